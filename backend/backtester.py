@@ -0,0 +1,272 @@
+"""
+Backtester Module
+Replays stored klines through the BaseStrategy subclasses used by the live bot.
+
+Indicators are computed once for the whole series with the NumPy kernels, then a
+tight loop replays the bot's decision path candle by candle (at the close price):
+check_sell_signal (which includes check_standard_exits), DCA steps, the lateral
+filter, check_buy_signal, and testnet-style commission on every fill.
+
+Usage:
+    bt = Backtester("rsi_rebound", settings={"buy_rsi": 30})
+    result = bt.run_stored("mainnet", "BTCUSDT", "1m", start_ms, end_ms)
+    result["candles_per_sec"]
+"""
+import contextlib
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .indicators import kernels
+    from .services.kline_store import get_kline_store
+    from .services.trade_stats import TradeStatsAccumulator
+    from .strategies.breakout_volume import BreakoutVolumeStrategy
+    from .strategies.rsi_rebound import RSIReboundStrategy
+    from .strategies.smart_scalper import SmartScalperStrategy
+except ImportError:
+    from indicators import kernels
+    from services.kline_store import get_kline_store
+    from services.trade_stats import TradeStatsAccumulator
+    from strategies.breakout_volume import BreakoutVolumeStrategy
+    from strategies.rsi_rebound import RSIReboundStrategy
+    from strategies.smart_scalper import SmartScalperStrategy
+
+# Same names (and backward-compatible aliases) as BinanceBot.strategies
+STRATEGIES = {
+    "rsi_rebound": RSIReboundStrategy, "rsi": RSIReboundStrategy,
+    "ema_rsi": RSIReboundStrategy, "rebound": RSIReboundStrategy,
+    "breakout_volume": BreakoutVolumeStrategy,
+    "smart_scalper": SmartScalperStrategy, "multi": SmartScalperStrategy,
+    "smart_scalping": SmartScalperStrategy, "scalper_pro": SmartScalperStrategy,
+}
+
+# BinanceBot defaults for every setting the replay reads
+DEFAULT_SETTINGS: Dict[str, Any] = {
+    "trade_qty": 35.0, "trade_qty_type": "quote", "buy_rsi": 21.0, "sell_rsi": 75.0,
+    "ema_length": 200, "fast_ema_len": 7, "macd_fast": 12, "macd_slow": 26, "macd_signal": 9,
+    "enable_fast_ema": True, "enable_trend_filter": True, "enable_vol_filter": True,
+    "stop_loss_pct": 3.2, "take_profit_pct": 1.3, "rsi_trailing_pct": 0.8,
+    "trailing_enabled": False, "sniper_mode": False, "sell_mode": "full",
+    "dca_enabled": False, "max_dca_orders": 2, "dca_step_pct": 1.5,
+    "enable_buying": True, "enable_selling": True, "testnet_commission_pct": 0.1,
+}
+
+INDICATOR_KEYS = ("rsi", "trend_ema", "fast_ema", "ema_2", "ema_7", "macd", "macd_hist",
+                  "macd_signal", "bb_lower", "bb_middle", "bb_upper", "vol_sma",
+                  "current_vol", "vol_prev", "adx", "atr", "fluctuation_factor")
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class _NullWriter:
+    """stdout sink: strategies log every evaluation with print()."""
+
+    def write(self, _):
+        return 0
+
+    def flush(self):
+        pass
+
+
+def precompute_indicators(high, low, close, volume, settings: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    Per-candle indicator arrays with the keys of `calculate_indicators`.
+    Value i only uses candles 0..i (no look-ahead). NaN warm-ups become 0.0 like
+    the live cleanup; `is_lateral` is a bool array.
+    """
+    high, low = kernels.as_array(high), kernels.as_array(low)
+    close, volume = kernels.as_array(close), kernels.as_array(volume)
+
+    macd, hist, signal = kernels.macd(close, int(settings["macd_fast"]),
+                                      int(settings["macd_slow"]), int(settings["macd_signal"]))
+    lower, middle, upper = kernels.bbands(close, 20, 2.0)
+    adx = kernels.adx(high, low, close, 14)[0]
+    vol_prev = np.empty_like(volume)
+    vol_prev[0] = np.nan
+    vol_prev[1:] = volume[:-1]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        fluctuation = kernels.sma(high - low, 20) / (close * 0.0002)
+    arrays = {
+        "rsi": kernels.rsi(close, 14),
+        "trend_ema": kernels.ema(close, int(settings["ema_length"])),
+        "fast_ema": kernels.ema(close, int(settings["fast_ema_len"])),
+        "ema_2": kernels.ema(close, 2),
+        "ema_7": kernels.ema(close, 7),
+        "macd": macd, "macd_hist": hist, "macd_signal": signal,
+        "bb_lower": lower, "bb_middle": middle, "bb_upper": upper,
+        "vol_sma": kernels.sma(volume, 20),
+        "current_vol": volume,
+        "vol_prev": vol_prev,
+        "adx": adx,
+        "atr": kernels.atr(high, low, close, 14),
+        "fluctuation_factor": np.where(np.isnan(fluctuation), 1.0, fluctuation),
+    }
+    arrays["is_lateral"] = (arrays["fluctuation_factor"] < 0.5) | (adx < 20)
+    for key in INDICATOR_KEYS:
+        arrays[key] = np.nan_to_num(arrays[key], nan=0.0)
+    return arrays
+
+
+class Backtester:
+    """Single-symbol replay of one strategy with the live bot's position rules."""
+
+    WARMUP = 50  # Candles skipped before the first evaluation
+
+    def __init__(self, strategy="rsi_rebound", settings: Optional[Dict[str, Any]] = None,
+                 initial_balance: float = 1000.0, symbol: str = "BTCUSDT"):
+        if isinstance(strategy, str):
+            if strategy not in STRATEGIES:
+                raise ValueError(f"Unknown strategy: {strategy}")
+            strategy = STRATEGIES[strategy]()
+        self.strategy = strategy
+        self.settings = {**DEFAULT_SETTINGS, **(settings or {})}
+        self.initial_balance = float(initial_balance)
+        self.symbol = symbol
+
+    def run_stored(self, network: str, symbol: str, interval: str,
+                   start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> Dict[str, Any]:
+        """Backtests candles persisted by the kline store."""
+        rows = get_kline_store().load_range(network, symbol, interval, start_ms, end_ms)
+        self.symbol = symbol
+        if not rows:
+            raise ValueError(f"No stored klines for {symbol} {interval} ({network})")
+        data = np.asarray(rows, dtype=np.float64)
+        return self.run_arrays(data[:, 0] // 1000, data[:, 2], data[:, 3], data[:, 4], data[:, 5])
+
+    def run(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """Backtests a get_historical_klines-style DataFrame (indexed by open time)."""
+        times = df.index.to_numpy(dtype='datetime64[s]').astype(np.int64)
+        return self.run_arrays(times, df['high'], df['low'], df['close'], df['volume'])
+
+    def run_arrays(self, times, high, low, close, volume) -> Dict[str, Any]:
+        started = time.perf_counter()
+        close = kernels.as_array(close)
+        arrays = precompute_indicators(high, low, close, volume, self.settings)
+        result = self.replay(times, close, arrays)
+        result["precompute_sec"] = round(time.perf_counter() - started - result["replay_sec"], 4)
+        return result
+
+    def replay(self, times, close, arrays: Dict[str, np.ndarray],
+               start: int = 0, stop: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Replays candles [start, stop) over precomputed indicator arrays (indicators
+        already cover the history before `start`, so windows need no extra warm-up).
+        """
+        close = kernels.as_array(close)
+        stop = len(close) if stop is None else min(stop, len(close))
+        first = max(start, self.WARMUP)
+
+        began = time.perf_counter()
+        with contextlib.redirect_stdout(_NullWriter()):
+            window = {k: v[first:stop] for k, v in arrays.items()}
+            trades, balance, qty = self._replay(
+                np.asarray(times, dtype=np.int64)[first:stop].tolist(), close[first:stop].tolist(), window)
+        elapsed = time.perf_counter() - began
+
+        replayed = max(0, stop - first)
+        last_price = float(close[stop - 1]) if stop > 0 else 0.0
+        stats = TradeStatsAccumulator()
+        for trade in trades:
+            stats.add(trade)
+
+        equity = balance + qty * last_price
+        return {
+            "strategy": self.strategy.name,
+            "symbol": self.symbol,
+            "candles": replayed,
+            "initial_balance": self.initial_balance,
+            "final_equity": round(equity, 4),
+            "net_pnl": round(equity - self.initial_balance, 4),
+            "return_pct": round((equity / self.initial_balance - 1) * 100, 3) if self.initial_balance else 0.0,
+            "open_qty": qty,
+            "commission_paid": round(sum(t["commission"] for t in trades), 4),
+            "stats": stats.snapshot(),
+            "trades": trades,
+            "precompute_sec": 0.0,
+            "replay_sec": round(elapsed, 4),
+            "candles_per_sec": round(replayed / elapsed) if elapsed > 0 else 0,
+        }
+
+    def _replay(self, times: List[int], closes: List[float], arrays: Dict[str, np.ndarray]):
+        """Candle loop mirroring BinanceBot._run_strategies / _handle_trade_execution."""
+        s = self.settings
+        strategy = self.strategy
+        keys = strategy.get_required_indicators()
+        columns = {k: arrays[k].tolist() for k in set(keys) | {"adx"}}
+        lateral = arrays["is_lateral"].tolist()
+        fee = float(s["testnet_commission_pct"]) / 100
+        dca_step = 1 - float(s["dca_step_pct"]) / 100
+        max_dca = int(s["max_dca_orders"])
+        dca_on = bool(s["dca_enabled"]) and not s["sniper_mode"]
+        quote_qty = s["trade_qty_type"] == "quote"
+        trade_qty = float(s["trade_qty"])
+
+        balance = self.initial_balance
+        qty = entry = highest = last_buy = 0.0
+        orders = 0
+        trades: List[Dict[str, Any]] = []
+        indicators: Dict[str, Any] = {}
+        state: Dict[str, Any] = {"symbol": self.symbol}
+
+        def record(i, side, price, executed, pnl, commission, total):
+            trades.append({
+                "time": datetime.fromtimestamp(times[i], tz=timezone.utc).strftime(TIME_FORMAT),
+                "type": f"{side} ({strategy.name}-{side})", "price": price, "qty": executed,
+                "symbol": self.symbol, "pnl": pnl, "rsi": indicators.get("rsi", 0.0),
+                "commission": commission, "total": total})
+
+        for i in range(len(closes)):
+            price = closes[i]
+            if qty > 0 and (highest == 0 or price > highest):
+                highest = price
+
+            for k, col in columns.items():
+                indicators[k] = col[i]
+            indicators["is_lateral"] = lateral[i]
+            state["current_price"] = price
+            state["entry_price"] = entry
+            state["highest_price"] = highest
+            state["accumulated_qty"] = qty
+            state["position_orders"] = orders
+
+            buy = sell = False
+            if qty > 0:
+                sell = strategy.check_sell_signal(indicators, s, state)
+                if dca_on and orders < max_dca and price <= last_buy * dca_step:
+                    buy = True
+            elif not lateral[i]:
+                buy = strategy.check_buy_signal(indicators, s, state)
+
+            if sell and s["enable_selling"]:
+                step = trade_qty if not quote_qty else trade_qty / price
+                executed = qty if s["sell_mode"] == "full" else min(step, qty)
+                commission = executed * fee * price
+                pnl = (price - entry) * executed if entry > 0 else 0.0
+                balance += executed * price - commission
+                qty = max(0.0, qty - executed)
+                record(i, "SELL", price, executed, pnl, commission, executed * price)
+                if qty * price < 1.0:
+                    # Dust is written off, as in _reset_position_state
+                    qty = entry = highest = last_buy = 0.0
+                    orders = 0
+            elif buy and s["enable_buying"]:
+                spend = balance * 0.98 if s["sniper_mode"] else (
+                    trade_qty if quote_qty else trade_qty * price)
+                if spend <= 0 or spend > balance:
+                    continue
+                executed = spend / price
+                final_qty = executed * (1 - fee)
+                balance -= spend
+                entry = (qty * entry + price * final_qty) / (qty + final_qty)
+                qty += final_qty
+                orders += 1
+                highest = 0.0
+                last_buy = price
+                record(i, "BUY", price, executed, 0.0, executed * fee * price, spend)
+
+        return trades, balance, qty
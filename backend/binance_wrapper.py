@@ -4,23 +4,32 @@ Version: 1.8.0 Stable (c) 2026
 """
 from binance.client import Client
 from binance.exceptions import BinanceAPIException
-from binance import BinanceSocketManager
 import pandas as pd
-import numpy as np
 from typing import List, Dict, Optional, Callable
-from math import floor, ceil
 import asyncio
 import threading
 import time
+from .services.kline_store import get_kline_store, KlineStore
+from .services.stream_manager import get_stream_manager
+from .services.symbol_filters import SymbolFilters, get_symbol_filter_table
 
 
 class BinanceWrapper:
-    def __init__(self, api_key: Optional[str] = None, api_secret: Optional[str] = None, testnet: bool = True):
+    LISTEN_KEY_KEEPALIVE = 30 * 60  # Binance expires listenKeys after 60 minutes
+
+    def __init__(self, api_key: Optional[str] = None, api_secret: Optional[str] = None, testnet: bool = True,
+                 client=None, stream_manager=None, kline_store: Optional[KlineStore] = None):
+        """
+        `client`, `stream_manager` and `kline_store` replace the real Binance client,
+        the process-wide socket manager and candle store (e.g. with the replay
+        FakeExchange); a client's `network` attribute overrides testnet/mainnet.
+        """
         self.api_key = api_key
         self.api_secret = api_secret
         self.testnet = testnet
         try:
-            self.client = Client(api_key, api_secret, testnet=testnet)
+            self.client = client if client is not None else Client(
+                api_key, api_secret, testnet=testnet)
             # Patch for python-binance - required for BinanceSocketManager
             self.client.https_proxy = None
             # Test connection by fetching server time
@@ -38,12 +47,43 @@ class BinanceWrapper:
                     f"Binance Server Error (502/504 Bad Gateway). Retrying...")
             raise Exception(f"Error de conexión: {str(e)}")
 
-        self._loop = None
+        # Sockets are streams on the process-wide multiplexed connection: name -> stream
+        self.stream_manager = stream_manager or get_stream_manager()
         self._sockets = {}
-        self._stop_events = {}
+        self._keepalive = None
         self._symbol_info_cache = {}  # Cache to avoid redundant API calls
+        # Shared candle store: delta fetch + local persistence per (network, symbol, interval)
+        self.kline_store = kline_store or get_kline_store()
+        self.network = getattr(client, "network", None) or (
+            "testnet" if testnet else "mainnet")
+        # Order filters for every symbol: one bulk exchangeInfo load per network, refreshed hourly
+        self.filters = get_symbol_filter_table(self.network)
+        self.filters.start(self.client)
 
     def get_historical_klines(self, symbol: str, interval: str, limit: int = 100) -> pd.DataFrame:
+        """Returns the latest `limit` klines, fetching only candles newer than the local store."""
+        try:
+            rows = self.kline_store.get_klines(
+                self.client, self.network, symbol, interval, limit)
+            return KlineStore.to_dataframe(rows)
+        except BinanceAPIException as e:
+            print(f"Binance API Exception in get_historical_klines: {e}")
+            return pd.DataFrame()
+        except Exception as e:
+            print(f"Error fetching data: {e}")
+            return pd.DataFrame()
+
+    def get_kline_rows(self, symbol: str, interval: str, limit: int = 100) -> list:
+        """Like get_historical_klines but returns the raw store rows (no DataFrame)."""
+        try:
+            return self.kline_store.get_klines(
+                self.client, self.network, symbol, interval, limit)
+        except Exception as e:
+            print(f"Error fetching klines for {symbol}: {e}")
+            return []
+
+    def fetch_historical_klines(self, symbol: str, interval: str, limit: int = 100) -> pd.DataFrame:
+        """Direct REST fetch of the full window, bypassing the local kline store."""
         try:
             klines = self.client.get_klines(
                 symbol=symbol, interval=interval, limit=limit)
@@ -88,6 +128,18 @@ class BinanceWrapper:
             print(f"Error getting balance: {e}")
             return 0.0
 
+    def get_balances(self) -> Optional[tuple]:
+        """
+        ({asset: (free, locked)}, account updateTime in ms) in one request; None on error.
+        """
+        try:
+            account = self.client.get_account()
+            return {b['asset']: (float(b['free']), float(b['locked']))
+                    for b in account.get('balances', [])}, int(account.get('updateTime') or 0)
+        except Exception as e:
+            print(f"Error getting balances: {e}")
+            return None
+
     def get_symbol_info(self, symbol: str) -> Optional[Dict]:
         """Fetches symbol info with basic caching (5 min)."""
         now = time.time()
@@ -107,35 +159,25 @@ class BinanceWrapper:
             print(f"Error getting symbol info: {e}")
             return None
 
+    def get_filters(self, symbol: str) -> Optional[SymbolFilters]:
+        """Precompiled filters from the bulk exchangeInfo table (REST only for unknown symbols)."""
+        return self.filters.get(symbol, self.client)
+
     def normalize_quantity(self, symbol: str, quantity: float) -> Optional[float]:
         """Rounds quantity to the nearest stepSize for the symbol."""
-        info = self.get_symbol_info(symbol)
-        if not info:
+        f = self.get_filters(symbol)
+        if not f or f.step_size is None:
             return quantity
-
-        for f in info['filters']:
-            if f['filterType'] in ['LOT_SIZE', 'MARKET_LOT_SIZE']:
-                step_size = float(f['stepSize'])
-                precision = int(round(-np.log10(step_size)))
-                normalized = floor(
-                    quantity * (10**precision)) / (10**precision)
-                return normalized
-        return quantity
+        return f.floor_qty(quantity)
 
     def adjust_to_min_notional(self, symbol: str, quantity: float, price: float, is_quote_qty: bool = False) -> Optional[float]:
         """Checks if quantity * price < MIN_NOTIONAL and adjusts if needed."""
-        info = self.get_symbol_info(symbol)
-        if not info:
+        f = self.get_filters(symbol)
+        if not f:
             return None
 
-        filters = {f['filterType']: f for f in info['filters']}
-
-        # Priority: NOTIONAL (modern) > MIN_NOTIONAL (legacy)
-        min_notional = 6.0  # Default conservative minimum
-        if 'NOTIONAL' in filters:
-            min_notional = float(filters['NOTIONAL']['minNotional'])
-        elif 'MIN_NOTIONAL' in filters:
-            min_notional = float(filters['MIN_NOTIONAL']['minNotional'])
+        # Default conservative minimum when the symbol has no notional filter
+        min_notional = f.min_notional if f.min_notional is not None else 6.0
 
         notional = quantity if is_quote_qty else quantity * price
 
@@ -149,47 +191,32 @@ class BinanceWrapper:
             return target_notional
 
         # For base quantity, we must respect LOT_SIZE
-        lot_filter = filters.get('LOT_SIZE') or filters.get('MARKET_LOT_SIZE')
-        if not lot_filter:
+        if f.step_size is None:
             return None
 
-        step_size = float(lot_filter['stepSize'])
-        required_qty = target_notional / price
-        precision = int(round(-np.log10(step_size)))
-        adjusted_qty = ceil(required_qty * (10**precision)) / (10**precision)
+        adjusted_qty = f.ceil_qty(target_notional / price)
 
         # double check
         if adjusted_qty * price < min_notional:
-            adjusted_qty += step_size
+            adjusted_qty += f.step_size
 
         return adjusted_qty
 
     def validate_order(self, symbol: str, quantity: float, price: float, is_quote_qty: bool = False) -> tuple[bool, str]:
         """Validates if an order meets Binance filters."""
-        info = self.get_symbol_info(symbol)
-        if not info:
+        f = self.get_filters(symbol)
+        if not f:
             return True, "OK"
 
-        filters = {f['filterType']: f for f in info['filters']}
-
         # 1. LOT_SIZE check (only if not using quote quantity)
-        if not is_quote_qty:
-            lot_filter = filters.get(
-                'LOT_SIZE') or filters.get('MARKET_LOT_SIZE')
-            if lot_filter:
-                min_qty = float(lot_filter['minQty'])
-                max_qty = float(lot_filter['maxQty'])
-                if quantity < min_qty:
-                    return False, f"Cantidad {quantity} menor al mínimo ({min_qty} {symbol.replace('USDT', '')})"
-                if quantity > max_qty:
-                    return False, f"Cantidad {quantity} excede el máximo ({max_qty})"
+        if not is_quote_qty and f.step_size is not None:
+            if quantity < f.min_qty:
+                return False, f"Cantidad {quantity} menor al mínimo ({f.min_qty} {symbol.replace('USDT', '')})"
+            if quantity > f.max_qty:
+                return False, f"Cantidad {quantity} excede el máximo ({f.max_qty})"
 
         # 2. NOTIONAL check
-        min_notional = 5.0
-        if 'NOTIONAL' in filters:
-            min_notional = float(filters['NOTIONAL']['minNotional'])
-        elif 'MIN_NOTIONAL' in filters:
-            min_notional = float(filters['MIN_NOTIONAL']['minNotional'])
+        min_notional = f.min_notional if f.min_notional is not None else 5.0
 
         notional = quantity if is_quote_qty else quantity * price
         if notional < min_notional:
@@ -198,7 +225,9 @@ class BinanceWrapper:
 
         return True, "OK"
 
-    def place_order(self, symbol: str, side: str, quantity: float, order_type: str = 'MARKET', quote_order_qty: float = None):
+    def place_order(self, symbol: str, side: str, quantity: float, order_type: str = 'MARKET', quote_order_qty: float = None,
+                    trace=None):
+        """Sends an order; `trace` (a services.latency.TickTrace) gets order_request/fill marks."""
         try:
             params = {"symbol": symbol, "side": side, "type": order_type}
             if quote_order_qty:
@@ -209,152 +238,112 @@ class BinanceWrapper:
                 params["quantity"] = "{:.8f}".format(
                     float(final_qty)).rstrip('0').rstrip('.')
 
+            if trace:
+                trace.mark("order_request")
             order = self.client.create_order(**params)
+            if trace:
+                trace.mark("fill")
             return order
         except Exception as e:
             print(f"Error placing order: {e}")
             raise e
 
-    def start_kline_socket(self, symbol: str, interval: str, callback: Callable):
-        """Starts a kline socket for the given symbol and interval with auto-reconnect."""
+    def _start_stream(self, name: str, stream: str, callback: Callable):
+        """Registers a named stream on the shared multiplexed connection."""
+        self.stop_socket(name)
+        self.stream_manager.subscribe(
+            self.network, stream, (id(self), name), callback)
+        self._sockets[name] = stream
+
+    def start_kline_socket(self, symbol: str, interval: str, callback: Callable, exclusive: bool = True):
+        """
+        Subscribes to klines for the given symbol and interval (multiplexed, auto-reconnect).
+        With exclusive=True (per-bot clients) any other kline socket is stopped first;
+        shared market-data clients pass exclusive=False to hold several markets.
+        """
+        name = f"kline_{symbol}_{interval}"
+
         # Ensure only one kline socket is active at a time to prevent "mixed state"
-        for name in list(self._stop_events.keys()):
-            if name.startswith("kline_"):
-                self.stop_socket(name)
+        if exclusive:
+            for other in list(self._sockets.keys()):
+                if other.startswith("kline_"):
+                    self.stop_socket(other)
 
-        name = f"kline_{symbol}_{interval}"
+        def on_msg(msg):
+            if msg and 'k' in msg:
+                callback(msg)
 
-        stop_event = threading.Event()
-        self._stop_events[name] = stop_event
-
-        def run_socket():
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-
-            try:
-                while not stop_event.is_set():  # Outer loop for reconnection
-                    try:
-                        async def main():
-                            client = Client(
-                                self.api_key, self.api_secret, testnet=self.testnet)
-                            client.https_proxy = None
-                            bsm = BinanceSocketManager(client)
-                            async with bsm.kline_socket(symbol=symbol, interval=interval) as stream:
-                                while not stop_event.is_set():
-                                    try:
-                                        msg = await asyncio.wait_for(stream.recv(), timeout=2.0)
-                                        if msg and 'k' in msg:
-                                            callback(msg)
-                                    except asyncio.TimeoutError:
-                                        continue
-
-                        loop.run_until_complete(main())
-                    except asyncio.CancelledError:
-                        break
-                    except Exception as e:
-                        if stop_event.is_set():
-                            break
-
-                        # Log error safely
-                        error_msg = str(e)
-                        # Suppress reconnection errors if already shutting down
-                        if "cannot schedule new futures after shutdown" in error_msg:
-                            break
-
-                        print(
-                            f"Kline Socket connection failed/closed: {error_msg}. Reconnecting in 5s...", flush=True)
-
-                        # Stop retrying if it's a fatal credential error
-                        if "code=-2015" in error_msg or "code=-1100" in error_msg:
-                            print(
-                                "❌ Fatal API Error detected in Kline Socket. Stopping reconnect loop.", flush=True)
-                            break
-
-                        stop_event.wait(5)
-            finally:
-                # Properly close the loop to prevent "cannot schedule" errors
-                try:
-                    loop.close()
-                except Exception:
-                    pass
+        self._start_stream(
+            name, f"{symbol.lower()}@kline_{interval}", on_msg)
+
+    def start_trade_socket(self, symbol: str, callback: Callable, exclusive: bool = True):
+        """Subscribes to aggregated trades for tick-level price updates."""
+        name = f"trade_{symbol}"
+
+        # Only one trade socket at a time, tied to the active symbol (unless shared client)
+        if exclusive:
+            for other in list(self._sockets.keys()):
+                if other.startswith("trade_"):
+                    self.stop_socket(other)
+
+        def on_msg(msg):
+            if msg and 'p' in msg:
+                callback(msg)
 
-        t = threading.Thread(target=run_socket, daemon=True)
-        t.start()
-        self._sockets[name] = t
+        self._start_stream(name, f"{symbol.lower()}@aggTrade", on_msg)
+
+    def start_mini_ticker_socket(self, callback: Callable, symbol: Optional[str] = None):
+        """24h mini tickers: one symbol, or every symbol at once (`!miniTicker@arr`)."""
+        stream = f"{symbol.lower()}@miniTicker" if symbol else "!miniTicker@arr"
+        self._start_stream(f"miniticker_{symbol or 'all'}", stream, callback)
+
+    def start_book_ticker_socket(self, symbol: str, callback: Callable):
+        """Best bid/ask updates for a symbol."""
+        self._start_stream(
+            f"bookticker_{symbol}", f"{symbol.lower()}@bookTicker", callback)
 
     def start_user_socket(self, callback: Callable):
-        """Starts a user data socket for account updates with auto-reconnect."""
+        """
+        Subscribes to the user data stream (listenKey) on the shared connection.
+        The listenKey is kept alive every 30 minutes and renewed if Binance expires it.
+        """
         name = "user"
         self.stop_socket(name)
 
-        stop_event = threading.Event()
-        self._stop_events[name] = stop_event
-
-        def run_socket():
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-
-            try:
-                while not stop_event.is_set():  # Outer loop for reconnection
-                    try:
-                        async def main():
-                            client = Client(
-                                self.api_key, self.api_secret, testnet=self.testnet)
-                            client.https_proxy = None
-                            bsm = BinanceSocketManager(client)
-                            async with bsm.user_socket() as stream:
-                                while not stop_event.is_set():
-                                    try:
-                                        msg = await asyncio.wait_for(stream.recv(), timeout=2.0)
-                                        callback(msg)
-                                    except asyncio.TimeoutError:
-                                        continue
-
-                        loop.run_until_complete(main())
-                    except asyncio.CancelledError:
-                        break
-                    except Exception as e:
-                        if stop_event.is_set():
-                            break
-
-                        # Log error safely
-                        error_msg = str(e)
-                        # Suppress reconnection errors if already shutting down
-                        if "cannot schedule new futures after shutdown" in error_msg:
-                            break
-
-                        print(
-                            f"User Socket connection failed/closed: {error_msg}. Reconnecting in 5s...", flush=True)
-
-                        # Stop retrying if it's a fatal credential error
-                        if "code=-2015" in error_msg or "code=-1100" in error_msg:
-                            print(
-                                "❌ Fatal API Error detected in User Socket. Stopping reconnect loop.", flush=True)
-                            break
-
-                        stop_event.wait(5)
-            finally:
-                # Properly close the loop to prevent "cannot schedule" errors
+        # Raises on invalid credentials (-2015/-1100) instead of retrying forever
+        listen_key = self.client.stream_get_listen_key()
+
+        def on_msg(msg):
+            if msg and msg.get('e') == 'listenKeyExpired':
+                print("User stream listenKey expired. Renewing...", flush=True)
+                threading.Thread(target=self.start_user_socket,
+                                 args=(callback,), daemon=True).start()
+                return
+            callback(msg)
+
+        async def keepalive():
+            loop = asyncio.get_running_loop()
+            while True:
+                await asyncio.sleep(self.LISTEN_KEY_KEEPALIVE)
                 try:
-                    loop.close()
-                except Exception:
-                    pass
+                    await loop.run_in_executor(None, lambda: self.client.stream_keepalive(listen_key))
+                except Exception as e:
+                    print(f"User stream keepalive failed: {e}", flush=True)
 
-        t = threading.Thread(target=run_socket, daemon=True)
-        t.start()
-        self._sockets[name] = t
+        self._start_stream(name, listen_key, on_msg)
+        self._keepalive = self.stream_manager.run_in_loop(keepalive())
 
     def stop_socket(self, name: str):
         """Stops a specific socket by name."""
-        if name in self._stop_events:
-            self._stop_events[name].set()
-            # Wait for thread to finish if necessary, but daemon threads will die anyway
-            del self._stop_events[name]
-
-        if name in self._sockets:
-            del self._sockets[name]
+        stream = self._sockets.pop(name, None)
+        if stream is not None:
+            self.stream_manager.unsubscribe(
+                self.network, stream, (id(self), name))
+        if name == "user" and self._keepalive is not None:
+            self._keepalive.cancel()
+            self._keepalive = None
 
     def stop_all_sockets(self):
         """Stops all running sockets."""
-        for name in list(self._stop_events.keys()):
+        for name in list(self._sockets.keys()):
             self.stop_socket(name)
@@ -2,24 +2,33 @@
 Binance Trading Bot - Module: bot_logic.py
 Version: 1.9.0 Stable (c) 2026
 """
+import numpy as np
 import pandas as pd
-import pandas_ta as ta
 import time
 import threading
+from collections import deque
 from datetime import datetime
+from typing import Optional
 from .binance_wrapper import BinanceWrapper
 from .config import API_KEY, API_SECRET, TELEGRAM_BOT_TOKEN, TRADING_MODE
 from .database import DatabaseManager
 from .telegram_notifier import TelegramNotifier
-from .indicators import calculate_indicators
+from .indicators import INDICATOR_BACKENDS, append_chart_indicators, calculate_indicators
+from .streaming_indicators import StreamingIndicatorEngine
+from .utils.ohlcv_buffer import OHLCVRingBuffer
 
 # Strategy Imports
 from .strategies.rsi_rebound import RSIReboundStrategy
 from .strategies.breakout_volume import BreakoutVolumeStrategy
 from .strategies.smart_scalper import SmartScalperStrategy
 
-from .predictive_modules import PredictiveEngine
+from .predictive_modules import IncrementalPredictiveEngine
+from .portfolio import PortfolioEngine, parse_symbols
+from .services.balances import BalanceLedger
 from .services.market_data import MarketDataService
+from .services.refresh_pool import get_alert_executor, get_refresh_executor
+from .services.trade_stats import TradeStatsAccumulator
+from .services.latency import TickTrace
 
 
 class BinanceBot:
@@ -28,66 +37,90 @@ class BinanceBot:
     Handles market data updates, strategy execution, risk management, and trade tracking.
     """
 
-    def __init__(self, user_id: int = 1):
+    RECENT_TRADES = 50  # Trades kept in memory for the dashboard
+    STRATEGY_FALLBACK_SECONDS = 5.0  # Max time without an evaluation if the streams stall
+    # Settings persisted in the state table rather than the settings table
+    STATE_SETTINGS = ("dca_enabled", "sniper_mode", "trailing_enabled",
+                      "enable_buying", "enable_selling")
+
+    def __init__(self, user_id: int = 1, market_hub=None, db: Optional[DatabaseManager] = None,
+                 log_file: Optional[str] = "backend/logs/bot.log"):
         self.user_id = user_id
-        self.db = DatabaseManager()
+        # Shared market-data fan-out (BotManager); None = private sockets per bot
+        self.market_hub = market_hub
+        self._market_subscription = None  # (network, symbol, timeframe) on the hub
+        self.log_file = log_file  # None = console only (e.g. offline replays)
+        self.db = db or DatabaseManager()
         self.lock = threading.Lock()
-        self.is_running = self.db.get_state(
-            "is_running", "False", user_id=user_id) == "True"
+
+        # One bulk read per table instead of dozens of single-key round trips
+        stored_settings = self.db.get_all_settings(user_id=user_id)
+        stored_state = self.db.get_all_state(user_id=user_id)
+
+        def setting(key, default=None):
+            return stored_settings.get(key, default)
+
+        def state(key, default=None):
+            return stored_state.get(key, default)
+
+        self.is_running = state(
+            "is_running", "False") == "True"
 
         # Core Settings
-        self.symbol = self.db.get_setting("symbol", "BTCUSDT", user_id=user_id)
-        self.timeframe = self.db.get_setting(
-            "timeframe", "15m", user_id=user_id)  # Default updated to 15m
+        self.symbol = setting("symbol", "BTCUSDT")
+        self.timeframe = setting(
+            "timeframe", "15m")  # Default updated to 15m
         self.client = None
         self.current_price = 0.0
         self.balance = 0.0
         self.crypto_balance = 0.0
+        # Every asset of the account, kept current by the user data stream
+        self.balances = BalanceLedger()
 
         # Strategy Settings
         self.min_balance_threshold = float(
-            self.db.get_setting("min_balance", 0.0, user_id=user_id))
-        self.trade_qty = float(self.db.get_setting(
-            "trade_qty", 35.0, user_id=user_id))  # Default updated to 35 USDT
-        self.buy_rsi = float(self.db.get_setting(
-            "buy_rsi", 21.0, user_id=user_id))  # Default updated to 21
-        self.sell_rsi = float(self.db.get_setting(
-            "sell_rsi", 75.0, user_id=user_id))  # Default updated to 75
-        self.ema_length = int(self.db.get_setting(
-            "ema_length", 200, user_id=user_id))
-        self.macd_fast = int(self.db.get_setting(
-            "macd_fast", 12, user_id=user_id))
-        self.macd_slow = int(self.db.get_setting(
-            "macd_slow", 26, user_id=user_id))
+            setting("min_balance", 0.0))
+        self.trade_qty = float(setting(
+            "trade_qty", 35.0))  # Default updated to 35 USDT
+        self.buy_rsi = float(setting(
+            "buy_rsi", 21.0))  # Default updated to 21
+        self.sell_rsi = float(setting(
+            "sell_rsi", 75.0))  # Default updated to 75
+        self.ema_length = int(setting(
+            "ema_length", 200))
+        self.macd_fast = int(setting(
+            "macd_fast", 12))
+        self.macd_slow = int(setting(
+            "macd_slow", 26))
         self.macd_signal_period = int(
-            self.db.get_setting("macd_signal", 9, user_id=user_id))
-        self.fast_ema_len = int(self.db.get_setting(
-            "fast_ema_len", 7, user_id=user_id))
-        self.enable_fast_ema = self.db.get_setting(
-            "enable_fast_ema", "True", user_id=user_id) == "True"
-        self.active_strategy = self.db.get_setting(
-            "active_strategy", "rsi", user_id=user_id)
-        self.trade_qty_type = self.db.get_setting(
+            setting("macd_signal", 9))
+        self.fast_ema_len = int(setting(
+            "fast_ema_len", 7))
+        self.enable_fast_ema = setting(
+            "enable_fast_ema", "True") == "True"
+        self.active_strategy = setting(
+            "active_strategy", "rsi")
+        self.trade_qty_type = setting(
             # Default updated to quote (USDT)
-            "trade_qty_type", "quote", user_id=user_id)
+            "trade_qty_type", "quote")
 
         # Risk Management Settings
-        self.stop_loss_pct = float(self.db.get_setting(
-            "stop_loss_pct", 3.2, user_id=user_id))  # Default 3.2%
-        self.take_profit_pct = float(self.db.get_setting(
-            "take_profit_pct", 1.3, user_id=user_id))  # Default 1.3%
-        self.max_dca_orders = int(self.db.get_setting(
-            "max_dca_orders", 2, user_id=user_id))  # Default 2
-        self.dca_step_pct = float(self.db.get_setting(
-            "dca_step_pct", 1.5, user_id=user_id))  # Default 1.5%
+        self.stop_loss_pct = float(setting(
+            "stop_loss_pct", 3.2))  # Default 3.2%
+        self.take_profit_pct = float(setting(
+            "take_profit_pct", 1.3))  # Default 1.3%
+        self.max_dca_orders = int(setting(
+            "max_dca_orders", 2))  # Default 2
+        self.dca_step_pct = float(setting(
+            "dca_step_pct", 1.5))  # Default 1.5%
         self.trailing_enabled = False  # FORCE DISABLED BY DEFAULT
-        self.trailing_stop_pct = float(self.db.get_setting(
-            "trailing_stop_pct", 1.0, user_id=user_id))
-        self.rsi_trailing_pct = float(self.db.get_setting(
-            "rsi_trailing_pct", 0.8, user_id=user_id))  # RSI Glide/Profit Step trailing %
+        self.trailing_stop_pct = float(setting(
+            "trailing_stop_pct", 1.0))
+        self.rsi_trailing_pct = float(setting(
+            "rsi_trailing_pct", 0.8))  # RSI Glide/Profit Step trailing %
         self.sniper_mode = False  # FORCE DISABLED BY DEFAULT
-        self.dca_enabled = self.db.get_state(
-            "dca_enabled", False, user_id=user_id)
+        self.dca_enabled = state(
+            "dca_enabled", False)
 
         # Initialize Strategies
         self.strategies = {
@@ -103,52 +136,75 @@ class BinanceBot:
         }
 
         # Operational Settings
-        self.notify_signals = self.db.get_setting(
-            "notify_signals", "False", user_id=user_id) == "True"
-        self.sell_mode = self.db.get_setting(
-            "sell_mode", "full", user_id=user_id)
-        self.enable_buying = self.db.get_state(
-            "enable_buying", True, user_id=user_id)
-        self.enable_selling = self.db.get_state(
-            "enable_selling", True, user_id=user_id)
+        self.notify_signals = setting(
+            "notify_signals", "False") == "True"
+        self.sell_mode = setting(
+            "sell_mode", "full")
+        self.enable_buying = state(
+            "enable_buying", True)
+        self.enable_selling = state(
+            "enable_selling", True)
 
         # New Quantitative Filter Controls
-        self.enable_trend_filter = self.db.get_setting(
-            "enable_trend_filter", "True", user_id=user_id) == "True"
-        self.enable_vol_filter = self.db.get_setting(
-            "enable_vol_filter", "True", user_id=user_id) == "True"
-        self.enable_mutual_exclusion = self.db.get_setting(
-            "enable_mutual_exclusion", "True", user_id=user_id) == "True"
-
-        self.testnet_commission_pct = float(self.db.get_setting(
-            "testnet_commission_pct", 0.1, user_id=user_id))
-        self.use_real_data = self.db.get_setting(
-            "use_real_data", "False", user_id=user_id) == "True"
+        self.enable_trend_filter = setting(
+            "enable_trend_filter", "True") == "True"
+        self.enable_vol_filter = setting(
+            "enable_vol_filter", "True") == "True"
+        self.enable_mutual_exclusion = setting(
+            "enable_mutual_exclusion", "True") == "True"
+
+        # Portfolio mode: the active strategy on several symbols (see backend/portfolio.py)
+        self.portfolio_symbols = setting("portfolio_symbols", "")
+        self.max_open_positions = int(setting("max_open_positions", 3))
+        self.max_portfolio_exposure_pct = float(setting(
+            "max_portfolio_exposure_pct", 60.0))
+        self.portfolio_tick_budget_ms = float(setting(
+            "portfolio_tick_budget_ms", 50))
+        self.portfolio = None
+
+        self.testnet_commission_pct = float(setting(
+            "testnet_commission_pct", 0.1))
+        self.use_real_data = setting(
+            "use_real_data", "False") == "True"
+
+        # Event-driven strategy evaluation (kline/trade stream triggers)
+        self.strategy_debounce_ms = int(setting(
+            "strategy_debounce_ms", 250))
+        self.enable_trade_stream = setting(
+            "enable_trade_stream", "True") == "True"
+        # pandas_ta (default) or numpy kernels for full indicator recomputes/chart columns
+        self.indicator_backend = setting("indicator_backend", "pandas_ta")
+        if self.indicator_backend not in INDICATOR_BACKENDS:
+            self.indicator_backend = "pandas_ta"
+        self._strategy_event = threading.Event()
+        self._last_strategy_eval = 0.0
+        self._tick_received = None  # Monotonic receive time of the latest price tick
+        self._last_snapshot_print = 0.0
 
         # Telegram Notifier
         self.tg_token = TELEGRAM_BOT_TOKEN
-        self.tg_chat_id = self.db.get_setting(
-            "tg_chat_id", "", user_id=user_id)
-        self.telegram_enabled = self.db.get_setting(
-            "telegram_enabled", "True", user_id=user_id) == "True"
+        self.tg_chat_id = setting(
+            "tg_chat_id", "")
+        self.telegram_enabled = setting(
+            "telegram_enabled", "True") == "True"
         self.notifier = TelegramNotifier(
             self.tg_token, self.tg_chat_id, enabled=self.telegram_enabled)
 
         # RSI Alert Settings & State
-        self.enable_rsi_alerts = self.db.get_setting(
-            "enable_rsi_alerts", "True", user_id=user_id) == "True"
-        self.enable_urgent_alerts = self.db.get_setting(
-            "enable_urgent_alerts", "True", user_id=user_id) == "True"
+        self.enable_rsi_alerts = setting(
+            "enable_rsi_alerts", "True") == "True"
+        self.enable_urgent_alerts = setting(
+            "enable_urgent_alerts", "True") == "True"
 
         # Adjustable Alert Thresholds
-        self.rsi_alert_buy_urgent = float(self.db.get_setting(
-            "rsi_alert_buy_urgent", 21.0, user_id=user_id))
-        self.rsi_alert_buy_normal = float(self.db.get_setting(
-            "rsi_alert_buy_normal", 31.0, user_id=user_id))
-        self.rsi_alert_sell_urgent = float(self.db.get_setting(
-            "rsi_alert_sell_urgent", 75.0, user_id=user_id))
-        self.rsi_alert_sell_normal = float(self.db.get_setting(
-            "rsi_alert_sell_normal", 65.0, user_id=user_id))
+        self.rsi_alert_buy_urgent = float(setting(
+            "rsi_alert_buy_urgent", 21.0))
+        self.rsi_alert_buy_normal = float(setting(
+            "rsi_alert_buy_normal", 31.0))
+        self.rsi_alert_sell_urgent = float(setting(
+            "rsi_alert_sell_urgent", 75.0))
+        self.rsi_alert_sell_normal = float(setting(
+            "rsi_alert_sell_normal", 65.0))
 
         # Anti-spam state per symbol (dict of dicts)
         # Format: {"BTCUSDT": {"buy_normal": False, "buy_urgent": False, ...}, ...}
@@ -165,8 +221,8 @@ class BinanceBot:
         self.position_orders = 0
         self.highest_price = 0.0
 
-        stored_initial_balance = self.db.get_state(
-            "initial_balance", user_id=user_id)
+        stored_initial_balance = state(
+            "initial_balance")
         self.initial_balance = float(
             stored_initial_balance) if stored_initial_balance else 0.0
         self._load_symbol_state()
@@ -188,11 +244,23 @@ class BinanceBot:
         self.last_status_time = 0
         self.pnl = 0.0
         self.daily_pnl = 0.0
-        self.daily_start_balance = float(self.db.get_state(
-            "daily_start_balance", 0.0, user_id=user_id))
-
-        self.history = []
-        self.trades = self.db.get_trades(user_id=user_id)
+        self.daily_start_balance = float(state(
+            "daily_start_balance", 0.0))
+
+        # Chart/strategy candle history (fixed-capacity NumPy ring buffer)
+        self.history = OHLCVRingBuffer(capacity=200)
+        # Incremental indicator state, advanced in O(1) on every closed kline
+        self.indicator_engine = StreamingIndicatorEngine()
+        # Bounded recent-trades window; older history via db.get_trades(offset=...)
+        self.trades = deque(self.db.get_trades(user_id=user_id,
+                                               limit=self.RECENT_TRADES), maxlen=self.RECENT_TRADES)
+        # Running stats over the full history, rebuilt once from SQL aggregates
+        self.trade_stats = TradeStatsAccumulator()
+        self.trade_stats.load_aggregates(
+            self.db.get_trade_aggregates(user_id=user_id))
+        # Change markers for status push clients (see services/status_stream.py)
+        self.trade_seq = 0        # +1 per new trade inserted at the front
+        self.trades_version = 0   # +1 whenever the list is replaced
         self.monitor_active = False
         self.data_client = None
         self.market_data_service = None
@@ -204,7 +272,8 @@ class BinanceBot:
                 "api_secret"), creds.get("is_testnet", True))
 
         # Predictive Module State
-        self.predictive_engine = PredictiveEngine()
+        self.predictive_engine = IncrementalPredictiveEngine(
+            indicator_backend=self.indicator_backend)
         self.prediction = {}
 
     def _get_scoped_key(self, key: str) -> str:
@@ -246,8 +315,8 @@ class BinanceBot:
             "last_buy_price": 0.0
         }
         for k, v in state_to_save.items():
-            self.db.save_state(self._get_scoped_key(k),
-                               v, user_id=self.user_id)
+            self.db.save_state_deferred(self._get_scoped_key(k),
+                                        v, user_id=self.user_id)
 
         self._log("🧹 State completely reset (Zero residue principle).", "INFO")
 
@@ -279,34 +348,25 @@ class BinanceBot:
                 self._log(
                     f"⚠️ API Key length ({len(api_key)}) outside normal range (36-64 chars)", "WARNING")
 
-            self.client = BinanceWrapper(
+            client = BinanceWrapper(
                 api_key, api_secret, testnet=is_testnet)
-            self.is_testnet = is_testnet
             self.db.save_state("credentials", {
                                "api_key": api_key, "api_secret": api_secret, "is_testnet": is_testnet}, user_id=self.user_id)
 
             # Initialize data client (Mainnet) if using real data in testnet
+            data_client = None
             if is_testnet and self.use_real_data:
                 try:
                     # Use None for keys for public access to Mainnet data
-                    self.data_client = BinanceWrapper(
+                    data_client = BinanceWrapper(
                         None, None, testnet=False)
                     self._log(
                         "✅ Real Market Data client initialized (Public Access)")
                 except Exception as de:
                     self._log(
                         f"⚠️ Could not init Real Data client: {de}. Falling back to Testnet data.", "WARNING")
-                    self.data_client = self.client
-            else:
-                self.data_client = self.client
 
-            # Initialize Market Data Service with the correct Data Client
-            self.market_data_service = MarketDataService(self.data_client)
-            self._log(
-                "✅ Market Data Service initialized with Smart Caching", "DEBUG")
-
-            threading.Thread(
-                target=self._finish_initialization, daemon=True).start()
+            self.attach_client(client, is_testnet, data_client)
             self._log(
                 f"✅ Credentials validated. Bot calibrated (1000 klines, Vol filter adj). Initializing...", "INFO")
             return True
@@ -314,45 +374,81 @@ class BinanceBot:
             self._log(f"❌ Credential validation failed: {e}", "ERROR")
             return False
 
-    def _finish_initialization(self):
+    def attach_client(self, client: BinanceWrapper, is_testnet: bool,
+                      data_client: Optional[BinanceWrapper] = None, background: bool = True):
+        """
+        Starts trading through an already-built wrapper (market data from `data_client`
+        if given). With background=False sockets are subscribed inline and no monitor
+        threads start: the caller drives the bot (see backend/replay.py).
+        """
+        self.client = client
+        self.is_testnet = is_testnet
+        self.data_client = data_client or client
+
+        # Initialize Market Data Service with the correct Data Client
+        self.market_data_service = MarketDataService(self.data_client)
+        # Live all-market price table (miniTicker), shared process-wide per network
+        self.market_data_service.start_data_stream()
+        self._log(
+            "✅ Market Data Service initialized with Smart Caching", "DEBUG")
+
+        if background:
+            threading.Thread(
+                target=self._finish_initialization, daemon=True).start()
+        else:
+            self._finish_initialization(start_threads=False)
+
+    def _finish_initialization(self, start_threads: bool = True):
         """Background initialization of WebSockets and account data."""
         try:
-            # Kline socket always uses data_client (which might be the same as client)
-            self.data_client.start_kline_socket(
-                self.symbol, self.timeframe, self._on_kline_msg)
+            self._subscribe_market()
             try:
                 self.client.start_user_socket(self._on_user_msg)
                 self._log("✅ User WebSocket connected", "DEBUG")
             except Exception as ws_error:
                 self._log(f"⚠️ User WebSocket failed: {ws_error}", "WARNING")
 
-            if not self.monitor_active:
+            if start_threads and not self.monitor_active:
                 self.monitor_active = True
                 threading.Thread(target=self._loop, daemon=True).start()
+                threading.Thread(
+                    target=self._strategy_worker, daemon=True).start()
 
-            self._update_account_balances()
+            # Seeds the ledger; the user stream keeps it current from here on
+            self._reconcile_balances()
             self._log(
                 f"✅ Binance Client fully initialized ({'Testnet' if self.is_testnet else 'REAL ACCOUNT'})")
         except Exception as e:
             self._log(f"Error during background initialization: {e}", "ERROR")
 
     def _update_account_balances(self):
-        """Fetches current account balances from Binance."""
+        """Refreshes the USDT/asset balance fields from the ledger (no network I/O)."""
+        self.balance = self.balances.free("USDT")
+        self.crypto_balance = self.balances.free(self.symbol.replace("USDT", ""))
+
+    def _reconcile_balances(self):
+        """Checks the balance ledger against one REST account read (startup and periodic)."""
         if not self.client:
             return
-        try:
-            self.balance = self.client.get_account_balance("USDT")
-            asset = self.symbol.replace("USDT", "")
-            self.crypto_balance = self.client.get_account_balance(asset)
+        if self.balances.reconcile(self.client):
+            with self.lock:
+                self._update_account_balances()
             # Log critical balance info
             self._log(
-                f"📊 Balance leído: {self.balance:.2f} USDT | {self.crypto_balance:.6f} {asset}", "DEBUG")
-        except Exception as e:
-            self._log(f"Balance fetch failed: {e}", "WARNING")
+                f"📊 Balance leído: {self.balance:.2f} USDT | {self.crypto_balance:.6f} {self.symbol.replace('USDT', '')}", "DEBUG")
+        else:
+            self._log("Balance reconciliation failed", "WARNING")
 
     def _on_kline_msg(self, msg):
         """Handles incoming WebSocket message for candlestick updates."""
+        trace = TickTrace()
         try:
+            portfolio = self.portfolio
+            if portfolio is not None and portfolio.on_kline(msg) and msg.get('s') != self.symbol:
+                self._tick_received = trace.received
+                self._request_strategy_eval()
+                return
+
             # Drop messages from other symbols (residual from stopped sockets)
             if msg.get('s') != self.symbol:
                 return
@@ -361,48 +457,232 @@ class BinanceBot:
             new_price = float(k['c'])
 
             with self.lock:
+                trace.mark("lock_wait")
                 self.current_price = new_price
 
                 # Update history in real-time so chart stays synchronized
                 if self.history:
                     # Binance kline start time is in ms
                     current_candle_time = int(k['t']) // 1000
+                    last_time = self.history.last_time
 
-                    if self.history[-1]['time'] == current_candle_time:
+                    if last_time == current_candle_time:
                         # Update current candle
-                        self.history[-1]['close'] = new_price
-                        self.history[-1]['high'] = max(
-                            self.history[-1]['high'], float(k['h']))
-                        self.history[-1]['low'] = min(self.history[-1]
-                                                      ['low'], float(k['l']))
-                    elif current_candle_time > self.history[-1]['time']:
-                        # New candle started, append it
-                        self.history.append({
-                            "time": current_candle_time,
-                            "open": float(k['o']),
-                            "high": float(k['h']),
-                            "low": float(k['l']),
-                            "close": new_price
-                        })
-                        if len(self.history) > 100:
-                            self.history.pop(0)
+                        self.history.update_last(
+                            close=new_price,
+                            high=max(self.history.get('high'), float(k['h'])),
+                            low=min(self.history.get('low'), float(k['l'])),
+                            volume=float(k['v']))
+                    elif current_candle_time > last_time:
+                        # New candle started, append it (oldest drops out)
+                        self.history.append(
+                            time=current_candle_time,
+                            open=float(k['o']),
+                            high=float(k['h']),
+                            low=float(k['l']),
+                            close=new_price,
+                            volume=float(k['v']))
+            trace.mark("candle_update")
+
+            # Price moved: evaluate strategies now (debounced/coalesced by the worker)
+            self._tick_received = trace.received
+            self._request_strategy_eval()
 
             if k['x']:  # Candle closed
-                threading.Thread(target=self._update_market_data,
-                                 daemon=True).start()
+                candle = {
+                    "time": int(k['t']) // 1000,
+                    "high": float(k['h']),
+                    "low": float(k['l']),
+                    "close": new_price,
+                    "volume": float(k['v'])
+                }
+                indicators = self.indicator_engine.update(
+                    self.symbol, self.timeframe, candle)
+                if indicators is None:
+                    # Engine not seeded yet: fall back to a full refresh (seeds it)
+                    self._schedule_market_refresh()
+                else:
+                    trace.mark("indicators")
+                    with self.lock:
+                        trace.mark("lock_wait")
+                        for key, val in indicators.items():
+                            setattr(self, key, val)
+                        if self.history.last_time == candle['time']:
+                            self.history.update_last(
+                                volume=candle['volume'],
+                                rsi=indicators.get('rsi'),
+                                trend_ema=indicators.get('trend_ema'),
+                                fast_ema=indicators.get('fast_ema'))
+            trace.finish()
         except Exception as e:
             self._log(f"Error handling kline message: {e}", "ERROR")
 
+    def _market_network(self) -> str:
+        """Network the market data comes from (mainnet unless testnet on testnet data)."""
+        return "testnet" if self.is_testnet and not self.use_real_data else "mainnet"
+
+    def _subscribe_market(self):
+        """
+        Subscribes to klines (and trades) for the active symbol/timeframe.
+        With a shared hub, bots on the same market share one socket and one
+        indicator engine; otherwise the bot opens its own sockets on data_client.
+        """
+        if self.market_hub:
+            network = self._market_network()
+            self.indicator_engine = self.market_hub.get_indicator_engine(
+                network, self.get_settings())
+            market = (network, self.symbol, self.timeframe)
+            if market != self._market_subscription:
+                # A new symbol also needs a new trade feed
+                if self._market_subscription and self._market_subscription[:2] != market[:2]:
+                    self.market_hub.unsubscribe_trades(self.user_id)
+                # Joins the new feed, then leaves the old one: a timeframe switch on the
+                # same symbol keeps the shared 1m socket (timeframes are resampled from it)
+                self.market_hub.subscribe_klines(
+                    network, self.symbol, self.timeframe, self.user_id, self._on_kline_msg, exclusive=True)
+                self._market_subscription = market
+            self._start_trade_stream()
+            self._configure_portfolio()
+        elif self.data_client:
+            # Kline socket always uses data_client (which might be the same as client)
+            self.data_client.start_kline_socket(
+                self.symbol, self.timeframe, self._on_kline_msg)
+            self._start_trade_stream()
+            self._configure_portfolio(dropped=True)
+
+    def _configure_portfolio(self, dropped: bool = False):
+        """Starts, updates or stops portfolio mode to match `portfolio_symbols`."""
+        symbols = parse_symbols(self.portfolio_symbols)
+        if not symbols:
+            if self.portfolio is not None:
+                self.portfolio.close()
+                self.portfolio = None
+                self._log("📁 Portfolio mode disabled", "INFO")
+            return
+        try:
+            if self.portfolio is None:
+                self.portfolio = PortfolioEngine(self, symbols)
+                self._log(f"📁 Portfolio mode: {', '.join(symbols)}", "INFO")
+            else:
+                self.portfolio.set_symbols(symbols)
+            self.portfolio.subscribe(dropped=dropped)
+        except Exception as e:
+            self._log(f"⚠️ Portfolio setup failed: {e}", "WARNING")
+
+    def _unsubscribe_market(self):
+        """Releases this bot's market-data subscriptions."""
+        self._market_subscription = None
+        if self.portfolio is not None:
+            self.portfolio.unsubscribe()
+        if self.market_hub:
+            self.market_hub.unsubscribe(self.user_id)
+        elif self.data_client:
+            self.data_client.stop_all_sockets()
+
+    def _start_trade_stream(self):
+        """Subscribes to tick-level trades for the active symbol (if enabled)."""
+        if not self.enable_trade_stream:
+            return
+        try:
+            if self.market_hub:
+                self.market_hub.subscribe_trades(
+                    self._market_network(), self.symbol, self.user_id, self._on_trade_msg)
+            elif self.data_client:
+                self.data_client.start_trade_socket(
+                    self.symbol, self._on_trade_msg)
+        except Exception as e:
+            self._log(f"⚠️ Trade stream failed: {e}", "WARNING")
+
+    def _stop_trade_stream(self):
+        if self.market_hub:
+            self.market_hub.unsubscribe_trades(self.user_id)
+        elif self.data_client:
+            self.data_client.stop_socket(f"trade_{self.symbol}")
+
+    def _on_trade_msg(self, msg):
+        """Handles aggregated trade messages: updates price and triggers evaluation."""
+        try:
+            if msg.get('s') != self.symbol:
+                return
+            self.current_price = float(msg['p'])
+            self._tick_received = time.monotonic()
+            self._request_strategy_eval()
+        except Exception as e:
+            self._log(f"Error handling trade message: {e}", "ERROR")
+
+    def _request_strategy_eval(self):
+        """Non-blocking trigger from stream handlers; bursts collapse into one evaluation."""
+        self._strategy_event.set()
+
+    def _strategy_worker(self):
+        """
+        Runs strategies as soon as a stream event arrives.
+        Evaluations are spaced at least `strategy_debounce_ms` apart; every event that
+        arrives while waiting is coalesced into the next single evaluation. Without
+        events, a pass still runs every STRATEGY_FALLBACK_SECONDS so stop-loss and
+        trailing exits are checked even if the streams stall.
+        """
+        while self.monitor_active:
+            idle = time.monotonic() - self._last_strategy_eval
+            if not self._strategy_event.wait(timeout=min(1.0, max(0.0, self.STRATEGY_FALLBACK_SECONDS - idle))):
+                if time.monotonic() - self._last_strategy_eval < self.STRATEGY_FALLBACK_SECONDS:
+                    continue
+
+            wait = self.strategy_debounce_ms / 1000 - \
+                (time.monotonic() - self._last_strategy_eval)
+            if wait > 0:
+                time.sleep(wait)
+
+            self._strategy_event.clear()
+            self._last_strategy_eval = time.monotonic()
+            self._evaluate_strategies()
+
+    def _evaluate_strategies(self):
+        """Single strategy pass: trailing high update, signal checks and alerts."""
+        if not self.is_running or not self.client:
+            return
+        # Tick-to-order timing from the receipt of the tick that triggered this pass
+        trace = TickTrace(self._tick_received)
+        trace.mark("queue")
+        try:
+            with self.lock:
+                trace.mark("lock_wait")
+                if self.portfolio is not None:
+                    # Portfolio mode: one pass over every portfolio symbol
+                    self.portfolio.evaluate(trace)
+                else:
+                    if self.current_price <= 0:
+                        return
+
+                    # Update Highest Price for Trailing Stop logic on every tick
+                    if self.accumulated_qty > 0:
+                        if self.highest_price == 0 or self.current_price > self.highest_price:
+                            self.highest_price = self.current_price
+                            # Write-behind: new highs can print on every tick
+                            self.db.save_state_deferred(self._get_scoped_key(
+                                "highest_price"), self.highest_price, user_id=self.user_id)
+
+                    self._run_strategies(trace)
+                    if self.notify_signals:
+                        self._check_signals_for_alerts()
+            ordered = any(stage == "fill" for stage, _ in trace.stages)
+            trace.finish("tick_to_order" if ordered else "tick_to_decision")
+        except Exception as e:
+            self._log(f"Strategy Loop Error: {e}", "ERROR")
+
     def _on_user_msg(self, msg):
         """Handles incoming WebSocket message for account updates."""
-        if msg['e'] == 'outboundAccountPosition':
-            for b in msg['B']:
-                if b['a'] == 'USDT':
-                    with self.lock:
-                        self.balance = float(b['f'])
-                elif b['a'] == self.symbol.replace("USDT", ""):
-                    with self.lock:
-                        self.crypto_balance = float(b['f'])
+        if self.balances.apply(msg):
+            with self.lock:
+                self._update_account_balances()
+
+    def _schedule_market_refresh(self) -> bool:
+        """
+        Queues a market-data refresh on the shared bounded pool.
+        At most one refresh runs and one waits per bot/symbol; extra requests coalesce.
+        """
+        return get_refresh_executor().submit(
+            (self.user_id, self.symbol, self.timeframe), self._update_market_data)
 
     def _update_market_data(self):
         """Fetches historical data and updates all technical indicators."""
@@ -419,71 +699,93 @@ class BinanceBot:
             if df.empty:
                 return False
 
-            indicators = calculate_indicators(df, self.get_settings())
+            indicators = self._sync_indicator_engine(df)
 
             # Calculate additional indicators for Frontend Chart (Visualization only)
-            # We use append=True to add columns to the dataframe
+            # RSI 14 plus Trend EMA & Fast EMA (matching strategy settings) as df columns
             try:
-                # RSI 14
-                df.ta.rsi(length=14, append=True)
-                # Trend EMA & Fast EMA (Matching strategy settings)
-                trend_len = int(self.ema_length)
-                fast_len = int(self.fast_ema_len)
-                df.ta.ema(length=trend_len, append=True)
-                df.ta.ema(length=fast_len, append=True)
+                append_chart_indicators(
+                    df, (self.ema_length, self.fast_ema_len), backend=self.indicator_backend)
             except Exception as e:
                 self._log(
                     f"Error calculating chart indicators: {e}", "WARNING")
 
+            # Predictive analysis (shared per network/symbol/timeframe, recomputed only when a candle closes)
+            prediction = None
+            if self.current_price > 0:
+                prediction = self.predictive_engine.analyze(
+                    df, self.current_price, symbol=self.symbol, timeframe=self.timeframe,
+                    network=getattr(self.data_client, "network", "mainnet"))
+
             with self.lock:
                 for key, val in indicators.items():
                     setattr(self, key, val)
 
-                # Run Predictive Analysis
-                if self.current_price > 0:
-                    self.prediction = self.predictive_engine.analyze(
-                        df, self.current_price)
+                if prediction is not None:
+                    self.prediction = prediction
 
-                # Construct history with all necessary fields for the Pro Chart
-                history_data = []
+                # Load history for the Pro Chart column-wise (no per-row dicts)
                 # Define column names for EMAs based on length (pandas_ta pattern: EMA_L)
-                trend_col = f"EMA_{trend_len}"
-                fast_col = f"EMA_{fast_len}"
-
-                for t, r in df.tail(200).iterrows():
-                    rsi_val = r.get('RSI_14')
-                    trend_ema_val = r.get(trend_col)
-                    fast_ema_val = r.get(fast_col)
-
-                    # Convert pandas Timestamp to int timestamp if needed
-                    ts = int(t.timestamp()) if hasattr(
-                        t, 'timestamp') else int(t)
-
-                    row = {
-                        "time": ts,
-                        "open": float(r['open']),
-                        "high": float(r['high']),
-                        "low": float(r['low']),
-                        "close": float(r['close']),
-                        "volume": float(r['volume']),
-                        "rsi": float(rsi_val) if pd.notna(rsi_val) else None,
-                        "trend_ema": float(trend_ema_val) if pd.notna(trend_ema_val) else None,
-                        "fast_ema": float(fast_ema_val) if pd.notna(fast_ema_val) else None,
-                    }
-                    history_data.append(row)
-
-                self.history = history_data
+                trend_col = f"EMA_{self.ema_length}"
+                fast_col = f"EMA_{self.fast_ema_len}"
+                tail = df.tail(self.history.capacity)
+                empty = np.full(len(tail), np.nan)
+
+                self.history.load(
+                    time=tail.index.to_numpy(
+                        dtype='datetime64[s]').astype(np.int64),
+                    open=tail['open'].to_numpy(dtype=float),
+                    high=tail['high'].to_numpy(dtype=float),
+                    low=tail['low'].to_numpy(dtype=float),
+                    close=tail['close'].to_numpy(dtype=float),
+                    volume=tail['volume'].to_numpy(dtype=float),
+                    rsi=tail['RSI_14'].to_numpy(
+                        dtype=float) if 'RSI_14' in tail else empty,
+                    trend_ema=tail[trend_col].to_numpy(
+                        dtype=float) if trend_col in tail else empty,
+                    fast_ema=tail[fast_col].to_numpy(
+                        dtype=float) if fast_col in tail else empty,
+                )
 
             return True
         except Exception as e:
             self._log(f"Market update error: {e}", "ERROR")
             return False
 
+    def _sync_indicator_engine(self, df: pd.DataFrame) -> dict:
+        """
+        Aligns the streaming indicator engine with a freshly fetched kline window.
+        The last REST row is the live (unclosed) candle; all previous rows are closed.
+        Seeds the engine once per (symbol, timeframe, params) and afterwards only
+        folds in candles missed by the socket, so no full recompute is needed.
+        """
+        settings = self.get_settings()
+        closed, live = df.iloc[:-1], df.iloc[-1]
+        try:
+            if self.indicator_engine.is_ready(self.symbol, self.timeframe, settings):
+                self.indicator_engine.catch_up(
+                    self.symbol, self.timeframe, closed)
+            else:
+                self.indicator_engine.seed(
+                    self.symbol, self.timeframe, closed, settings)
+
+            return self.indicator_engine.peek(self.symbol, self.timeframe, {
+                "time": int(df.index[-1].timestamp()),
+                "high": live['high'], "low": live['low'],
+                "close": live['close'], "volume": live['volume']
+            })
+        except Exception as e:
+            self._log(
+                f"Streaming indicators unavailable, full recompute: {e}", "WARNING")
+            return calculate_indicators(df, settings)
+
     def _loop(self):
-        """Main execution loop for checking strategies and risk."""
+        """Housekeeping loop: heartbeat, market sync, balances and RSI alerts.
+        Strategy execution is event-driven (see _strategy_worker)."""
         self._update_market_data()
 
         last_rsi_alert_check = 0
+        last_balance_sync = 0
 
         while self.monitor_active:
             now_time = time.time()
@@ -491,15 +793,17 @@ class BinanceBot:
             # 1. HEARTBEAT & MARKET SYNC (Every 30s)
             if now_time - self.last_status_time > 30:
                 # Refresh market data background
-                threading.Thread(
-                    target=self._update_market_data, daemon=True).start()
+                self._schedule_market_refresh()
                 self._print_status_heartbeat()
                 self.last_status_time = now_time
 
             # 2. ACCOUNT SYNC & SAFETY RESET (Every 10s)
-            # We use a secondary timer or just check modulo if loop sleep is small
-            if self.client and int(now_time) % 10 == 0:
+            if self.client and now_time - last_balance_sync >= 10:
+                last_balance_sync = now_time
                 try:
+                    # REST only every RECONCILE_INTERVAL, and never under the strategy lock
+                    if self.balances.needs_reconcile():
+                        self._reconcile_balances()
                     with self.lock:
                         self._update_account_balances()
 
@@ -518,36 +822,17 @@ class BinanceBot:
                         if self.current_price > 0:
                             self._update_equity()
 
-                            # Update Highest Price for Trailing Stop logic
-                            if self.accumulated_qty > 0:
-                                if self.highest_price == 0 or self.current_price > self.highest_price:
-                                    self.highest_price = self.current_price
-                                    self.db.save_state(self._get_scoped_key(
-                                        "highest_price"), self.highest_price, user_id=self.user_id)
-
                 except Exception as e:
                     self._log(f"PnL/Sync Error: {e}", "ERROR")
 
-            # 3. STRATEGY EXECUTION (Only if running)
-            if self.is_running and self.client:
-                try:
-                    with self.lock:
-                        if self.current_price > 0:
-                            self._run_strategies()
-                            if self.notify_signals:
-                                self._check_signals_for_alerts()
-
-                    # 4. MULTI-SYMBOL RSI ALERTS (Optimized Check every 60s)
-                    if self.enable_rsi_alerts and (now_time - last_rsi_alert_check > 60):
-                        threading.Thread(
-                            target=self._check_rsi_alerts, daemon=True).start()
-                        last_rsi_alert_check = now_time
-
-                except Exception as e:
-                    self._log(f"Strategy Loop Error: {e}", "ERROR")
+            # 3. MULTI-SYMBOL RSI ALERTS (Optimized Check every 60s)
+            if self.is_running and self.client and self.enable_rsi_alerts and (now_time - last_rsi_alert_check > 60):
+                get_alert_executor().submit(
+                    (self.user_id, "rsi_alerts"), self._check_rsi_alerts)
+                last_rsi_alert_check = now_time
 
-            # Small sleep to prevent CPU spiking, most logic is gated by timers above
-            time.sleep(2)
+            # Housekeeping only: strategies no longer wait on this timer
+            time.sleep(1)
 
     def _print_status_heartbeat(self):
         """Prints a structured and visual status update to the terminal."""
@@ -657,18 +942,21 @@ class BinanceBot:
         print(f"{blue}-------------------------{reset}\n")
         sys.stdout.flush()
 
-    def _run_strategies(self):
+    def _active_strategy(self):
+        """Strategy instance for `active_strategy` (RSI Rebound if unknown)."""
+        strategy = self.strategies.get(self.active_strategy)
+        if not strategy:
+            self._log(
+                f"⚠️ Estrategia '{self.active_strategy}' no encontrada. Usando fallback.", "WARNING")
+            strategy = self.strategies.get("rsi_rebound")
+        return strategy
+
+    def _run_strategies(self, trace: Optional[TickTrace] = None):
         """Orchestrates strategy execution by delegating to modular strategy instances."""
         if not self.client or not self.strategies:
             return
 
-        strategy_name = self.active_strategy
-        strategy = self.strategies.get(strategy_name)
-
-        if not strategy:
-            self._log(
-                f"⚠️ Estrategia '{strategy_name}' no encontrada. Usando fallback.", "WARNING")
-            strategy = self.strategies.get("rsi_rebound")
+        strategy = self._active_strategy()
 
         # 1. Prepare data for strategy
         indicators = {k: getattr(self, k, 0)
@@ -684,7 +972,9 @@ class BinanceBot:
             "highest_price": self.highest_price,
             "accumulated_qty": self.accumulated_qty,
             "position_orders": self.position_orders,
-            "symbol": self.symbol
+            "symbol": self.symbol,
+            # Zero-copy candle arrays for strategies that need price history
+            "candles": self.history.view()
         }
 
         # 2. Check Signals
@@ -711,27 +1001,28 @@ class BinanceBot:
             # MUTUAL EXCLUSION RULE (Optional): No operar BTC y SOL al mismo tiempo.
             is_blocked_by_exclusion = False
             if self.enable_mutual_exclusion:
-                try:
-                    asset_to_check = "SOL" if "BTC" in self.symbol else "BTC"
-                    other_balance = self.client.get_account_balance(
-                        asset_to_check)
-                    # If we have more than a tiny amount (dust) in the other asset, block.
-                    threshold = 0.0001 if asset_to_check == "BTC" else 0.1
-                    if other_balance > threshold:
-                        self._log(
-                            f"🚫 Mutual Exclusion: Position found in {asset_to_check} ({other_balance}). Clipping BUY signal for {self.symbol}.", "INFO")
-                        is_blocked_by_exclusion = True
-                except Exception as e:
+                asset_to_check = "SOL" if "BTC" in self.symbol else "BTC"
+                # Stream-fed snapshot: no REST round trip on the strategy path
+                other_balance = self.balances.free(asset_to_check)
+                # If we have more than a tiny amount (dust) in the other asset, block.
+                threshold = 0.0001 if asset_to_check == "BTC" else 0.1
+                if other_balance > threshold:
                     self._log(
-                        f"⚠️ Error checking mutual exclusion: {e}", "WARNING")
+                        f"🚫 Mutual Exclusion: Position found in {asset_to_check} ({other_balance}). Clipping BUY signal for {self.symbol}.", "INFO")
+                    is_blocked_by_exclusion = True
 
             if not is_blocked_by_exclusion and not indicators.get('is_lateral', False):
                 buy_sig_checked = strategy.check_buy_signal(
                     indicators, settings, state)
 
         # Requirement: Print block before evaluation (showing what we found)
-        self._print_state_snapshot(
-            buy_signal=buy_sig_checked, sell_signal=sell_sig_checked)
+        # Event-driven ticks can be sub-second, so idle snapshots keep the old ~2s cadence
+        if buy_sig_checked or sell_sig_checked or time.monotonic() - self._last_snapshot_print >= 2:
+            self._last_snapshot_print = time.monotonic()
+            self._print_state_snapshot(
+                buy_signal=buy_sig_checked, sell_signal=sell_sig_checked)
+        if trace:
+            trace.mark("strategy")
 
         # 3. Execution
         if sell_sig_checked:
@@ -740,7 +1031,7 @@ class BinanceBot:
                     f"📉 SEÑAL DE VENTA DETECTADA por {strategy.name}", "INFO")
                 qty_to_sell = self._calculate_sell_qty(self.crypto_balance)
                 _, _ = self._place_sell_order(
-                    self.symbol, qty_to_sell, self.current_price, f"{strategy.name}-SELL")
+                    self.symbol, qty_to_sell, self.current_price, f"{strategy.name}-SELL", trace=trace)
             else:
                 self._log(
                     f"📉 SEÑAL DE VENTA DETECTADA pero 'enable_selling' es False.", "WARNING")
@@ -750,7 +1041,7 @@ class BinanceBot:
                 self._log(
                     f"🚀 SEÑAL DE COMPRA DETECTADA por {strategy.name}", "INFO")
                 _, _ = self._place_buy_order(self.symbol, self.trade_qty, self.current_price, f"{strategy.name}-BUY",
-                                             is_quote=(self.trade_qty_type == "quote"))
+                                             is_quote=(self.trade_qty_type == "quote"), trace=trace)
             else:
                 self._log(
                     f"🚀 SEÑAL DE COMPRA DETECTADA pero 'enable_buying' es False.", "WARNING")
@@ -766,7 +1057,8 @@ class BinanceBot:
         step_price = self.entry_price * (1 - self.dca_step_pct / 100)
         return self.current_price <= step_price
 
-    def _handle_trade_execution(self, trade, side: str, strategy: str, qty: float, price: float):
+    def _handle_trade_execution(self, trade, side: str, strategy: str, qty: float, price: float,
+                                trace: Optional[TickTrace] = None):
         """Processes a successful order and updates internal state and database."""
         if not trade:
             return None
@@ -818,7 +1110,7 @@ class BinanceBot:
                         f"🧹 Position cleared: Remaining {self.accumulated_qty:.8f} is Dust/Fees.", "INFO")
 
                 self._reset_position_state()
-                # Ensure balance sync is immediate after a total sale
+                # Balance fields follow the ledger (the fill's account update may still be in flight)
                 self._update_account_balances()
 
         # Persist State
@@ -831,25 +1123,36 @@ class BinanceBot:
             "last_buy_price": self.last_buy_price
         }
         for k, v in state_to_save.items():
-            self.db.save_state(self._get_scoped_key(k),
-                               v, user_id=self.user_id)
+            self.db.save_state_deferred(self._get_scoped_key(k),
+                                        v, user_id=self.user_id)
 
-        trade_entry = {
+        if self.portfolio is not None:
+            self.portfolio.reload(self.symbol)
+
+        self._record_trade({
             "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "type": f"{side} ({strategy})", "price": actual_price, "qty": executed_qty,
             "symbol": self.symbol, "pnl": pnl, "rsi": self.rsi, "commission": commission,
-            "total": quote_qty or (actual_price * executed_qty)
-        }
-        self.trades.insert(0, trade_entry)
-        self.db.save_trade(trade_entry, user_id=self.user_id)
-        self._send_trade_notification(trade_entry)
+            "total": quote_qty or (actual_price * executed_qty),
+            # Stage timings (ms) from the triggering tick to the fill; None for manual orders
+            "latency": trace.as_dict() if trace else None
+        })
 
         # Requirement: Print block after execution
         self._print_state_snapshot()
 
         return trade
 
-    def _place_buy_order(self, symbol: str, quantity: float, price: float, strategy: str = "AUTO", is_quote: bool = False):
+    def _record_trade(self, trade_entry: dict):
+        """Adds a fill to the recent trades, running stats, database and Telegram."""
+        self.trades.appendleft(trade_entry)
+        self.trade_stats.add(trade_entry)
+        self.trade_seq += 1
+        self.db.save_trade(trade_entry, user_id=self.user_id)
+        self._send_trade_notification(trade_entry)
+
+    def _place_buy_order(self, symbol: str, quantity: float, price: float, strategy: str = "AUTO", is_quote: bool = False,
+                         trace: Optional[TickTrace] = None):
         """Validates and places a BUY order on Binance."""
         try:
             if self.sniper_mode:
@@ -891,21 +1194,27 @@ class BinanceBot:
                     self._log(f"❌ {err_msg}", "ERROR")
                     return None, err_msg
 
+            if trace:
+                trace.mark("validation")
+
+            # Queued position state must be durable before a new order changes it
+            self.db.flush_state()
             trade = self.client.place_order(
-                symbol, "BUY", quantity, quote_order_qty=quantity if is_quote else None)
+                symbol, "BUY", quantity, quote_order_qty=quantity if is_quote else None, trace=trace)
 
             if not trade:
                 err_msg = "Buy order returned None (Check logs for details)"
                 self._log(f"❌ {err_msg}", "ERROR")
                 return None, err_msg
 
-            return self._handle_trade_execution(trade, "BUY", strategy, quantity, price), None
+            return self._handle_trade_execution(trade, "BUY", strategy, quantity, price, trace), None
         except Exception as e:
             err_msg = f"Exception in _place_buy_order: {str(e)}"
             self._log(f"❌ {err_msg}", "ERROR")
             return None, err_msg
 
-    def _place_sell_order(self, symbol: str, quantity: float, price: float, strategy: str = "AUTO"):
+    def _place_sell_order(self, symbol: str, quantity: float, price: float, strategy: str = "AUTO",
+                          trace: Optional[TickTrace] = None):
         """Validates and places a SELL order on Binance."""
         try:
             # 1. Sanity check: quantity to sell vs balance
@@ -947,28 +1256,32 @@ class BinanceBot:
                 else:
                     self._log(f"❌ Aborting SELL: {reason}", "ERROR")
                     return None, reason
+            if trace:
+                trace.mark("validation")
 
             self._log(
                 f"📤 Enviando venta: {quantity} {symbol} @ {price} ({strategy})", "INFO")
-            trade = self.client.place_order(symbol, "SELL", quantity)
+            self.db.flush_state()
+            trade = self.client.place_order(symbol, "SELL", quantity, trace=trace)
 
             if not trade:
                 err_msg = "Sell order returned None (Check logs for details)"
                 self._log(f"❌ {err_msg}", "ERROR")
                 return None, err_msg
 
-            return self._handle_trade_execution(trade, "SELL", strategy, quantity, price), None
+            return self._handle_trade_execution(trade, "SELL", strategy, quantity, price, trace), None
         except Exception as e:
             err_msg = f"Exception in _place_sell_order: {str(e)}"
             self._log(f"❌ {err_msg}", "ERROR")
             return None, err_msg
 
-    def _calculate_sell_qty(self, balance: float) -> float:
+    def _calculate_sell_qty(self, balance: float, price: Optional[float] = None) -> float:
         """Calculates the amount to sell based on the current sell mode."""
         if self.sell_mode == "full":
             return balance
+        price = self.current_price if price is None else price
         step = self.trade_qty if self.trade_qty_type == "base" else (
-            self.trade_qty / self.current_price if self.current_price > 0 else 0)
+            self.trade_qty / price if price > 0 else 0)
         return min(step, balance)
 
     def _log(self, message: str, level: str = "INFO"):
@@ -977,8 +1290,9 @@ class BinanceBot:
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         entry = f"[{timestamp}] [{level}] {message}"
         print(entry, flush=True)
-        with open("backend/logs/bot.log", "a", encoding="utf-8") as f:
-            f.write(entry + "\n")
+        if self.log_file:
+            with open(self.log_file, "a", encoding="utf-8") as f:
+                f.write(entry + "\n")
         if level == "ERROR" and self.telegram_enabled:
             self.notifier.send_message(f"🚨 *ERROR BOT*\n{message}")
 
@@ -1014,23 +1328,19 @@ class BinanceBot:
             return
 
         try:
-            from .rsi_snapshot import get_default_symbols, calculate_rsi
+            from .rsi_snapshot import get_default_symbols, calculate_rsi_snapshot
             symbols = get_default_symbols()
 
-            # Batch processing would be better, but for now we optimize by not doing it every loop
-            for symbol in symbols:
+            # One concurrent snapshot for all symbols (shared with the API/Telegram views)
+            snapshot = calculate_rsi_snapshot(
+                symbols, self.data_client, timeframe=self.timeframe)
+            for item in snapshot:
                 try:
+                    symbol, rsi = item["symbol"], item["rsi"]
                     if symbol not in self._rsi_alert_states:
                         self._rsi_alert_states[symbol] = {
                             "buy_normal": False, "buy_urgent": False, "sell_normal": False, "sell_urgent": False}
 
-                    # Fetch klines (Fastest possible fetch)
-                    df = self.data_client.get_historical_klines(
-                        symbol, self.timeframe, limit=1000)
-                    if df is None or df.empty:
-                        continue
-
-                    rsi = calculate_rsi(df)
                     if rsi is None or rsi <= 0:
                         continue
 
@@ -1087,7 +1397,7 @@ class BinanceBot:
 
     def manual_buy(self, custom_qty=None, is_quote=None):
         try:
-            # Refresh balance to avoid desync
+            # Latest stream-fed balances (no REST round trip before the order)
             self._update_account_balances()
 
             if is_quote is None:
@@ -1159,7 +1469,13 @@ class BinanceBot:
         self.stop()
         self.monitor_active = False
 
-        # Stop sockets
+        if self.portfolio is not None:
+            self.portfolio.close()
+            self.portfolio = None
+
+        # Stop sockets (shared market feeds are only released for this bot)
+        if self.market_hub:
+            self._unsubscribe_market()
         if self.client:
             self.client.stop_all_sockets()
         if self.data_client and self.data_client != self.client:
@@ -1168,8 +1484,9 @@ class BinanceBot:
         self.client = None
         self.data_client = None
 
-        # Clear credentials from state (Security)
+        # Clear credentials from state (Security) and commit queued state writes
         self.db.save_state("credentials", None, user_id=self.user_id)
+        self.db.flush_state()
 
         self._log("🔌 Bot disconnected and WebSockets closed.", "INFO")
         return {"status": "stopped"}
@@ -1177,21 +1494,31 @@ class BinanceBot:
     def get_status(self):
         """Returns the current bot status, stats, and settings for the UI."""
         with self.lock:
-            wins = len([t for t in self.trades if t.get('pnl', 0) > 0])
-            losses = len([t for t in self.trades if t.get('pnl', 0) < 0])
-            wr = (wins / (wins + losses) * 100) if (wins + losses) > 0 else 0.0
-            net_pnl = sum([t.get('pnl', 0) for t in self.trades])
-
-            return {
-                "is_running": self.is_running, "symbol": self.symbol, "mode": "TESTNET" if self.is_testnet else "REAL",
-                "price": round(self.current_price, 2), "balance": round(self.balance, 2), "crypto_balance": round(self.crypto_balance, 6),
-                "entry_price": round(self.entry_price, 6), "accumulated_qty": round(self.accumulated_qty, 8),
-                "pnl": round(self.pnl, 2), "daily_pnl": round(self.daily_pnl, 2), "rsi": round(self.rsi, 2), "ema_200": round(self.trend_ema, 2),
-                "macd": round(self.macd, 2), "macd_signal": round(self.macd_signal, 2), "macd_hist": round(self.macd_hist, 2),
-                "bb_upper": round(self.bb_upper, 2), "bb_lower": round(self.bb_lower, 2), "current_vol": round(self.current_vol, 2),
-                "history": self.history, "trades": self.trades, "settings": self.get_settings(), "prediction": getattr(self, 'prediction', {}),
-                "stats": {"wins": wins, "losses": losses, "win_rate": round(wr, 1), "net_pnl": round(net_pnl, 2), "daily_pnl": round(self.daily_pnl, 2)}
-            }
+            status = self._live_status()
+            status["history"] = self.history.to_records()
+            status["trades"] = list(self.trades)
+            return status
+
+    def get_live_status(self):
+        """Status without the history/trades arrays (used for push deltas)."""
+        with self.lock:
+            return self._live_status()
+
+    def _live_status(self):
+        """Scalar status fields, stats and settings. Caller holds self.lock."""
+        stats = self.trade_stats.snapshot()
+        stats["daily_pnl"] = round(self.daily_pnl, 2)
+
+        return {
+            "is_running": self.is_running, "symbol": self.symbol, "mode": "TESTNET" if self.is_testnet else "REAL",
+            "price": round(self.current_price, 2), "balance": round(self.balance, 2), "crypto_balance": round(self.crypto_balance, 6),
+            "entry_price": round(self.entry_price, 6), "accumulated_qty": round(self.accumulated_qty, 8),
+            "pnl": round(self.pnl, 2), "daily_pnl": round(self.daily_pnl, 2), "rsi": round(self.rsi, 2), "ema_200": round(self.trend_ema, 2),
+            "macd": round(self.macd, 2), "macd_signal": round(self.macd_signal, 2), "macd_hist": round(self.macd_hist, 2),
+            "bb_upper": round(self.bb_upper, 2), "bb_lower": round(self.bb_lower, 2), "current_vol": round(self.current_vol, 2),
+            "settings": self.get_settings(), "prediction": getattr(self, 'prediction', {}),
+            "stats": stats, "portfolio": self.portfolio.status() if self.portfolio else None
+        }
 
     def get_settings(self):
         """Returns a dictionary of current bot configuration."""
@@ -1210,7 +1537,12 @@ class BinanceBot:
             "rsi_alert_sell_urgent": self.rsi_alert_sell_urgent, "rsi_alert_sell_normal": self.rsi_alert_sell_normal,
             "enable_fast_ema": self.enable_fast_ema, "fast_ema_len": self.fast_ema_len,
             "ema_length": self.ema_length, "macd_signal": self.macd_signal_period,
-            "rsi_trailing_pct": self.rsi_trailing_pct
+            "rsi_trailing_pct": self.rsi_trailing_pct,
+            "strategy_debounce_ms": self.strategy_debounce_ms, "enable_trade_stream": self.enable_trade_stream,
+            "indicator_backend": self.indicator_backend,
+            "portfolio_symbols": self.portfolio_symbols, "max_open_positions": self.max_open_positions,
+            "max_portfolio_exposure_pct": self.max_portfolio_exposure_pct,
+            "portfolio_tick_budget_ms": self.portfolio_tick_budget_ms
         }
 
     def update_settings(self, settings: dict):
@@ -1241,6 +1573,9 @@ class BinanceBot:
                     elif v.lower() == 'false':
                         v = False
 
+                if k == "portfolio_symbols":
+                    v = ",".join(parse_symbols(v))
+
                 # Apply to standard attributes
                 if hasattr(self, k):
                     setattr(self, k, v)
@@ -1250,9 +1585,7 @@ class BinanceBot:
                     setattr(self, mapping[k], v)
 
                 # Persist to DB (state vs setting)
-                state_keys = ["dca_enabled", "sniper_mode", "trailing_enabled",
-                              "enable_buying", "enable_selling"]
-                if k in state_keys:
+                if k in self.STATE_SETTINGS:
                     self.db.save_state(k, v, user_id=self.user_id)
                 else:
                     self.db.save_setting(k, v, user_id=self.user_id)
@@ -1260,9 +1593,7 @@ class BinanceBot:
         # TRIGGER ACTIONS OUTSIDE LOCK
         if symbol_changed:
             self._log(f"🔄 Switching symbol to {new_symbol} (Non-blocking)...")
-            if self.data_client:
-                self.data_client.start_kline_socket(
-                    new_symbol, self.timeframe, self._on_kline_msg)
+            self._subscribe_market()
 
             self._load_symbol_state()
             self._update_account_balances()
@@ -1272,8 +1603,7 @@ class BinanceBot:
         elif data_mode_changed:
             self._log(
                 f"🌐 Data mode changed to {'Real' if new_data_mode else 'Testnet'}...")
-            if self.data_client:
-                self.data_client.stop_all_sockets()
+            self._unsubscribe_market()
 
             if self.is_testnet and new_data_mode:
                 try:
@@ -1286,12 +1616,24 @@ class BinanceBot:
             else:
                 self.data_client = self.client
 
-            if self.data_client:
-                self.data_client.start_kline_socket(
-                    self.symbol, self.timeframe, self._on_kline_msg)
+            self._subscribe_market()
 
             self._update_market_data()
 
+        elif "timeframe" in settings or (self.market_hub and any(
+                k in settings for k in ["ema_length", "fast_ema_len", "macd_fast", "macd_slow", "macd_signal"])):
+            # Follow the new market (and, with a hub, the matching shared indicator engine)
+            self._subscribe_market()
+
+        elif 'enable_trade_stream' in settings:
+            if self.enable_trade_stream:
+                self._start_trade_stream()
+            else:
+                self._stop_trade_stream()
+
+        elif 'portfolio_symbols' in settings and self.client:
+            self._configure_portfolio()
+
         # Update Telegram notifier if config changed
         if 'tg_chat_id' in settings or 'telegram_enabled' in settings:
             self.notifier.update_config(
@@ -1302,10 +1644,14 @@ class BinanceBot:
             self._log(
                 f"✅ Telegram config updated: enabled={self.telegram_enabled}, chat_id={'***' if self.tg_chat_id else 'Not set'}")
 
+        if 'indicator_backend' in settings:
+            if self.indicator_backend not in INDICATOR_BACKENDS:
+                self.indicator_backend = "pandas_ta"
+            self.predictive_engine.indicator_backend = self.indicator_backend
+
         # Trigger immediate data refresh if indicators or timeframe changed
-        if any(k in settings for k in ["ema_length", "fast_ema_len", "timeframe", "macd_fast", "macd_slow", "macd_signal"]):
-            threading.Thread(target=self._update_market_data,
-                             daemon=True).start()
+        if any(k in settings for k in ["indicator_backend", "ema_length", "fast_ema_len", "timeframe", "macd_fast", "macd_slow", "macd_signal"]):
+            self._schedule_market_refresh()
 
         return {"status": "success"}
 
@@ -1313,6 +1659,8 @@ class BinanceBot:
         """Resets the accumulated position state for the current symbol (User requested)."""
         with self.lock:
             self._reset_position_state()
+            if self.portfolio is not None:
+                self.portfolio.reload(self.symbol)
         return {"status": "success"}
 
     def reset_pnl(self):
@@ -1334,7 +1682,9 @@ class BinanceBot:
             self.db.save_state("daily_start_balance",
                                current_equity, user_id=self.user_id)
             self.db.clear_trades(user_id=self.user_id)
-            self.trades = []
+            self.trades.clear()
+            self.trade_stats.reset()
+            self.trades_version += 1
 
             self._log(
                 f"⚠️ PNL RESET: User cleared history at {current_equity:.2f} USDT equity.", "IMPORTANT")
@@ -1344,14 +1694,19 @@ class BinanceBot:
         """Fetches current prices for major trading pairs."""
         if not self.client:
             return {}
+        # We fetch more targets to improve the converter experience
+        targets = [
+            "BTCUSDT", "ETHUSDT", "SOLUSDT", "ADAUSDT", "XRPUSDT",
+            "BNBUSDT", "DOTUSDT", "MATICUSDT", "LINKUSDT", "DOGEUSDT",
+            "AVAXUSDT"
+        ]
+        # Served from the live miniTicker table; REST only until the stream warms up
+        if self.market_data_service:
+            prices = self.market_data_service.get_prices(targets)
+            if prices:
+                return prices
         try:
-            # We fetch more targets to improve the converter experience
             tickers = self.client.client.get_all_tickers()
-            targets = [
-                "BTCUSDT", "ETHUSDT", "SOLUSDT", "ADAUSDT", "XRPUSDT",
-                "BNBUSDT", "DOTUSDT", "MATICUSDT", "LINKUSDT", "DOGEUSDT",
-                "AVAXUSDT"
-            ]
             return {t['symbol']: float(t['price']) for t in tickers if t['symbol'] in targets}
         except Exception:
             return {}
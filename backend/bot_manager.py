@@ -4,6 +4,7 @@ Bot Manager - Handles multiple bot instances for different users
 import threading
 from typing import Dict, Optional
 from .bot_logic import BinanceBot
+from .services.market_hub import get_market_hub
 
 
 class BotManager:
@@ -12,13 +13,15 @@ class BotManager:
     def __init__(self):
         self.bots: Dict[int, BinanceBot] = {}
         self.lock = threading.Lock()
+        # One socket / indicator engine per distinct market, shared by all bots
+        self.market_hub = get_market_hub()
 
     def get_or_create_bot(self, user_id: int, api_key: str, api_secret: str, is_testnet: bool) -> BinanceBot:
         """Get existing bot for user or create new one"""
         with self.lock:
             if user_id not in self.bots:
                 # Create new bot instance for this user
-                bot = BinanceBot(user_id=user_id)
+                bot = BinanceBot(user_id=user_id, market_hub=self.market_hub)
                 # Set credentials
                 result = bot.set_credentials(api_key, api_secret, is_testnet)
                 if result.get("status") == "error":
@@ -50,4 +53,5 @@ class BotManager:
                 if not bot.is_running
             ]
             for user_id in inactive_users:
+                self.market_hub.unsubscribe(user_id)
                 del self.bots[user_id]
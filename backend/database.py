@@ -1,30 +1,166 @@
 import sqlite3
 import json
+import atexit
 import hashlib
+import threading
+import time
+from datetime import datetime
 from cryptography.fernet import Fernet
 import base64
 
+# Persistent connections: one per (thread, database file), shared by every
+# DatabaseManager instance in that thread. sqlite3 connections must not be used
+# from several threads at once, so thread-local is the natural pool here.
+_local = threading.local()
+_initialized = set()
+_init_lock = threading.Lock()
+_journals = {}
+
+
+class StateJournal:
+    """
+    Write-behind queue for hot-path state writes (one per database file).
+
+    put() only records the value in memory; repeated writes to the same key are
+    coalesced and a background thread commits everything pending in a single
+    transaction every `flush_interval` seconds. Pending values are visible to
+    get_state() immediately. flush() writes synchronously and is called before
+    order placement, on disconnect and at process exit.
+    """
+
+    def __init__(self, db: "DatabaseManager", flush_interval: float = 0.5):
+        self.db = db
+        self.flush_interval = flush_interval
+        self._pending = {}  # (user_id, key) -> serialized value
+        self._inflight = {}  # Batch being committed (still readable)
+        self._lock = threading.Lock()
+        # Serializes flushes and synchronous writes so an older queued value can
+        # never land after a newer direct save_state()
+        self.write_lock = threading.RLock()
+        self._wake = threading.Event()
+        self._thread = None
+
+        # Stats
+        self.puts = 0
+        self.flushes = 0
+        self.rows_written = 0
+
+    def put(self, user_id: int, key: str, value: str):
+        with self._lock:
+            self._pending[(user_id, key)] = value
+            self.puts += 1
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="state-journal", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def get(self, user_id: int, key: str):
+        """Returns the unflushed value for a key, or None."""
+        val = self._pending.get((user_id, key))
+        return self._inflight.get((user_id, key)) if val is None else val
+
+    def pending_for(self, user_id: int) -> dict:
+        with self._lock:
+            merged = {**self._inflight, **self._pending}
+        return {k: v for (uid, k), v in merged.items() if uid == user_id}
+
+    def discard(self, user_id: int, key: str):
+        with self._lock:
+            self._pending.pop((user_id, key), None)
+
+    def flush(self):
+        """Commits every pending value in one transaction (no-op if empty)."""
+        with self.write_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                batch = self._inflight = self._pending
+                self._pending = {}
+            try:
+                with self.db._get_connection() as conn:
+                    conn.executemany(
+                        'INSERT OR REPLACE INTO state (user_id, key, value) VALUES (?, ?, ?)',
+                        [(uid, key, val) for (uid, key), val in batch.items()])
+                self.flushes += 1
+                self.rows_written += len(batch)
+            except Exception as e:
+                # Put the batch back (newer values win) and retry on the next cycle
+                with self._lock:
+                    self._pending = {**batch, **self._pending}
+                print(f"State journal flush failed: {e}")
+            finally:
+                self._inflight = {}
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            time.sleep(self.flush_interval)  # Let a burst of writes coalesce
+            self.flush()
+
+
+@atexit.register
+def _flush_journals():
+    for journal in list(_journals.values()):
+        journal.flush()
+
 
 class DatabaseManager:
+    STATEMENT_CACHE = 256  # Prepared statements kept per connection
+
     def __init__(self, db_name="backend/bot_data.db"):
         self.db_name = db_name
-        self._init_db()
-
-        # Enable WAL mode to prevent locking issues and improve concurrency
+        # Schema/migrations only run once per database file and process
+        with _init_lock:
+            if db_name not in _initialized:
+                self._init_db()
+                _initialized.add(db_name)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_name, timeout=10,
+                               cached_statements=self.STATEMENT_CACHE)
+        conn.execute("PRAGMA foreign_keys = ON")
         try:
-            with self._get_connection() as conn:
-                conn.execute("PRAGMA journal_mode=WAL")
-                # Balanced performance/safety
-                conn.execute("PRAGMA synchronous=NORMAL")
+            # WAL prevents locking issues and improves concurrency
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Balanced performance/safety
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA temp_store=MEMORY")
         except Exception as e:
             print(f"Error enabling WAL mode: {e}")
+        return conn
 
     def _get_connection(self):
-        """Returns a sqlite3 connection. WAL mode and foreign keys enabled."""
-        conn = sqlite3.connect(self.db_name, timeout=10)
-        conn.execute("PRAGMA foreign_keys = ON")
+        """
+        Returns this thread's persistent sqlite3 connection (opened on first use,
+        pragmas applied once). `with conn:` commits or rolls back but never closes,
+        so prepared statements stay cached between calls.
+        """
+        conns = getattr(_local, "conns", None)
+        if conns is None:
+            conns = _local.conns = {}
+        conn = conns.get(self.db_name)
+        if conn is None:
+            conn = conns[self.db_name] = self._connect()
         return conn
 
+    @property
+    def journal(self) -> StateJournal:
+        """Process-wide write-behind journal for this database file."""
+        journal = _journals.get(self.db_name)
+        if journal is None:
+            with _init_lock:
+                journal = _journals.setdefault(self.db_name, StateJournal(self))
+        return journal
+
+    def close(self):
+        """Closes the calling thread's connection (reopened lazily if used again)."""
+        conns = getattr(_local, "conns", {})
+        conn = conns.pop(self.db_name, None)
+        if conn is not None:
+            conn.close()
+
     def _get_encryption_key(self, user_id: str) -> bytes:
         """Generate a deterministic encryption key from user_id"""
         # This creates a key from the user_id - simple but functional
@@ -112,6 +248,11 @@ class DatabaseManager:
                     'ALTER TABLE trades ADD COLUMN total REAL DEFAULT 0')
             except sqlite3.OperationalError:
                 pass
+            try:
+                # Tick-to-order stage timings (JSON, see services/latency.py)
+                cursor.execute('ALTER TABLE trades ADD COLUMN latency TEXT')
+            except sqlite3.OperationalError:
+                pass
 
             # Migrate settings table - backup and recreate with new schema
             try:
@@ -214,6 +355,31 @@ class DatabaseManager:
                     )
                 ''')
 
+            # Ranked parameter-sweep results (see optimizer.py)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS optimizer_results (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    run_id TEXT,
+                    user_id INTEGER,
+                    created_at TEXT,
+                    strategy TEXT,
+                    symbol TEXT,
+                    interval TEXT,
+                    window INTEGER,
+                    phase TEXT,
+                    rank INTEGER,
+                    score REAL,
+                    params TEXT,
+                    metrics TEXT
+                )
+            ''')
+            cursor.execute(
+                'CREATE INDEX IF NOT EXISTS idx_optimizer_run ON optimizer_results(run_id, phase, window, rank)')
+            try:
+                cursor.execute('ALTER TABLE optimizer_results ADD COLUMN user_id INTEGER')
+            except sqlite3.OperationalError:
+                pass
+
             conn.commit()
 
     # ========== USER MANAGEMENT ==========
@@ -335,8 +501,8 @@ class DatabaseManager:
         with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                INSERT INTO trades (user_id, time, type, price, qty, pnl, symbol, rsi, commission, total)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                INSERT INTO trades (user_id, time, type, price, qty, pnl, symbol, rsi, commission, total, latency)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 user_id,
                 trade_data.get("time"),
@@ -347,17 +513,19 @@ class DatabaseManager:
                 trade_data.get("symbol", "BTCUSDT"),
                 trade_data.get("rsi", 0.0),
                 trade_data.get("commission", 0.0),
-                trade_data.get("total", 0.0)
+                trade_data.get("total", 0.0),
+                json.dumps(trade_data["latency"]) if trade_data.get("latency") else None
             ))
             conn.commit()
 
-    def get_trades(self, user_id: int = 1, limit=50):
+    def get_trades(self, user_id: int = 1, limit=50, offset=0):
+        """Newest-first page of trades (`offset` skips the most recent ones)."""
         with self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
-                '''SELECT time, type, price, pnl, rsi, qty, commission, total, symbol 
-                   FROM trades WHERE user_id = ? ORDER BY id DESC LIMIT ?''',
-                (user_id, limit)
+                '''SELECT time, type, price, pnl, rsi, qty, commission, total, symbol, latency
+                   FROM trades WHERE user_id = ? ORDER BY id DESC LIMIT ? OFFSET ?''',
+                (user_id, limit, offset)
             )
             rows = cursor.fetchall()
             return [{
@@ -369,9 +537,107 @@ class DatabaseManager:
                 "qty": r[5],
                 "commission": r[6] if len(r) > 6 else 0,
                 "total": r[7] if len(r) > 7 else 0,
-                "symbol": r[8] if len(r) > 8 else "BTCUSDT"
+                "symbol": r[8] if len(r) > 8 else "BTCUSDT",
+                "latency": json.loads(r[9]) if r[9] else None
             } for r in rows]
 
+    def count_trades(self, user_id: int = 1) -> int:
+        with self._get_connection() as conn:
+            return conn.execute(
+                'SELECT COUNT(*) FROM trades WHERE user_id = ?', (user_id,)).fetchone()[0]
+
+    def get_trade_aggregates(self, user_id: int = 1) -> dict:
+        """
+        Inputs for TradeStatsAccumulator, computed in SQL: per-type sums, cumulative
+        PnL peak/drawdown (window functions) and hold times, where a holding period
+        runs from the first BUY after a SELL to the next SELL of the same symbol.
+        """
+        with self._get_connection() as conn:
+            by_type = {}
+            for row in conn.execute('''
+                SELECT type, COUNT(*),
+                       SUM(pnl > 0), SUM(pnl < 0), COALESCE(SUM(pnl), 0),
+                       COALESCE(SUM(CASE WHEN pnl > 0 THEN pnl END), 0),
+                       COALESCE(-SUM(CASE WHEN pnl < 0 THEN pnl END), 0)
+                FROM trades WHERE user_id = ? GROUP BY type
+            ''', (user_id,)):
+                by_type[row[0] or ""] = {
+                    "trades": row[1], "wins": row[2] or 0, "losses": row[3] or 0,
+                    "net_pnl": row[4], "gross_profit": row[5], "gross_loss": row[6]}
+
+            net, peak, max_dd = conn.execute('''
+                SELECT COALESCE(SUM(pnl), 0), COALESCE(MAX(peak), 0), COALESCE(MAX(peak - cum), 0)
+                FROM (
+                    SELECT pnl, cum, MAX(MAX(cum) OVER (ORDER BY id), 0) AS peak
+                    FROM (
+                        SELECT id, pnl, SUM(pnl) OVER (ORDER BY id) AS cum
+                        FROM trades WHERE user_id = ? AND pnl != 0
+                    )
+                )
+            ''', (user_id,)).fetchone()
+
+            hold_seconds, holds = 0.0, 0
+            open_since = {}
+            for symbol, opened, sold in conn.execute('''
+                WITH t AS (
+                    SELECT id, symbol, time, type LIKE 'SELL%' AS is_sell
+                    FROM trades WHERE user_id = ?
+                ), g AS (
+                    SELECT *, COALESCE(SUM(is_sell) OVER (
+                        PARTITION BY symbol ORDER BY id
+                        ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING), 0) AS grp
+                    FROM t
+                )
+                SELECT symbol,
+                       MIN(CASE WHEN NOT is_sell THEN time END),
+                       MAX(CASE WHEN is_sell THEN time END)
+                FROM g GROUP BY symbol, grp
+            ''', (user_id,)):
+                if opened and sold:
+                    hold_seconds += conn.execute(
+                        "SELECT strftime('%s', ?) - strftime('%s', ?)", (sold, opened)).fetchone()[0] or 0
+                    holds += 1
+                elif opened:
+                    open_since[symbol] = opened  # Position still open
+
+            return {"by_type": by_type, "net_pnl": net, "peak_pnl": peak, "max_drawdown": max_dd,
+                    "hold_seconds": float(hold_seconds), "holds": holds, "open_since": open_since}
+
+    # ========== OPTIMIZER RESULTS ==========
+
+    def save_optimizer_results(self, rows: list):
+        """Stores optimizer rows (dicts with run_id, user_id, strategy, symbol, interval, window, phase, rank, score, params, metrics)."""
+        created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._get_connection() as conn:
+            conn.executemany('''
+                INSERT INTO optimizer_results
+                (run_id, user_id, created_at, strategy, symbol, interval, window, phase, rank, score, params, metrics)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [(r["run_id"], r.get("user_id"), created_at, r["strategy"], r["symbol"], r["interval"], r["window"],
+                   r["phase"], r["rank"], r["score"], json.dumps(r["params"]), json.dumps(r["metrics"]))
+                  for r in rows])
+            conn.commit()
+
+    def get_optimizer_results(self, run_id: str, phase: str = None, limit: int = 50, user_id: int = None) -> list:
+        """Ranked rows of one optimizer run (best first within each window), optionally only if owned by `user_id`."""
+        query = '''SELECT window, phase, rank, score, params, metrics, strategy, symbol, interval, created_at
+                   FROM optimizer_results WHERE run_id = ?'''
+        args = [run_id]
+        if user_id is not None:
+            query += " AND user_id = ?"
+            args.append(user_id)
+        if phase:
+            query += " AND phase = ?"
+            args.append(phase)
+        query += " ORDER BY window, phase, rank LIMIT ?"
+        args.append(limit)
+        with self._get_connection() as conn:
+            return [{
+                "window": r[0], "phase": r[1], "rank": r[2], "score": r[3],
+                "params": json.loads(r[4]), "metrics": json.loads(r[5]),
+                "strategy": r[6], "symbol": r[7], "interval": r[8], "created_at": r[9],
+            } for r in conn.execute(query, args).fetchall()]
+
     def clear_trades(self, user_id: int = 1):
         with self._get_connection() as conn:
             cursor = conn.cursor()
@@ -397,32 +663,74 @@ class DatabaseManager:
             row = cursor.fetchone()
             return row[0] if row else default
 
+    def get_all_settings(self, user_id: int = 1) -> dict:
+        """All settings of a user in one query (raw string values)."""
+        with self._get_connection() as conn:
+            rows = conn.execute(
+                'SELECT key, value FROM settings WHERE user_id = ?', (user_id,)).fetchall()
+            return dict(rows)
+
     # ========== STATE ==========
 
+    @staticmethod
+    def _serialize_state(value) -> str:
+        # If value is a dict or list, store as JSON
+        if isinstance(value, (dict, list)):
+            value = json.dumps(value)
+        return str(value)
+
     def save_state(self, key: str, value, user_id: int = 1):
+        journal = _journals.get(self.db_name)
+        if journal is None:
+            self._write_state(key, value, user_id)
+            return
+        with journal.write_lock:
+            journal.discard(user_id, key)
+            self._write_state(key, value, user_id)
+
+    def _write_state(self, key: str, value, user_id: int):
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            # If value is a dict or list, store as JSON
-            if isinstance(value, (dict, list)):
-                value = json.dumps(value)
             cursor.execute(
                 'INSERT OR REPLACE INTO state (user_id, key, value) VALUES (?, ?, ?)',
-                (user_id, key, str(value))
+                (user_id, key, self._serialize_state(value))
             )
             conn.commit()
 
+    def save_state_deferred(self, key: str, value, user_id: int = 1):
+        """Queues a state write on the journal (non-blocking, coalesced per key)."""
+        self.journal.put(user_id, key, self._serialize_state(value))
+
+    def flush_state(self):
+        """Synchronously commits queued state writes (e.g. before placing an order)."""
+        journal = _journals.get(self.db_name)
+        if journal is not None:
+            journal.flush()
+
     def get_state(self, key: str, default=None, is_json=False, user_id: int = 1):
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                'SELECT value FROM state WHERE user_id = ? AND key = ?', (user_id, key))
-            row = cursor.fetchone()
+        journal = _journals.get(self.db_name)
+        val = journal.get(user_id, key) if journal is not None else None
+        if val is None:
+            with self._get_connection() as conn:
+                row = conn.execute(
+                    'SELECT value FROM state WHERE user_id = ? AND key = ?', (user_id, key)).fetchone()
             if not row:
                 return default
             val = row[0]
-            if is_json:
-                try:
-                    return json.loads(val)
-                except json.JSONDecodeError:
-                    return default
-            return val
+        if is_json:
+            try:
+                return json.loads(val)
+            except json.JSONDecodeError:
+                return default
+        return val
+
+    def get_all_state(self, user_id: int = 1) -> dict:
+        """All state values of a user in one query (raw string values)."""
+        with self._get_connection() as conn:
+            rows = conn.execute(
+                'SELECT key, value FROM state WHERE user_id = ?', (user_id,)).fetchall()
+        state = dict(rows)
+        journal = _journals.get(self.db_name)
+        if journal is not None:
+            state.update(journal.pending_for(user_id))
+        return state
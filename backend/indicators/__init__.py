@@ -1,17 +1,36 @@
 from typing import Dict, Any
+import math
 import pandas as pd
-import pandas_ta as ta
 
+from . import kernels
 
-def calculate_rsi_from_df(df: pd.DataFrame, period: int = 14) -> float:
+# Values of the `indicator_backend` setting: pandas_ta (default) or the NumPy kernels
+INDICATOR_BACKENDS = ("pandas_ta", "numpy")
+DEFAULT_BACKEND = "pandas_ta"
+
+
+def _load_pandas_ta():
+    # Imported on first use so the numpy backend never pays for the pandas_ta import
+    import pandas_ta  # noqa: F401 (registers the DataFrame.ta accessor)
+
+
+def _last(values) -> float:
+    val = float(values[-1])
+    return val if not math.isnan(val) else 0.0
+
+
+def calculate_rsi_from_df(df: pd.DataFrame, period: int = 14, backend: str = DEFAULT_BACKEND) -> float:
     """
-    Robust RSI calculation helper using pandas_ta.
+    Robust RSI calculation helper using pandas_ta (or the NumPy kernels).
     Returns 0.0 if calculation fails, ensuring type safety.
     """
     if df is None or df.empty or len(df) <= period:
         return 0.0
 
     try:
+        if backend == "numpy":
+            return _last(kernels.rsi(df['close'], period))
+        _load_pandas_ta()
         rsi = df.ta.rsi(length=period)
         if rsi is not None and not rsi.empty:
             val = float(rsi.iloc[-1])
@@ -22,6 +41,20 @@ def calculate_rsi_from_df(df: pd.DataFrame, period: int = 14) -> float:
     return 0.0
 
 
+def append_chart_indicators(df: pd.DataFrame, ema_lengths, backend: str = DEFAULT_BACKEND):
+    """Adds RSI_14 and EMA_<length> columns (pandas_ta naming) used by the chart and PredictiveEngine."""
+    if backend == "numpy":
+        close = kernels.as_array(df['close'])
+        df['RSI_14'] = kernels.rsi(close, 14)
+        for length in ema_lengths:
+            df[f'EMA_{length}'] = kernels.ema(close, int(length))
+        return
+    _load_pandas_ta()
+    df.ta.rsi(length=14, append=True)
+    for length in ema_lengths:
+        df.ta.ema(length=int(length), append=True)
+
+
 def calculate_indicators(df: pd.DataFrame, settings: Dict[str, Any]) -> Dict[str, float]:
     """
     Calculates technical indicators for the trading bot.
@@ -38,6 +71,10 @@ def calculate_indicators(df: pd.DataFrame, settings: Dict[str, Any]) -> Dict[str
     if df.empty:
         return results
 
+    if settings.get('indicator_backend', DEFAULT_BACKEND) == "numpy":
+        return _finalize(df, _calculate_numpy(df, settings))
+    _load_pandas_ta()
+
     # RSI Calculation (Unified)
     results['rsi'] = calculate_rsi_from_df(df, period=14)
 
@@ -130,6 +167,58 @@ def calculate_indicators(df: pd.DataFrame, settings: Dict[str, Any]) -> Dict[str
         except Exception:
             pass
 
+    return _finalize(df, results)
+
+
+def _calculate_numpy(df: pd.DataFrame, settings: Dict[str, Any]) -> Dict[str, float]:
+    """Same indicators as the pandas_ta path, from contiguous float64 arrays."""
+    results = {}
+    n = len(df)
+    close = kernels.as_array(df['close'])
+    high = kernels.as_array(df['high'])
+    low = kernels.as_array(df['low'])
+    volume = kernels.as_array(df['volume'])
+
+    results['rsi'] = _last(kernels.rsi(close, 14)) if n > 14 else 0.0
+
+    macd_fast = int(settings.get('macd_fast', 12))
+    macd_slow = int(settings.get('macd_slow', 26))
+    macd_signal = int(settings.get('macd_signal', 9))
+    if n > max(macd_fast, macd_slow, macd_signal):
+        macd, hist, signal = kernels.macd(close, macd_fast, macd_slow, macd_signal)
+        results['macd'] = _last(macd)
+        results['macd_hist'] = _last(hist)
+        results['macd_signal'] = _last(signal)
+
+    ema_length = int(settings.get('ema_length', 200))
+    if n > ema_length:
+        results['trend_ema'] = float(kernels.ema(close, ema_length)[-1])
+
+    fast_ema_len = int(settings.get('fast_ema_len', 7))
+    if n > fast_ema_len:
+        results['fast_ema'] = float(kernels.ema(close, fast_ema_len)[-1])
+        results['ema_2'] = float(kernels.ema(close, 2)[-1])
+        results['ema_7'] = float(kernels.ema(close, 7)[-1])
+
+    if n > 20:
+        lower, middle, upper = kernels.bbands(close, 20, 2.0)
+        results['bb_lower'] = float(lower[-1])
+        results['bb_middle'] = float(middle[-1])
+        results['bb_upper'] = float(upper[-1])
+
+        results['vol_sma'] = float(volume[-20:].mean())
+        results['current_vol'] = float(volume[-1])
+        results['vol_prev'] = float(volume[-2])
+
+    if n > 14:
+        results['adx'] = float(kernels.adx(high, low, close, 14)[0][-1])
+        results['atr'] = float(kernels.atr(high, low, close, 14)[-1])
+
+    return results
+
+
+def _finalize(df: pd.DataFrame, results: Dict[str, float]) -> Dict[str, float]:
+    """Derived volatility/lateral flags and NaN cleanup shared by both backends."""
     # Fluctuation Factor (Volatility proxy)
     if len(df) > 20:
         try:
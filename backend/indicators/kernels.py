@@ -0,0 +1,188 @@
+"""
+Indicator Kernels
+Pure-NumPy versions of the pandas_ta indicators used by the bot.
+
+Every kernel takes float64 arrays and works along the last axis, so a 2D array
+of shape (n_series, n_candles) computes all series in one call. Outputs have
+the same length as the input with NaN warm-up values, matching pandas_ta:
+- RMA (RSI, ATR, ADX): ewm(alpha=1/length, adjust=True, min_periods=length)
+- EMA: SMA-seeded ewm(span=length, adjust=False)
+- Bollinger: SMA +/- std * population std (ddof=0)
+- OBV: cumulative signed volume with the first candle counted as up
+"""
+import math
+from typing import Tuple
+
+import numpy as np
+
+# Largest exponent used inside one scan block (beta ** -k must stay well inside float64)
+_MAX_SCALE_LOG = 300.0
+
+
+def as_array(values) -> np.ndarray:
+    """Contiguous float64 view/copy of `values` (Series, list or ndarray)."""
+    return np.ascontiguousarray(np.asarray(values, dtype=np.float64))
+
+
+def _linear_scan(u: np.ndarray, beta: float) -> np.ndarray:
+    """
+    y[t] = u[t] + beta * y[t-1] along the last axis (y[-1] = 0), vectorized.
+
+    Within a block, y[j] = beta**j * cumsum(u[i] * beta**-i) (+ carry), so the
+    recurrence becomes a cumsum. Blocks keep beta**-i finite for any length.
+    """
+    out = np.empty_like(u)
+    n = u.shape[-1]
+    if n == 0:
+        return out
+    if beta <= 0.0:
+        out[...] = u
+        return out
+
+    block = n if beta >= 1.0 else max(1, min(n, int(_MAX_SCALE_LOG / -math.log(beta))))
+    powers = beta ** np.arange(block, dtype=np.float64)
+    carry = np.zeros(u.shape[:-1], dtype=np.float64)
+    for start in range(0, n, block):
+        stop = min(start + block, n)
+        p = powers[:stop - start]
+        acc = np.cumsum(u[..., start:stop] / p, axis=-1)
+        acc += (beta * carry)[..., None]
+        acc *= p
+        out[..., start:stop] = acc
+        carry = acc[..., -1]
+    return out
+
+
+def ewm_mean(x, alpha: float, min_periods: int = 0) -> np.ndarray:
+    """pandas `ewm(alpha=alpha, adjust=True, min_periods=min_periods).mean()` (NaN-aware)."""
+    x = as_array(x)
+    valid = ~np.isnan(x)
+    beta = 1.0 - alpha
+    num = _linear_scan(np.where(valid, x, 0.0), beta)
+    den = _linear_scan(valid.astype(np.float64), beta)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out = num / den
+    out[np.cumsum(valid, axis=-1) < max(min_periods, 1)] = np.nan
+    return out
+
+
+def rma(x, length: int) -> np.ndarray:
+    """Wilder's moving average (pandas_ta `rma`)."""
+    return ewm_mean(x, 1.0 / length, min_periods=length)
+
+
+def sma(x, length: int) -> np.ndarray:
+    """Simple moving average with `length` warm-up (rolling(length).mean())."""
+    x = as_array(x)
+    out = np.full_like(x, np.nan)
+    if x.shape[-1] < length:
+        return out
+    csum = np.cumsum(x, axis=-1)
+    out[..., length - 1] = csum[..., length - 1]
+    out[..., length:] = csum[..., length:] - csum[..., :-length]
+    out[..., length - 1:] /= length
+    return out
+
+
+def ema(x, length: int) -> np.ndarray:
+    """
+    pandas_ta `ema`: SMA of the first `length` valid values, then ewm(adjust=False).
+    Leading NaNs (e.g. the MACD line warm-up) are skipped; gaps after them are not supported.
+    """
+    x = as_array(x)
+    alpha = 2.0 / (length + 1)
+    valid = ~np.isnan(x)
+    rank = np.cumsum(valid, axis=-1)  # 1-based index of each valid value
+
+    # Seed = mean of the first `length` valid values of each series
+    head = np.where(valid & (rank <= length), x, 0.0)
+    seed = head.sum(axis=-1, keepdims=True) / length
+    is_seed = valid & (rank == length)
+
+    u = np.where(is_seed, seed, np.where(valid & (rank > length), alpha * x, 0.0))
+    out = _linear_scan(u, 1.0 - alpha)
+    out[rank < length] = np.nan
+    return out
+
+
+def macd(close, fast: int = 12, slow: int = 26, signal: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Returns (macd, histogram, signal) like pandas_ta MACD_, MACDh_, MACDs_."""
+    close = as_array(close)
+    line = ema(close, fast) - ema(close, slow)
+    sig = ema(line, signal)  # NaN warm-up of `line` is skipped, as in pandas_ta
+    return line, line - sig, sig
+
+
+def rolling_std(x, length: int, ddof: int = 0) -> np.ndarray:
+    """Rolling standard deviation with `length` warm-up."""
+    x = as_array(x)
+    out = np.full_like(x, np.nan)
+    if x.shape[-1] < length:
+        return out
+    windows = np.lib.stride_tricks.sliding_window_view(x, length, axis=-1)
+    out[..., length - 1:] = windows.std(axis=-1, ddof=ddof)
+    return out
+
+
+def bbands(close, length: int = 20, std: float = 2.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Returns (lower, middle, upper) Bollinger Bands (pandas_ta BBL_, BBM_, BBU_)."""
+    close = as_array(close)
+    mid = sma(close, length)
+    dev = std * rolling_std(close, length)
+    return mid - dev, mid, mid + dev
+
+
+def _prev(x: np.ndarray) -> np.ndarray:
+    """x shifted one step right along the last axis (first value NaN)."""
+    out = np.empty_like(x)
+    out[..., 0] = np.nan
+    out[..., 1:] = x[..., :-1]
+    return out
+
+
+def true_range(high, low, close) -> np.ndarray:
+    high, low, close = as_array(high), as_array(low), as_array(close)
+    prev_close = _prev(close)
+    tr = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(prev_close - low)))
+    tr[..., 0] = np.nan
+    return tr
+
+
+def atr(high, low, close, length: int = 14) -> np.ndarray:
+    """Average True Range (RMA of the true range)."""
+    return rma(true_range(high, low, close), length)
+
+
+def adx(high, low, close, length: int = 14) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Returns (adx, dmp, dmn) like pandas_ta ADX_, DMP_, DMN_."""
+    high, low = as_array(high), as_array(low)
+    up = high - _prev(high)
+    dn = _prev(low) - low
+    pos = np.where((up > dn) & (up > 0), up, 0.0)
+    neg = np.where((dn > up) & (dn > 0), dn, 0.0)
+    pos[..., 0] = neg[..., 0] = np.nan
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        k = 100.0 / atr(high, low, close, length)
+        dmp = k * rma(pos, length)
+        dmn = k * rma(neg, length)
+        dx = 100.0 * np.abs(dmp - dmn) / (dmp + dmn)
+    return rma(dx, length), dmp, dmn
+
+
+def rsi(close, length: int = 14) -> np.ndarray:
+    """Relative Strength Index (Wilder)."""
+    close = as_array(close)
+    diff = close - _prev(close)
+    gain = rma(np.where(diff > 0, diff, np.where(np.isnan(diff), np.nan, 0.0)), length)
+    loss = rma(np.where(diff < 0, -diff, np.where(np.isnan(diff), np.nan, 0.0)), length)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return 100.0 * gain / (gain + loss)
+
+
+def obv(close, volume) -> np.ndarray:
+    """On Balance Volume."""
+    close, volume = as_array(close), as_array(volume)
+    sign = np.sign(close - _prev(close))
+    sign[..., 0] = 1.0
+    return np.cumsum(sign * volume, axis=-1)
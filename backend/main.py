@@ -3,7 +3,8 @@ Binance Trading Bot - Stable Version 2.0.0
 (c) 2026 - Samael26/BinanceAgent
 Architecture: FastAPI / React
 """
-from fastapi import FastAPI, HTTPException, Body, Request, Depends
+from fastapi import FastAPI, HTTPException, Body, Request, Depends, WebSocket, WebSocketDisconnect
+from starlette.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 import secrets
 from typing import Optional
@@ -11,6 +12,12 @@ from .bot_manager import BotManager
 from .database import DatabaseManager
 from .services.telegram_manager import TelegramManager
 from .config import TELEGRAM_BOT_TOKEN
+from .services.refresh_pool import get_alert_executor, get_refresh_executor
+from .services.stream_manager import get_stream_manager
+from .services.status_stream import StatusBroadcaster
+from .services.latency import get_latency_tracker
+from .telegram_notifier import get_telegram_dispatcher
+from .predictive_modules import get_prediction_cache
 from contextlib import asynccontextmanager
 
 # Initialize Bot Manager and Database
@@ -66,6 +73,7 @@ async def lifespan(app: FastAPI):
             bot = bot_manager.bots.get(user_id)
             if bot:
                 bot.disconnect()
+    get_stream_manager().close()
     print("Shutdown complete.")
 
 # Initialize App
@@ -232,6 +240,24 @@ def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics")
+def get_metrics(user: dict = Depends(get_current_user)):
+    """
+    Process-level performance metrics (refresh/alert pools, market feeds, streams, latency,
+    Telegram queue, predictions). Requires login: it lists every market being traded.
+    """
+    return {
+        "refresh_pool": get_refresh_executor().get_metrics(),
+        "alert_pool": get_alert_executor().get_metrics(),
+        "market_hub": bot_manager.market_hub.get_stats(),
+        "streams": get_stream_manager().get_stats(),
+        "latency": get_latency_tracker().snapshot(),
+        "telegram": get_telegram_dispatcher().get_stats(),
+        "predictions": get_prediction_cache().get_stats(),
+        "status_stream": status_broadcaster.get_stats(),
+    }
+
+
 @app.get("/api/status")
 def get_bot_status(user: dict = Depends(get_current_user)):
     bot = bot_manager.get_bot(user['id'])
@@ -240,6 +266,42 @@ def get_bot_status(user: dict = Depends(get_current_user)):
     return bot.get_status()
 
 
+@app.get("/api/trades")
+def get_trade_history(offset: int = 0, limit: int = 50, user: dict = Depends(get_current_user)):
+    """Paginated trade history (newest first) beyond the in-memory recent window."""
+    limit = max(1, min(limit, 500))
+    offset = max(0, offset)
+    return {
+        "trades": db.get_trades(user_id=user['id'], limit=limit, offset=offset),
+        "total": db.count_trades(user_id=user['id']),
+        "offset": offset, "limit": limit,
+    }
+
+
+STATUS_PUSH_INTERVAL = 1.0  # Seconds between status deltas per bot
+# One status build per bot and tick, shared by all of that user's dashboards
+status_broadcaster = StatusBroadcaster(bot_manager.get_bot, STATUS_PUSH_INTERVAL)
+
+
+@app.websocket("/ws/status")
+async def status_stream(websocket: WebSocket, token: Optional[str] = None):
+    """Pushes one status snapshot, then deltas (replaces /api/status polling)."""
+    user = await run_in_threadpool(db.get_user_by_token, token) if token else None
+    if not user:
+        await websocket.close(code=4401)
+        return
+    await websocket.accept()
+
+    queue = status_broadcaster.subscribe(user['id'])
+    try:
+        while True:
+            await websocket.send_text(await queue.get())
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        status_broadcaster.unsubscribe(user['id'], queue)
+
+
 @app.get("/api/tickers")
 def get_tickers(user: dict = Depends(get_current_user)):
     bot = bot_manager.get_bot(user['id'])
@@ -298,9 +360,9 @@ def test_connection(user: dict = Depends(get_current_user)):
         # Test connection by getting server time
         server_time = bot.client.client.get_server_time()
 
-        # Get balances
-        usdt_balance = bot.client.get_account_balance("USDT")
-        btc_balance = bot.client.get_account_balance("BTC")
+        # Balances from the stream-fed ledger (no extra REST calls)
+        usdt_balance = bot.balances.free("USDT")
+        btc_balance = bot.balances.free("BTC")
 
         mode = "Testnet (Simulación)" if bot.is_testnet else "⚠️ CUENTA REAL"
 
@@ -313,6 +375,7 @@ def test_connection(user: dict = Depends(get_current_user)):
                 "USDT": usdt_balance,
                 "BTC": btc_balance
             },
+            "ledger": bot.balances.get_stats(),
             "message": f"✅ Conectado exitosamente a Binance ({mode})"
         }
     except Exception as e:
@@ -363,6 +426,30 @@ def get_rsi_snapshot(user: dict = Depends(get_current_user)):
             status_code=500, detail=f"Error calculando RSI: {str(e)}")
 
 
+@app.get("/api/market/scan")
+def get_market_scan(top: int = 100, timeframe: Optional[str] = None, user: dict = Depends(get_current_user)):
+    """
+    Ranked predictive scan of the most traded USDT pairs (one batch pass, cached 60s).
+    Rows: rank, symbol, price, rsi, rvol, breakout_prob, market_score, divergences, fear_greed.
+    """
+    from .market_scan import get_market_scan_service
+
+    bot = bot_manager.get_bot(user['id'])
+    if not bot or not bot.client:
+        raise HTTPException(status_code=404, detail="Bot no inicializado")
+
+    client = bot.data_client if hasattr(
+        bot, 'data_client') and bot.data_client else bot.client
+    service = get_market_scan_service()
+    try:
+        symbols = service.top_symbols(client, max(1, min(top, 200)))
+        return service.scan(client, symbols, timeframe or bot.timeframe)
+    except Exception as e:
+        print(f"Error en market scan: {e}")
+        raise HTTPException(
+            status_code=500, detail=f"Error en escaneo de mercado: {str(e)}")
+
+
 @app.post("/api/reset")
 def reset_position(user: dict = Depends(get_current_user)):
     bot = bot_manager.get_bot(user['id'])
@@ -371,6 +458,78 @@ def reset_position(user: dict = Depends(get_current_user)):
     return bot.reset_position()
 
 
+@app.post("/api/backtest")
+def run_backtest(params: dict = Body(default={}), user: dict = Depends(get_current_user)):
+    """
+    Replays stored klines through a strategy. Defaults to the bot's symbol,
+    timeframe, active strategy and settings; `settings` overrides individual keys.
+    """
+    from .backtester import Backtester
+
+    bot = bot_manager.get_bot(user['id'])
+    if not bot:
+        raise HTTPException(status_code=404, detail="Bot no inicializado")
+
+    client = bot.data_client or bot.client
+    network = client.network if client else "mainnet"
+    try:
+        tester = Backtester(
+            params.get("strategy", bot.active_strategy),
+            settings={**bot.get_settings(), **params.get("settings", {})},
+            initial_balance=float(params.get("initial_balance", 1000.0)))
+        result = tester.run_stored(
+            network, params.get("symbol", bot.symbol), params.get("timeframe", bot.timeframe),
+            params.get("start_ms"), params.get("end_ms"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    result["trades"] = result["trades"][-200:]  # Keep the response small
+    return result
+
+
+@app.post("/api/optimize")
+def run_optimizer(params: dict = Body(default={}), user: dict = Depends(get_current_user)):
+    """
+    Parameter sweep over stored klines. `space` maps setting names to value lists
+    (grid), or lists and {"min", "max"} ranges with `samples` (random search); `train`/`test`
+    candle counts enable walk-forward windows. Results are stored by run_id.
+    """
+    from .optimizer import DEFAULT_SPACE, Optimizer
+
+    bot = bot_manager.get_bot(user['id'])
+    if not bot:
+        raise HTTPException(status_code=404, detail="Bot no inicializado")
+
+    client = bot.data_client or bot.client
+    network = client.network if client else "mainnet"
+    space = params.get("space") or DEFAULT_SPACE
+    try:
+        if params.get("samples"):
+            ranges = {k: (v["min"], v["max"]) if isinstance(v, dict) else v for k, v in space.items()}
+            candidates = Optimizer.random(ranges, int(params["samples"]), params.get("seed"))
+        else:
+            candidates = Optimizer.grid(space)
+        optimizer = Optimizer(
+            params.get("strategy", bot.active_strategy), base_settings=bot.get_settings(),
+            initial_balance=float(params.get("initial_balance", 1000.0)),
+            workers=params.get("workers"), objective=params.get("objective", "net_pnl"), db=db,
+            user_id=user['id'])
+        return optimizer.run_stored(
+            network, params.get("symbol", bot.symbol), params.get("timeframe", bot.timeframe),
+            candidates, params.get("start_ms"), params.get("end_ms"),
+            train=params.get("train"), test=params.get("test"), top=int(params.get("top", 20)))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/api/optimize/{run_id}")
+def get_optimizer_run(run_id: str, phase: str = None, limit: int = 50, user: dict = Depends(get_current_user)):
+    rows = db.get_optimizer_results(run_id, phase, min(max(limit, 1), 500), user_id=user['id'])
+    if not rows:
+        raise HTTPException(status_code=404, detail="Optimización no encontrada")
+    return rows
+
+
 @app.post("/api/reset_pnl")
 def reset_pnl(user: dict = Depends(get_current_user)):
     bot = bot_manager.get_bot(user['id'])
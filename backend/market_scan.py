@@ -0,0 +1,117 @@
+"""
+Market Scan Module
+Ranks many trading pairs with one batch predictive pass.
+
+Klines for every symbol are fetched concurrently through the shared kline store
+(delta fetch, so after the first scan each symbol costs one small request), the
+closed candles are stacked into aligned (symbols x candles) matrices and
+PredictiveEngine.scan computes RVOL, breakout probability, market score,
+divergences and fear/greed for all of them at once.
+"""
+from .predictive_modules import PredictiveEngine
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Leveraged tokens and stablecoin pairs carry no useful trend signal
+_EXCLUDED_SUFFIXES = ("UPUSDT", "DOWNUSDT", "BULLUSDT", "BEARUSDT")
+_STABLECOINS = {"USDCUSDT", "FDUSDUSDT", "TUSDUSDT", "BUSDUSDT", "USDPUSDT", "DAIUSDT", "EURUSDT"}
+
+
+class MarketScanService:
+    """Concurrent kline fetch + one vectorized scan, cached per timeframe."""
+
+    MAX_WORKERS = 8  # Stays below the HTTP connection pool of the Binance client session (10)
+    KLINE_LIMIT = 500  # Enough for EMA 200 warm-up
+    MIN_CANDLES = 50
+    TIMEOUT = 30.0  # Upper bound for the fetch phase of one scan (seconds)
+    TTL = 60  # Seconds a scan result is reused
+    TOP_SYMBOLS_TTL = 900
+
+    def __init__(self):
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.MAX_WORKERS, thread_name_prefix="market-scan")
+        self._lock = threading.Lock()
+        self._scan_locks: Dict[Tuple, threading.Lock] = {}
+        self._results: Dict[Tuple, Tuple[float, List[Dict]]] = {}
+        self._top: Dict[str, Tuple[float, List[str]]] = {}
+        self.engine = PredictiveEngine(indicator_backend="numpy")
+
+    def top_symbols(self, client, n: int = 100, quote: str = "USDT") -> List[str]:
+        """Most traded `quote` pairs by 24h quote volume (one ticker call, cached)."""
+        network = getattr(client, "network", "mainnet")
+        cached = self._top.get(network)
+        if cached is None or time.time() - cached[0] > self.TOP_SYMBOLS_TTL:
+            tickers = client.client.get_ticker()
+            ranked = sorted(
+                (t for t in tickers
+                 if t['symbol'].endswith(quote) and t['symbol'] not in _STABLECOINS
+                 and not t['symbol'].endswith(_EXCLUDED_SUFFIXES) and float(t.get('quoteVolume', 0)) > 0),
+                key=lambda t: float(t['quoteVolume']), reverse=True)
+            cached = (time.time(), [t['symbol'] for t in ranked])
+            self._top[network] = cached
+        return cached[1][:n]
+
+    def load_matrix(self, client, symbols: List[str], timeframe: str):
+        """
+        Fetches closed candles for `symbols` and stacks them aligned on open time.
+        Symbols that are stale (last closed candle older than the majority's) or
+        too short are left out. Returns (symbols, high, low, close, volume).
+        """
+        futures = [(s, self._pool.submit(client.get_kline_rows, s, timeframe, self.KLINE_LIMIT))
+                   for s in symbols]
+        deadline = time.monotonic() + self.TIMEOUT
+        series = {}
+        for symbol, future in futures:
+            try:
+                rows = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeout:
+                print(f"[Market Scan] Timeout fetching {symbol}")
+                continue
+            except Exception as e:
+                print(f"[Market Scan] Error fetching {symbol}: {e}")
+                continue
+            closed = rows[:-1]  # Last row is the live candle
+            if len(closed) >= self.MIN_CANDLES:
+                series[symbol] = closed
+
+        if not series:
+            return [], None, None, None, None
+        latest = Counter(rows[-1][0] for rows in series.values()).most_common(1)[0][0]
+        kept = [s for s in symbols if s in series and series[s][-1][0] == latest]
+        length = min(len(series[s]) for s in kept)
+        # Store rows are (open_time, open, high, low, close, volume, close_time): keep OHLCV
+        stacked = np.array([[r[1:6] for r in series[s][-length:]] for s in kept], dtype=np.float64)
+        return kept, stacked[:, :, 1], stacked[:, :, 2], stacked[:, :, 3], stacked[:, :, 4]
+
+    def scan(self, client, symbols: List[str], timeframe: str = "1m") -> List[Dict]:
+        """Ranked scan table for `symbols`; concurrent callers share one computation."""
+        key = (getattr(client, "network", "mainnet"), timeframe, tuple(symbols))
+        with self._lock:
+            scan_lock = self._scan_locks.setdefault(key, threading.Lock())
+        with scan_lock:
+            cached = self._results.get(key)
+            if cached is not None and time.time() - cached[0] < self.TTL:
+                return cached[1]
+            kept, high, low, close, volume = self.load_matrix(client, symbols, timeframe)
+            table = self.engine.scan(kept, high, low, close, volume) if kept else []
+            self._results[key] = (time.time(), table)
+            return table
+
+
+_service: Optional[MarketScanService] = None
+_service_lock = threading.Lock()
+
+
+def get_market_scan_service() -> MarketScanService:
+    """Returns the process-wide market scan service (created on first use)."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = MarketScanService()
+    return _service
@@ -0,0 +1,300 @@
+"""
+Optimizer Module
+Grid/random parameter sweeps and walk-forward optimization on a process pool.
+
+The kline series and its indicator arrays are computed once and copied into a
+single shared-memory block; workers map it as NumPy views (nothing large is
+pickled per task), replay batches of candidates with the Backtester and send
+back only summary metrics, so throughput scales with the number of cores.
+
+Walk-forward: each window optimizes on its train slice, then the best
+candidate is replayed on the following (unseen) test slice. Ranked rows are
+stored in the `optimizer_results` table.
+
+Usage:
+    opt = Optimizer("rsi_rebound", base_settings=bot.get_settings(), db=db)
+    candidates = Optimizer.grid({"buy_rsi": [20, 25, 30], "take_profit_pct": [1.0, 1.5]})
+    report = opt.run_stored("mainnet", "BTCUSDT", "1m", candidates, train=43_200, test=10_080)
+"""
+import itertools
+import multiprocessing
+import os
+import random
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from .backtester import DEFAULT_SETTINGS, INDICATOR_KEYS, Backtester, precompute_indicators
+    from .services.kline_store import get_kline_store
+except ImportError:
+    from backtester import DEFAULT_SETTINGS, INDICATOR_KEYS, Backtester, precompute_indicators
+    from services.kline_store import get_kline_store
+
+# Settings users tune by hand; a reasonable default search space
+DEFAULT_SPACE: Dict[str, Sequence] = {
+    "buy_rsi": [20, 25, 30, 35],
+    "sell_rsi": [65, 70, 75, 80],
+    "stop_loss_pct": [1.5, 2.5, 3.2],
+    "take_profit_pct": [0.8, 1.3, 2.0],
+    "rsi_trailing_pct": [0.5, 0.8, 1.2],
+    "dca_step_pct": [1.0, 1.5, 2.5],
+}
+
+# Changing these needs different indicator arrays (recomputed inside the worker)
+INDICATOR_PARAMS = ("ema_length", "fast_ema_len", "macd_fast", "macd_slow", "macd_signal")
+
+OHLCV_COLUMNS = ("time", "high", "low", "close", "volume")
+SHARED_COLUMNS = OHLCV_COLUMNS + INDICATOR_KEYS + ("is_lateral",)
+
+METRIC_KEYS = ("net_pnl", "return_pct", "commission_paid", "candles")
+
+Window = Tuple[int, int]
+
+# Per-process view of the shared block (set by _init_worker)
+_worker: Dict[str, Any] = {}
+
+
+def _views(block: np.ndarray) -> Dict[str, np.ndarray]:
+    arrays = {name: block[i] for i, name in enumerate(SHARED_COLUMNS)}
+    arrays["is_lateral"] = arrays["is_lateral"] != 0
+    return arrays
+
+
+def _init_worker(shm_name: Optional[str], shape, block: Optional[np.ndarray], context: Dict[str, Any]):
+    """Pool initializer: maps the shared block once per worker process."""
+    if shm_name is not None:
+        shm = shared_memory.SharedMemory(name=shm_name)
+        block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        _worker["shm"] = shm  # Keep the mapping alive for the worker's lifetime
+    _worker["arrays"] = _views(block)
+    _worker["context"] = context
+    _worker["cache"] = {}
+
+
+def _indicator_arrays(settings: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """Shared arrays, or a per-worker recompute when indicator parameters differ."""
+    arrays = _worker["arrays"]
+    base = _worker["context"]["base_settings"]
+    key = tuple(int(settings[p]) for p in INDICATOR_PARAMS)
+    if key == tuple(int(base[p]) for p in INDICATOR_PARAMS):
+        return arrays
+    cache = _worker["cache"]
+    if key not in cache:
+        cache[key] = precompute_indicators(
+            arrays["high"], arrays["low"], arrays["close"], arrays["volume"], settings)
+    return cache[key]
+
+
+def _metrics(result: Dict[str, Any]) -> Dict[str, Any]:
+    stats = result["stats"]
+    metrics = {k: result[k] for k in METRIC_KEYS}
+    metrics.update(trades=stats["total_trades"], wins=stats["wins"], losses=stats["losses"],
+                   win_rate=stats["win_rate"], profit_factor=stats["profit_factor"],
+                   max_drawdown=stats["max_drawdown"])
+    return metrics
+
+
+def _evaluate_batch(batch: List[Tuple[int, Dict[str, Any]]], windows: List[Window]):
+    """Worker task: replays each (index, params) candidate on every window."""
+    ctx = _worker["context"]
+    shared = _worker["arrays"]
+    out = []
+    for index, params in batch:
+        settings = {**ctx["base_settings"], **params}
+        tester = Backtester(ctx["strategy"], settings=settings,
+                            initial_balance=ctx["initial_balance"], symbol=ctx["symbol"])
+        arrays = _indicator_arrays(settings)
+        out.append((index, [
+            _metrics(tester.replay(shared["time"], shared["close"], arrays, start, stop))
+            for start, stop in windows]))
+    return out
+
+
+class Optimizer:
+    """Fans candidate settings out over a process pool and ranks them per window."""
+
+    BATCHES_PER_WORKER = 4  # Small batches keep all cores busy until the end
+
+    def __init__(self, strategy: str = "rsi_rebound", base_settings: Optional[Dict[str, Any]] = None,
+                 initial_balance: float = 1000.0, workers: Optional[int] = None,
+                 objective: str = "net_pnl", min_trades: int = 1, db=None, user_id: Optional[int] = None):
+        self.strategy = strategy
+        self.base_settings = {**DEFAULT_SETTINGS, **(base_settings or {})}
+        self.initial_balance = float(initial_balance)
+        cores = os.cpu_count() or 1
+        self.workers = max(1, min(int(workers or cores), cores))
+        self.objective = objective
+        self.min_trades = min_trades
+        self.db = db
+        self.user_id = user_id  # Owner of the stored results
+
+    # ========== CANDIDATES & WINDOWS ==========
+
+    @staticmethod
+    def grid(space: Dict[str, Sequence]) -> List[Dict[str, Any]]:
+        """Every combination of the listed values."""
+        keys = list(space)
+        return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+    @staticmethod
+    def random(space: Dict[str, Any], n: int, seed: Optional[int] = None) -> List[Dict[str, Any]]:
+        """`n` samples: lists are sampled as choices, (low, high) tuples uniformly."""
+        rng = random.Random(seed)
+        candidates = []
+        for _ in range(n):
+            params = {}
+            for key, spec in space.items():
+                if isinstance(spec, tuple):
+                    low, high = spec
+                    params[key] = rng.randint(low, high) if isinstance(low, int) and isinstance(
+                        high, int) else round(rng.uniform(low, high), 3)
+                else:
+                    params[key] = rng.choice(list(spec))
+            candidates.append(params)
+        return candidates
+
+    @staticmethod
+    def walk_forward_windows(n: int, train: int, test: int, step: Optional[int] = None) -> List[Tuple[Window, Window]]:
+        """Rolling ((train_start, train_end), (test_start, test_end)) index windows."""
+        step = step or test
+        windows = []
+        start = 0
+        while start + train + test <= n:
+            windows.append(((start, start + train), (start + train, start + train + test)))
+            start += step
+        return windows
+
+    # ========== RUNNING ==========
+
+    def _score(self, metrics: Dict[str, Any]) -> Optional[float]:
+        if metrics["trades"] < self.min_trades:
+            return None
+        value = metrics.get(self.objective)
+        if value is None and self.objective == "profit_factor":
+            return float("inf") if metrics["wins"] else None  # No losing trades
+        return value
+
+    def _rank(self, candidates, scored: Dict[int, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        rows = [{"params": candidates[i], "metrics": m, "score": self._score(m)} for i, m in scored.items()]
+        rows.sort(key=lambda r: (r["score"] is not None, r["score"] or 0.0), reverse=True)
+        for rank, row in enumerate(rows, 1):
+            row["rank"] = rank
+        return rows
+
+    def _map(self, executor, jobs: List[Tuple[List[Tuple[int, Dict[str, Any]]], List[Window]]]):
+        if executor is None:
+            for batch, windows in jobs:
+                yield from _evaluate_batch(batch, windows)
+            return
+        futures = [executor.submit(_evaluate_batch, batch, windows) for batch, windows in jobs]
+        for future in futures:
+            yield from future.result()
+
+    def run(self, times, high, low, close, volume, candidates: List[Dict[str, Any]],
+            windows: Optional[List[Tuple[Window, Window]]] = None,
+            symbol: str = "", interval: str = "", top: int = 20) -> Dict[str, Any]:
+        """
+        Evaluates `candidates` on the whole series, or on each walk-forward window
+        (train ranking + out-of-sample replay of the winner) when `windows` is given.
+        """
+        if not candidates:
+            raise ValueError("No candidates to evaluate")
+        started = time.perf_counter()
+        columns = {"time": times, "high": high, "low": low, "close": close, "volume": volume}
+        columns.update(precompute_indicators(high, low, close, volume, self.base_settings))
+        n = len(columns["close"])
+
+        context = {"strategy": self.strategy, "base_settings": self.base_settings,
+                   "initial_balance": self.initial_balance, "symbol": symbol}
+        train_windows = [w[0] for w in windows] if windows else [(0, n)]
+
+        shm = None
+        executor = None
+        try:
+            if self.workers > 1:
+                shm = shared_memory.SharedMemory(create=True, size=len(SHARED_COLUMNS) * n * 8)
+                block = np.ndarray((len(SHARED_COLUMNS), n), dtype=np.float64, buffer=shm.buf)
+                for i, name in enumerate(SHARED_COLUMNS):
+                    block[i] = columns[name]
+                # Spawned workers: forking the server would copy its threads and locks
+                executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(shm.name, block.shape, None, context))
+            else:
+                block = np.vstack([np.asarray(columns[name], dtype=np.float64) for name in SHARED_COLUMNS])
+                _init_worker(None, block.shape, block, context)
+
+            indexed = list(enumerate(candidates))
+            size = max(1, len(indexed) // (self.workers * self.BATCHES_PER_WORKER))
+            jobs = [(indexed[i:i + size], train_windows) for i in range(0, len(indexed), size)]
+            per_window: List[Dict[int, Dict[str, Any]]] = [{} for _ in train_windows]
+            for index, metrics in self._map(executor, jobs):
+                for w, m in enumerate(metrics):
+                    per_window[w][index] = m
+            ranked = [self._rank(candidates, scored) for scored in per_window]
+
+            tests = []
+            if windows:
+                best = [(w, candidates.index(r[0]["params"])) for w, r in enumerate(ranked)]
+                test_jobs = [([(i, candidates[i])], [windows[w][1]]) for w, i in best]
+                for (w, _), (index, metrics) in zip(best, self._map(executor, test_jobs)):
+                    tests.append({"window": w, "params": candidates[index], "metrics": metrics[0],
+                                  "score": self._score(metrics[0]), "rank": 1})
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+
+        elapsed = time.perf_counter() - started
+        evaluations = len(candidates) * len(train_windows) + len(tests)
+        report = {
+            "run_id": uuid.uuid4().hex[:12],
+            "strategy": self.strategy,
+            "symbol": symbol,
+            "interval": interval,
+            "objective": self.objective,
+            "candidates": len(candidates),
+            "windows": len(train_windows),
+            "workers": self.workers,
+            "evaluations": evaluations,
+            "elapsed_sec": round(elapsed, 3),
+            "evals_per_sec": round(evaluations / elapsed, 2) if elapsed > 0 else 0.0,
+            "ranked": [rows[:top] for rows in ranked],
+            "walk_forward": tests,
+        }
+        if tests:
+            report["out_of_sample_pnl"] = round(sum(t["metrics"]["net_pnl"] for t in tests), 4)
+        if self.db is not None:
+            self._save(report)
+        return report
+
+    def run_stored(self, network: str, symbol: str, interval: str, candidates: List[Dict[str, Any]],
+                   start_ms: Optional[int] = None, end_ms: Optional[int] = None,
+                   train: Optional[int] = None, test: Optional[int] = None, **kwargs) -> Dict[str, Any]:
+        """Optimizes over candles persisted by the kline store (walk-forward if train/test sizes are given)."""
+        rows = get_kline_store().load_range(network, symbol, interval, start_ms, end_ms)
+        if not rows:
+            raise ValueError(f"No stored klines for {symbol} {interval} ({network})")
+        data = np.asarray(rows, dtype=np.float64)
+        windows = self.walk_forward_windows(len(data), train, test) if train and test else None
+        if train and test and not windows:
+            raise ValueError("Not enough candles for one walk-forward window")
+        return self.run(data[:, 0] // 1000, data[:, 2], data[:, 3], data[:, 4], data[:, 5],
+                        candidates, windows=windows, symbol=symbol, interval=interval, **kwargs)
+
+    def _save(self, report: Dict[str, Any]):
+        phase = "train" if report["walk_forward"] else "full"
+        base = {k: report[k] for k in ("run_id", "strategy", "symbol", "interval")}
+        base["user_id"] = self.user_id
+        rows = [{**base, **row, "window": w, "phase": phase}
+                for w, ranked in enumerate(report["ranked"]) for row in ranked]
+        rows += [{**base, **row, "phase": "test"} for row in report["walk_forward"]]
+        self.db.save_optimizer_results(rows)
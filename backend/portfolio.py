@@ -0,0 +1,448 @@
+"""
+Portfolio Module
+Runs the bot's active strategy on several symbols at once.
+
+Every symbol gets its own position book (entry, quantity, DCA orders, trailing
+high), persisted under the same symbol-scoped state keys the single-symbol bot
+uses, so a symbol keeps its position when it moves in or out of the portfolio.
+Indicators come from the bot's streaming indicator engine (O(1) per closed
+kline), balances from the user-stream balance ledger, so a pass over N
+symbols is pure computation: signals for all symbols are decided inside one
+tick budget, then the resulting orders are sent concurrently.
+
+Portfolio-level limits replace the BTC/SOL mutual exclusion rule:
+    max_open_positions          symbols holding a position at the same time
+    max_portfolio_exposure_pct  position value / (position value + free quote)
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from .services.latency import TickTrace, get_latency_tracker
+
+QUOTE_ASSET = "USDT"
+
+
+def parse_symbols(value) -> List[str]:
+    """'btcusdt, ETHUSDT' or a list -> ['BTCUSDT', 'ETHUSDT'] (order kept, no duplicates)."""
+    items = value.split(",") if isinstance(value, str) else (value or [])
+    symbols = []
+    for item in items:
+        symbol = str(item).strip().upper()
+        if symbol and symbol not in symbols:
+            symbols.append(symbol)
+    return symbols
+
+
+class SymbolBook:
+    """Position state of one symbol (the per-symbol twin of the bot's own fields)."""
+
+    FIELDS = ("entry_price", "position_orders", "accumulated_qty",
+              "highest_price", "open_position", "last_buy_price")
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.asset = symbol.replace(QUOTE_ASSET, "")
+        self.reset()
+
+    def reset(self):
+        self.entry_price = 0.0
+        self.position_orders = 0
+        self.accumulated_qty = 0.0
+        self.highest_price = 0.0
+        self.open_position = False
+        self.last_buy_price = 0.0
+
+    def load(self, state: Dict[str, str]):
+        """Reads the book from the raw state table (DatabaseManager.get_all_state)."""
+        def value(key, default):
+            return state.get(f"{key}_{self.symbol}", default)
+
+        self.entry_price = float(value("entry_price", 0.0) or 0.0)
+        self.position_orders = int(float(value("position_orders", 0) or 0))
+        self.accumulated_qty = float(value("accumulated_qty", 0.0) or 0.0)
+        self.highest_price = float(value("highest_price", 0.0) or 0.0)
+        self.open_position = value("open_position", False) in (True, "True")
+        self.last_buy_price = float(value("last_buy_price", 0.0) or 0.0)
+
+    def save(self, db, user_id: int):
+        for key in self.FIELDS:
+            db.save_state_deferred(f"{key}_{self.symbol}", getattr(self, key), user_id=user_id)
+
+    def apply_fill(self, side: str, executed_qty: float, price: float, fee_pct: float = 0.0) -> float:
+        """Updates the position with a fill; returns the realized PnL of a SELL."""
+        if side == "BUY":
+            qty = executed_qty * (1 - fee_pct / 100)
+            new_qty = self.accumulated_qty + qty
+            self.entry_price = (self.accumulated_qty * self.entry_price + price * qty) / new_qty \
+                if new_qty > 0 else price
+            self.accumulated_qty = new_qty
+            self.position_orders += 1
+            self.open_position = True
+            self.highest_price = 0.0  # Trailing restarts from the new entry level
+            self.last_buy_price = price
+            return 0.0
+
+        pnl = (price - self.entry_price) * executed_qty if self.entry_price > 0 else 0.0
+        self.accumulated_qty = max(0.0, self.accumulated_qty - executed_qty)
+        if self.accumulated_qty * price < 1.0:  # Remaining dust/fees: position closed
+            self.reset()
+        return pnl
+
+    def position_value(self, price: float) -> float:
+        return self.accumulated_qty * price
+
+
+class PortfolioEngine:
+    """Per-symbol books, prices and indicators of one bot plus the portfolio pass."""
+
+    ORDER_WORKERS = 4
+
+    def __init__(self, bot, symbols: List[str]):
+        self.bot = bot
+        self.symbols: List[str] = []
+        self.books: Dict[str, SymbolBook] = {}
+        self._prices: Dict[str, float] = {}
+        self._indicators: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._subscribed: Dict[str, tuple] = {}  # symbol -> (network, timeframe) of its feed
+        self._cursor = 0  # First symbol of the next pass (round-robin after a budget overrun)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self.stats = {"passes": 0, "overruns": 0, "deferred": 0, "blocked": 0, "orders": 0}
+        self.set_symbols(symbols)
+
+    # ========== SYMBOLS & MARKET DATA ==========
+
+    def set_symbols(self, symbols: List[str]):
+        """Loads books for new symbols; books of removed symbols are dropped (state stays in the DB)."""
+        state = self.bot.db.get_all_state(user_id=self.bot.user_id)
+        with self._lock:
+            for symbol in symbols:
+                if symbol not in self.books:
+                    book = SymbolBook(symbol)
+                    book.load(state)
+                    self.books[symbol] = book
+            for symbol in list(self.books):
+                if symbol not in symbols:
+                    del self.books[symbol]
+                    self._prices.pop(symbol, None)
+                    self._indicators.pop(symbol, None)
+            self.symbols = list(symbols)
+            self._cursor = 0
+
+    def subscribe(self, dropped: bool = False):
+        """
+        Kline feeds for every portfolio symbol except the bot's own (already subscribed),
+        all routed through the bot's kline handler, plus indicator seeding.
+        `dropped`: the caller just closed this client's kline sockets (exclusive subscribe).
+        """
+        bot = self.bot
+        if dropped:
+            self._subscribed.clear()
+        network = bot._market_network()
+        wanted = {s: (network, bot.timeframe) for s in self.symbols if s != bot.symbol}
+        if any(wanted.get(s) != market for s, market in self._subscribed.items()):
+            self.unsubscribe()  # Symbol set, timeframe or network changed: resubscribe
+        for symbol, market in wanted.items():
+            if symbol in self._subscribed:
+                continue
+            if bot.market_hub:
+                bot.market_hub.subscribe_klines(
+                    network, symbol, bot.timeframe, self.subscriber_id, bot._on_kline_msg)
+            elif bot.data_client:
+                bot.data_client.start_kline_socket(
+                    symbol, bot.timeframe, bot._on_kline_msg, exclusive=False)
+            else:
+                continue
+            self._subscribed[symbol] = market
+        self.seed()
+
+    @property
+    def subscriber_id(self):
+        return ("portfolio", self.bot.user_id)
+
+    def unsubscribe(self):
+        """Releases the extra kline feeds."""
+        if self.bot.market_hub:
+            self.bot.market_hub.unsubscribe(self.subscriber_id)
+        elif self.bot.data_client:
+            for symbol, market in self._subscribed.items():
+                self.bot.data_client.stop_socket(f"kline_{symbol}_{market[1]}")
+        self._subscribed.clear()
+
+    def seed(self):
+        """Seeds the indicator state of every symbol that has none yet (concurrent REST loads)."""
+        bot = self.bot
+        settings = bot.get_settings()
+        missing = [s for s in self.symbols
+                   if not bot.indicator_engine.is_ready(s, bot.timeframe, settings)]
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(len(missing), self.ORDER_WORKERS),
+                                    thread_name_prefix="portfolio-seed") as pool:
+                list(pool.map(self._seed_symbol, missing))
+        for symbol in self.symbols:
+            if symbol not in self._indicators:
+                indicators = bot.indicator_engine.peek(symbol, bot.timeframe)
+                if indicators is not None:
+                    with self._lock:
+                        self._indicators[symbol] = indicators
+
+    def _seed_symbol(self, symbol: str):
+        bot = self.bot
+        try:
+            df = bot.data_client.get_historical_klines(symbol, bot.timeframe, limit=1000)
+            if df.empty:
+                return
+            # Last row is the live candle: seed with closed candles only
+            indicators = bot.indicator_engine.seed(
+                symbol, bot.timeframe, df.iloc[:-1], bot.get_settings())
+            with self._lock:
+                self._indicators[symbol] = indicators
+                self._prices.setdefault(symbol, float(df['close'].iloc[-1]))
+        except Exception as e:
+            bot._log(f"Portfolio seed failed for {symbol}: {e}", "WARNING")
+
+    def on_kline(self, msg) -> bool:
+        """Price/indicator update from a kline message; False if the symbol is not in the portfolio."""
+        symbol = msg.get('s')
+        if symbol not in self.books:
+            return False
+        k = msg['k']
+        with self._lock:
+            self._prices[symbol] = float(k['c'])
+        if k['x']:
+            bot = self.bot
+            indicators = bot.indicator_engine.update(symbol, bot.timeframe, {
+                "time": int(k['t']) // 1000, "high": float(k['h']), "low": float(k['l']),
+                "close": float(k['c']), "volume": float(k['v'])})
+            if indicators is None:
+                bot._log(f"Portfolio: {symbol} not seeded yet, seeding", "DEBUG")
+                threading.Thread(target=self._seed_symbol, args=(symbol,), daemon=True).start()
+            else:
+                with self._lock:
+                    self._indicators[symbol] = indicators
+        return True
+
+    # ========== EVALUATION ==========
+
+    def _exposure(self, prices: Dict[str, float]) -> float:
+        return sum(b.position_value(prices.get(s, 0.0)) for s, b in self.books.items())
+
+    def evaluate(self, trace: Optional[TickTrace] = None):
+        """
+        One portfolio pass (caller holds bot.lock). Signals are decided for the
+        symbols in round-robin order until the tick budget is spent; symbols left
+        over start the next pass. Orders then go out concurrently.
+        """
+        bot = self.bot
+        started = time.perf_counter()
+        budget = bot.portfolio_tick_budget_ms / 1000
+        strategy = bot._active_strategy()
+        settings = bot.get_settings()
+        with self._lock:
+            prices = dict(self._prices)
+            indicators_by_symbol = dict(self._indicators)
+
+        sells, buys = [], []
+        order = self.symbols[self._cursor:] + self.symbols[:self._cursor]
+        evaluated = 0
+        for symbol in order:
+            if evaluated and time.perf_counter() - started > budget:
+                break
+            evaluated += 1
+            signal = self._decide(symbol, strategy, settings, prices.get(symbol, 0.0),
+                                  indicators_by_symbol.get(symbol))
+            if signal == "SELL":
+                sells.append(symbol)
+            elif signal == "BUY":
+                buys.append(symbol)
+
+        deferred = len(order) - evaluated
+        self._cursor = (self._cursor + evaluated) % len(self.symbols) if self.symbols else 0
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.stats["passes"] += 1
+        if deferred:
+            self.stats["overruns"] += 1
+            self.stats["deferred"] += deferred
+            bot._log(
+                f"⏱ Portfolio pass over budget ({elapsed_ms:.1f} ms): {deferred} symbols deferred", "WARNING")
+        get_latency_tracker().record("portfolio_pass", elapsed_ms)
+        if trace:
+            trace.mark("strategy")
+
+        orders = [(s, "SELL", None) for s in sells] + self._gate_buys(buys, prices)
+        if orders:
+            self._execute(orders, prices, strategy.name, trace)
+
+    def _decide(self, symbol: str, strategy, settings: Dict[str, Any], price: float,
+                snapshot: Optional[Dict[str, Any]]) -> Optional[str]:
+        """Strategy decision for one symbol, mirroring BinanceBot._run_strategies."""
+        book = self.books[symbol]
+        if price <= 0 or snapshot is None:
+            return None
+        bot = self.bot
+
+        if book.accumulated_qty > 0 and (book.highest_price == 0 or price > book.highest_price):
+            book.highest_price = price
+            bot.db.save_state_deferred(f"highest_price_{symbol}", price, user_id=bot.user_id)
+
+        indicators = {k: snapshot.get(k, 0) for k in strategy.get_required_indicators()}
+        indicators['is_lateral'] = snapshot.get('is_lateral', False)
+        indicators['adx'] = snapshot.get('adx', 0)
+        state = {
+            "current_price": price, "entry_price": book.entry_price,
+            "highest_price": book.highest_price, "accumulated_qty": book.accumulated_qty,
+            "position_orders": book.position_orders, "symbol": symbol,
+        }
+
+        if book.accumulated_qty > 0:
+            if strategy.check_sell_signal(indicators, settings, state):
+                return "SELL" if bot.enable_selling else None
+            if bot.dca_enabled and book.position_orders < bot.max_dca_orders and not bot.sniper_mode and \
+                    price <= book.last_buy_price * (1 - bot.dca_step_pct / 100):
+                bot._log(f"📉 DCA Step Reached on {symbol}: {price:.4f} (-{bot.dca_step_pct}%)", "INFO")
+                return "BUY" if bot.enable_buying else None
+            return None
+
+        if not indicators['is_lateral'] and strategy.check_buy_signal(indicators, settings, state):
+            return "BUY" if bot.enable_buying else None
+        return None
+
+    def _gate_buys(self, buys: List[str], prices: Dict[str, float]) -> List[tuple]:
+        """Applies the portfolio limits to the buy signals of a pass; returns (symbol, side, quote) orders."""
+        bot = self.bot
+        free_quote = bot.balances.free(QUOTE_ASSET)
+        exposure = self._exposure(prices)
+        open_positions = sum(1 for b in self.books.values() if b.accumulated_qty > 0)
+        orders = []
+        for symbol in buys:
+            price = prices[symbol]
+            book = self.books[symbol]
+            quote = bot.trade_qty if bot.trade_qty_type == "quote" else bot.trade_qty * price
+            quote = min(quote, free_quote)
+            is_new = book.accumulated_qty <= 0
+            equity = free_quote + exposure
+            reason = None
+            if is_new and open_positions >= bot.max_open_positions:
+                reason = f"{open_positions}/{bot.max_open_positions} positions open"
+            elif equity <= 0 or (exposure + quote) / equity * 100 > bot.max_portfolio_exposure_pct:
+                reason = f"exposure would exceed {bot.max_portfolio_exposure_pct}% of equity"
+            elif quote <= 0:
+                reason = "no free balance"
+            if reason:
+                self.stats["blocked"] += 1
+                bot._log(f"🚫 Portfolio limit: BUY {symbol} skipped ({reason})", "DEBUG")
+                continue
+            orders.append((symbol, "BUY", quote))
+            free_quote -= quote
+            exposure += quote
+            open_positions += is_new
+        return orders
+
+    def _place(self, symbol: str, side: str, quote: Optional[float], price: float):
+        """Validates and sends one order; returns the order or None. Runs on the order pool."""
+        bot = self.bot
+        if side == "BUY":
+            quantity, is_quote = quote, True
+        else:
+            quantity, is_quote = bot._calculate_sell_qty(bot.balances.free(self.books[symbol].asset), price), False
+        is_valid, reason = bot.client.validate_order(symbol, quantity, price, is_quote_qty=is_quote)
+        if not is_valid:
+            adj = bot.client.adjust_to_min_notional(symbol, quantity, price, is_quote_qty=is_quote)
+            limit = quote if side == "BUY" else bot.balances.free(self.books[symbol].asset)
+            if not adj or adj > limit:
+                bot._log(f"❌ Portfolio {side} {symbol} aborted: {reason}", "ERROR")
+                return None
+            quantity = adj
+        return bot.client.place_order(
+            symbol, side, quantity, quote_order_qty=quantity if is_quote else None)
+
+    def _execute(self, orders: List[tuple], prices: Dict[str, float], strategy_name: str,
+                 trace: Optional[TickTrace]):
+        bot = self.bot
+        bot.db.flush_state()  # Queued position state must be durable before orders change it
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.ORDER_WORKERS,
+                                            thread_name_prefix="portfolio-orders")
+        futures = [(symbol, side, self._pool.submit(self._place, symbol, side, quote, prices[symbol]))
+                   for symbol, side, quote in orders]
+        for symbol, side, future in futures:
+            try:
+                trade = future.result()
+            except Exception as e:
+                bot._log(f"❌ Portfolio {side} {symbol} failed: {e}", "ERROR")
+                continue
+            if trade:
+                self._record(symbol, side, trade, prices[symbol], f"{strategy_name}-{side}")
+        if trace:
+            trace.mark("fill")
+
+    def _record(self, symbol: str, side: str, trade: Dict[str, Any], price: float, strategy: str):
+        """Book update, persistence and trade history for one fill."""
+        bot = self.bot
+        executed_qty = float(trade.get('executedQty', 0))
+        quote_qty = float(trade.get('cummulativeQuoteQty', 0))
+        actual_price = float(trade.get('price', 0)) or (
+            quote_qty / executed_qty if executed_qty > 0 else price)
+        fee_pct = bot.testnet_commission_pct if bot.is_testnet else 0.0
+
+        book = self.books[symbol]
+        pnl = book.apply_fill(side, executed_qty, actual_price, fee_pct)
+        book.save(bot.db, bot.user_id)
+        if symbol == bot.symbol:
+            self.export(book)
+        self.stats["orders"] += 1
+        bot._log(f"📥 Portfolio {side} {symbol}: {executed_qty} @ {actual_price:.4f} | "
+                 f"Entry=${book.entry_price:.4f} Qty={book.accumulated_qty:.6f}", "INFO")
+
+        indicators = self._indicators.get(symbol) or {}
+        bot._record_trade({
+            "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "type": f"{side} ({strategy})", "price": actual_price, "qty": executed_qty,
+            "symbol": symbol, "pnl": pnl, "rsi": indicators.get('rsi', 0.0),
+            "commission": executed_qty * fee_pct / 100 * actual_price,
+            "total": quote_qty or (actual_price * executed_qty), "latency": None
+        })
+
+    # ========== BOT SYNC & STATUS ==========
+
+    def export(self, book: SymbolBook):
+        """Copies a book into the bot's own position fields (the bot's symbol is also a portfolio symbol)."""
+        for key in SymbolBook.FIELDS:
+            setattr(self.bot, key, getattr(book, key))
+
+    def reload(self, symbol: str):
+        """Takes over the bot's own position fields after a manual trade on its symbol."""
+        book = self.books.get(symbol)
+        if book is not None:
+            for key in SymbolBook.FIELDS:
+                setattr(book, key, getattr(self.bot, key))
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            prices = dict(self._prices)
+            rsis = {s: i.get('rsi', 0.0) for s, i in self._indicators.items()}
+        exposure = self._exposure(prices)
+        free_quote = self.bot.balances.free(QUOTE_ASSET)
+        equity = free_quote + exposure
+        return {
+            "symbols": [{
+                "symbol": s, "price": prices.get(s, 0.0), "rsi": round(float(rsis.get(s, 0.0)), 2),
+                "accumulated_qty": round(b.accumulated_qty, 8), "entry_price": round(b.entry_price, 6),
+                "position_orders": b.position_orders,
+                "pnl_pct": round((prices.get(s, 0.0) / b.entry_price - 1) * 100, 2)
+                if b.entry_price > 0 and prices.get(s) else 0.0,
+            } for s, b in ((s, self.books[s]) for s in self.symbols)],
+            "open_positions": sum(1 for b in self.books.values() if b.accumulated_qty > 0),
+            "exposure": round(exposure, 2),
+            "exposure_pct": round(exposure / equity * 100, 2) if equity > 0 else 0.0,
+            "stats": dict(self.stats),
+        }
+
+    def close(self):
+        self.unsubscribe()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
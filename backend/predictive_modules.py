@@ -1,8 +1,16 @@
+import threading
+from collections import deque
+
 import pandas as pd
 import numpy as np
 from datetime import datetime, time as dtime
 import pytz
 
+try:
+    from .indicators import kernels
+except ImportError:
+    from indicators import kernels
+
 
 class PredictiveEngine:
     """
@@ -25,7 +33,9 @@ class PredictiveEngine:
     COMPRESSION_THRESHOLD = 1.5  # Umbral para detectar compresión de bandas
     PROJECTION_CANDLES = 5  # Cuántas velas proyectar a futuro
 
-    def __init__(self):
+    def __init__(self, indicator_backend: str = "pandas_ta"):
+        # "numpy": cálculos sobre arrays float64 (indicators.kernels) en vez de Series/rolling
+        self.indicator_backend = indicator_backend
         self.last_price_update = datetime.now()
         self.last_price = 0.0
         # Almacena tuplas (timestamp, precio) para calcular velocidad
@@ -59,11 +69,107 @@ class PredictiveEngine:
 
         return results
 
+    def scan(self, symbols, high, low, close, volume) -> list:
+        """
+        Batch analysis of many symbols in one vectorized pass.
+
+        `high`, `low`, `close` and `volume` are aligned (symbols x candles) arrays;
+        indicators are computed with the 2D kernels. Returns one row per symbol
+        (RVOL, breakout probability, market score, divergences, fear/greed),
+        ranked by market score, then breakout probability, then RVOL.
+        """
+        high, low = kernels.as_array(high), kernels.as_array(low)
+        close, volume = kernels.as_array(close), kernels.as_array(volume)
+        if close.ndim != 2 or close.shape[1] < 50:
+            return []
+
+        rsi_series = kernels.rsi(close, self.RSI_PERIOD)
+        rsi = rsi_series[:, -1]
+        rsi_or_neutral = np.where(np.isnan(rsi), 50.0, rsi)
+        last_close = close[:, -1]
+        ema = kernels.ema(close, 200)[:, -1] if close.shape[1] >= 200 else last_close
+
+        # RVOL (current volume / 20-candle average)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            avg_vol = volume[:, -self.VOL_WINDOW:].mean(axis=1)
+            rvol = np.where(avg_vol == 0, 0.0, np.round(volume[:, -1] / avg_vol, 2))
+
+            # Bollinger compression (average width / current width)
+            bbl, _, bbu = kernels.bbands(close, 20, 2.0)
+            widths = bbu - bbl
+            compression = np.where(widths[:, -1] > 0, widths[:, -20:].mean(axis=1) / widths[:, -1], 1.0)
+
+        breakout = (40 * (rvol > self.RVOL_THRESHOLD) + 40 * (compression > self.COMPRESSION_THRESHOLD)
+                    + 20 * ((rsi_or_neutral >= 40) & (rsi_or_neutral <= 60)))
+        breakout = np.minimum(breakout, 100)
+
+        score = (50 + 10 * (rsi_or_neutral > 50) - 20 * (rsi_or_neutral > self.RSI_OVERBOUGHT)
+                 + 20 * (rsi_or_neutral < self.RSI_OVERSOLD) + np.where(last_close > ema, 20, -20))
+        score = np.clip(score, 0, 100)
+
+        bullish, bullish_at, bearish, bearish_at = self._scan_divergences(close[:, -20:], rsi_series[:, -20:])
+
+        order = np.lexsort((-rvol, -breakout, -score))
+        table = []
+        for rank, i in enumerate(order, start=1):
+            divergences = []
+            if bullish[i]:
+                divergences.append({"type": "bullish", "label": "Div Alcista (Bull)", "index": int(bullish_at[i])})
+            if bearish[i]:
+                divergences.append({"type": "bearish", "label": "Div Bajista (Bear)", "index": int(bearish_at[i])})
+            table.append({
+                "rank": rank,
+                "symbol": symbols[i],
+                "price": float(last_close[i]),
+                "rsi": round(float(rsi[i]), 1) if not np.isnan(rsi[i]) else None,
+                "rvol": float(rvol[i]),
+                "breakout_prob": int(breakout[i]),
+                "market_score": int(score[i]),
+                "divergences": divergences,
+                "fear_greed": self._fear_greed_from_rsi(float(rsi_or_neutral[i])),
+            })
+        return table
+
+    @staticmethod
+    def _scan_divergences(prices: np.ndarray, rsis: np.ndarray):
+        """Vectorized `_detect_divergences` over (symbols x 20) windows."""
+        n = prices.shape[1]
+        inner = np.zeros(n, dtype=bool)
+        inner[2:n - 2] = True  # Same pivot range as the single-symbol scan
+        prev, nxt = prices[:, 1:-1] - prices[:, :-2], prices[:, 1:-1] - prices[:, 2:]
+        lows = np.zeros_like(prices, dtype=bool)
+        highs = np.zeros_like(prices, dtype=bool)
+        lows[:, 1:-1] = (prev < 0) & (nxt < 0)
+        highs[:, 1:-1] = (prev > 0) & (nxt > 0)
+        positions = np.arange(n)
+
+        def last_two(mask):
+            mask = mask & inner
+            last = np.where(mask, positions, -1).max(axis=1)
+            before = np.where(mask & (positions < last[:, None]), positions, -1).max(axis=1)
+            return last, before
+
+        rows = np.arange(prices.shape[0])
+        last_l, prev_l = last_two(lows)
+        last_h, prev_h = last_two(highs)
+        bullish = (prev_l >= 0) & (prices[rows, last_l] < prices[rows, prev_l]) & (rsis[rows, last_l] > rsis[rows, prev_l])
+        bearish = (prev_h >= 0) & (prices[rows, last_h] > prices[rows, prev_h]) & (rsis[rows, last_h] < rsis[rows, prev_h])
+        return bullish, last_l, bearish, last_h
+
     def _calculate_volatility_atr(self, df: pd.DataFrame) -> dict:
         """Calcula ATR (Average True Range) para medir volatilidad real."""
         if len(df) < 15:
             return {"value": 0, "status": "Baja"}
 
+        if self.indicator_backend == "numpy":
+            tr = kernels.true_range(df['high'], df['low'], df['close'])
+            tr[0] = df['high'].iloc[0] - df['low'].iloc[0]
+            atr = tr[-14:].mean()
+            avg_atr = tr[-50:].mean() if len(tr) >= 50 else np.nan
+            status = "Alta 📉" if atr > avg_atr * \
+                1.2 else ("Baja 💤" if atr < avg_atr * 0.8 else "Normal")
+            return {"value": float(atr), "status": status}
+
         high_low = df['high'] - df['low']
         high_close = (df['high'] - df['close'].shift()).abs()
         low_close = (df['low'] - df['close'].shift()).abs()
@@ -97,7 +203,10 @@ class PredictiveEngine:
     def _calculate_fear_greed(self, df: pd.DataFrame) -> dict:
         """Estima sentimiento de Miedo vs Codicia basado en RSI y Volatilidad."""
         rsi = df[f'RSI_{self.RSI_PERIOD}'].iloc[-1] if f'RSI_{self.RSI_PERIOD}' in df.columns else 50
+        return self._fear_greed_from_rsi(rsi)
 
+    @staticmethod
+    def _fear_greed_from_rsi(rsi: float) -> dict:
         score = rsi  # Base
         if rsi > 75:
             label = "Extrema Codicia 🤑"
@@ -117,11 +226,17 @@ class PredictiveEngine:
         if 'volume' not in df.columns:
             return "Neutral"
 
-        obv = (np.sign(df['close'].diff()) * df['volume']).fillna(0).cumsum()
-        obv_ema = obv.rolling(20).mean()
+        if self.indicator_backend == "numpy":
+            # El kernel cuenta la primera vela como alcista; aquí empieza en 0
+            obv = kernels.obv(df['close'], df['volume']) - df['volume'].iloc[0]
+            curr_obv = obv[-1]
+            curr_ema = obv[-20:].mean() if len(obv) >= 20 else np.nan
+        else:
+            obv = (np.sign(df['close'].diff()) * df['volume']).fillna(0).cumsum()
+            obv_ema = obv.rolling(20).mean()
 
-        curr_obv = obv.iloc[-1]
-        curr_ema = obv_ema.iloc[-1]
+            curr_obv = obv.iloc[-1]
+            curr_ema = obv_ema.iloc[-1]
 
         if curr_obv > curr_ema * 1.05:
             return "Acumulación (Compra ✅)"
@@ -264,7 +379,13 @@ class PredictiveEngine:
         if 'volume' not in df.columns:
             return 0.0
 
-        avg_vol = df['volume'].rolling(window=self.VOL_WINDOW).mean().iloc[-1]
+        if self.indicator_backend == "numpy":
+            volume = kernels.as_array(df['volume'])
+            avg_vol = volume[-self.VOL_WINDOW:].mean() if len(
+                volume) >= self.VOL_WINDOW else np.nan
+        else:
+            avg_vol = df['volume'].rolling(
+                window=self.VOL_WINDOW).mean().iloc[-1]
         current_vol = df['volume'].iloc[-1]
 
         if avg_vol == 0:
@@ -286,8 +407,12 @@ class PredictiveEngine:
         # Compresión de Volatilidad (Ancho de Bandas de Bollinger / Promedio)
         if 'BBU_20_2.0' in df.columns and 'BBL_20_2.0' in df.columns:
             bb_width = (df['BBU_20_2.0'].iloc[-1] - df['BBL_20_2.0'].iloc[-1])
-            avg_width = (df['BBU_20_2.0'] - df['BBL_20_2.0']
-                         ).rolling(20).mean().iloc[-1]
+            if self.indicator_backend == "numpy":
+                widths = kernels.as_array(df['BBU_20_2.0']) - kernels.as_array(df['BBL_20_2.0'])
+                avg_width = widths[-20:].mean() if len(widths) >= 20 else np.nan
+            else:
+                avg_width = (df['BBU_20_2.0'] - df['BBL_20_2.0']
+                             ).rolling(20).mean().iloc[-1]
             # Si el ancho actual es mucho menor al promedio, hay compresión.
             compression = avg_width / bb_width if bb_width > 0 else 1.0
         else:
@@ -457,3 +582,350 @@ class PredictiveEngine:
             traps.append("BEAR_TRAP")
 
         return traps
+
+
+class _RollingWindow:
+    """Last `size` values with a running sum (O(1) per push); NaN in the window makes the mean NaN."""
+
+    __slots__ = ("values", "total", "nans")
+
+    def __init__(self, size: int):
+        self.values = deque(maxlen=size)
+        self.total = 0.0
+        self.nans = 0  # NaN values are kept out of the sum (they would poison it for good)
+
+    def push(self, value: float):
+        if len(self.values) == self.values.maxlen:
+            self._remove(self.values[0])
+        self.values.append(value)
+        if value != value:
+            self.nans += 1
+        else:
+            self.total += value
+
+    def _remove(self, value: float):
+        if value != value:
+            self.nans -= 1
+        else:
+            self.total -= value
+
+    def full(self) -> bool:
+        return len(self.values) == self.values.maxlen
+
+    def mean(self) -> float:
+        if not self.values or self.nans:
+            return np.nan
+        return self.total / len(self.values)
+
+
+class _SeriesState:
+    """
+    Rolling predictive state over the closed candles of one (symbol, timeframe).
+
+    Each closed candle is folded in once: true range into ATR(14/50) sums,
+    absolute OBV, volume and Bollinger width sums, 50-bar lows/highs and the
+    pivot candidates of the 20-bar divergence window.
+    """
+
+    OBV_HISTORY = 2000  # Absolute OBV per candle, to re-base it on any window start
+
+    def __init__(self):
+        self.count = 0  # Closed candles folded in
+        self.last_time = None  # Open time (ns) of the newest closed candle
+        self.prev_close = None
+        self.tr_short = _RollingWindow(14)
+        self.tr_long = _RollingWindow(50)
+        self.volume = _RollingWindow(PredictiveEngine.VOL_WINDOW)
+        self.bb_width = _RollingWindow(20)
+        self.obv = 0.0
+        self.obv_window = _RollingWindow(20)
+        self.obv_at = {}  # open time (ns) -> absolute OBV
+        self.obv_times = deque()
+        self.lows = deque(maxlen=50)
+        self.highs = deque(maxlen=50)
+        self.closes = deque(maxlen=20)
+        self.rsis = deque(maxlen=20)
+        self.pivot_lows = deque()  # (candle number, price, rsi)
+        self.pivot_highs = deque()
+        self.last = {}  # Indicator columns of the newest closed candle
+        self.key = None  # last_time the cached result was computed for
+        self.result = None
+
+    def push(self, ts: int, high: float, low: float, close: float, volume: float, columns: dict):
+        if self.prev_close is None:
+            tr = high - low
+            direction = 1.0  # Same convention as kernels.obv: first candle counts as up
+        else:
+            tr = max(high - low, abs(high - self.prev_close), abs(self.prev_close - low))
+            direction = float(np.sign(close - self.prev_close))
+        self.tr_short.push(tr)
+        self.tr_long.push(tr)
+        self.volume.push(volume)
+        if 'BBU_20_2.0' in columns and 'BBL_20_2.0' in columns:
+            self.bb_width.push(columns['BBU_20_2.0'] - columns['BBL_20_2.0'])
+
+        self.obv += direction * volume
+        self.obv_window.push(self.obv)
+        self.obv_at[ts] = self.obv
+        self.obv_times.append(ts)
+        if len(self.obv_times) > self.OBV_HISTORY:
+            del self.obv_at[self.obv_times.popleft()]
+
+        # The previous candle is a pivot once the candle after it has closed
+        closes = self.closes
+        if len(closes) >= 2:
+            mid = closes[-1]
+            if mid < closes[-2] and mid < close:
+                self.pivot_lows.append((self.count - 1, mid, self.rsis[-1]))
+            if mid > closes[-2] and mid > close:
+                self.pivot_highs.append((self.count - 1, mid, self.rsis[-1]))
+
+        self.lows.append(low)
+        self.highs.append(high)
+        closes.append(close)
+        self.rsis.append(columns.get(f'RSI_{PredictiveEngine.RSI_PERIOD}', np.nan))
+        self.last = columns
+        self.prev_close = close
+        self.last_time = ts
+        self.count += 1
+
+    def pivots(self, pivots: deque, window: int):
+        """Pivots inside the last `window` candles, as (window index, price, rsi)."""
+        start = self.count - window
+        while pivots and pivots[0][0] < start + 2:
+            pivots.popleft()
+        return [(i - start, price, rsi) for i, price, rsi in pivots if i <= self.count - 3]
+
+
+class IncrementalPredictiveEngine(PredictiveEngine):
+    """
+    PredictiveEngine that reuses its state between candles.
+
+    The analysis runs on closed candles only (the last row of the DataFrame is
+    the live candle), so its result only changes when a candle closes. State is
+    kept per (network, symbol, timeframe) in the process-wide PredictionCache: a call
+    folds in just the newly closed candles, and a call with no new closed
+    candle returns the cached result (with speed and session, which depend on
+    the clock and the live price, refreshed). Every bot on the same pair, plus
+    the API and Telegram views of it, share one computation.
+    """
+
+    def __init__(self, indicator_backend: str = "pandas_ta", cache=None):
+        super().__init__(indicator_backend)
+        self.cache = cache
+
+    def analyze(self, df: pd.DataFrame, current_price: float, symbol: str = None,
+                timeframe: str = None, network: str = "mainnet") -> dict:
+        if symbol is None or not isinstance(df.index, pd.DatetimeIndex):
+            return super().analyze(df, current_price)
+        if df.empty or len(df) - 1 < 50:
+            return {}
+
+        result = (self.cache or get_prediction_cache()).get(symbol, timeframe, df, network)
+        if not result:
+            return {}
+        result = dict(result)
+        result["session"] = self._get_market_session()
+        result["speed"] = self._calculate_speed(current_price)
+        return result
+
+    def analyze_state(self, state: _SeriesState, first_time: int) -> dict:
+        """Builds the full result from the rolling state (no DataFrame access)."""
+        last = state.last
+        rsi_col = f'RSI_{self.RSI_PERIOD}'
+        rsi = last.get(rsi_col, 50)
+        close = state.closes[-1]
+
+        # Volatility (ATR 14 vs 50)
+        atr = state.tr_short.mean()
+        avg_atr = state.tr_long.mean() if state.tr_long.full() else np.nan
+        status = "Alta 📉" if atr > avg_atr * \
+            1.2 else ("Baja 💤" if atr < avg_atr * 0.8 else "Normal")
+
+        # Relative volume
+        avg_vol = state.volume.mean() if state.volume.full() else np.nan
+        rvol = 0.0 if avg_vol == 0 else round(state.volume.values[-1] / avg_vol, 2)
+
+        # Breakout probability
+        if 'BBU_20_2.0' in last and 'BBL_20_2.0' in last:
+            bb_width = last['BBU_20_2.0'] - last['BBL_20_2.0']
+            avg_width = state.bb_width.mean() if state.bb_width.full() else np.nan
+            compression = avg_width / bb_width if bb_width > 0 else 1.0
+        else:
+            compression = 1.0
+        breakout = 0
+        if rvol > self.RVOL_THRESHOLD:
+            breakout += 40
+        if compression > self.COMPRESSION_THRESHOLD:
+            breakout += 40
+        if 40 <= rsi <= 60:
+            breakout += 20
+
+        # Smart money (OBV relative to the first candle of the window)
+        base = state.obv_at[first_time]
+        curr_obv = state.obv - base
+        curr_ema = state.obv_window.mean() - base if state.count >= 20 else np.nan
+        if curr_obv > curr_ema * 1.05:
+            smart_money = "Acumulación (Compra ✅)"
+        elif curr_obv < curr_ema * 0.95:
+            smart_money = "Distribución (Venta ❌)"
+        else:
+            smart_money = "Neutral"
+
+        # Trend strength and market score share the EMA_200 column
+        if 'EMA_200' in last:
+            ema = last['EMA_200']
+            strength = min(100, abs(close - ema) / ema * 100 * 10)
+            trend = {"score": int(strength), "label": "Fuerte" if strength > 70 else (
+                "Débil" if strength < 30 else "Media")}
+        else:
+            ema = close
+            trend = {"score": 50, "label": "Neutral"}
+        score = 50
+        if rsi > 50:
+            score += 10
+        if rsi > self.RSI_OVERBOUGHT:
+            score -= 20
+        if rsi < self.RSI_OVERSOLD:
+            score += 20
+        score += 20 if close > ema else -20
+
+        results = {
+            "divergences": self._state_divergences(state) if rsi_col in last else [],
+            "rvol": rvol,
+            "breakout_prob": min(breakout, 100),
+            "liquidity_zones": {"support": float(min(state.lows)), "target": float(max(state.highs))},
+            "market_score": max(0, min(100, score)),
+            "volatility": {"value": float(atr), "status": status},
+            "trend_strength": trend,
+            "fear_greed": self._fear_greed_from_rsi(rsi),
+            "smart_money": smart_money,
+            "projection": self._state_projection(state),
+            "traps": self._state_traps(state),
+        }
+        results['summary'] = self.get_readable_summary(results)
+        return results
+
+    def _state_divergences(self, state: _SeriesState) -> list:
+        window = 20
+        if state.count < window:
+            return []
+        divergences = []
+        lows = state.pivots(state.pivot_lows, window)
+        highs = state.pivots(state.pivot_highs, window)
+        if len(lows) >= 2:
+            last_l, prev_l = lows[-1], lows[-2]
+            if last_l[1] < prev_l[1] and last_l[2] > prev_l[2]:
+                divergences.append({"type": "bullish", "label": "Div Alcista (Bull)",
+                                    "index": int(last_l[0])})
+        if len(highs) >= 2:
+            last_h, prev_h = highs[-1], highs[-2]
+            if last_h[1] > prev_h[1] and last_h[2] < prev_h[2]:
+                divergences.append({"type": "bearish", "label": "Div Bajista (Bear)",
+                                    "index": int(last_h[0])})
+        return divergences
+
+    def _state_projection(self, state: _SeriesState) -> list:
+        recent = np.array(list(state.closes)[-self.PROJECTION_CANDLES:])
+        if len(recent) < self.PROJECTION_CANDLES:
+            return []
+        slope, _ = np.polyfit(np.arange(self.PROJECTION_CANDLES), recent, 1)
+        last_time = int(state.last_time // 1_000_000_000)
+        return [{"time": last_time + i * 60, "value": recent[-1] + slope * i}
+                for i in range(1, self.PROJECTION_CANDLES + 1)]
+
+    @staticmethod
+    def _state_traps(state: _SeriesState) -> list:
+        traps = []
+        if state.count < 3:
+            return traps
+        if state.highs[-1] > state.highs[-2] and state.closes[-1] < state.closes[-2]:
+            traps.append("BULL_TRAP")
+        if state.lows[-1] < state.lows[-2] and state.closes[-1] > state.closes[-2]:
+            traps.append("BEAR_TRAP")
+        return traps
+
+
+class PredictionCache:
+    """
+    Process-wide predictive state and results per (network, symbol, timeframe).
+
+    Results are cached under the open time of the newest closed candle, so
+    repeated calls within a candle cost a dict lookup. The indicator columns
+    present in the DataFrame are part of the key, since bots with different
+    EMA settings see different columns.
+    """
+
+    FEATURE_COLUMNS = ('RSI_14', 'EMA_200', 'BBU_20_2.0', 'BBL_20_2.0')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states = {}
+        self._engine = IncrementalPredictiveEngine(indicator_backend="numpy", cache=self)
+        self.stats = {"hits": 0, "updates": 0, "rebuilds": 0}
+
+    def get(self, symbol: str, timeframe: str, df: pd.DataFrame, network: str = "mainnet") -> dict:
+        features = tuple(c for c in self.FEATURE_COLUMNS if c in df.columns)
+        times = df.index.as_unit('ns').asi8
+        closed = len(df) - 1  # The last row is the live candle
+        last_time = int(times[closed - 1])
+
+        with self._lock:
+            key = (network, symbol, timeframe, features)
+            state = self._states.get(key)
+            if state is not None and state.key == last_time:
+                self.stats["hits"] += 1
+                return state.result
+
+            # Resume after the newest candle already folded in, if the window still holds it
+            start = 0
+            if state is not None and state.last_time is not None:
+                pos = int(np.searchsorted(times[:closed], state.last_time))
+                if pos < closed and times[pos] == state.last_time and int(times[0]) in state.obv_at:
+                    start = pos + 1
+                else:
+                    state = None
+            if state is None:
+                state = self._states[key] = _SeriesState()
+                self.stats["rebuilds"] += 1
+            else:
+                self.stats["updates"] += 1
+
+            if start < closed:
+                self._fold(state, df, times, start, closed, features)
+            state.key = last_time
+            state.result = self._engine.analyze_state(state, int(times[0]))
+            return state.result
+
+    @staticmethod
+    def _fold(state: _SeriesState, df: pd.DataFrame, times, start: int, stop: int, features):
+        high = df['high'].to_numpy(dtype=float)[start:stop]
+        low = df['low'].to_numpy(dtype=float)[start:stop]
+        close = df['close'].to_numpy(dtype=float)[start:stop]
+        volume = df['volume'].to_numpy(dtype=float)[start:stop]
+        columns = {c: df[c].to_numpy(dtype=float)[start:stop] for c in features}
+        for i in range(stop - start):
+            state.push(int(times[start + i]), high[i], low[i], close[i], volume[i],
+                       {c: values[i] for c, values in columns.items()})
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {**self.stats, "series": len(self._states)}
+
+    def clear(self):
+        with self._lock:
+            self._states.clear()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_prediction_cache() -> PredictionCache:
+    """Returns the process-wide prediction cache (created on first use)."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = PredictionCache()
+    return _cache
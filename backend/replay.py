@@ -0,0 +1,152 @@
+"""
+Replay Harness
+Drives a real BinanceBot end-to-end against the in-process FakeExchange.
+
+The bot is wired exactly as in production (BinanceWrapper, kline and user
+sockets, streaming indicators, strategies, order placement, trade persistence)
+but with the exchange, socket manager, candle store and database swapped for
+local ones. Instead of the monitor threads, the harness runs the bot's loop
+steps synchronously per candle, so a replay is deterministic and as fast as
+the pipeline allows (`speed` throttles it to N times real time).
+
+Usage:
+    exchange = FakeExchange(balances={"USDT": 1000.0})
+    exchange.load_klines("BTCUSDT", "1m", synthetic_klines(5000, seed=1))
+    with ReplayHarness(exchange, "BTCUSDT", "1m", settings={"buy_rsi": 30}) as replay:
+        report = replay.run(speed=1000)
+"""
+import contextlib
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, Optional
+
+from .binance_wrapper import BinanceWrapper
+from .bot_logic import BinanceBot
+from .database import DatabaseManager
+from .services.fake_exchange import FakeExchange
+from .services.kline_store import KlineStore
+from .services.latency import get_latency_tracker
+
+# No Telegram, alerts or extra streams during a replay
+REPLAY_SETTINGS: Dict[str, Any] = {
+    "telegram_enabled": False, "notify_signals": False, "enable_rsi_alerts": False,
+    "enable_trade_stream": False, "use_real_data": False,
+}
+
+
+class ReplayHarness:
+    """One bot on a FakeExchange, stepped candle by candle."""
+
+    def __init__(self, exchange: FakeExchange, symbol: str = "BTCUSDT", timeframe: str = "1m",
+                 settings: Optional[Dict[str, Any]] = None, db_path: Optional[str] = None,
+                 refresh_every: int = 0, quiet: bool = True):
+        self.exchange = exchange
+        self.refresh_every = refresh_every  # Candles between full market refreshes (0 = only at start)
+        self._devnull = open(os.devnull, "w") if quiet else None
+        self._tmpdir = None
+        if db_path is None:
+            self._tmpdir = tempfile.mkdtemp(prefix="replay-")
+            db_path = os.path.join(self._tmpdir, "bot_data.db")
+
+        # Settings are stored first so the bot loads them like on a restart
+        db = DatabaseManager(db_path)
+        user = db.get_user_by_username("replay")
+        user_id = user["id"] if user else db.create_user("replay", "replay", "replay")
+        for key, value in {**REPLAY_SETTINGS, "symbol": symbol, "timeframe": timeframe,
+                           **(settings or {})}.items():
+            if key in BinanceBot.STATE_SETTINGS:
+                db.save_state(key, value, user_id=user_id)
+            else:
+                db.save_setting(key, value, user_id=user_id)
+
+        store = KlineStore(":memory:")
+        store.MIN_REFRESH_SECONDS = 0  # Simulated time moves faster than the wall clock
+
+        with self._output():
+            self.bot = BinanceBot(user_id=user_id, db=db, log_file=None)
+            wrapper = BinanceWrapper(client=exchange, stream_manager=exchange, kline_store=store)
+            self.bot.attach_client(wrapper, is_testnet=True, background=False)
+            self.bot._update_market_data()  # Seeds indicators, as the monitor loop does first
+            self.bot.start()
+
+    def _output(self):
+        """Strategies and the bot print on every evaluation; silenced unless quiet=False."""
+        if self._devnull is None:
+            return contextlib.nullcontext()
+        return contextlib.redirect_stdout(self._devnull)
+
+    def run(self, steps: Optional[int] = None, speed: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Replays up to `steps` candles (all by default). `speed` paces the replay at
+        that multiple of real time; None runs as fast as possible.
+        """
+        exchange, bot = self.exchange, self.bot
+        clock_start = exchange.clock_ms
+        started = time.perf_counter()
+        candles = 0
+
+        with self._output():
+            while steps is None or candles < steps:
+                if not exchange.step():
+                    break
+                candles += 1
+
+                # Stream handlers first, then one strategy pass per kline event
+                while True:
+                    stream = exchange.pump_one()
+                    if stream is None:
+                        break
+                    if "@kline_" in stream:
+                        bot._evaluate_strategies()
+
+                # Account sync / equity, as the monitor loop does every 10s
+                with bot.lock:
+                    bot._update_account_balances()
+                    if bot.current_price > 0:
+                        bot._update_equity()
+                if self.refresh_every and candles % self.refresh_every == 0:
+                    bot._update_market_data()
+
+                if speed:
+                    ahead = (exchange.clock_ms - clock_start) / 1000 / speed - (time.perf_counter() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+
+        elapsed = time.perf_counter() - started
+        return self.report(candles, elapsed, (exchange.clock_ms - clock_start) / 1000)
+
+    def report(self, candles: int = 0, elapsed: float = 0.0, simulated: float = 0.0) -> Dict[str, Any]:
+        exchange, bot = self.exchange, self.bot
+        price = exchange.get_symbol_ticker(bot.symbol)["price"]
+        base, quote = exchange.base_asset(bot.symbol), exchange.quote_asset(bot.symbol)
+        return {
+            "candles": candles,
+            "simulated_sec": round(simulated, 3),
+            "elapsed_sec": round(elapsed, 4),
+            "candles_per_sec": round(candles / elapsed) if elapsed > 0 else 0,
+            "speedup": round(simulated / elapsed) if elapsed > 0 else 0,
+            "orders": len(exchange.orders),
+            "balances": dict(exchange.balances),
+            "equity": round(exchange.balances.get(quote, 0.0) +
+                            exchange.balances.get(base, 0.0) * float(price), 4),
+            "stats": bot.trade_stats.snapshot(),
+            "latency": get_latency_tracker().snapshot(),  # Process-wide stage histograms
+        }
+
+    def close(self):
+        with self._output():
+            self.bot.disconnect()
+        if self._devnull is not None:
+            self._devnull.close()
+            self._devnull = None
+        if self._tmpdir:
+            shutil.rmtree(self._tmpdir, ignore_errors=True)
+            self._tmpdir = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
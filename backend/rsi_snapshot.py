@@ -1,14 +1,19 @@
 """
 RSI Snapshot Module
 Calculates RSI for multiple trading pairs with caching for performance optimization.
-Uses pandas_ta for consistency with bot core indicators.
+
+Symbols are fetched concurrently on a small bounded pool (one in-flight fetch per
+symbol/timeframe, shared by concurrent callers), so a snapshot takes as long as the
+slowest symbol rather than the sum of all of them. Klines come from the shared
+kline store (delta fetch) and RSI is advanced only over newly closed candles.
 """
 from .indicators import calculate_rsi_from_df as calculate_rsi
+from .streaming_indicators import StreamingRSI
+import math
+import threading
 import time
-from typing import List, Dict, Optional
-from datetime import datetime
-import pandas as pd
-import pandas_ta as ta
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import List, Dict, Optional, Tuple
 
 
 class RSISnapshotCache:
@@ -38,9 +43,104 @@ class RSISnapshotCache:
 _rsi_cache = RSISnapshotCache(ttl_seconds=10)
 
 
+class RSISnapshotService:
+    """Concurrent, de-duplicated RSI fetcher with incremental per-series state."""
+
+    # Stays below the HTTP connection pool of the Binance client session (10)
+    MAX_WORKERS = 8
+    KLINE_LIMIT = 1000  # Same window as the bot
+    RSI_LENGTH = 14
+    TIMEOUT = 15.0  # Upper bound for one snapshot (seconds)
+
+    def __init__(self):
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.MAX_WORKERS, thread_name_prefix="rsi-snapshot")
+        self._lock = threading.Lock()
+        self._inflight: Dict[Tuple[str, str, str], Future] = {}
+        self._states: Dict[Tuple[str, str, str], StreamingRSI] = {}
+
+    def _compute(self, client, key: Tuple[str, str, str]) -> Optional[Dict]:
+        _, symbol, timeframe = key
+        rows = client.get_kline_rows(symbol, timeframe, limit=self.KLINE_LIMIT)
+        if not rows:
+            print(f"[RSI Snapshot] No data for {symbol}")
+            return None
+
+        state = self._states.get(key)
+        if state is None:
+            state = self._states.setdefault(key, StreamingRSI(self.RSI_LENGTH))
+        # Last row is the live candle: committed state only holds closed ones
+        state.advance((r[0], r[4]) for r in rows[:-1])
+        rsi_value = state.value(live_close=rows[-1][4])
+
+        if math.isnan(rsi_value):
+            print(f"[RSI Snapshot] Failed to calculate RSI for {symbol}")
+            return None
+        snapshot = {"symbol": symbol, "rsi": round(rsi_value, 1)}
+        _rsi_cache.set("_".join(key), snapshot)
+        return snapshot
+
+    def _submit(self, client, key: Tuple[str, str, str]) -> Future:
+        """Returns the in-flight future for `key`, starting one if needed."""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._pool.submit(self._compute, client, key)
+                self._inflight[key] = future
+                future.add_done_callback(
+                    lambda f, k=key: self._done(k, f))
+            return future
+
+    def _done(self, key, future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def snapshot(self, symbols: List[str], client, timeframe: str) -> List[Dict]:
+        network = getattr(client, "network", "mainnet")
+        pending = []
+        results: Dict[str, Dict] = {}
+
+        for symbol in symbols:
+            key = (network, symbol, timeframe)
+            cached = _rsi_cache.get("_".join(key))
+            if cached is not None:
+                results[symbol] = cached
+            else:
+                pending.append((symbol, self._submit(client, key)))
+
+        deadline = time.monotonic() + self.TIMEOUT
+        for symbol, future in pending:
+            try:
+                snapshot = future.result(
+                    timeout=max(0.0, deadline - time.monotonic()))
+                if snapshot is not None:
+                    results[symbol] = snapshot
+            except FutureTimeout:
+                print(f"[RSI Snapshot] Timeout processing {symbol}")
+            except Exception as e:
+                print(f"[RSI Snapshot] Error processing {symbol}: {e}")
+
+        return [results[s] for s in symbols if s in results]
+
+
+_service: Optional[RSISnapshotService] = None
+_service_lock = threading.Lock()
+
+
+def get_rsi_snapshot_service() -> RSISnapshotService:
+    """Returns the process-wide RSI snapshot service (created on first use)."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = RSISnapshotService()
+    return _service
+
+
 def calculate_rsi_snapshot(symbols: List[str], client, timeframe: str = "1m") -> List[Dict[str, any]]:
     """
-    Calculate RSI for multiple symbols.
+    Calculate RSI for multiple symbols concurrently.
 
     Args:
         symbols: List of trading pairs (e.g., ['BTCUSDT', 'SOLUSDT'])
@@ -48,45 +148,9 @@ def calculate_rsi_snapshot(symbols: List[str], client, timeframe: str = "1m") ->
         timeframe: Timeframe for RSI calculation (default '1m')
 
     Returns:
-        List of dicts with 'symbol' and 'rsi' keys
+        List of dicts with 'symbol' and 'rsi' keys (in the order of `symbols`)
     """
-    results = []
-
-    for symbol in symbols:
-        try:
-            # Check cache first
-            cache_key = f"{symbol}_{timeframe}"
-            cached = _rsi_cache.get(cache_key)
-
-            if cached is not None:
-                results.append(cached)
-                continue
-
-            # Fetch data and calculate RSI (using same limit as bot: 1000)
-            df = client.get_historical_klines(symbol, timeframe, limit=1000)
-
-            if df is None or df.empty:
-                print(f"[RSI Snapshot] No data for {symbol}")
-                continue
-
-            rsi_value = calculate_rsi(df)
-
-            if rsi_value is not None:
-                snapshot = {
-                    "symbol": symbol,
-                    "rsi": round(rsi_value, 1)
-                }
-                results.append(snapshot)
-                _rsi_cache.set(cache_key, snapshot)
-                print(f"[RSI Snapshot] {symbol}: RSI={rsi_value:.1f}")
-            else:
-                print(f"[RSI Snapshot] Failed to calculate RSI for {symbol}")
-
-        except Exception as e:
-            print(f"[RSI Snapshot] Error processing {symbol}: {e}")
-            continue
-
-    return results
+    return get_rsi_snapshot_service().snapshot(symbols, client, timeframe)
 
 
 def get_default_symbols() -> List[str]:
@@ -0,0 +1,133 @@
+"""
+Balances Module.
+In-memory balance ledger for every asset, fed by the user data stream.
+
+`outboundAccountPosition` events overwrite the assets they carry and
+`balanceUpdate` events (deposits, withdrawals, transfers) apply their delta
+unless the asset already holds a newer value, so every reader (strategy checks, manual orders, the portfolio engine,
+status and Telegram views) gets balances with zero network I/O.
+
+A REST account read seeds the ledger when the user socket starts and
+reconciles it periodically, repairing events missed while disconnected. Each
+asset keeps the exchange time of its last update, so a REST snapshot that is
+older than a stream event for an asset never overwrites the newer value.
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Differences below this are rounding noise, not drift
+_DRIFT_TOLERANCE = 1e-8
+
+
+class BalanceLedger:
+    """Free/locked amount per asset. Thread-safe; reads never touch the network."""
+
+    RECONCILE_INTERVAL = 300  # Seconds between REST reconciliations
+
+    def __init__(self):
+        self._balances: Dict[str, Tuple[float, float]] = {}
+        self._updated: Dict[str, int] = {}  # Asset -> exchange time (ms) of its last update
+        self._lock = threading.Lock()
+        self.loaded = False
+        self.last_reconcile = 0.0  # Wall time of the last successful REST reconciliation
+        self.last_event = 0.0      # Wall time of the last stream event
+        self.stats = {"events": 0, "reconciliations": 0, "drift_corrections": 0, "failures": 0}
+
+    # ========== STREAM ==========
+
+    def apply(self, msg) -> bool:
+        """Folds a user stream event in; True if it changed balances."""
+        event = msg.get('e')
+        if event == 'outboundAccountPosition':
+            updated = int(msg.get('u') or msg.get('E') or 0)
+            with self._lock:
+                for b in msg.get('B', ()):
+                    if updated >= self._updated.get(b['a'], 0):
+                        self._balances[b['a']] = (float(b['f']), float(b['l']))
+                        self._updated[b['a']] = updated
+                self._mark_event()
+            return True
+        if event == 'balanceUpdate':
+            asset = msg['a']
+            updated = int(msg.get('T') or msg.get('E') or 0)
+            with self._lock:
+                self._mark_event()
+                if updated <= self._updated.get(asset, 0):
+                    return False  # Already contained in a newer snapshot (REST or stream)
+                free, locked = self._balances.get(asset, (0.0, 0.0))
+                self._balances[asset] = (free + float(msg['d']), locked)
+                self._updated[asset] = updated
+            return True
+        return False
+
+    def _mark_event(self):
+        self.stats["events"] += 1
+        self.last_event = time.time()
+
+    # ========== REST RECONCILIATION ==========
+
+    def needs_reconcile(self) -> bool:
+        return not self.loaded or time.time() - self.last_reconcile >= self.RECONCILE_INTERVAL
+
+    def reconcile(self, client) -> bool:
+        """
+        Compares the ledger with one REST account read (BinanceWrapper.get_balances)
+        and adopts the exchange value of every asset not updated by the stream since.
+        """
+        try:
+            result = client.get_balances()
+        except Exception as e:
+            result = None
+            logger.warning("Balance reconciliation failed: %s", e)
+        if result is None:
+            self.stats["failures"] += 1
+            return False
+        balances, updated = result
+
+        drifted = []
+        with self._lock:
+            for asset in set(balances) | set(self._balances):
+                if self._updated.get(asset, 0) > updated:
+                    continue  # The stream already delivered a newer value
+                exchange = balances.get(asset, (0.0, 0.0))
+                ledger = self._balances.get(asset, (0.0, 0.0))
+                if self.loaded and any(abs(a - b) > _DRIFT_TOLERANCE for a, b in zip(exchange, ledger)):
+                    drifted.append((asset, ledger[0], exchange[0]))
+                if asset in balances:
+                    self._balances[asset] = exchange
+                else:
+                    self._balances.pop(asset, None)
+                self._updated[asset] = updated
+            self.loaded = True
+            self.last_reconcile = time.time()
+            self.stats["reconciliations"] += 1
+            self.stats["drift_corrections"] += len(drifted)
+
+        for asset, ledger_free, exchange_free in drifted:
+            logger.warning("Balance drift on %s: ledger %.8f, exchange %.8f (corrected)",
+                           asset, ledger_free, exchange_free)
+        return True
+
+    # ========== READS ==========
+
+    def free(self, asset: str) -> float:
+        with self._lock:
+            return self._balances.get(asset, (0.0, 0.0))[0]
+
+    def balances(self) -> Dict[str, Tuple[float, float]]:
+        """(free, locked) of every asset with a non-zero balance."""
+        with self._lock:
+            return {a: v for a, v in self._balances.items() if v[0] + v[1] > 0}
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            **self.stats,
+            "assets": len(self.balances()),
+            "reconcile_age_sec": round(now - self.last_reconcile, 1) if self.last_reconcile else None,
+            "event_age_sec": round(now - self.last_event, 1) if self.last_event else None,
+        }
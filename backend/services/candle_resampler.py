@@ -0,0 +1,201 @@
+"""
+Candle Resampler Module.
+Derives higher-timeframe candles from one 1m kline stream per symbol.
+
+Every 1m kline message (live updates and closes) is folded into an in-memory
+bucket per derived interval: the closed minutes of the bucket are kept as an
+aggregate and the live minute is combined on top, so each message costs O(1)
+per interval. The output is a Binance-shaped kline message per interval, so
+subscribers cannot tell a derived feed from a native socket.
+
+Buckets are UTC-aligned (open_time % interval == 0), which matches Binance for
+every interval up to 12h. A bucket that is already open when the resampler
+starts is seeded from the 1m history (served by the kline store) by `seed()`,
+which the owner calls before the socket opens, so the stream callback never
+waits on REST under the resampler lock.
+
+A missed 1m close (dropped message or reconnect) shows up as a message whose
+minute skips past the last closed one: the missing minutes are replayed from
+the history, and a bucket that is replaced by a newer one without having
+emitted its close gets a close from what it holds, so no derived candle is
+left open.
+"""
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from backend.services.kline_store import INTERVAL_MS, KlineRow
+
+logger = logging.getLogger(__name__)
+
+BASE_INTERVAL = "1m"
+RESAMPLED_INTERVALS = ("3m", "5m", "15m", "30m", "1h", "2h", "4h", "6h", "8h", "12h")
+_BASE_MS = INTERVAL_MS[BASE_INTERVAL]
+# 1m candles needed to seed the longest bucket (plus the live one)
+SEED_CANDLES = INTERVAL_MS[RESAMPLED_INTERVALS[-1]] // _BASE_MS + 1
+
+
+class _Bucket:
+    """Closed-minute aggregate of one derived candle."""
+
+    __slots__ = ("open_time", "open", "high", "low", "close", "volume", "last_minute", "done")
+
+    def __init__(self, open_time: int):
+        self.open_time = open_time
+        self.open = None  # None until the first minute of the bucket is folded in
+        self.high = float("-inf")
+        self.low = float("inf")
+        self.close = None
+        self.volume = 0.0
+        self.last_minute = None  # Open time of the newest folded (closed) minute
+        self.done = False  # Close already emitted
+
+    def fold(self, minute: int, o: float, h: float, l: float, c: float, v: float):
+        if self.last_minute is not None and minute <= self.last_minute:
+            return  # Repeated close message
+        if self.open is None:
+            self.open = o
+        self.high = max(self.high, h)
+        self.low = min(self.low, l)
+        self.close = c
+        self.volume += v
+        self.last_minute = minute
+
+    def row(self, step: int) -> KlineRow:
+        return (self.open_time, self.open, self.high, self.low, self.close, self.volume, self.open_time + step - 1)
+
+
+class CandleResampler:
+    """Per-symbol 1m -> {3m .. 12h} aggregation."""
+
+    def __init__(self, symbol: str, history: Optional[Callable[[int], List[KlineRow]]] = None,
+                 intervals: Tuple[str, ...] = RESAMPLED_INTERVALS):
+        self.symbol = symbol
+        self.intervals = tuple(i for i in intervals if i in INTERVAL_MS)
+        self._history = history  # limit -> 1m rows (oldest first, last one live)
+        self._buckets: Dict[str, _Bucket] = {}
+        self._lock = threading.Lock()
+        self._last_closed: Optional[int] = None  # Open time of the newest closed 1m candle seen
+        self.messages = 0
+        self.reseeds = 0
+
+    def seed(self) -> bool:
+        """
+        Folds the closed minutes of every currently open bucket from the 1m
+        history. Call before the first message (it reads history, possibly REST).
+        """
+        rows = self._read_history(SEED_CANDLES)
+        if not rows:
+            return False
+        with self._lock:
+            self._rebuild(rows[:-1], rows[-1][0])
+        return True
+
+    def _read_history(self, limit: int) -> List[KlineRow]:
+        if self._history is None:
+            return []
+        try:
+            return self._history(limit) or []
+        except Exception as ex:
+            logger.error("Resampler history read failed for %s: %s", self.symbol, ex)
+            return []
+
+    def _rebuild(self, closed: List[KlineRow], minute: int):
+        """Buckets holding `minute`, filled with the closed rows before it."""
+        for interval in self.intervals:
+            step = INTERVAL_MS[interval]
+            bucket = _Bucket(minute - minute % step)
+            for row in closed:
+                if bucket.open_time <= row[0] < minute:
+                    bucket.fold(row[0], row[1], row[2], row[3], row[4], row[5])
+            self._buckets[interval] = bucket
+        times = [r[0] for r in closed if r[0] < minute]
+        self._last_closed = times[-1] if times else None
+
+    def _fill_gap(self, minute: int) -> List[Tuple[str, KlineRow, bool]]:
+        """
+        Replays the closed minutes missing before `minute` from the history
+        (called without the lock held); returns the derived closes they produce.
+        """
+        with self._lock:
+            after = self._last_closed
+        if after is None or minute <= after + _BASE_MS:
+            return []
+        missing = (minute - after) // _BASE_MS - 1
+        rows = []
+        if self._history is not None:
+            self.reseeds += 1
+            logger.warning("Resampler %s: %d 1m closes missed, re-seeding from history", self.symbol, missing)
+            rows = [r for r in self._read_history(min(missing + 2, SEED_CANDLES)) if after < r[0] < minute]
+
+        out = []
+        with self._lock:
+            if missing >= SEED_CANDLES - 1:
+                self._rebuild(rows, minute)  # Longer than any bucket: start over from the history
+            else:
+                for row in rows:
+                    self._advance(row[0], row[1], row[2], row[3], row[4], row[5], True, out)
+            # Minutes the history could not provide are not retried on every message
+            self._last_closed = max(self._last_closed or 0, minute - _BASE_MS)
+        return [d for d in out if d[2]]
+
+    def feed(self, msg) -> List[Tuple[str, KlineRow, bool]]:
+        """
+        Consumes one 1m kline message; returns (interval, row, closed) for every
+        derived interval, preceded by the closes of buckets it finished (after a
+        gap). Rows use the kline store layout.
+        """
+        k = msg['k']
+        minute = int(k['t'])
+        o, h, l, c, v = float(k['o']), float(k['h']), float(k['l']), float(k['c']), float(k['v'])
+
+        out = self._fill_gap(minute)
+        with self._lock:
+            self.messages += 1
+            self._advance(minute, o, h, l, c, v, bool(k['x']), out)
+        return out
+
+    def _advance(self, minute: int, o: float, h: float, l: float, c: float, v: float, closed: bool,
+                 out: List[Tuple[str, KlineRow, bool]]):
+        for interval in self.intervals:
+            step = INTERVAL_MS[interval]
+            start = minute - minute % step
+            bucket = self._buckets.get(interval)
+            if bucket is None or start > bucket.open_time:
+                if bucket is not None and not bucket.done and bucket.open is not None:
+                    out.append((interval, bucket.row(step), True))  # Its last close was missed
+                bucket = self._buckets[interval] = _Bucket(start)
+            elif start < bucket.open_time:
+                continue  # Late message for an already finished bucket
+
+            if bucket.open is None:
+                row = (start, o, h, l, c, v, start + step - 1)
+            else:
+                row = (start, bucket.open, max(bucket.high, h), min(bucket.low, l), c,
+                       bucket.volume + (0.0 if minute == bucket.last_minute else v), start + step - 1)
+            done = closed and minute + _BASE_MS == start + step
+            if closed:
+                bucket.fold(minute, o, h, l, c, v)
+                bucket.done = bucket.done or done
+            out.append((interval, row, done))
+        if closed and (self._last_closed is None or minute > self._last_closed):
+            self._last_closed = minute
+
+    @staticmethod
+    def to_message(symbol: str, interval: str, row: KlineRow, closed: bool, event_time: int = 0) -> dict:
+        """Binance kline stream payload for a derived candle."""
+        return {
+            "e": "kline", "E": event_time, "s": symbol,
+            "k": {
+                "t": row[0], "T": row[6], "s": symbol, "i": interval,
+                "o": row[1], "h": row[2], "l": row[3], "c": row[4], "v": row[5],
+                "x": closed,
+            },
+        }
+
+    @staticmethod
+    def to_row(msg) -> KlineRow:
+        """Kline store row of a (1m) kline stream message."""
+        k = msg['k']
+        return (int(k['t']), float(k['o']), float(k['h']), float(k['l']), float(k['c']),
+                float(k['v']), int(k['T']))
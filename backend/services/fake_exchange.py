@@ -0,0 +1,339 @@
+"""
+Fake Exchange Module.
+In-process stand-in for Binance: the python-binance `Client` surface used by
+BinanceWrapper plus the StreamManager surface used for sockets.
+
+Kline series (recorded rows or `synthetic_klines`) are replayed candle by
+candle on a simulated clock. Each `step()` closes the live candle of the next
+series (x=True kline) and opens the following one at its open price; market
+orders fill at the last streamed price with Binance-style commission, and the
+resulting executionReport / outboundAccountPosition events go to the user
+stream. Messages are queued and only delivered by `pump_one()`/`pump()`, so
+the caller decides ordering and nothing re-enters a handler that is still
+holding the bot lock (see backend/replay.py).
+"""
+import logging
+import math
+import random
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from backend.services.kline_store import INTERVAL_MS, KlineRow, KlineStore
+
+logger = logging.getLogger(__name__)
+
+QUOTE_ASSETS = ("USDT", "FDUSD", "USDC", "BUSD", "BTC", "ETH", "BNB")
+
+
+class FakeExchangeError(Exception):
+    """Order/API rejection with the `code` and `message` of BinanceAPIException."""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(f"APIError(code={code}): {message}")
+        self.code = code
+        self.message = message
+
+
+class _Handle:
+    """Returned by run_in_loop: background coroutines never run on the fake."""
+
+    def cancel(self):
+        return True
+
+
+def _fmt(value: float) -> str:
+    return f"{value:.8f}"
+
+
+def synthetic_klines(n: int, interval: str = "1m", start_price: float = 100.0,
+                     volatility: float = 0.002, cycle: int = 240, seed: int = 0,
+                     start_ms: int = 1_700_000_000_000) -> List[KlineRow]:
+    """Random walk with a slow sine swing (so oscillator strategies trade). Deterministic per seed."""
+    rng = random.Random(seed)
+    step = INTERVAL_MS[interval]
+    rows = []
+    price = start_price
+    for i in range(n):
+        drift = volatility * 1.5 * math.sin(2 * math.pi * i / cycle)
+        close = price * math.exp(drift + rng.gauss(0.0, volatility))
+        wick = price * volatility * abs(rng.gauss(0.0, 0.5))
+        high = max(price, close) + wick
+        low = min(price, close) - wick
+        open_time = start_ms + i * step
+        rows.append((open_time, price, high, low, close,
+                     round(rng.uniform(5.0, 15.0), 4), open_time + step - 1))
+        price = close
+    return rows
+
+
+class _Series:
+    __slots__ = ("symbol", "interval", "rows", "cursor")
+
+    def __init__(self, symbol: str, interval: str, rows: List[KlineRow], cursor: int):
+        self.symbol = symbol
+        self.interval = interval
+        self.rows = rows
+        self.cursor = cursor  # Index of the live (not yet closed) candle
+
+    @property
+    def done(self) -> bool:
+        return self.cursor >= len(self.rows) - 1
+
+
+class FakeExchange:
+    """
+    Deterministic in-memory exchange. Pass it as both `client` and `stream_manager`
+    to BinanceWrapper; `network` keeps its kline store / price table keys apart.
+    """
+
+    network = "replay"
+    LISTEN_KEY = "replay-listen-key"
+
+    def __init__(self, balances: Optional[Dict[str, float]] = None, commission_pct: float = 0.1,
+                 step_size: float = 0.00001, min_notional: float = 5.0):
+        self.balances: Dict[str, float] = dict(balances or {"USDT": 1000.0})
+        self.fee = commission_pct / 100
+        self.step_size = step_size
+        self.min_notional = min_notional
+        self.clock_ms = 0
+        self.orders: List[Dict[str, Any]] = []
+        self.https_proxy = None  # Attribute BinanceWrapper patches on real clients
+
+        self._series: Dict[Tuple[str, str], _Series] = {}
+        self._prices: Dict[str, float] = {}
+        self._subs: Dict[str, Dict[Any, Callable]] = {}
+        self._queue: deque = deque()
+        self._lock = threading.RLock()
+
+    # ========== DATA ==========
+
+    def load_klines(self, symbol: str, interval: str, rows: Iterable, history: int = 1000):
+        """
+        Adds a series: raw Binance kline lists or kline store rows (oldest first).
+        The first `history` candles are already closed when the replay starts.
+        """
+        rows = [r if isinstance(r[1], float) else KlineStore._parse([r])[0] for r in rows]
+        if len(rows) < 2:
+            raise ValueError(f"Need at least 2 klines for {symbol} {interval}")
+        with self._lock:
+            series = _Series(symbol, interval, rows, min(max(history, 1), len(rows) - 1))
+            self._series[(symbol, interval)] = series
+            live = rows[series.cursor]
+            self._prices[symbol] = live[1]
+            self.clock_ms = max(self.clock_ms, live[0])
+
+    def base_asset(self, symbol: str) -> str:
+        for quote in QUOTE_ASSETS:
+            if symbol.endswith(quote) and len(symbol) > len(quote):
+                return symbol[:-len(quote)]
+        return symbol
+
+    def quote_asset(self, symbol: str) -> str:
+        return symbol[len(self.base_asset(symbol)):]
+
+    # ========== REPLAY ==========
+
+    @property
+    def done(self) -> bool:
+        return all(s.done for s in self._series.values())
+
+    def step(self) -> bool:
+        """
+        Advances the clock to the next candle close (across all series) and queues
+        the closed kline plus the opening tick of the next candle. False when exhausted.
+        """
+        with self._lock:
+            live = [s for s in self._series.values() if not s.done]
+            if not live:
+                return False
+            close_time = min(s.rows[s.cursor][6] for s in live)
+            for series in live:
+                row = series.rows[series.cursor]
+                if row[6] != close_time:
+                    continue
+                self.clock_ms = close_time
+                self._prices[series.symbol] = row[4]
+                self._emit_kline(series, row, closed=True)
+                series.cursor += 1
+                nxt = series.rows[series.cursor]
+                self._prices[series.symbol] = nxt[1]
+                self._emit_kline(series, (nxt[0], nxt[1], nxt[1], nxt[1], nxt[1], 0.0, nxt[6]), closed=False)
+            self.clock_ms = close_time + 1
+            self._emit("!miniTicker@arr", [
+                {"e": "24hrMiniTicker", "E": self.clock_ms, "s": s, "c": _fmt(p)}
+                for s, p in self._prices.items()])
+            return True
+
+    def _emit_kline(self, series: _Series, row: KlineRow, closed: bool):
+        symbol = series.symbol
+        self._emit(f"{symbol.lower()}@kline_{series.interval}", {
+            "e": "kline", "E": self.clock_ms, "s": symbol,
+            "k": {"t": row[0], "T": row[6], "s": symbol, "i": series.interval,
+                  "o": _fmt(row[1]), "h": _fmt(row[2]), "l": _fmt(row[3]),
+                  "c": _fmt(row[4]), "v": _fmt(row[5]), "x": closed}})
+
+    def _emit(self, stream: str, msg):
+        if self._subs.get(stream):
+            self._queue.append((stream, msg))
+
+    def pump_one(self) -> Optional[str]:
+        """Delivers the oldest queued message; returns its stream name (None if idle)."""
+        with self._lock:
+            if not self._queue:
+                return None
+            stream, msg = self._queue.popleft()
+            callbacks = list(self._subs.get(stream, {}).values())
+        for callback in callbacks:
+            try:
+                callback(msg)
+            except Exception as ex:
+                logger.error("Replay callback failed on %s: %s", stream, ex)
+        return stream
+
+    def pump(self) -> int:
+        """Delivers every queued message (including ones queued by the handlers)."""
+        delivered = 0
+        while self.pump_one() is not None:
+            delivered += 1
+        return delivered
+
+    # ========== STREAM MANAGER SURFACE ==========
+
+    def subscribe(self, network: str, stream: str, key, callback: Callable):
+        with self._lock:
+            self._subs.setdefault(stream, {})[key] = callback
+
+    def unsubscribe(self, network: str, stream: str, key):
+        with self._lock:
+            owners = self._subs.get(stream)
+            if owners is not None:
+                owners.pop(key, None)
+                if not owners:
+                    del self._subs[stream]
+
+    def run_in_loop(self, coro):
+        coro.close()  # Keepalives are meaningless without a server
+        return _Handle()
+
+    # ========== CLIENT SURFACE ==========
+
+    def get_server_time(self) -> Dict[str, int]:
+        return {"serverTime": self.clock_ms}
+
+    def _visible(self, symbol: str, interval: str) -> List[KlineRow]:
+        series = self._series.get((symbol, interval))
+        if series is None:
+            raise FakeExchangeError(-1121, f"Invalid symbol/interval: {symbol} {interval}")
+        live = series.rows[series.cursor]
+        # The live candle only shows its open: no look-ahead into the rest of it
+        return series.rows[:series.cursor] + [(live[0], live[1], live[1], live[1], live[1], 0.0, live[6])]
+
+    def get_klines(self, symbol: str, interval: str, limit: int = 500,
+                   startTime: Optional[int] = None, endTime: Optional[int] = None, **_) -> List[list]:
+        with self._lock:
+            rows = self._visible(symbol, interval)
+        if startTime is not None:
+            rows = [r for r in rows if r[0] >= startTime]
+        if endTime is not None:
+            rows = [r for r in rows if r[0] <= endTime]
+        rows = rows[:limit] if startTime is not None else rows[-limit:]
+        return [[r[0], _fmt(r[1]), _fmt(r[2]), _fmt(r[3]), _fmt(r[4]), _fmt(r[5]), r[6],
+                 _fmt(r[5] * r[4]), 0, "0", "0", "0"] for r in rows]
+
+    def get_historical_klines(self, symbol: str, interval: str, start_str=None, end_str=None,
+                              limit: int = 1000, **_) -> List[list]:
+        return self.get_klines(symbol, interval, limit=limit)
+
+    def get_symbol_info(self, symbol: str) -> Optional[Dict[str, Any]]:
+        if symbol not in self._prices:
+            return None
+        step = _fmt(self.step_size)
+        return {
+            "symbol": symbol, "status": "TRADING",
+            "baseAsset": self.base_asset(symbol), "quoteAsset": self.quote_asset(symbol),
+            "filters": [
+                {"filterType": "PRICE_FILTER", "minPrice": "0.01000000", "maxPrice": "1000000.00000000",
+                 "tickSize": "0.01000000"},
+                {"filterType": "LOT_SIZE", "minQty": step, "maxQty": "9000000.00000000", "stepSize": step},
+                {"filterType": "NOTIONAL", "minNotional": _fmt(self.min_notional)},
+            ],
+        }
+
+    def get_exchange_info(self) -> Dict[str, Any]:
+        return {"timezone": "UTC", "serverTime": self.clock_ms,
+                "symbols": [self.get_symbol_info(s) for s in list(self._prices)]}
+
+    def get_symbol_ticker(self, symbol: str) -> Dict[str, str]:
+        if symbol not in self._prices:
+            raise FakeExchangeError(-1121, f"Invalid symbol: {symbol}")
+        return {"symbol": symbol, "price": _fmt(self._prices[symbol])}
+
+    def get_all_tickers(self) -> List[Dict[str, str]]:
+        return [{"symbol": s, "price": _fmt(p)} for s, p in self._prices.items()]
+
+    def get_asset_balance(self, asset: str) -> Dict[str, str]:
+        return {"asset": asset, "free": _fmt(self.balances.get(asset, 0.0)), "locked": _fmt(0.0)}
+
+    def get_account(self) -> Dict[str, Any]:
+        return {"canTrade": True, "updateTime": self.clock_ms, "balances": [
+            {"asset": a, "free": _fmt(v), "locked": _fmt(0.0)} for a, v in self.balances.items()]}
+
+    def stream_get_listen_key(self) -> str:
+        return self.LISTEN_KEY
+
+    def stream_keepalive(self, listen_key: str):
+        return {}
+
+    def create_order(self, symbol: str, side: str, type: str = "MARKET", quantity=None,
+                     quoteOrderQty=None, **_) -> Dict[str, Any]:
+        """Fills MARKET orders immediately at the last streamed price."""
+        if type != "MARKET":
+            raise FakeExchangeError(-1116, f"Unsupported order type: {type}")
+        with self._lock:
+            price = self._prices.get(symbol)
+            if price is None:
+                raise FakeExchangeError(-1121, f"Invalid symbol: {symbol}")
+            base, quote = self.base_asset(symbol), self.quote_asset(symbol)
+
+            qty = float(quoteOrderQty) / price if quoteOrderQty is not None else float(quantity or 0)
+            qty = round(math.floor(qty / self.step_size + 1e-9) * self.step_size, 8)
+            notional = qty * price
+            if qty <= 0 or notional < self.min_notional:
+                raise FakeExchangeError(-1013, "Filter failure: NOTIONAL")
+
+            if side == "BUY":
+                if notional > self.balances.get(quote, 0.0) + 1e-9:
+                    raise FakeExchangeError(-2010, "Account has insufficient balance for requested action.")
+                commission, commission_asset = qty * self.fee, base
+                self.balances[quote] = self.balances.get(quote, 0.0) - notional
+                self.balances[base] = self.balances.get(base, 0.0) + qty - commission
+            elif side == "SELL":
+                if qty > self.balances.get(base, 0.0) + 1e-9:
+                    raise FakeExchangeError(-2010, "Account has insufficient balance for requested action.")
+                commission, commission_asset = notional * self.fee, quote
+                self.balances[base] = max(0.0, self.balances.get(base, 0.0) - qty)
+                self.balances[quote] = self.balances.get(quote, 0.0) + notional - commission
+            else:
+                raise FakeExchangeError(-1100, f"Illegal side: {side}")
+
+            order_id = len(self.orders) + 1
+            order = {
+                "symbol": symbol, "orderId": order_id, "clientOrderId": f"replay-{order_id}",
+                "transactTime": self.clock_ms, "price": _fmt(0.0), "origQty": _fmt(qty),
+                "executedQty": _fmt(qty), "cummulativeQuoteQty": _fmt(notional),
+                "status": "FILLED", "type": type, "side": side,
+                "fills": [{"price": _fmt(price), "qty": _fmt(qty), "commission": _fmt(commission),
+                           "commissionAsset": commission_asset}],
+            }
+            self.orders.append(order)
+
+            self._emit(self.LISTEN_KEY, {
+                "e": "executionReport", "E": self.clock_ms, "s": symbol, "c": order["clientOrderId"],
+                "S": side, "o": type, "q": _fmt(qty), "x": "TRADE", "X": "FILLED", "i": order_id,
+                "l": _fmt(qty), "z": _fmt(qty), "L": _fmt(price), "n": _fmt(commission),
+                "N": commission_asset, "T": self.clock_ms, "Z": _fmt(notional)})
+            self._emit(self.LISTEN_KEY, {
+                "e": "outboundAccountPosition", "E": self.clock_ms, "u": self.clock_ms,
+                "B": [{"a": a, "f": _fmt(self.balances.get(a, 0.0)), "l": _fmt(0.0)} for a in (base, quote)]})
+            return order
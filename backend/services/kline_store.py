@@ -0,0 +1,299 @@
+"""
+Kline Store Module.
+Process-wide candle store per (network, symbol, interval) with delta fetching.
+
+Instead of pulling the full 1000-kline window on every call, the store only asks
+Binance for klines starting at the last stored open time (which refreshes the live
+candle and appends newer ones) and serves the window from memory. Candles are
+persisted to a local SQLite file so restarts don't re-download history; the file
+keeps the newest RETENTION_CANDLES per series, so it stays bounded.
+
+Series fed by a kline stream (`apply_stream`, e.g. from the candle resampler)
+are served straight from memory while the stream keeps them current.
+"""
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Binance interval lengths in milliseconds
+INTERVAL_MS = {
+    "1m": 60_000, "3m": 180_000, "5m": 300_000, "15m": 900_000, "30m": 1_800_000,
+    "1h": 3_600_000, "2h": 7_200_000, "4h": 14_400_000, "6h": 21_600_000,
+    "8h": 28_800_000, "12h": 43_200_000, "1d": 86_400_000, "3d": 259_200_000,
+    "1w": 604_800_000, "1M": 2_592_000_000,
+}
+
+# Row layout: (open_time_ms, open, high, low, close, volume, close_time_ms)
+KlineRow = Tuple[int, float, float, float, float, float, int]
+
+
+class _Series:
+    """In-memory candles for one (network, symbol, interval) key."""
+
+    __slots__ = ("rows", "lock", "last_fetch", "loaded", "streamed_at", "short_limit")
+
+    def __init__(self):
+        self.rows: List[KlineRow] = []
+        self.lock = threading.Lock()
+        self.last_fetch = 0.0
+        self.loaded = False
+        self.streamed_at = 0.0  # Last time a stream update extended the window
+        self.short_limit = 0  # Limit the exchange returned fewer rows for (young listing)
+
+
+class KlineStore:
+    """
+    Candle cache with delta fetch and SQLite persistence.
+    Thread-safe: one lock per series, so different markets never block each other.
+    """
+
+    MAX_FETCH = 1000      # Binance max klines per request
+    MEMORY_CANDLES = 1500  # Candles kept in memory per series
+    RETENTION_CANDLES = 20_000  # Candles kept in SQLite per series (older ones are pruned)
+    PRUNE_EVERY = 500  # New candles between prunes of a series
+    MIN_REFRESH_SECONDS = 1.0  # Collapses bursts of concurrent callers into one request
+    STREAM_FRESH_SECONDS = 10.0  # A streamed series skips REST while updated this recently
+
+    def __init__(self, db_path: str = "backend/klines.db"):
+        self.db_path = db_path
+        self._series: Dict[Tuple[str, str, str], _Series] = {}
+        self._series_lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._pruned: Dict[Tuple[str, str, str], int] = {}  # Key -> open time pruned up to
+        self._conn = None
+        self._init_db()
+
+    def _init_db(self):
+        try:
+            self._conn = sqlite3.connect(
+                self.db_path, timeout=10, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS klines (
+                    network TEXT,
+                    symbol TEXT,
+                    interval TEXT,
+                    open_time INTEGER,
+                    open REAL,
+                    high REAL,
+                    low REAL,
+                    close REAL,
+                    volume REAL,
+                    close_time INTEGER,
+                    PRIMARY KEY (network, symbol, interval, open_time)
+                )
+            ''')
+            self._conn.commit()
+        except Exception as ex:
+            # The store still works as a pure in-memory cache
+            logger.error("Kline store persistence disabled: %s", ex)
+            self._conn = None
+
+    def _get_series(self, key: Tuple[str, str, str]) -> _Series:
+        series = self._series.get(key)
+        if series is None:
+            with self._series_lock:
+                series = self._series.setdefault(key, _Series())
+        return series
+
+    # ========== PERSISTENCE ==========
+
+    def _load(self, key: Tuple[str, str, str]) -> List[KlineRow]:
+        if not self._conn:
+            return []
+        with self._db_lock:
+            rows = self._conn.execute('''
+                SELECT open_time, open, high, low, close, volume, close_time
+                FROM klines WHERE network = ? AND symbol = ? AND interval = ?
+                ORDER BY open_time DESC LIMIT ?
+            ''', (*key, self.MEMORY_CANDLES)).fetchall()
+        rows.reverse()
+        return rows
+
+    def _persist(self, key: Tuple[str, str, str], rows: List[KlineRow]):
+        if not self._conn or not rows:
+            return
+        try:
+            with self._db_lock:
+                self._conn.executemany('''
+                    INSERT OR REPLACE INTO klines
+                    (network, symbol, interval, open_time, open, high, low, close, volume, close_time)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', [(*key, *r) for r in rows])
+                self._prune(key, rows[-1][0])
+                self._conn.commit()
+        except Exception as ex:
+            logger.error("Failed to persist klines for %s: %s", key, ex)
+
+    def _prune(self, key: Tuple[str, str, str], newest: int):
+        """Deletes candles older than the newest RETENTION_CANDLES (caller holds the DB lock)."""
+        step = INTERVAL_MS.get(key[2])
+        if step is None:
+            return
+        cutoff = newest - self.RETENTION_CANDLES * step
+        last = self._pruned.get(key)
+        if last is not None and cutoff < last + self.PRUNE_EVERY * step:
+            return
+        self._conn.execute('''
+            DELETE FROM klines
+            WHERE network = ? AND symbol = ? AND interval = ? AND open_time <= ?
+        ''', (*key, cutoff))
+        self._pruned[key] = cutoff
+
+    def load_range(self, network: str, symbol: str, interval: str,
+                   start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> List[KlineRow]:
+        """Reads persisted candles (oldest first), e.g. for offline analysis."""
+        if not self._conn:
+            return []
+        query = '''SELECT open_time, open, high, low, close, volume, close_time
+                   FROM klines WHERE network = ? AND symbol = ? AND interval = ?'''
+        params = [network, symbol, interval]
+        if start_ms is not None:
+            query += " AND open_time >= ?"
+            params.append(start_ms)
+        if end_ms is not None:
+            query += " AND open_time <= ?"
+            params.append(end_ms)
+        with self._db_lock:
+            return self._conn.execute(query + " ORDER BY open_time", params).fetchall()
+
+    # ========== FETCHING ==========
+
+    @staticmethod
+    def _parse(klines: list) -> List[KlineRow]:
+        return [(int(k[0]), float(k[1]), float(k[2]), float(k[3]), float(k[4]), float(k[5]), int(k[6]))
+                for k in klines]
+
+    def _merge(self, series: _Series, fresh: List[KlineRow]):
+        """Replaces the overlapping tail (live candle) and appends newer candles."""
+        if not fresh:
+            return
+        first = fresh[0][0]
+        rows = series.rows
+        cut = len(rows)
+        while cut > 0 and rows[cut - 1][0] >= first:
+            cut -= 1
+        del rows[cut:]
+        rows.extend(fresh)
+        if len(rows) > self.MEMORY_CANDLES:
+            del rows[:len(rows) - self.MEMORY_CANDLES]
+
+    def get_klines(self, client, network: str, symbol: str, interval: str, limit: int = 100) -> List[KlineRow]:
+        """
+        Returns the latest `limit` candles (oldest first, last one is the live candle).
+        Only klines newer than the last stored open time are requested from Binance.
+        """
+        key = (network, symbol, interval)
+        series = self._get_series(key)
+
+        with series.lock:
+            if not series.loaded:
+                series.rows = self._load(key)
+                series.loaded = True
+
+            now = time.time()
+            streamed = now - series.streamed_at < self.STREAM_FRESH_SECONDS
+            # A window shorter than `limit` is filled right away, unless the exchange
+            # already returned all it has; then it refreshes like any other series
+            missing = len(series.rows) < limit and limit > series.short_limit
+            if missing or not streamed and now - series.last_fetch >= self.MIN_REFRESH_SECONDS:
+                step = INTERVAL_MS.get(interval)
+                rows = series.rows
+                # Delta is possible when the stored window is deep enough and the gap
+                # since the last candle fits in a single request
+                can_delta = (
+                    step is not None and len(rows) >= limit and
+                    (now * 1000 - rows[-1][0]) // step < self.MAX_FETCH
+                )
+                try:
+                    if can_delta:
+                        klines = client.get_klines(
+                            symbol=symbol, interval=interval,
+                            startTime=rows[-1][0], limit=self.MAX_FETCH)
+                    else:
+                        requested = min(max(limit, 1), self.MAX_FETCH)
+                        klines = client.get_klines(
+                            symbol=symbol, interval=interval, limit=requested)
+                        series.rows = []
+                        series.short_limit = requested if len(klines or []) < requested else 0
+
+                    fresh = self._parse(klines or [])
+                    self._merge(series, fresh)
+                    series.last_fetch = now
+                    self._persist(key, fresh)
+                except Exception as ex:
+                    # Serve whatever we have rather than an empty window
+                    logger.error(
+                        "Kline delta fetch failed for %s %s: %s", symbol, interval, ex)
+                    if not series.rows:
+                        raise
+
+            return series.rows[-limit:]
+
+    def apply_stream(self, network: str, symbol: str, interval: str, row: KlineRow, closed: bool = False) -> bool:
+        """
+        Merges a streamed candle (live update or close) into a loaded series.
+        Only contiguous updates are applied; after a gap the series falls back
+        to delta fetching. Closed candles are persisted. Returns True if applied.
+        """
+        key = (network, symbol, interval)
+        series = self._series.get(key)
+        if series is None:
+            return False
+        with series.lock:
+            rows = series.rows
+            if not series.loaded or not rows:
+                return False
+            last = rows[-1][0]
+            if row[0] == last:
+                rows[-1] = row
+            elif row[0] == rows[-1][6] + 1:
+                rows.append(row)
+                if len(rows) > self.MEMORY_CANDLES:
+                    del rows[:len(rows) - self.MEMORY_CANDLES]
+            else:
+                return False
+            series.streamed_at = time.time()
+        if closed:
+            self._persist(key, [row])
+        return True
+
+    def invalidate(self, network: str, symbol: str, interval: str):
+        """Forces the next call to refresh the live candle from Binance."""
+        series = self._series.get((network, symbol, interval))
+        if series:
+            series.last_fetch = 0.0
+            series.streamed_at = 0.0
+            series.short_limit = 0
+
+    @staticmethod
+    def to_dataframe(rows: List[KlineRow]) -> pd.DataFrame:
+        """Builds the DataFrame layout returned by BinanceWrapper.get_historical_klines."""
+        if not rows:
+            return pd.DataFrame()
+        df = pd.DataFrame(rows, columns=[
+            'timestamp', 'open', 'high', 'low', 'close', 'volume', 'close_time'])
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        df.set_index('timestamp', inplace=True, drop=False)
+        return df[['open', 'high', 'low', 'close', 'volume', 'timestamp']]
+
+
+_store: Optional[KlineStore] = None
+_store_lock = threading.Lock()
+
+
+def get_kline_store() -> KlineStore:
+    """Returns the process-wide kline store (created on first use)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = KlineStore()
+    return _store
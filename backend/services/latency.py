@@ -0,0 +1,154 @@
+"""
+Latency Module.
+Tick-to-order stage timing with process-wide per-stage histograms.
+
+A TickTrace starts at the monotonic time a socket message was received; each
+`mark(stage)` closes the stage that ran since the previous mark. Stages of the
+trading path:
+
+    kline handler:  lock_wait -> candle_update -> indicators
+    evaluation:     queue -> lock_wait -> strategy -> validation -> order_request -> fill
+
+`finish()` feeds every stage plus the end-to-end total (tick_to_order or
+tick_to_decision) into fixed-bucket histograms, exposed on /metrics.
+"""
+import bisect
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Histogram bucket upper bounds in milliseconds (last bucket is +Inf)
+BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """Fixed log-spaced buckets: O(1) memory, percentiles estimated from bucket bounds."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, ms: float):
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (capped by the observed max)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(BUCKETS_MS[i], self.max) if i < len(BUCKETS_MS) else self.max
+        return self.max
+
+    def summary(self) -> Dict:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.50), 3),
+            "p95_ms": round(self.percentile(0.95), 3),
+            "p99_ms": round(self.percentile(0.99), 3),
+            "max_ms": round(self.max, 3),
+            # Cumulative counts per upper bound, Prometheus-style
+            "buckets": {str(b): c for b, c in zip(
+                list(BUCKETS_MS) + ["+Inf"], _cumulative(self.counts))},
+        }
+
+
+def _cumulative(counts: List[int]) -> List[int]:
+    out, total = [], 0
+    for n in counts:
+        total += n
+        out.append(total)
+    return out
+
+
+class LatencyTracker:
+    """Named histograms shared by every bot in the process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, LatencyHistogram] = {}
+
+    def record(self, stage: str, ms: float):
+        with self._lock:
+            hist = self._histograms.get(stage)
+            if hist is None:
+                hist = self._histograms[stage] = LatencyHistogram()
+            hist.record(ms)
+
+    def record_many(self, samples: List[Tuple[str, float]]):
+        with self._lock:
+            for stage, ms in samples:
+                hist = self._histograms.get(stage)
+                if hist is None:
+                    hist = self._histograms[stage] = LatencyHistogram()
+                hist.record(ms)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {stage: hist.summary() for stage, hist in self._histograms.items()}
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+_tracker: Optional[LatencyTracker] = None
+_tracker_lock = threading.Lock()
+
+
+def get_latency_tracker() -> LatencyTracker:
+    """Returns the process-wide latency tracker (created on first use)."""
+    global _tracker
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                _tracker = LatencyTracker()
+    return _tracker
+
+
+class TickTrace:
+    """Stage timestamps for one message (not thread-safe: one owner at a time)."""
+
+    __slots__ = ("received", "last", "stages")
+
+    def __init__(self, received: Optional[float] = None):
+        self.received = time.monotonic() if received is None else received
+        self.last = self.received
+        self.stages: List[Tuple[str, float]] = []  # (stage, ms) in order; stages may repeat
+
+    def mark(self, stage: str):
+        """Ends `stage` now (it started at the previous mark)."""
+        now = time.monotonic()
+        self.stages.append((stage, (now - self.last) * 1000))
+        self.last = now
+
+    def total_ms(self) -> float:
+        return (self.last - self.received) * 1000
+
+    def as_dict(self) -> Dict[str, float]:
+        """Per-stage milliseconds (repeated stages summed) plus `total`."""
+        out: Dict[str, float] = {}
+        for stage, ms in self.stages:
+            out[stage] = out.get(stage, 0.0) + ms
+        out = {k: round(v, 3) for k, v in out.items()}
+        out["total"] = round(self.total_ms(), 3)
+        return out
+
+    def finish(self, total_stage: Optional[str] = None, tracker: Optional[LatencyTracker] = None):
+        """Records every stage (and the total under `total_stage`) in the histograms."""
+        samples = list(self.stages)
+        if total_stage:
+            samples.append((total_stage, self.total_ms()))
+        (tracker or get_latency_tracker()).record_many(samples)
@@ -3,16 +3,112 @@ Market Data Service Module.
 Handles all market data ingestion, storage, and retrieval with smart caching.
 """
 import logging
+import threading
 import time
-from typing import Dict, List
+from typing import Dict, List, NamedTuple, Optional
 
 import pandas as pd
 
 from backend.binance_wrapper import BinanceWrapper
+from backend.services.stream_manager import get_stream_manager
 
 logger = logging.getLogger(__name__)
 
 
+class PriceEntry(NamedTuple):
+    price: float
+    updated: float   # time.time() of the last update
+    age: float       # seconds since the last update
+    stale: bool      # True if the value can no longer be trusted as "live"
+
+
+class PriceTable:
+    """
+    Live last-price table per network, fed by the `!miniTicker@arr` stream.
+
+    Writers replace whole (price, timestamp) tuples and readers do a single dict
+    lookup, so no lock is needed on either side (the GIL makes both atomic).
+    miniTicker only reports symbols that traded in the last second, so an entry
+    is stale when the stream itself went quiet or the symbol has not traded for
+    `max_age` seconds.
+    """
+
+    STREAM_TIMEOUT = 5.0
+    MAX_AGE = 60.0
+    REST_INTERVAL = 2.0  # Min seconds between REST refreshes of one stale symbol
+
+    def __init__(self, network: str):
+        self.network = network
+        self._prices: Dict[str, tuple] = {}
+        self._last_batch = 0.0
+        self._streams = set()
+        self._rest_at: Dict[str, float] = {}  # Symbol -> last REST refresh attempt
+
+    def __len__(self) -> int:
+        return len(self._prices)
+
+    def on_message(self, msg):
+        """Stream callback: accepts the all-market array or a single mini ticker."""
+        now = time.time()
+        for t in (msg if isinstance(msg, list) else (msg,)):
+            try:
+                self._prices[t['s']] = (float(t['c']), now)
+            except (KeyError, ValueError, TypeError):
+                # Silent fail for speed in stream
+                continue
+        self._last_batch = now
+
+    def set(self, symbol: str, price: float, ts: Optional[float] = None):
+        self._prices[symbol] = (float(price), time.time() if ts is None else ts)
+
+    def get(self, symbol: str) -> Optional[PriceEntry]:
+        item = self._prices.get(symbol)
+        if item is None:
+            return None
+        now = time.time()
+        age = now - item[1]
+        stream_down = now - self._last_batch > self.STREAM_TIMEOUT
+        return PriceEntry(item[0], item[1], age, stream_down or age > self.MAX_AGE)
+
+    def rest_due(self, symbol: str) -> bool:
+        """True (and records the attempt) if `symbol` may be refreshed over REST now."""
+        now = time.time()
+        if now - self._rest_at.get(symbol, 0.0) < self.REST_INTERVAL:
+            return False
+        self._rest_at[symbol] = now
+        return True
+
+    def snapshot(self, symbols: Optional[List[str]] = None) -> Dict[str, float]:
+        prices = self._prices
+        if symbols is None:
+            return {s: v[0] for s, v in list(prices.items())}
+        return {s: prices[s][0] for s in symbols if s in prices}
+
+    def subscribe(self, symbols: Optional[List[str]] = None, manager=None):
+        """Subscribes to every symbol (default) or only to `symbols`."""
+        streams = ["!miniTicker@arr"] if not symbols else [
+            f"{s.lower()}@miniTicker" for s in symbols]
+        manager = manager or get_stream_manager()
+        for stream in streams:
+            if stream not in self._streams:
+                manager.subscribe(self.network, stream,
+                                  ("price_table", stream), self.on_message)
+                self._streams.add(stream)
+
+
+_tables: Dict[str, PriceTable] = {}
+_tables_lock = threading.Lock()
+
+
+def get_price_table(network: str) -> PriceTable:
+    """Returns the process-wide price table for a network (created on first use)."""
+    table = _tables.get(network)
+    if table is None:
+        with _tables_lock:
+            table = _tables.setdefault(network, PriceTable(network))
+    return table
+
+
 class MarketDataService:
     """
     The Eyes of the System.
@@ -22,45 +118,42 @@ class MarketDataService:
 
     def __init__(self, wrapper: BinanceWrapper):
         self.wrapper = wrapper
-        self.price_cache: Dict[str, float] = {}
-        self.last_price_update: Dict[str, float] = {}
+        # Shared by every service on the same network, fed by the miniTicker stream
+        self.prices = get_price_table(getattr(wrapper, "network", "mainnet"))
         self.klines_cache: Dict[str, pd.DataFrame] = {}
-        self.cache_ttl = 0.5  # 500ms cache validity for prices
+
+    def get_price_entry(self, symbol: str) -> Optional[PriceEntry]:
+        """Price, age and staleness flag from the live table (never hits REST)."""
+        return self.prices.get(symbol)
 
     def get_current_price(self, symbol: str) -> float:
         """
-        Returns the current price with low-latency caching.
+        Returns the latest streamed price. REST is used for a symbol the stream
+        has never reported (e.g. right after startup) and, at most once per
+        PriceTable.REST_INTERVAL, for a stale entry (stream down or symbol quiet).
         """
-        now = time.time()
-
-        # Check Cache
-        if symbol in self.price_cache:
-            if now - self.last_price_update.get(symbol, 0) < self.cache_ttl:
-                return self.price_cache[symbol]
+        entry = self.prices.get(symbol)
+        if entry is not None and not entry.stale:
+            return entry.price
+        if not self.prices.rest_due(symbol) and entry is not None:
+            return entry.price
 
-        # Fetch fresh if cache expired (Fallback to REST if socket lagging)
         try:
             price = float(self.wrapper.client.get_symbol_ticker(
                 symbol=symbol)['price'])
-
-            self.price_cache[symbol] = price
-            self.last_price_update[symbol] = now
+            self.prices.set(symbol, price)
             return price
         except Exception as ex:
             logger.error("Error fetching price for %s: %s", symbol, ex)
-            return self.price_cache.get(symbol, 0.0)
+            return 0.0
+
+    def get_prices(self, symbols: Optional[List[str]] = None) -> Dict[str, float]:
+        """Latest prices for `symbols` (or every known symbol) from the live table."""
+        return self.prices.snapshot(symbols)
 
     def update_price_stream(self, msg):
-        """Callback for WebSocket price updates."""
-        try:
-            symbol = msg['s']
-            # 'c' is usually close price in mini-ticker
-            price = float(msg['c'])
-            self.price_cache[symbol] = price
-            self.last_price_update[symbol] = time.time()
-        except (KeyError, ValueError, TypeError):
-            # Silent fail for speed in stream
-            pass
+        """Callback for WebSocket price updates (mini ticker or all-market array)."""
+        self.prices.on_message(msg)
 
     def get_historical_data(self, symbol: str, interval: str, limit: int = 100) -> pd.DataFrame:
         """
@@ -74,8 +167,12 @@ class MarketDataService:
             logger.error("Failed to get klines for %s: %s", symbol, ex)
             return pd.DataFrame()
 
-    def start_data_stream(self, symbols: List[str]):
-        """Starts WebSocket streams for list of symbols."""
-        logger.info("Starting data stream for %d symbols...", len(symbols))
-        # Implementation would use wrapper.start_ticker_socket or similar
-        # TODO: Implement WebSocket stream initialization
+    def start_data_stream(self, symbols: Optional[List[str]] = None):
+        """Starts the mini-ticker price feed for every symbol (default) or a subset."""
+        logger.info("Starting price stream for %s...",
+                    f"{len(symbols)} symbols" if symbols else "all symbols")
+        try:
+            self.prices.subscribe(
+                symbols, getattr(self.wrapper, "stream_manager", None))
+        except Exception as ex:
+            logger.error("Failed to start price stream: %s", ex)
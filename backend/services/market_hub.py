@@ -0,0 +1,256 @@
+"""
+Market Data Hub Module.
+Process-wide fan-out of market data across all users.
+
+Each distinct (network, symbol) gets exactly one 1m kline socket; the 3m..12h
+timeframes are derived from it in memory by a CandleResampler, so bots on any
+mix of timeframes (or switching between them) share that socket. Each distinct
+(network, indicator params) gets one shared streaming indicator engine. Every
+subscribed bot receives the same messages and reads indicators from the shared
+engine, so cost scales with distinct symbols instead of users or timeframes.
+"""
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from backend.binance_wrapper import BinanceWrapper
+from backend.services.candle_resampler import BASE_INTERVAL, RESAMPLED_INTERVALS, CandleResampler
+from backend.services.stream_manager import Mailbox, get_dispatcher
+from backend.streaming_indicators import StreamingIndicatorEngine
+
+logger = logging.getLogger(__name__)
+
+
+class _Feed:
+    """One upstream socket and its subscribers (each with its own mailbox)."""
+
+    __slots__ = ("name", "subscribers", "lock")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.subscribers: Dict[Any, Tuple[Mailbox, Callable]] = {}
+        self.lock = threading.Lock()
+
+    def add(self, subscriber_id, callback: Callable):
+        with self.lock:
+            entry = self.subscribers.get(subscriber_id)
+            mailbox = entry[0] if entry else Mailbox(f"{self.name}-{subscriber_id}")
+            self.subscribers[subscriber_id] = (mailbox, callback)  # Same mailbox: order is kept
+
+    def remove(self, subscriber_id) -> bool:
+        """Drops one subscriber; True when the feed has none left."""
+        with self.lock:
+            entry = self.subscribers.pop(subscriber_id, None)
+            if entry is not None:
+                get_dispatcher().close(entry[0])
+            return not self.subscribers
+
+    def close(self):
+        with self.lock:
+            for mailbox, _ in self.subscribers.values():
+                get_dispatcher().close(mailbox)
+            self.subscribers.clear()
+
+    def dispatch(self, msg):
+        """Queues the message for every subscriber, so a bot blocked on its lock never delays the others."""
+        with self.lock:
+            targets = list(self.subscribers.values())
+        dispatcher = get_dispatcher()
+        for mailbox, callback in targets:
+            dispatcher.put(mailbox, callback, msg)
+
+
+class MarketDataHub:
+    """Shares kline/trade subscriptions and indicator state between bots."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: Dict[str, BinanceWrapper] = {}
+        self._kline_feeds: Dict[Tuple[str, str, str], _Feed] = {}
+        self._trade_feeds: Dict[Tuple[str, str], _Feed] = {}
+        # One 1m socket + resampler per (network, symbol) for the derived timeframes
+        self._resamplers: Dict[Tuple[str, str], CandleResampler] = {}
+        self._engines: Dict[Tuple[str, tuple],
+                            StreamingIndicatorEngine] = {}
+
+    @staticmethod
+    def network_for(is_testnet: bool, use_real_data: bool) -> str:
+        """Market data comes from mainnet unless the bot trades testnet on testnet data."""
+        return "testnet" if is_testnet and not use_real_data else "mainnet"
+
+    def get_data_client(self, network: str) -> BinanceWrapper:
+        """Public (keyless) data client shared by every bot on a network."""
+        with self._lock:
+            client = self._clients.get(network)
+            if client is None:
+                client = BinanceWrapper(
+                    None, None, testnet=(network == "testnet"))
+                self._clients[network] = client
+            return client
+
+    def get_indicator_engine(self, network: str, settings: Dict[str, Any]) -> StreamingIndicatorEngine:
+        """Shared engine for a network and indicator parameter set."""
+        key = (network, StreamingIndicatorEngine._params(settings))
+        with self._lock:
+            engine = self._engines.get(key)
+            if engine is None:
+                engine = StreamingIndicatorEngine()
+                self._engines[key] = engine
+            return engine
+
+    # ========== SUBSCRIPTIONS ==========
+
+    @staticmethod
+    def _resampled(timeframe: str) -> bool:
+        return timeframe == BASE_INTERVAL or timeframe in RESAMPLED_INTERVALS
+
+    def subscribe_klines(self, network: str, symbol: str, timeframe: str, subscriber_id, callback: Callable,
+                         exclusive: bool = False):
+        """
+        Adds a subscriber; the upstream socket opens with the first one.
+        1m..12h feeds share the symbol's 1m socket. With exclusive=True the
+        subscriber leaves its other kline feeds afterwards, so switching
+        timeframe on the same symbol keeps the socket open.
+        """
+        key = (network, symbol, timeframe)
+        open_socket = False
+        resampler = None
+        with self._lock:
+            feed = self._kline_feeds.get(key)
+            is_new = feed is None
+            if is_new:
+                feed = _Feed("_".join(key))
+                self._kline_feeds[key] = feed
+                if self._resampled(timeframe):
+                    open_socket = (network, symbol) not in self._resamplers
+                    if open_socket:
+                        resampler = self._resamplers[(network, symbol)] = self._new_resampler(network, symbol)
+                else:
+                    open_socket = True
+        feed.add(subscriber_id, callback)
+
+        if open_socket:
+            client = self.get_data_client(network)
+            if self._resampled(timeframe):
+                # History is read here, before the first message (never under a lock or on the stream)
+                resampler.seed()
+                client.start_kline_socket(
+                    symbol, BASE_INTERVAL, lambda msg: self._on_base_kline(network, symbol, msg),
+                    exclusive=False)
+                logger.info("Market hub: opened 1m kline feed %s (resampled)", (network, symbol))
+            else:
+                client.start_kline_socket(
+                    symbol, timeframe, feed.dispatch, exclusive=False)
+                logger.info("Market hub: opened kline feed %s", key)
+        if exclusive:
+            self._release(subscriber_id, ("kline",), keep=key)
+
+    def _new_resampler(self, network: str, symbol: str) -> CandleResampler:
+        return CandleResampler(symbol, history=lambda limit: self._base_history(network, symbol, limit))
+
+    def _base_history(self, network: str, symbol: str, limit: int):
+        """1m rows for (re-)seeding a resampler, delta-refreshed so minutes the stream missed are filled."""
+        client = self.get_data_client(network)
+        client.kline_store.invalidate(network, symbol, BASE_INTERVAL)
+        return client.get_kline_rows(symbol, BASE_INTERVAL, limit)
+
+    def _on_base_kline(self, network: str, symbol: str, msg):
+        """1m message: updates the candle store and fans out to the 1m and derived feeds."""
+        resampler = self._resamplers.get((network, symbol))
+        if resampler is None:
+            return
+        store = self.get_data_client(network).kline_store
+        store.apply_stream(network, symbol, BASE_INTERVAL, CandleResampler.to_row(msg), bool(msg['k']['x']))
+        derived = resampler.feed(msg)
+
+        feed = self._kline_feeds.get((network, symbol, BASE_INTERVAL))
+        if feed is not None:
+            feed.dispatch(msg)
+        for interval, row, closed in derived:
+            # Keeps the store's window for every derived timeframe current (no REST while streaming)
+            store.apply_stream(network, symbol, interval, row, closed)
+            feed = self._kline_feeds.get((network, symbol, interval))
+            if feed is not None:
+                feed.dispatch(CandleResampler.to_message(symbol, interval, row, closed, msg.get('E', 0)))
+
+    def subscribe_trades(self, network: str, symbol: str, subscriber_id, callback: Callable):
+        """Adds a trade-stream subscriber; one socket per (network, symbol)."""
+        key = (network, symbol)
+        with self._lock:
+            feed = self._trade_feeds.get(key)
+            is_new = feed is None
+            if is_new:
+                feed = _Feed("_".join(key))
+                self._trade_feeds[key] = feed
+        feed.add(subscriber_id, callback)
+
+        if is_new:
+            self.get_data_client(network).start_trade_socket(
+                symbol, feed.dispatch, exclusive=False)
+
+    def _release(self, subscriber_id, kinds, keep=None):
+        closing = []
+        with self._lock:
+            for prefix in kinds:
+                feeds = self._kline_feeds if prefix == "kline" else self._trade_feeds
+                for key, feed in list(feeds.items()):
+                    if key == keep:
+                        continue
+                    if feed.remove(subscriber_id):
+                        del feeds[key]
+                        if prefix == "kline" and self._resampled(key[2]):
+                            # The shared 1m socket closes with the symbol's last resampled feed
+                            base = key[:2]
+                            if any(k[:2] == base and self._resampled(k[2]) for k in feeds):
+                                continue
+                            self._resamplers.pop(base, None)
+                            key = (*base, BASE_INTERVAL)
+                        closing.append((prefix, key))
+
+        for prefix, key in closing:
+            client = self._clients.get(key[0])
+            if client:
+                client.stop_socket(f"{prefix}_{'_'.join(key[1:])}")
+            logger.info("Market hub: closed %s feed %s", prefix, key)
+
+    def unsubscribe(self, subscriber_id):
+        """Removes a subscriber from every feed; idle sockets are closed."""
+        self._release(subscriber_id, ("kline", "trade"))
+
+    def unsubscribe_trades(self, subscriber_id):
+        """Removes a subscriber from trade feeds only."""
+        self._release(subscriber_id, ("trade",))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Distinct markets vs. subscribers (how much work is being shared)."""
+        with self._lock:
+            return {
+                "kline_feeds": {"_".join(k): len(f.subscribers) for k, f in self._kline_feeds.items()},
+                "trade_feeds": {"_".join(k): len(f.subscribers) for k, f in self._trade_feeds.items()},
+                "resampled_symbols": {"_".join(k): r.messages for k, r in self._resamplers.items()},
+                "indicator_engines": len(self._engines),
+            }
+
+    def shutdown(self):
+        with self._lock:
+            for client in self._clients.values():
+                client.stop_all_sockets()
+            for feed in (*self._kline_feeds.values(), *self._trade_feeds.values()):
+                feed.close()
+            self._kline_feeds.clear()
+            self._trade_feeds.clear()
+            self._resamplers.clear()
+
+
+_hub: Optional[MarketDataHub] = None
+_hub_lock = threading.Lock()
+
+
+def get_market_hub() -> MarketDataHub:
+    """Returns the process-wide market data hub (created on first use)."""
+    global _hub
+    if _hub is None:
+        with _hub_lock:
+            if _hub is None:
+                _hub = MarketDataHub()
+    return _hub
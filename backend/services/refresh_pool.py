@@ -0,0 +1,159 @@
+"""
+Refresh Pool Module.
+Shared bounded executors for market-data refreshes and for alert scans.
+
+Jobs are de-duplicated per key (e.g. (user_id, symbol, timeframe)): at most one run
+is in flight and at most one is queued behind it. Extra requests while a run is
+queued are coalesced, so bursty streams can no longer spawn overlapping refreshes.
+
+RSI alert scans (one multi-symbol snapshot per bot) run on their own executor:
+they are slow compared with a refresh, and sharing the refresh workers would
+delay every bot's market data behind them.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshExecutor:
+    """Bounded thread pool with per-key single-flight semantics and metrics."""
+
+    def __init__(self, max_workers: int = 4, name: str = "refresh"):
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._active: Dict[Hashable, bool] = {}  # key -> queued-behind flag
+        self._pending_fn: Dict[Hashable, Callable] = {}
+
+        # Metrics
+        self._queued = 0
+        self._running = 0
+        self._submitted = 0
+        self._coalesced = 0
+        self._completed = 0
+        self._failed = 0
+        self._run_times = deque(maxlen=500)
+        self._wait_times = deque(maxlen=500)
+
+    def submit(self, key: Hashable, fn: Callable[[], Any]) -> bool:
+        """
+        Schedules `fn` for `key`. Returns False if the request was coalesced into
+        a run that is already queued for the same key.
+        """
+        with self._lock:
+            self._submitted += 1
+            if key in self._active:
+                if self._active[key]:
+                    self._coalesced += 1
+                    return False
+                # One run in flight: queue exactly one follow-up with the latest fn
+                self._active[key] = True
+                self._pending_fn[key] = fn
+                return True
+
+            self._active[key] = False
+            self._queued += 1
+        self._pool.submit(self._run, key, fn, time.perf_counter())
+        return True
+
+    def _run(self, key: Hashable, fn: Callable[[], Any], enqueued_at: float):
+        started = time.perf_counter()
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            self._wait_times.append(started - enqueued_at)
+
+        failed = False
+        try:
+            fn()
+        except Exception as ex:
+            failed = True
+            logger.error("Refresh job %s failed: %s", key, ex)
+        finally:
+            elapsed = time.perf_counter() - started
+            follow_up = None
+            with self._lock:
+                self._running -= 1
+                self._run_times.append(elapsed)
+                if failed:
+                    self._failed += 1
+                else:
+                    self._completed += 1
+
+                if self._active.get(key):
+                    follow_up = self._pending_fn.pop(key)
+                    self._active[key] = False
+                    self._queued += 1
+                else:
+                    self._active.pop(key, None)
+
+            if follow_up is not None:
+                self._pool.submit(self._run, key, follow_up,
+                                  time.perf_counter())
+
+    def is_busy(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._active
+
+    @staticmethod
+    def _summary(samples) -> Dict[str, float]:
+        if not samples:
+            return {"count": 0, "avg_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+        ordered = sorted(samples)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return {
+            "count": len(ordered),
+            "avg_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+            "p95_ms": round(p95 * 1000, 2),
+            "max_ms": round(ordered[-1] * 1000, 2),
+        }
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Queue depth, in-flight work and run/wait time statistics."""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "queue_depth": self._queued,
+                "running": self._running,
+                "pending_followups": sum(1 for v in self._active.values() if v),
+                "submitted": self._submitted,
+                "coalesced": self._coalesced,
+                "completed": self._completed,
+                "failed": self._failed,
+                "run_time": self._summary(self._run_times),
+                "wait_time": self._summary(self._wait_times),
+            }
+
+    def shutdown(self, wait: bool = False):
+        self._pool.shutdown(wait=wait)
+
+
+_executor: Optional[RefreshExecutor] = None
+_alert_executor: Optional[RefreshExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_refresh_executor() -> RefreshExecutor:
+    """Returns the process-wide refresh executor (created on first use)."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = RefreshExecutor()
+    return _executor
+
+
+def get_alert_executor() -> RefreshExecutor:
+    """Returns the process-wide executor for alert scans (separate from market refreshes)."""
+    global _alert_executor
+    if _alert_executor is None:
+        with _executor_lock:
+            if _alert_executor is None:
+                _alert_executor = RefreshExecutor(max_workers=2, name="alerts")
+    return _alert_executor
@@ -0,0 +1,221 @@
+"""
+Status Stream Module.
+Computes status deltas for the dashboard WebSocket (/ws/status) and fans them out.
+
+Each connection gets one full snapshot, then only what changed since the last
+message: modified scalar fields (price, indicators, position, stats, settings),
+the live/new candles and new trades. The history and trades arrays are only
+re-sent when they were replaced (symbol switch, PnL reset).
+
+StatusBroadcaster runs one producer per bot, not per connection: each tick
+builds the bot's status once under `bot.lock`, encodes the delta once and
+queues the same text for every open dashboard of that bot. Connections that
+just joined get a snapshot taken under the same lock hold, so they are in step
+with the next shared delta.
+"""
+import asyncio
+import json
+import logging
+from itertools import islice
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _json_default(obj):
+    # Indicator values and predictions may still be NumPy scalars/arrays
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+
+def encode(message: Dict[str, Any]) -> str:
+    """Serializes a snapshot/delta message for the WebSocket."""
+    return json.dumps(message, default=_json_default, separators=(",", ":"))
+
+
+class StatusDiffer:
+    """Tracks what one client has already seen of a bot's status."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._fields: Dict[str, Any] = {}
+        self._last_candle: Optional[dict] = None
+        self._trade_seq = 0
+        self._trades_version = 0
+
+    def _remember(self, fields, records_tail, bot):
+        self._fields = fields
+        self._last_candle = records_tail
+        self._trade_seq = bot.trade_seq
+        self._trades_version = bot.trades_version
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Full status (sent once per connection or after a bot restart)."""
+        bot = self.bot
+        with bot.lock:
+            status = bot._live_status()
+            records = bot.history.to_records()
+            self._remember(status, records[-1] if records else None, bot)
+            return self._snapshot_message(status, records, bot)
+
+    @staticmethod
+    def _snapshot_message(status, records, bot) -> Dict[str, Any]:
+        return {"type": "snapshot", "data": {**status, "history": records, "trades": list(bot.trades)}}
+
+    def _history_delta(self, history) -> Dict[str, Any]:
+        last = self._last_candle
+        if not len(history):
+            return {}
+        if last is None:
+            return {"history": history.to_records()}
+
+        times = history.column("time")
+        idx = int(np.searchsorted(times, last["time"]))
+        if idx >= len(times) or times[idx] != last["time"]:
+            # Our last candle is gone (symbol/timeframe switch): resend everything
+            return {"history": history.to_records()}
+
+        # Previously-live candle (may have closed with final values) + newer ones
+        records = history.to_records(len(times) - idx)
+        if len(records) == 1 and records[0] == last:
+            return {}
+        return {"candles": records}
+
+    def delta(self) -> Optional[Dict[str, Any]]:
+        """Changes since the previous message, or None if nothing changed."""
+        return self.publish()[0]
+
+    def publish(self, full: bool = False) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        (delta, snapshot) from one status build under one lock hold; the
+        snapshot (only with `full`) matches the state the delta leads to.
+        """
+        bot = self.bot
+        msg: Dict[str, Any] = {}
+        snapshot = None
+        with bot.lock:
+            status = bot._live_status()
+            msg.update(self._history_delta(bot.history))
+
+            new_count = bot.trade_seq - self._trade_seq
+            if bot.trades_version != self._trades_version or new_count > len(bot.trades):
+                msg["trades"] = list(bot.trades)
+            elif new_count > 0:
+                msg["new_trades"] = list(islice(bot.trades, new_count))
+
+            tail = msg.get("history") or msg.get("candles")
+            last_candle = tail[-1] if tail else self._last_candle
+            previous = self._fields
+            self._remember(status, last_candle, bot)
+            if full:
+                snapshot = self._snapshot_message(status, bot.history.to_records(), bot)
+
+        changed = {k: v for k, v in status.items() if previous.get(k) != v}
+        if changed:
+            msg["fields"] = changed
+        return ({"type": "delta", **msg} if msg else None), snapshot
+
+
+class _Channel:
+    """Connections watching one bot and the single differ that serves them."""
+
+    __slots__ = ("queues", "fresh", "warned", "differ", "task")
+
+    def __init__(self):
+        self.queues: Set[asyncio.Queue] = set()
+        self.fresh: Set[asyncio.Queue] = set()   # Waiting for their first snapshot
+        self.warned: Set[asyncio.Queue] = set()  # Already told the bot is missing
+        self.differ: Optional[StatusDiffer] = None
+        self.task: Optional[asyncio.Task] = None
+
+
+class StatusBroadcaster:
+    """Per-bot status producer shared by every dashboard connection of that bot."""
+
+    MAX_PENDING = 50  # Messages queued for a slow client before it is resynced with a snapshot
+
+    def __init__(self, get_bot: Callable[[Hashable], Any], interval: float = 1.0):
+        self._get_bot = get_bot
+        self.interval = interval
+        self._channels: Dict[Hashable, _Channel] = {}
+        self.stats = {"ticks": 0, "messages": 0, "resyncs": 0}
+
+    def subscribe(self, key: Hashable) -> asyncio.Queue:
+        """Registers a connection (call from the event loop); returns its message queue."""
+        channel = self._channels.get(key)
+        if channel is None:
+            channel = self._channels[key] = _Channel()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.MAX_PENDING)
+        channel.queues.add(queue)
+        channel.fresh.add(queue)
+        if channel.task is None:
+            channel.task = asyncio.create_task(self._run(key, channel))
+        return queue
+
+    def unsubscribe(self, key: Hashable, queue: asyncio.Queue):
+        channel = self._channels.get(key)
+        if channel is not None:
+            channel.queues.discard(queue)
+            channel.fresh.discard(queue)
+            channel.warned.discard(queue)
+
+    async def _run(self, key: Hashable, channel: _Channel):
+        try:
+            while channel.queues:
+                try:
+                    await self._tick(key, channel)
+                except Exception as ex:
+                    logger.error("Status broadcast for %s failed: %s", key, ex)
+                await asyncio.sleep(self.interval)
+        finally:
+            channel.task = None
+            if not channel.queues and self._channels.get(key) is channel:
+                del self._channels[key]
+
+    async def _tick(self, key: Hashable, channel: _Channel):
+        bot = self._get_bot(key)
+        if not bot:
+            channel.differ = None
+            waiting = channel.queues - channel.warned
+            self._send(channel, waiting, encode({"type": "error", "detail": "Bot no inicializado"}))
+            channel.warned |= waiting
+            channel.fresh |= waiting
+            return
+
+        self.stats["ticks"] += 1
+        if channel.differ is None or channel.differ.bot is not bot:
+            # First tick or bot re-created: everyone starts over with a full snapshot
+            channel.differ = StatusDiffer(bot)
+            fresh = set(channel.queues)
+            delta, snapshot = None, await asyncio.to_thread(channel.differ.snapshot)
+        else:
+            fresh = set(channel.fresh)
+            delta, snapshot = await asyncio.to_thread(channel.differ.publish, bool(fresh))
+        channel.fresh -= fresh
+        channel.warned -= fresh
+        if snapshot is not None:
+            self._send(channel, fresh & channel.queues, encode(snapshot))
+        if delta is not None:
+            # Connections that joined during the build wait for their snapshot instead
+            self._send(channel, channel.queues - channel.fresh - fresh, encode(delta))
+
+    def _send(self, channel: _Channel, queues, text: str):
+        for queue in list(queues):
+            try:
+                queue.put_nowait(text)
+                self.stats["messages"] += 1
+            except asyncio.QueueFull:
+                # Too far behind for deltas to make sense: drop the backlog, resend a snapshot
+                while not queue.empty():
+                    queue.get_nowait()
+                channel.fresh.add(queue)
+                self.stats["resyncs"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "bots": len(self._channels),
+                "connections": sum(len(c.queues) for c in self._channels.values())}
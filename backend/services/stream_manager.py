@@ -0,0 +1,429 @@
+"""
+Stream Manager Module.
+Multiplexes Binance market/user streams over combined-stream WebSocket connections.
+
+A single daemon thread runs one asyncio loop for the whole process. Each network
+(mainnet/testnet) gets one combined connection (`/stream?streams=a/b/c`) and streams
+are added or removed at runtime with SUBSCRIBE/UNSUBSCRIBE messages, so dozens of
+symbols cost one socket instead of one thread + event loop + Client each.
+The loop thread only queues messages. Each owner has a mailbox that a small
+shared Dispatcher pool drains in order, one worker per mailbox at a time, so a
+callback that blocks (e.g. on a bot lock held across an order) delays its own
+owner's messages only, and the thread count stays fixed however many
+subscriptions there are.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import websockets
+
+logger = logging.getLogger(__name__)
+
+STREAM_URLS = {
+    "mainnet": "wss://stream.binance.com:9443/stream",
+    "testnet": "wss://stream.testnet.binance.vision/stream",
+}
+
+
+class Mailbox:
+    """Pending (callback, message) pairs of one owner, delivered in order."""
+
+    __slots__ = ("name", "queue", "scheduled", "closed", "dropped")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.queue: deque = deque()
+        self.scheduled = False  # Waiting in, or being drained by, the dispatcher
+        self.closed = False
+        self.dropped = 0
+
+
+class Dispatcher:
+    """
+    Fixed pool of delivery threads shared by every mailbox. A mailbox is handed
+    to one worker at a time (per-owner order is kept) and goes back to the end
+    of the ready queue after BATCH messages, so busy owners cannot starve others.
+    """
+
+    WORKERS = 8
+    BATCH = 64
+    MAX_PENDING = 10000  # Per mailbox; the oldest messages are dropped beyond this backlog
+
+    def __init__(self, workers: int = WORKERS):
+        self.workers = workers
+        self._ready: deque = deque()
+        self._cond = threading.Condition()
+        self._threads = []
+
+    def put(self, mailbox: Mailbox, callback: Callable[[Any], None], data: Any):
+        with self._cond:
+            if mailbox.closed:
+                return
+            if len(mailbox.queue) >= self.MAX_PENDING:
+                mailbox.queue.popleft()
+                mailbox.dropped += 1
+            mailbox.queue.append((callback, data))
+            if not mailbox.scheduled:
+                mailbox.scheduled = True
+                self._ready.append(mailbox)
+                self._cond.notify()
+            if not self._threads:
+                for i in range(self.workers):
+                    thread = threading.Thread(target=self._run, name=f"deliver-{i}", daemon=True)
+                    thread.start()
+                    self._threads.append(thread)
+
+    def close(self, mailbox: Mailbox):
+        """Discards the mailbox's pending messages and ignores later ones."""
+        with self._cond:
+            mailbox.closed = True
+            mailbox.queue.clear()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._ready:
+                    self._cond.wait()
+                mailbox = self._ready.popleft()
+            for _ in range(self.BATCH):
+                with self._cond:
+                    if mailbox.closed or not mailbox.queue:
+                        mailbox.scheduled = False
+                        break
+                    callback, data = mailbox.queue.popleft()
+                try:
+                    callback(data)
+                except Exception as ex:
+                    logger.error("Stream callback for %s failed: %s", mailbox.name, ex)
+            else:
+                with self._cond:
+                    if mailbox.queue and not mailbox.closed:
+                        self._ready.append(mailbox)
+                        self._cond.notify()
+                    else:
+                        mailbox.scheduled = False
+
+
+_dispatcher: Optional[Dispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher() -> Dispatcher:
+    """Returns the process-wide delivery pool (created on first use)."""
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = Dispatcher()
+    return _dispatcher
+
+
+class _Connection:
+    """One combined-stream connection: desired streams vs. streams live on the socket."""
+
+    MAX_STREAMS = 1024          # Binance limit per connection
+    CONTROL_INTERVAL = 0.25     # Binance allows 5 incoming control messages per second
+    BACKOFF_BASE = 1.0
+    BACKOFF_MAX = 60.0
+
+    def __init__(self, manager: "StreamManager", network: str, url: str):
+        self.manager = manager
+        self.network = network
+        self.url = url
+        self.live = set()
+        self.wake = asyncio.Event()
+        self.ws = None
+        self.task: Optional[asyncio.Task] = None
+        self.ids = itertools.count(1)
+
+        # Stats
+        self.connects = 0
+        self.reconnects = 0
+        self.messages = 0
+        self.last_message = 0.0
+        self.last_error = None
+
+    @classmethod
+    def backoff_delay(cls, attempt: int) -> float:
+        """Exponential backoff with jitter: uniform in [cap/2, cap]."""
+        cap = min(cls.BACKOFF_MAX, cls.BACKOFF_BASE * (2 ** attempt))
+        return cap / 2 + random.uniform(0, cap / 2)
+
+    def notify(self):
+        self.wake.set()
+
+    async def run(self):
+        self.task = asyncio.current_task()
+        attempt = 0
+        while not self.manager._closed:
+            streams = self.manager._desired_streams(self.network)
+            if not streams:
+                # Nothing to listen to: stay disconnected until someone subscribes
+                await self.wake.wait()
+                self.wake.clear()
+                continue
+
+            try:
+                url = f"{self.url}?streams={'/'.join(sorted(streams))}"
+                async with websockets.connect(url, ping_interval=20, ping_timeout=20,
+                                              close_timeout=2, max_size=2 ** 22) as ws:
+                    self.ws = ws
+                    self.live = set(streams)
+                    self.connects += 1
+                    attempt = 0
+                    await self._serve(ws)
+            except asyncio.CancelledError:
+                raise
+            except Exception as ex:
+                self.last_error = str(ex)
+                logger.warning("%s stream connection failed/closed: %s",
+                               self.network, ex)
+            finally:
+                self.ws = None
+                self.live = set()
+
+            if self.manager._closed:
+                break
+            if self.manager._desired_streams(self.network):
+                self.reconnects += 1
+                delay = self.backoff_delay(attempt)
+                attempt += 1
+                logger.info("Reconnecting %s streams in %.1fs",
+                            self.network, delay)
+                await self._backoff(delay)
+
+    async def _backoff(self, delay: float):
+        """Sleeps `delay` seconds; only shutdown cuts it short (not subscription churn)."""
+        deadline = time.monotonic() + delay
+        while not self.manager._closed:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                await asyncio.wait_for(self.wake.wait(), remaining)
+            except asyncio.TimeoutError:
+                return
+            self.wake.clear()
+
+    async def _serve(self, ws):
+        """Reads messages while applying subscription changes as they arrive."""
+        reader = asyncio.ensure_future(self._read(ws))
+        try:
+            while True:
+                waiter = asyncio.ensure_future(self.wake.wait())
+                done, _ = await asyncio.wait({reader, waiter}, return_when=asyncio.FIRST_COMPLETED)
+                if reader in done:
+                    waiter.cancel()
+                    reader.result()  # Re-raises the connection error, if any
+                    return
+                self.wake.clear()
+                if self.manager._closed or not self.manager._desired_streams(self.network):
+                    await ws.close()
+                    return
+                await self._sync(ws)
+        finally:
+            reader.cancel()
+
+    async def _sync(self, ws):
+        """Sends the SUBSCRIBE/UNSUBSCRIBE diff between desired and live streams."""
+        desired = self.manager._desired_streams(self.network)
+        removed = sorted(self.live - desired)
+        added = sorted(desired - self.live)
+        if removed:
+            await ws.send(json.dumps({"method": "UNSUBSCRIBE", "params": removed, "id": next(self.ids)}))
+            self.live.difference_update(removed)
+            await asyncio.sleep(self.CONTROL_INTERVAL)
+        if added:
+            await ws.send(json.dumps({"method": "SUBSCRIBE", "params": added, "id": next(self.ids)}))
+            self.live.update(added)
+            await asyncio.sleep(self.CONTROL_INTERVAL)
+
+    async def _read(self, ws):
+        async for raw in ws:
+            try:
+                msg = json.loads(raw)
+            except ValueError:
+                continue
+            stream = msg.get("stream")
+            if stream is None:
+                if msg.get("error"):
+                    logger.error("%s stream control error: %s",
+                                 self.network, msg["error"])
+                continue
+            self.messages += 1
+            self.last_message = time.time()
+            self.manager._dispatch(self.network, stream, msg.get("data"))
+
+
+class StreamManager:
+    """
+    Process-wide multiplexer for Binance combined streams.
+
+    Usage:
+        manager.subscribe("mainnet", "btcusdt@kline_1m", owner_key, callback)
+        manager.unsubscribe("mainnet", "btcusdt@kline_1m", owner_key)
+    Several owners may subscribe to the same stream; it is sent on the wire once.
+    """
+
+    def __init__(self, urls: Optional[Dict[str, str]] = None):
+        self.urls = dict(urls or STREAM_URLS)
+        self._lock = threading.Lock()
+        # network -> stream -> owner key -> callback
+        self._subs: Dict[str, Dict[str, Dict[Hashable, Callable]]] = {}
+        # owner key -> (mailbox, number of streams it is subscribed to)
+        self._mailboxes: Dict[Hashable, list] = {}
+        self._dispatcher = get_dispatcher()
+        self._connections: Dict[str, _Connection] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def _ensure_loop(self):
+        if self._loop is not None:
+            return
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(loop)
+            loop.call_soon(ready.set)
+            loop.run_forever()
+
+        self._thread = threading.Thread(
+            target=run, name="binance-streams", daemon=True)
+        self._thread.start()
+        ready.wait()
+        self._loop = loop
+
+    def _desired_streams(self, network: str) -> set:
+        with self._lock:
+            return set(self._subs.get(network, ()))
+
+    def _dispatch(self, network: str, stream: str, data: Any):
+        """Queues a message for every owner of the stream (never runs callbacks inline)."""
+        with self._lock:
+            targets = [(self._mailboxes[key][0], callback)
+                       for key, callback in self._subs.get(network, {}).get(stream, {}).items()]
+        for mailbox, callback in targets:
+            self._dispatcher.put(mailbox, callback, data)
+
+    # ========== PUBLIC API ==========
+
+    def subscribe(self, network: str, stream: str, key: Hashable, callback: Callable[[dict], None]):
+        """
+        Registers `callback` for `stream` under `key` (replaces the previous one).
+        Stream names are used verbatim: symbol streams are lowercase, listenKeys are not.
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("StreamManager is closed")
+            streams = self._subs.setdefault(network, {})
+            if stream not in streams and len(streams) >= _Connection.MAX_STREAMS:
+                raise ValueError(
+                    f"Stream limit reached for {network} ({_Connection.MAX_STREAMS})")
+            owners = streams.setdefault(stream, {})
+            if key not in owners:
+                entry = self._mailboxes.get(key)
+                if entry is None:
+                    entry = self._mailboxes[key] = [Mailbox(str(key)), 0]
+                entry[1] += 1
+            owners[key] = callback  # Same mailbox on replacement: order is kept
+            self._ensure_loop()
+            conn = self._connections.get(network)
+            if conn is None:
+                conn = _Connection(self, network, self.urls[network])
+                self._connections[network] = conn
+                asyncio.run_coroutine_threadsafe(conn.run(), self._loop)
+        self._loop.call_soon_threadsafe(conn.notify)
+
+    def unsubscribe(self, network: str, stream: str, key: Hashable):
+        """Removes one owner; the stream is unsubscribed when no owners remain."""
+        with self._lock:
+            owners = self._subs.get(network, {}).get(stream)
+            if not owners or owners.pop(key, None) is None:
+                return
+            entry = self._mailboxes[key]
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._mailboxes[key]
+                self._dispatcher.close(entry[0])
+            if not owners:
+                del self._subs[network][stream]
+            conn = self._connections.get(network)
+        if conn and self._loop:
+            self._loop.call_soon_threadsafe(conn.notify)
+
+    def run_in_loop(self, coro):
+        """Schedules a coroutine on the stream loop (e.g. listenKey keepalives)."""
+        with self._lock:
+            self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-network stream counts, owners and connection health."""
+        with self._lock:
+            stats = {}
+            for network, conn in self._connections.items():
+                streams = self._subs.get(network, {})
+                mailboxes = [self._mailboxes[k][0] for k in {k for o in streams.values() for k in o}]
+                stats[network] = {
+                    "connected": conn.ws is not None,
+                    "streams": len(streams),
+                    "live_streams": len(conn.live),
+                    "owners": sum(len(o) for o in streams.values()),
+                    "pending": sum(len(m.queue) for m in mailboxes),
+                    "dropped": sum(m.dropped for m in mailboxes),
+                    "connects": conn.connects,
+                    "reconnects": conn.reconnects,
+                    "messages": conn.messages,
+                    "last_message_age": round(time.time() - conn.last_message, 1) if conn.last_message else None,
+                    "last_error": conn.last_error,
+                }
+            return stats
+
+    def close(self, timeout: float = 5.0):
+        """Closes every connection gracefully and stops the loop thread."""
+        with self._lock:
+            self._closed = True
+            for mailbox, _ in self._mailboxes.values():
+                self._dispatcher.close(mailbox)
+            self._mailboxes.clear()
+            self._subs.clear()
+            connections = list(self._connections.values())
+        if not self._loop:
+            return
+
+        async def shutdown():
+            for conn in connections:
+                conn.notify()
+            tasks = [conn.task for conn in connections if conn.task]
+            if tasks:
+                await asyncio.wait(tasks, timeout=timeout)
+
+        try:
+            asyncio.run_coroutine_threadsafe(
+                shutdown(), self._loop).result(timeout + 1)
+        except Exception as ex:
+            logger.warning("Stream manager shutdown incomplete: %s", ex)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+_manager: Optional[StreamManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_stream_manager() -> StreamManager:
+    """Returns the process-wide stream manager (created on first use)."""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = StreamManager()
+    return _manager
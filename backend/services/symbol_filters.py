@@ -0,0 +1,163 @@
+"""
+Symbol Filters Module.
+Precompiled exchange filters per symbol for order normalization and validation.
+
+One bulk `exchangeInfo` call fills a per-network table of compact records
+(step/tick sizes, quantity bounds, min notional and their decimal scales),
+refreshed in the background. The order path then only does a dict lookup and
+float arithmetic: no filter-list scans, string parsing, log10 or REST calls.
+Symbols missing from the table (new listings, or before the first bulk load
+finishes) fall back to a single `get_symbol_info` request.
+"""
+import logging
+import math
+import threading
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Guards floor/ceil against representation error (e.g. 0.29 * 100 = 28.999999999999996)
+_EPSILON = 1e-9
+
+
+def _precision(step: float) -> int:
+    return max(0, int(round(-math.log10(step)))) if step > 0 else 0
+
+
+class SymbolFilters:
+    """Numeric view of one symbol's LOT_SIZE / PRICE_FILTER / (MIN_)NOTIONAL filters."""
+
+    __slots__ = ("symbol", "base_asset", "quote_asset", "step_size", "min_qty", "max_qty",
+                 "qty_precision", "qty_scale", "tick_size", "price_precision", "price_scale",
+                 "min_notional")
+
+    def __init__(self, symbol: str, base_asset: str = "", quote_asset: str = "",
+                 step_size: Optional[float] = None, min_qty: float = 0.0, max_qty: float = math.inf,
+                 tick_size: Optional[float] = None, min_notional: Optional[float] = None):
+        self.symbol = symbol
+        self.base_asset = base_asset
+        self.quote_asset = quote_asset
+        self.step_size = step_size  # None: no LOT_SIZE filter
+        self.min_qty = min_qty
+        self.max_qty = max_qty
+        self.qty_precision = _precision(step_size or 0.0)
+        self.qty_scale = 10 ** self.qty_precision
+        self.tick_size = tick_size
+        self.price_precision = _precision(tick_size or 0.0)
+        self.price_scale = 10 ** self.price_precision
+        self.min_notional = min_notional  # None: no NOTIONAL / MIN_NOTIONAL filter
+
+    @classmethod
+    def from_info(cls, info: Dict[str, Any]) -> "SymbolFilters":
+        """Parses a `get_symbol_info` / exchangeInfo symbol entry (once)."""
+        filters = {f['filterType']: f for f in info.get('filters', [])}
+        lot = filters.get('LOT_SIZE') or filters.get('MARKET_LOT_SIZE')
+        price = filters.get('PRICE_FILTER')
+        # Priority: NOTIONAL (modern) > MIN_NOTIONAL (legacy)
+        notional = filters.get('NOTIONAL') or filters.get('MIN_NOTIONAL')
+        return cls(
+            info['symbol'], info.get('baseAsset', ''), info.get('quoteAsset', ''),
+            step_size=float(lot['stepSize']) if lot else None,
+            min_qty=float(lot['minQty']) if lot else 0.0,
+            max_qty=float(lot['maxQty']) if lot else math.inf,
+            tick_size=float(price['tickSize']) if price and float(price['tickSize']) > 0 else None,
+            min_notional=float(notional['minNotional']) if notional else None,
+        )
+
+    def floor_qty(self, quantity: float) -> float:
+        return math.floor(quantity * self.qty_scale + _EPSILON) / self.qty_scale
+
+    def ceil_qty(self, quantity: float) -> float:
+        return math.ceil(quantity * self.qty_scale - _EPSILON) / self.qty_scale
+
+    def floor_price(self, price: float) -> float:
+        return math.floor(price * self.price_scale + _EPSILON) / self.price_scale
+
+
+class SymbolFilterTable:
+    """Per-network symbol -> SymbolFilters map with background bulk refresh."""
+
+    REFRESH_SECONDS = 3600  # Filters change rarely (new listings, tick size updates)
+    RETRY_SECONDS = 60
+
+    def __init__(self, network: str):
+        self.network = network
+        self._records: Dict[str, SymbolFilters] = {}
+        self._client = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.loaded = False
+        self.loads = 0
+        self.fallbacks = 0
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def load(self, client) -> int:
+        """Bulk exchangeInfo load; swaps the whole table at once (readers never lock)."""
+        info = client.get_exchange_info()
+        records = {}
+        for entry in info.get('symbols', []):
+            try:
+                records[entry['symbol']] = SymbolFilters.from_info(entry)
+            except (KeyError, ValueError, TypeError) as ex:
+                logger.debug("Skipping filters for %s: %s", entry.get('symbol'), ex)
+        self._records = records
+        self.loaded = True
+        self.loads += 1
+        return len(records)
+
+    def start(self, client):
+        """Starts the background loader once per table (later clients only replace the REST client)."""
+        with self._lock:
+            self._client = client
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name=f"symbol-filters-{self.network}", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                count = self.load(self._client)
+                logger.info("Loaded filters for %d symbols (%s)", count, self.network)
+                wait = self.REFRESH_SECONDS
+            except Exception as ex:
+                logger.error("exchangeInfo load failed (%s): %s", self.network, ex)
+                wait = self.RETRY_SECONDS
+            self._stop.wait(wait)
+
+    def stop(self):
+        self._stop.set()
+
+    def get(self, symbol: str, client=None) -> Optional[SymbolFilters]:
+        """Record for `symbol`; unknown symbols cost one get_symbol_info call."""
+        record = self._records.get(symbol)
+        if record is not None or client is None:
+            return record
+        try:
+            info = client.get_symbol_info(symbol)
+        except Exception as ex:
+            logger.error("Error getting symbol info for %s: %s", symbol, ex)
+            return None
+        if not info:
+            return None
+        record = SymbolFilters.from_info(info)
+        self.fallbacks += 1
+        self._records[symbol] = record
+        return record
+
+
+_tables: Dict[str, SymbolFilterTable] = {}
+_tables_lock = threading.Lock()
+
+
+def get_symbol_filter_table(network: str) -> SymbolFilterTable:
+    """Returns the process-wide filter table for a network (created on first use)."""
+    table = _tables.get(network)
+    if table is None:
+        with _tables_lock:
+            table = _tables.setdefault(network, SymbolFilterTable(network))
+    return table
@@ -40,6 +40,20 @@ class TelegramManager:
                 return next(iter(self.bot_manager.bots.values()))
         return None
 
+    def _get_price(self, bot, symbol: str) -> float:
+        """Precio desde la tabla en vivo (miniTicker); REST solo si no hay servicio."""
+        service = getattr(bot, 'market_data_service', None)
+        if service:
+            price = service.get_current_price(symbol)
+        else:
+            client = bot.data_client if getattr(
+                bot, 'data_client', None) else bot.client
+            price = float(client.client.get_symbol_ticker(
+                symbol=symbol)['price'])
+        if not price:
+            raise ValueError(f"No price for {symbol}")
+        return price
+
     async def start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Mando /start - Panel Principal"""
         text = (
@@ -228,8 +242,7 @@ class TelegramManager:
         try:
             df = client.get_historical_klines(symbol, bot.timeframe, limit=100)
             rsi = calculate_rsi(df)
-            price = float(client.client.get_symbol_ticker(
-                symbol=symbol)['price'])
+            price = self._get_price(bot, symbol)
 
             zone = "Neutral"
             emoji = "⚪"
@@ -298,21 +311,15 @@ class TelegramManager:
             return
 
         try:
-            # Obtener balances de Binance
-            account = bot.client.client.get_account()
-            balances = account.get('balances', [])
-
+            # Balances del ledger en memoria (alimentado por el user stream)
             text = "💰 *ESTADO DEL PORTAFOLIO*\n\n"
             total_usdt = 0
             found_assets = []
 
-            for balance in balances:
-                free = float(balance['free'])
-                locked = float(balance['locked'])
+            for asset, (free, locked) in bot.balances.balances().items():
                 total = free + locked
 
                 if total > 0:
-                    asset = balance['asset']
                     if asset == 'USDT':
                         total_usdt += total
                         found_assets.append(f"💵 *USDT:* {total:,.2f}")
@@ -321,13 +328,11 @@ class TelegramManager:
                         try:
                             if asset.startswith('LD'):  # Binance Earn
                                 clean_asset = asset[2:]
-                                ticker = bot.client.client.get_symbol_ticker(
-                                    symbol=f"{clean_asset}USDT")
+                                price = self._get_price(
+                                    bot, f"{clean_asset}USDT")
                             else:
-                                ticker = bot.client.client.get_symbol_ticker(
-                                    symbol=f"{asset}USDT")
+                                price = self._get_price(bot, f"{asset}USDT")
 
-                            price = float(ticker['price'])
                             value_usdt = total * price
                             total_usdt += value_usdt
                             found_assets.append(
@@ -370,7 +375,8 @@ class TelegramManager:
             await query.edit_message_text("❌ Bot no inicializado")
             return
 
-        from ..rsi_snapshot import get_default_symbols, calculate_rsi
+        from ..rsi_snapshot import get_default_symbols
+        from ..market_scan import get_market_scan_service
         symbols = get_default_symbols()[:5]  # Top 5
         client = bot.data_client if hasattr(
             bot, 'data_client') and bot.data_client else bot.client
@@ -380,12 +386,28 @@ class TelegramManager:
         bullish = 0
         bearish = 0
 
-        for sym in symbols:
+        def scan():
+            # Scan and live prices in one batch off the event loop (the price read may hit REST)
+            rows = get_market_scan_service().scan(client, symbols, "15m")
+            for row in rows:
+                try:
+                    row['live_price'] = self._get_price(bot, row['symbol'])
+                except Exception:
+                    row['live_price'] = None
+            return rows
+
+        try:
+            rows = await asyncio.to_thread(scan)
+        except Exception as e:
+            logger.error(f"Error en escaneo de tendencia: {e}")
+            rows = []
+
+        for row in sorted(rows, key=lambda r: symbols.index(r['symbol'])):
             try:
-                df = client.get_historical_klines(sym, "15m", limit=50)
-                rsi = calculate_rsi(df)
-                price = float(client.client.get_symbol_ticker(
-                    symbol=sym)['price'])
+                rsi = row['rsi'] or 50
+                # Live price, else the close of the last scanned candle
+                price = row['live_price'] or row.get('price')
+                price_text = f"${price:,.2f}" if price else "n/d"
 
                 status = "Neutral ⚪"
                 if rsi > 55:
@@ -395,8 +417,9 @@ class TelegramManager:
                     status = "Bajista 🔴"
                     bearish += 1
 
-                text += f"*{sym}:* ${price:,.2f} | {status}\n"
-            except:
+                text += f"*{row['symbol']}:* {price_text} | {status}\n"
+            except Exception as e:
+                logger.warning(f"Tendencia: fila {row.get('symbol')} omitida: {e}")
                 continue
 
         sentiment = "NEUTRAL"
@@ -686,19 +709,14 @@ class TelegramManager:
 
     async def _get_portfolio_text(self, bot):
         try:
-            account = bot.client.client.get_account()
-            balances = account.get('balances', [])
             text = "💰 *ESTADO DEL PORTAFOLIO*\n\n"
             total_usdt = 0
-            for b in balances:
-                free = float(b['free'])
-                locked = float(b['locked'])
+            for asset, (free, locked) in bot.balances.balances().items():
                 total = free + locked
                 if total > 0.000001:
-                    asset = b['asset']
                     try:
-                        price = 1.0 if asset == 'USDT' else float(
-                            bot.client.client.get_symbol_ticker(symbol=f"{asset}USDT")['price'])
+                        price = 1.0 if asset == 'USDT' else self._get_price(
+                            bot, f"{asset}USDT")
                         val = total * price
                         total_usdt += val
                         text += f"🔸 *{asset}:* {total:.6f} (~{val:,.2f} $)\n"
@@ -763,8 +781,7 @@ class TelegramManager:
         try:
             df = client.get_historical_klines(symbol, bot.timeframe, limit=100)
             rsi = calculate_rsi(df)
-            price = float(client.client.get_symbol_ticker(
-                symbol=symbol)['price'])
+            price = self._get_price(bot, symbol)
 
             text = (
                 f"📊 *RSI ACTUAL – {symbol}* ({bot.timeframe})\n\n"
@@ -0,0 +1,146 @@
+"""
+Trade Statistics Module.
+Running performance metrics updated in O(1) per trade.
+
+The accumulator is rebuilt once from SQL aggregates (DatabaseManager.get_trade_aggregates)
+and then folds in every new trade, so the status endpoint never rescans the trade list.
+"""
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def strategy_of(trade_type: str) -> str:
+    """'SELL (RSI Rebound-SELL)' -> 'RSI Rebound'; untagged types map to themselves."""
+    if "(" in trade_type and trade_type.endswith(")"):
+        name = trade_type[trade_type.index("(") + 1:-1]
+    else:
+        name = trade_type
+    for suffix in ("-BUY", "-SELL"):
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def _new_bucket() -> Dict[str, float]:
+    return {"trades": 0, "wins": 0, "losses": 0, "net_pnl": 0.0,
+            "gross_profit": 0.0, "gross_loss": 0.0}
+
+
+class TradeStatsAccumulator:
+    """
+    Wins/losses, net PnL, profit factor, max drawdown (on cumulative realized PnL),
+    average hold time (first BUY after flat -> next SELL, per symbol) and a
+    per-strategy breakdown.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.trades = 0
+        self.wins = 0
+        self.losses = 0
+        self.gross_profit = 0.0
+        self.gross_loss = 0.0
+        self.net_pnl = 0.0
+        self.peak_pnl = 0.0
+        self.max_drawdown = 0.0
+        self.hold_seconds = 0.0
+        self.holds = 0
+        self.open_since: Dict[str, datetime] = {}
+        self.by_strategy: Dict[str, Dict[str, float]] = {}
+
+    @staticmethod
+    def _parse_time(value) -> Optional[datetime]:
+        try:
+            return datetime.strptime(value, TIME_FORMAT)
+        except (TypeError, ValueError):
+            return None
+
+    def add(self, trade: Dict[str, Any]):
+        """Folds one executed trade (as stored by save_trade) into the totals."""
+        pnl = float(trade.get("pnl") or 0.0)
+        trade_type = trade.get("type", "")
+        bucket = self.by_strategy.setdefault(
+            strategy_of(trade_type), _new_bucket())
+
+        self.trades += 1
+        bucket["trades"] += 1
+        if pnl > 0:
+            self.wins += 1
+            self.gross_profit += pnl
+            bucket["wins"] += 1
+            bucket["gross_profit"] += pnl
+        elif pnl < 0:
+            self.losses += 1
+            self.gross_loss += -pnl
+            bucket["losses"] += 1
+            bucket["gross_loss"] += -pnl
+        bucket["net_pnl"] += pnl
+
+        if pnl:
+            self.net_pnl += pnl
+            self.peak_pnl = max(self.peak_pnl, self.net_pnl)
+            self.max_drawdown = max(
+                self.max_drawdown, self.peak_pnl - self.net_pnl)
+
+        symbol = trade.get("symbol", "")
+        ts = self._parse_time(trade.get("time"))
+        if trade_type.startswith("BUY"):
+            if symbol not in self.open_since and ts:
+                self.open_since[symbol] = ts
+        elif trade_type.startswith("SELL"):
+            opened = self.open_since.pop(symbol, None)
+            if opened and ts:
+                self.hold_seconds += (ts - opened).total_seconds()
+                self.holds += 1
+
+    def load_aggregates(self, agg: Dict[str, Any]):
+        """Restores the totals from DatabaseManager.get_trade_aggregates()."""
+        self.reset()
+        for trade_type, row in agg.get("by_type", {}).items():
+            bucket = self.by_strategy.setdefault(
+                strategy_of(trade_type), _new_bucket())
+            for key in bucket:
+                bucket[key] += row[key]
+            self.trades += row["trades"]
+            self.wins += row["wins"]
+            self.losses += row["losses"]
+            self.gross_profit += row["gross_profit"]
+            self.gross_loss += row["gross_loss"]
+        self.net_pnl = agg.get("net_pnl", 0.0)
+        self.peak_pnl = agg.get("peak_pnl", 0.0)
+        self.max_drawdown = agg.get("max_drawdown", 0.0)
+        self.hold_seconds = agg.get("hold_seconds", 0.0)
+        self.holds = agg.get("holds", 0)
+        self.open_since = {sym: t for sym, t in (
+            (s, self._parse_time(v)) for s, v in agg.get("open_since", {}).items()) if t}
+
+    @staticmethod
+    def _profit_factor(profit: float, loss: float) -> Optional[float]:
+        if loss > 0:
+            return round(profit / loss, 2)
+        return None  # Undefined without losing trades
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Stats payload for the UI (keeps the legacy wins/losses/win_rate/net_pnl keys)."""
+        closed = self.wins + self.losses
+        return {
+            "wins": self.wins,
+            "losses": self.losses,
+            "win_rate": round(self.wins / closed * 100, 1) if closed else 0.0,
+            "net_pnl": round(self.net_pnl, 2),
+            "total_trades": self.trades,
+            "profit_factor": self._profit_factor(self.gross_profit, self.gross_loss),
+            "max_drawdown": round(self.max_drawdown, 2),
+            "avg_hold_minutes": round(self.hold_seconds / self.holds / 60, 1) if self.holds else 0.0,
+            "by_strategy": {
+                name: {
+                    "trades": b["trades"], "wins": b["wins"], "losses": b["losses"],
+                    "net_pnl": round(b["net_pnl"], 2),
+                    "profit_factor": self._profit_factor(b["gross_profit"], b["gross_loss"]),
+                } for name, b in self.by_strategy.items()
+            },
+        }
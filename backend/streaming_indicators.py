@@ -0,0 +1,412 @@
+"""
+Streaming Indicator Engine
+Keeps Wilder/EMA running state per (symbol, timeframe) so every closed kline
+updates RSI, MACD, EMAs, Bollinger, ADX and ATR in O(1) instead of
+recomputing 1000 candles through pandas_ta.
+
+Each recurrence reproduces the pandas_ta definitions used by
+`indicators.calculate_indicators`:
+- RMA (RSI, ATR, ADX): ewm(alpha=1/length, adjust=True, min_periods=length)
+- EMA: SMA-seeded ewm(span=length, adjust=False)
+- Bollinger: SMA(20) +/- 2 * population std (ddof=0)
+"""
+import math
+import threading
+from collections import deque
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+
+
+class _RMA:
+    """Wilder moving average matching pandas ewm(adjust=True, min_periods=length)."""
+
+    __slots__ = ("beta", "min_periods", "num", "den", "count")
+
+    def __init__(self, length: int):
+        self.beta = 1.0 - 1.0 / length
+        self.min_periods = length
+        self.num = 0.0
+        self.den = 0.0
+        self.count = 0
+
+    def update(self, x: float) -> float:
+        self.num = x + self.beta * self.num
+        self.den = 1.0 + self.beta * self.den
+        self.count += 1
+        return self.value
+
+    @property
+    def value(self) -> float:
+        if self.count < self.min_periods or self.den == 0:
+            return math.nan
+        return self.num / self.den
+
+
+class _EMA:
+    """EMA seeded with the SMA of the first `length` values (pandas_ta default)."""
+
+    __slots__ = ("length", "alpha", "seed_sum", "count", "value")
+
+    def __init__(self, length: int):
+        self.length = length
+        self.alpha = 2.0 / (length + 1)
+        self.seed_sum = 0.0
+        self.count = 0
+        self.value = math.nan
+
+    def update(self, x: float) -> float:
+        self.count += 1
+        if self.count < self.length:
+            self.seed_sum += x
+        elif self.count == self.length:
+            self.value = (self.seed_sum + x) / self.length
+        else:
+            self.value = self.alpha * x + (1.0 - self.alpha) * self.value
+        return self.value
+
+
+class StreamingRSI:
+    """
+    Standalone Wilder RSI (pandas_ta `rsi` definition) over closed candles.
+    `advance` folds only candles newer than the last one seen; `value` previews
+    the live candle without mutating the state.
+    """
+
+    def __init__(self, length: int = 14):
+        self.length = length
+        self.reset()
+
+    def reset(self):
+        self.gain = _RMA(self.length)
+        self.loss = _RMA(self.length)
+        self.prev_close = math.nan
+        self.last_time: Optional[int] = None
+
+    def push(self, close: float):
+        if not math.isnan(self.prev_close):
+            diff = close - self.prev_close
+            self.gain.update(diff if diff > 0 else 0.0)
+            self.loss.update(-diff if diff < 0 else 0.0)
+        self.prev_close = close
+
+    def advance(self, candles) -> int:
+        """
+        Commits closed (open_time, close) pairs, oldest first. If the window no
+        longer reaches back to our last candle (gap), the state is rebuilt from it.
+        Returns the number of candles applied.
+        """
+        candles = list(candles)
+        if not candles:
+            return 0
+        if self.last_time is not None and candles[0][0] > self.last_time:
+            self.reset()
+        applied = 0
+        for t, close in candles:
+            if self.last_time is not None and t <= self.last_time:
+                continue
+            self.push(float(close))
+            self.last_time = t
+            applied += 1
+        return applied
+
+    def value(self, live_close: Optional[float] = None) -> float:
+        """RSI of the committed candles, plus `live_close` as a preview if given."""
+        gain, loss = self.gain, self.loss
+        count, g_num, g_den, l_num, l_den = gain.count, gain.num, gain.den, loss.num, loss.den
+        if live_close is not None and not math.isnan(self.prev_close):
+            diff = float(live_close) - self.prev_close
+            g_num = (diff if diff > 0 else 0.0) + gain.beta * g_num
+            l_num = (-diff if diff < 0 else 0.0) + loss.beta * l_num
+            g_den = 1.0 + gain.beta * g_den
+            l_den = 1.0 + loss.beta * l_den
+            count += 1
+        if count < self.length or g_den == 0:
+            return math.nan
+        avg_gain, avg_loss = g_num / g_den, l_num / l_den
+        if avg_gain + avg_loss == 0:
+            return math.nan
+        return 100.0 * avg_gain / (avg_gain + avg_loss)
+
+
+class _IndicatorState:
+    """Running indicator state for a single (symbol, timeframe) series."""
+
+    WINDOW = 20
+    LENGTH = 14
+
+    def __init__(self, params: Tuple[int, int, int, int, int]):
+        ema_length, fast_ema_len, macd_fast, macd_slow, macd_signal = params
+        self.params = params
+        self.count = 0
+        self.last_time = None
+        self.prev_high = math.nan
+        self.prev_low = math.nan
+        self.prev_close = math.nan
+        self.prev_volume = math.nan
+        self.last_close = math.nan
+        self.last_volume = math.nan
+
+        # RSI (Wilder)
+        self.rsi_gain = _RMA(self.LENGTH)
+        self.rsi_loss = _RMA(self.LENGTH)
+
+        # EMAs
+        self.trend_ema = _EMA(ema_length)
+        self.fast_ema = _EMA(fast_ema_len)
+        self.ema_2 = _EMA(2)
+        self.ema_7 = _EMA(7)
+
+        # MACD
+        self.macd_fast = _EMA(macd_fast)
+        self.macd_slow = _EMA(macd_slow)
+        self.macd_signal = _EMA(macd_signal)
+        self.macd = math.nan
+
+        # ATR / ADX (Wilder)
+        self.atr = _RMA(self.LENGTH)
+        self.dm_plus = _RMA(self.LENGTH)
+        self.dm_minus = _RMA(self.LENGTH)
+        self.adx = _RMA(self.LENGTH)
+
+        # Rolling windows (bounded by WINDOW, constant cost per update)
+        self.closes = deque(maxlen=self.WINDOW)
+        self.volumes = deque(maxlen=self.WINDOW)
+        self.ranges = deque(maxlen=self.WINDOW)
+
+    def copy(self) -> "_IndicatorState":
+        """Returns an independent copy used to preview the live candle."""
+        clone = _IndicatorState.__new__(_IndicatorState)
+        for key, val in self.__dict__.items():
+            if isinstance(val, (_RMA, _EMA)):
+                dup = val.__class__.__new__(val.__class__)
+                for slot in val.__slots__:
+                    setattr(dup, slot, getattr(val, slot))
+                val = dup
+            elif isinstance(val, deque):
+                val = deque(val, maxlen=val.maxlen)
+            setattr(clone, key, val)
+        return clone
+
+    def push(self, high: float, low: float, close: float, volume: float):
+        """Folds one closed candle into the running state."""
+        if self.count > 0:
+            diff = close - self.prev_close
+            self.rsi_gain.update(diff if diff > 0 else 0.0)
+            self.rsi_loss.update(-diff if diff < 0 else 0.0)
+
+            tr = max(high - low, abs(high - self.prev_close),
+                     abs(self.prev_close - low))
+            self.atr.update(tr)
+
+            up = high - self.prev_high
+            dn = self.prev_low - low
+            self.dm_plus.update(up if (up > dn and up > 0) else 0.0)
+            self.dm_minus.update(dn if (dn > up and dn > 0) else 0.0)
+
+            atr = self.atr.value
+            if not math.isnan(atr) and atr > 0:
+                dmp = 100.0 * self.dm_plus.value / atr
+                dmn = 100.0 * self.dm_minus.value / atr
+                if dmp + dmn > 0:
+                    self.adx.update(100.0 * abs(dmp - dmn) / (dmp + dmn))
+
+        self.trend_ema.update(close)
+        self.fast_ema.update(close)
+        self.ema_2.update(close)
+        self.ema_7.update(close)
+
+        fast = self.macd_fast.update(close)
+        slow = self.macd_slow.update(close)
+        if not math.isnan(fast) and not math.isnan(slow):
+            self.macd = fast - slow
+            self.macd_signal.update(self.macd)
+
+        self.closes.append(close)
+        self.volumes.append(volume)
+        self.ranges.append(high - low)
+
+        self.prev_volume = self.last_volume
+        self.prev_high, self.prev_low, self.prev_close = high, low, close
+        self.last_close, self.last_volume = close, volume
+        self.count += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns the same keys as `calculate_indicators` for the current state."""
+        ema_length, fast_ema_len, macd_fast, macd_slow, macd_signal = self.params
+        n = self.count
+        results: Dict[str, Any] = {}
+
+        if n == 0:
+            return results
+
+        rsi = 0.0
+        if n > self.LENGTH:
+            gain, loss = self.rsi_gain.value, self.rsi_loss.value
+            if not math.isnan(gain) and gain + loss > 0:
+                rsi = 100.0 * gain / (gain + loss)
+        results['rsi'] = rsi
+
+        if n > max(macd_fast, macd_slow, macd_signal):
+            signal = self.macd_signal.value
+            results['macd'] = self.macd
+            results['macd_hist'] = self.macd - signal
+            results['macd_signal'] = signal
+
+        if n > ema_length:
+            results['trend_ema'] = self.trend_ema.value
+
+        if n > fast_ema_len:
+            results['fast_ema'] = self.fast_ema.value
+            results['ema_2'] = self.ema_2.value
+            results['ema_7'] = self.ema_7.value
+
+        if n > self.WINDOW:
+            mid = sum(self.closes) / self.WINDOW
+            var = sum((c - mid) ** 2 for c in self.closes) / self.WINDOW
+            dev = 2.0 * math.sqrt(var)
+            results['bb_lower'] = mid - dev
+            results['bb_middle'] = mid
+            results['bb_upper'] = mid + dev
+
+            results['vol_sma'] = sum(self.volumes) / self.WINDOW
+            results['current_vol'] = self.last_volume
+            results['vol_prev'] = self.prev_volume
+
+        if n > self.LENGTH:
+            results['adx'] = self.adx.value
+            results['atr'] = self.atr.value
+
+        if n > self.WINDOW:
+            avg_size = sum(self.ranges) / self.WINDOW
+            if self.last_close > 0:
+                results['fluctuation_factor'] = avg_size / \
+                    (self.last_close * 0.0002)
+            else:
+                results['fluctuation_factor'] = 1.0
+            results['is_lateral'] = results['fluctuation_factor'] < 0.5 or \
+                results.get('adx', 25) < 20
+
+        # Same cleanup as calculate_indicators: never hand NaNs to strategies
+        for k, v in results.items():
+            if isinstance(v, float) and math.isnan(v):
+                results[k] = 0.0
+
+        return results
+
+
+class StreamingIndicatorEngine:
+    """
+    Stateful indicator engine keyed by (symbol, timeframe).
+
+    Usage:
+        engine.seed(symbol, timeframe, df, settings)   # once, from REST history
+        engine.update(symbol, timeframe, candle)       # every closed kline, O(1)
+        engine.peek(symbol, timeframe, candle)         # live candle preview, O(1)
+    """
+
+    def __init__(self):
+        self._states: Dict[Tuple[str, str], _IndicatorState] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _params(settings: Dict[str, Any]) -> Tuple[int, int, int, int, int]:
+        return (
+            int(settings.get('ema_length', 200)),
+            int(settings.get('fast_ema_len', 7)),
+            int(settings.get('macd_fast', 12)),
+            int(settings.get('macd_slow', 26)),
+            int(settings.get('macd_signal', 9)),
+        )
+
+    @staticmethod
+    def _candle_time(candle: Dict[str, Any]) -> int:
+        return int(candle['time'])
+
+    def is_ready(self, symbol: str, timeframe: str, settings: Dict[str, Any]) -> bool:
+        """True if a state exists for this series with matching indicator parameters."""
+        state = self._states.get((symbol, timeframe))
+        return state is not None and state.params == self._params(settings)
+
+    def last_time(self, symbol: str, timeframe: str) -> Optional[int]:
+        """Open time (seconds) of the last committed candle, if any."""
+        state = self._states.get((symbol, timeframe))
+        return state.last_time if state else None
+
+    def seed(self, symbol: str, timeframe: str, df: pd.DataFrame, settings: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Builds the running state from closed historical candles (one full pass).
+        The DataFrame must only contain closed candles, indexed by open time.
+        """
+        state = _IndicatorState(self._params(settings))
+        if df is not None and not df.empty:
+            highs = df['high'].to_numpy(dtype=float)
+            lows = df['low'].to_numpy(dtype=float)
+            closes = df['close'].to_numpy(dtype=float)
+            volumes = df['volume'].to_numpy(dtype=float)
+            for i in range(len(closes)):
+                state.push(highs[i], lows[i], closes[i], volumes[i])
+            state.last_time = int(df.index[-1].timestamp()) if hasattr(
+                df.index[-1], 'timestamp') else int(df.index[-1])
+
+        with self._lock:
+            self._states[(symbol, timeframe)] = state
+        return state.snapshot()
+
+    def update(self, symbol: str, timeframe: str, candle: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Commits a closed candle {time, high, low, close, volume}.
+        Candles already folded into the state are ignored (duplicate close events).
+        Returns None if the series has not been seeded yet.
+        """
+        with self._lock:
+            state = self._states.get((symbol, timeframe))
+            if state is None:
+                return None
+            t = self._candle_time(candle)
+            if state.last_time is not None and t <= state.last_time:
+                return state.snapshot()
+            state.push(float(candle['high']), float(candle['low']),
+                       float(candle['close']), float(candle['volume']))
+            state.last_time = t
+            return state.snapshot()
+
+    def peek(self, symbol: str, timeframe: str, candle: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Returns indicators as if the live (unclosed) candle were appended,
+        without mutating the committed state.
+        """
+        with self._lock:
+            state = self._states.get((symbol, timeframe))
+            if state is None:
+                return None
+            if candle is None or (state.last_time is not None and self._candle_time(candle) <= state.last_time):
+                return state.snapshot()
+            preview = state.copy()
+        preview.push(float(candle['high']), float(candle['low']),
+                     float(candle['close']), float(candle['volume']))
+        return preview.snapshot()
+
+    def catch_up(self, symbol: str, timeframe: str, df: pd.DataFrame) -> int:
+        """
+        Commits any closed candles in `df` newer than the state (e.g. missed while
+        the socket was reconnecting). Returns the number of candles applied.
+        """
+        last = self.last_time(symbol, timeframe)
+        if last is None or df is None or df.empty:
+            return 0
+        applied = 0
+        for t, row in df[df.index > pd.Timestamp(last, unit='s')].iterrows():
+            self.update(symbol, timeframe, {
+                'time': int(t.timestamp()), 'high': row['high'], 'low': row['low'],
+                'close': row['close'], 'volume': row['volume']})
+            applied += 1
+        return applied
+
+    def reset(self, symbol: Optional[str] = None, timeframe: Optional[str] = None):
+        """Drops stored state (all series, or a single one)."""
+        with self._lock:
+            if symbol is None:
+                self._states.clear()
+            else:
+                self._states.pop((symbol, timeframe), None)
@@ -1,16 +1,225 @@
 import requests
 import logging
+import threading
+import time
+from collections import deque
+
+from requests.adapters import HTTPAdapter
+
+
+class _ChatQueue:
+    """Pending messages for one (token, chat) pair plus its send schedule."""
+
+    __slots__ = ("token", "chat_id", "messages", "next_at", "attempts")
+
+    def __init__(self, token, chat_id):
+        self.token = token
+        self.chat_id = chat_id
+        self.messages = deque()
+        self.next_at = 0.0  # Monotonic time the next send is allowed
+        self.attempts = 0  # Failed attempts of the batch at the head of the queue
+
+
+class TelegramDispatcher:
+    """
+    Background sender shared by every notifier in the process.
+
+    `enqueue` only appends to a per-chat queue and wakes the worker, so callers
+    (trading threads, often holding the bot lock) never wait on the network.
+    A single daemon thread drains the queues over one pooled HTTP session,
+    honouring Telegram's limits (about 1 message/second per chat, 30/second per
+    bot token) and `retry_after` on 429. Messages that pile up for a chat while
+    it is rate limited go out together as one digest.
+    """
+
+    PER_CHAT_INTERVAL = 1.0  # Seconds between messages to the same chat
+    TOKEN_RATE = 25  # Messages per second per bot token (Telegram allows 30)
+    MAX_LENGTH = 4096  # Telegram message length limit
+    MAX_PENDING = 100  # Per chat; the oldest messages are dropped beyond this
+    MAX_ATTEMPTS = 3
+    RETRY_DELAY = 2.0
+    DIGEST_SEPARATOR = "\n\n〰️〰️〰️\n\n"
+
+    def __init__(self, session=None):
+        self._session = session
+        self._cond = threading.Condition()
+        self._chats = {}
+        self._token_sends = {}  # token -> deque of recent send times
+        self._thread = None
+        self._inflight = 0
+        self.stats = {"queued": 0, "sent": 0, "digests": 0, "dropped": 0, "failed": 0, "rate_limited": 0}
+
+    @property
+    def session(self):
+        if self._session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+            session.mount("https://", adapter)
+            self._session = session
+        return self._session
+
+    def enqueue(self, token, chat_id, text):
+        """Queues `text` for one chat. Never blocks on I/O."""
+        with self._cond:
+            key = (token, chat_id)
+            queue = self._chats.get(key)
+            if queue is None:
+                queue = self._chats[key] = _ChatQueue(token, chat_id)
+            if len(queue.messages) >= self.MAX_PENDING:
+                queue.messages.popleft()
+                self.stats["dropped"] += 1
+            queue.messages.append(text)
+            self.stats["queued"] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="telegram-dispatcher", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def pending(self):
+        with self._cond:
+            return sum(len(q.messages) for q in self._chats.values()) + self._inflight
+
+    def flush(self, timeout=10.0):
+        """Waits until every queued message was sent or given up on. Returns True if drained."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while any(q.messages for q in self._chats.values()) or self._inflight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def get_stats(self):
+        with self._cond:
+            return {**self.stats, "pending": sum(len(q.messages) for q in self._chats.values()),
+                    "chats": len(self._chats)}
+
+    def _token_wait(self, token, now):
+        """Seconds until `token` may send again under the per-token rate."""
+        sends = self._token_sends.get(token)
+        if not sends:
+            return 0.0
+        while sends and now - sends[0] >= 1.0:
+            sends.popleft()
+        if len(sends) < self.TOKEN_RATE:
+            return 0.0
+        return 1.0 - (now - sends[0])
+
+    def _next_batch(self, now):
+        """Picks the chat that has waited longest and is allowed to send; returns (queue, batch, wait)."""
+        best, wait = None, None
+        for queue in self._chats.values():
+            if not queue.messages:
+                continue
+            ready_in = max(queue.next_at - now, self._token_wait(queue.token, now))
+            if ready_in <= 0:
+                if best is None or queue.next_at < best.next_at:
+                    best = queue
+            elif wait is None or ready_in < wait:
+                wait = ready_in
+        if best is None:
+            return None, None, wait
+
+        # Coalesce everything that fits in one message
+        batch = [best.messages.popleft()]
+        size = len(batch[0])
+        while best.messages and size + len(self.DIGEST_SEPARATOR) + len(best.messages[0]) + 40 <= self.MAX_LENGTH:
+            text = best.messages.popleft()
+            size += len(self.DIGEST_SEPARATOR) + len(text)
+            batch.append(text)
+        self._token_sends.setdefault(best.token, deque()).append(now)
+        self._inflight += len(batch)
+        return best, batch, None
+
+    def _compose(self, batch):
+        if len(batch) == 1:
+            return batch[0][:self.MAX_LENGTH]
+        return f"🗂 *{len(batch)} notificaciones*\n\n" + self.DIGEST_SEPARATOR.join(batch)
+
+    def _post(self, queue, text):
+        """One sendMessage call. Returns (ok, retry_after)."""
+        api_url = f"https://api.telegram.org/bot{queue.token}/sendMessage"
+        payload = {"chat_id": queue.chat_id, "text": text, "parse_mode": "Markdown"}
+        try:
+            response = self.session.post(api_url, json=payload, timeout=10)
+        except Exception as e:
+            logging.error(f"⚠️ Telegram connection error for {queue.chat_id}: {e}")
+            return False, None
+        if response.status_code == 200:
+            return True, None
+        retry_after = None
+        if response.status_code == 429:
+            try:
+                retry_after = float(response.json().get("parameters", {}).get("retry_after", 1))
+            except Exception:
+                retry_after = 1.0
+        logging.error(
+            f"❌ Telegram API Error for {queue.chat_id} (Status {response.status_code}): {response.text}")
+        return False, retry_after
+
+    def _run(self):
+        while True:
+            with self._cond:
+                queue, batch, wait = self._next_batch(time.monotonic())
+                if queue is None:
+                    self._cond.wait(wait)
+                    continue
+
+            ok, retry_after = self._post(queue, self._compose(batch))
+
+            with self._cond:
+                now = time.monotonic()
+                self._inflight -= len(batch)
+                if ok:
+                    queue.attempts = 0
+                    queue.next_at = now + self.PER_CHAT_INTERVAL
+                    self.stats["sent"] += len(batch)
+                    if len(batch) > 1:
+                        self.stats["digests"] += 1
+                    logging.info(f"✅ Telegram message sent to {queue.chat_id} successfully.")
+                elif retry_after is not None:
+                    # Rate limited: not counted as a failed attempt
+                    self.stats["rate_limited"] += 1
+                    queue.messages.extendleft(reversed(batch))
+                    queue.next_at = now + retry_after
+                else:
+                    queue.attempts += 1
+                    if queue.attempts < self.MAX_ATTEMPTS:
+                        queue.messages.extendleft(reversed(batch))
+                        queue.next_at = now + self.RETRY_DELAY
+                    else:
+                        queue.attempts = 0
+                        queue.next_at = now + self.PER_CHAT_INTERVAL
+                        self.stats["failed"] += len(batch)
+                self._cond.notify_all()
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_telegram_dispatcher():
+    """Returns the process-wide Telegram dispatcher (created on first use)."""
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = TelegramDispatcher()
+    return _dispatcher
 
 
 class TelegramNotifier:
-    def __init__(self, token=None, chat_id=None, enabled=True):
+    def __init__(self, token=None, chat_id=None, enabled=True, dispatcher=None):
         """
         :param token: Telegram Bot Token (defaults to None, should be provided from config)
         :param chat_id: Can be a single ID (str/int), a list of IDs, or a comma-separated string
+        :param dispatcher: Background sender (defaults to the process-wide one)
         """
         self.token = token
         self.chat_ids = self._parse_chat_ids(chat_id)
         self.enabled = enabled
+        self.dispatcher = dispatcher
 
     def _parse_chat_ids(self, chat_id):
         if not chat_id:
@@ -27,6 +236,7 @@ class TelegramNotifier:
         self.enabled = enabled
 
     def send_message(self, text):
+        """Queues `text` for every chat; delivery happens on the dispatcher thread."""
         if not self.enabled:
             return False
         if not self.token or not self.chat_ids:
@@ -34,42 +244,7 @@ class TelegramNotifier:
                 "Telegram Notifier: Token or Chat IDs not configured.")
             return False
 
-        success_count = 0
+        dispatcher = self.dispatcher or get_telegram_dispatcher()
         for cid in self.chat_ids:
-            api_url = f"https://api.telegram.org/bot{self.token}/sendMessage"
-            payload = {
-                "chat_id": cid,
-                "text": text,
-                "parse_mode": "Markdown"
-            }
-
-            max_retries = 3
-            retry_count = 0
-            sent = False
-
-            while retry_count < max_retries and not sent:
-                try:
-                    logging.info(
-                        f"Attempting to send Telegram message to {cid} (Attempt {retry_count + 1}/{max_retries})")
-                    response = requests.post(api_url, json=payload, timeout=10)
-                    if response.status_code == 200:
-                        logging.info(
-                            f"✅ Telegram message sent to {cid} successfully.")
-                        success_count += 1
-                        sent = True
-                    else:
-                        logging.error(
-                            f"❌ Telegram API Error for {cid} (Status {response.status_code}): {response.text}")
-                        retry_count += 1
-                        if retry_count < max_retries:
-                            import time
-                            time.sleep(2)  # Wait before retry
-                except Exception as e:
-                    logging.error(
-                        f"⚠️ Telegram connection error for {cid}: {e}")
-                    retry_count += 1
-                    if retry_count < max_retries:
-                        import time
-                        time.sleep(2)
-
-        return success_count > 0
+            dispatcher.enqueue(self.token, cid, text)
+        return True
@@ -1,8 +1,8 @@
-import pandas_ta as ta
 import pandas as pd
 import io
 import mplfinance as mpf
 import matplotlib
+from ..indicators import kernels
 matplotlib.use('Agg')
 
 
@@ -34,8 +34,8 @@ def generate_chart(symbol, klines):
 
         df.set_index('time', inplace=True)
 
-        # Calcular RSI para el panel inferior usando pandas_ta
-        df['RSI'] = ta.rsi(df['close'], length=14)
+        # Calcular RSI para el panel inferior (kernel NumPy, misma definición que pandas_ta)
+        df['RSI'] = kernels.rsi(df['close'], 14)
 
         # Configuración de estilo premium (Dark Mode)
         mc = mpf.make_marketcolors(
@@ -0,0 +1,120 @@
+"""
+OHLCV Ring Buffer
+Fixed-capacity, NumPy-backed candle container for the chart payload and strategies.
+
+Storage is "mirrored": every row is written at position i and i + capacity, so the
+latest N rows (N <= capacity) are always one contiguous slice. That gives O(1)
+append / live-candle update and zero-copy column views without reordering.
+"""
+import math
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class OHLCVRingBuffer:
+    """Fixed-capacity OHLCV + indicator history backed by float64 arrays."""
+
+    FIELDS = ("time", "open", "high", "low", "close", "volume",
+              "rsi", "trend_ema", "fast_ema")
+
+    def __init__(self, capacity: int = 200, fields: tuple = FIELDS):
+        self.capacity = capacity
+        self.fields = tuple(fields)
+        self._index = {name: i for i, name in enumerate(self.fields)}
+        self._data = np.full((len(self.fields), 2 * capacity), np.nan)
+        self._head = 0  # Physical slot (0..capacity-1) for the next append
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    @property
+    def last_time(self) -> Optional[int]:
+        """Open time (seconds) of the newest candle, or None if empty."""
+        if not self._size:
+            return None
+        return int(self._data[0, (self._head - 1) % self.capacity])
+
+    def clear(self):
+        self._data.fill(np.nan)
+        self._head = 0
+        self._size = 0
+
+    def append(self, **values):
+        """Appends a candle; the oldest one is overwritten when full. O(1)."""
+        slot = self._head
+        column = np.full(len(self.fields), np.nan)
+        for name, val in values.items():
+            if val is not None:
+                column[self._index[name]] = val
+        self._data[:, slot] = column
+        self._data[:, slot + self.capacity] = column
+        self._head = (slot + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def update_last(self, **values):
+        """Updates fields of the newest (live) candle in place. O(1)."""
+        if not self._size:
+            return
+        slot = (self._head - 1) % self.capacity
+        for name, val in values.items():
+            i = self._index[name]
+            val = np.nan if val is None else val
+            self._data[i, slot] = val
+            self._data[i, slot + self.capacity] = val
+
+    def get(self, name: str, pos: int = -1) -> float:
+        """Returns a single value; `pos` counts like a list index (-1 = newest)."""
+        if not -self._size <= pos < self._size:
+            raise IndexError("OHLCVRingBuffer index out of range")
+        if pos < 0:
+            pos += self._size
+        start = (self._head - self._size) % self.capacity
+        return float(self._data[self._index[name], start + pos])
+
+    def column(self, name: str, n: Optional[int] = None) -> np.ndarray:
+        """Zero-copy view of the last `n` values of a field (oldest first)."""
+        n = self._size if n is None else min(n, self._size)
+        end = (self._head - self._size) % self.capacity + self._size
+        view = self._data[self._index[name], end - n:end]
+        view.flags.writeable = False
+        return view
+
+    def view(self, n: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Zero-copy views of every field for the last `n` candles."""
+        return {name: self.column(name, n) for name in self.fields}
+
+    def load(self, **columns):
+        """
+        Replaces the contents with whole columns (vectorized, no per-row work).
+        Only the last `capacity` rows are kept.
+        """
+        lengths = {len(v) for v in columns.values()}
+        if len(lengths) != 1:
+            raise ValueError("All columns must have the same length")
+        n = min(lengths.pop(), self.capacity)
+
+        self._data.fill(np.nan)
+        for name, values in columns.items():
+            arr = np.asarray(values, dtype=float)[-n:] if n else []
+            row = self._data[self._index[name]]
+            row[:n] = arr
+            row[self.capacity:self.capacity + n] = arr
+        self._head = n % self.capacity
+        self._size = n
+
+    def to_records(self, n: Optional[int] = None) -> List[dict]:
+        """Chart payload: list of per-candle dicts with NaN mapped to None."""
+        cols = [self.column(name, n).tolist() for name in self.fields]
+        time_idx = self._index["time"]
+        records = []
+        for row in zip(*cols):
+            rec = {name: (None if isinstance(v, float) and math.isnan(v) else v)
+                   for name, v in zip(self.fields, row)}
+            rec["time"] = int(row[time_idx])
+            records.append(rec)
+        return records
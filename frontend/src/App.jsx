@@ -83,6 +83,7 @@ function App() {
   const prevBalanceRef = useRef(0)
   const lastTradeRef = useRef(null)
   const lastSymbolRef = useRef('')
+  const statusRef = useRef(null) // Last full status (base for WebSocket deltas)
   
   const [priceChange, setPriceChange] = useState(0)
   const [balanceChange, setBalanceChange] = useState(0)
@@ -209,14 +210,83 @@ function App() {
     return () => clearInterval(interval);
   }, [isAuthenticated]);
 
-  // Effect to re-fetch status
+  // Live status: WebSocket push (snapshot + deltas), falling back to 3s polling
   useEffect(() => {
     if (!isAuthenticated) return;
-    fetchStatus()
-    const interval = setInterval(fetchStatus, 3000) 
-    return () => clearInterval(interval)
+    let ws = null
+    let pollInterval = null
+    let reconnectTimer = null
+    let closed = false
+
+    const startPolling = () => {
+      if (pollInterval) return
+      fetchStatus()
+      pollInterval = setInterval(fetchStatus, 3000)
+    }
+    const stopPolling = () => {
+      if (pollInterval) clearInterval(pollInterval)
+      pollInterval = null
+    }
+
+    const connect = () => {
+      const token = localStorage.getItem('authToken')
+      if (!token || typeof WebSocket === 'undefined') {
+        startPolling()
+        return
+      }
+      const proto = window.location.protocol === 'https:' ? 'wss' : 'ws'
+      ws = new WebSocket(`${proto}://${window.location.host}/ws/status?token=${encodeURIComponent(token)}`)
+
+      ws.onmessage = (event) => {
+        let msg
+        try { msg = JSON.parse(event.data) } catch { return }
+        if (msg.type === 'snapshot') {
+          stopPolling()
+          applyStatus(msg.data)
+        } else if (msg.type === 'delta' && statusRef.current) {
+          applyStatus(mergeStatusDelta(statusRef.current, msg))
+        } else if (msg.type === 'error') {
+          startPolling()
+        }
+      }
+      ws.onclose = () => {
+        ws = null
+        if (closed) return
+        // Keep the dashboard alive over HTTP and retry the socket later
+        startPolling()
+        reconnectTimer = setTimeout(connect, 5000)
+      }
+    }
+
+    connect()
+    return () => {
+      closed = true
+      stopPolling()
+      if (reconnectTimer) clearTimeout(reconnectTimer)
+      if (ws) ws.close()
+    }
   }, [isAuthenticated])
 
+  // Applies a delta message from /ws/status on top of the last full status
+  const mergeStatusDelta = (prev, delta) => {
+    const next = { ...prev, ...(delta.fields || {}) }
+    if (delta.history) {
+      next.history = delta.history
+    } else if (delta.candles && delta.candles.length > 0) {
+      const firstTime = delta.candles[0].time
+      next.history = prev.history
+        .filter(c => c.time < firstTime)
+        .concat(delta.candles)
+        .slice(-200)
+    }
+    if (delta.trades) {
+      next.trades = delta.trades
+    } else if (delta.new_trades && delta.new_trades.length > 0) {
+      next.trades = delta.new_trades.concat(prev.trades)
+    }
+    return next
+  }
+
   const isConnected = isAuthenticated && botStatus.mode !== 'DISCONNECTED'
 
   const fetchStatus = () => {
@@ -234,60 +304,7 @@ function App() {
         if (!res.ok) throw new Error('Network response was not ok');
         return res.json();
       })
-      .then(data => {
-        if (!data || typeof data !== 'object') return;
-
-        // If symbol changed, reset price comparison refs immediately to prevent fake % drops
-        if (data.symbol && lastSymbolRef.current && data.symbol !== lastSymbolRef.current) {
-          prevPriceRef.current = 0; // Force reset
-          prevBalanceRef.current = 0;
-          setPriceChange(0);
-          setBalanceChange(0);
-        }
-        if (data.symbol) lastSymbolRef.current = data.symbol;
-        
-        // Only calculate changes if we have a valid previous price and the same symbol
-        if (data.price > 0 && prevPriceRef.current > 0 && data.symbol === lastSymbolRef.current) {
-          const change = ((data.price - prevPriceRef.current) / prevPriceRef.current) * 100
-          setPriceChange(change)
-        }
-        
-        // Track current price for next comparison
-        if (data.price > 0) prevPriceRef.current = data.price
-        
-        // Same for balance
-        if (data.balance > 0 && prevBalanceRef.current > 0 && data.symbol === lastSymbolRef.current) {
-          const balChange = ((data.balance - prevBalanceRef.current) / prevBalanceRef.current) * 100
-          setBalanceChange(balChange)
-        }
-        if (data.balance > 0) prevBalanceRef.current = data.balance
-        
-        const safeData = {
-          ...data,
-          history: Array.isArray(data.history) ? data.history : [],
-          trades: Array.isArray(data.trades) ? data.trades : []
-        };
-
-        // Detect new automatic trades for notifications
-        if (safeData.trades.length > 0) {
-          const latestTrade = safeData.trades[0];
-          if (lastTradeRef.current && lastTradeRef.current.time !== latestTrade.time) {
-            // Only notify if it's NOT a manual trade (those have their own notification in confirmTrade)
-            if (!latestTrade.type.includes('MANUAL')) {
-              const isBuy = latestTrade.type.includes('BUY');
-              const tradeType = isBuy ? 'Compra' : 'Venta';
-              const emoji = isBuy ? '🚀' : '💰';
-              const symbol = latestTrade.symbol?.replace('USDT', '') || 'Cripto';
-              addNotification('success', `${emoji} ${tradeType} Automática: ${latestTrade.qty} ${symbol}`);
-            }
-          }
-          lastTradeRef.current = latestTrade;
-        }
-
-        setBotStatus(prev => ({ ...prev, ...safeData }));
-        setLoading(false);
-        setError(null);
-      })
+      .then(data => applyStatus(data))
       .catch(err => {
         console.error('Fetch error:', err);
         if (err.message === 'Session expired') {
@@ -299,6 +316,62 @@ function App() {
       })
   }
 
+  const applyStatus = (data) => {
+    if (!data || typeof data !== 'object') return;
+
+    // If symbol changed, reset price comparison refs immediately to prevent fake % drops
+    if (data.symbol && lastSymbolRef.current && data.symbol !== lastSymbolRef.current) {
+      prevPriceRef.current = 0; // Force reset
+      prevBalanceRef.current = 0;
+      setPriceChange(0);
+      setBalanceChange(0);
+    }
+    if (data.symbol) lastSymbolRef.current = data.symbol;
+    
+    // Only calculate changes if we have a valid previous price and the same symbol
+    if (data.price > 0 && prevPriceRef.current > 0 && data.symbol === lastSymbolRef.current) {
+      const change = ((data.price - prevPriceRef.current) / prevPriceRef.current) * 100
+      setPriceChange(change)
+    }
+    
+    // Track current price for next comparison
+    if (data.price > 0) prevPriceRef.current = data.price
+    
+    // Same for balance
+    if (data.balance > 0 && prevBalanceRef.current > 0 && data.symbol === lastSymbolRef.current) {
+      const balChange = ((data.balance - prevBalanceRef.current) / prevBalanceRef.current) * 100
+      setBalanceChange(balChange)
+    }
+    if (data.balance > 0) prevBalanceRef.current = data.balance
+    
+    const safeData = {
+      ...data,
+      history: Array.isArray(data.history) ? data.history : [],
+      trades: Array.isArray(data.trades) ? data.trades : []
+    };
+
+    // Detect new automatic trades for notifications
+    if (safeData.trades.length > 0) {
+      const latestTrade = safeData.trades[0];
+      if (lastTradeRef.current && lastTradeRef.current.time !== latestTrade.time) {
+        // Only notify if it's NOT a manual trade (those have their own notification in confirmTrade)
+        if (!latestTrade.type.includes('MANUAL')) {
+          const isBuy = latestTrade.type.includes('BUY');
+          const tradeType = isBuy ? 'Compra' : 'Venta';
+          const emoji = isBuy ? '🚀' : '💰';
+          const symbol = latestTrade.symbol?.replace('USDT', '') || 'Cripto';
+          addNotification('success', `${emoji} ${tradeType} Automática: ${latestTrade.qty} ${symbol}`);
+        }
+      }
+      lastTradeRef.current = latestTrade;
+    }
+
+    statusRef.current = safeData;
+    setBotStatus(prev => ({ ...prev, ...safeData }));
+    setLoading(false);
+    setError(null);
+  }
+
   const handleStart = () => {
     fetch('/api/start', { method: 'POST', headers: getAuthHeaders() })
       .then(res => res.json())
@@ -44,6 +44,14 @@ const StatisticsCard = ({ stats, formatMoney }) => {
                     <span style={{ color: '#3fb950' }}>✅ {stats.wins} Ganadas</span>
                     <span style={{ color: '#f85149' }}>❌ {stats.losses} Perdidas</span>
                 </div>
+
+                {stats.total_trades !== undefined && (
+                    <div style={{ display: 'flex', justifyContent: 'space-between', fontSize: '0.8rem', color: 'var(--text-dim)', marginTop: '8px' }}>
+                        <span>PF: {stats.profit_factor ?? '—'}</span>
+                        <span>Max DD: {formatMoney(stats.max_drawdown)}</span>
+                        <span>Hold: {stats.avg_hold_minutes} min</span>
+                    </div>
+                )}
             </div>
         </div>
     );
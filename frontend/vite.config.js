@@ -10,6 +10,10 @@ export default defineConfig({
       '/api': {
         target: 'http://127.0.0.1:8000',
         changeOrigin: true
+      },
+      '/ws': {
+        target: 'ws://127.0.0.1:8000',
+        ws: true
       }
     }
   }
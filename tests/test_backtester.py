@@ -0,0 +1,55 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', 'backend')))
+
+from backtester import Backtester  # noqa: E402
+from strategies.base_strategy import BaseStrategy  # noqa: E402
+
+
+class BuyThenTakeProfit(BaseStrategy):
+    """Buys at 100 or below and exits 2% above the average entry."""
+
+    def __init__(self):
+        super().__init__("Test")
+
+    def get_required_indicators(self):
+        return ["rsi"]
+
+    def check_buy_signal(self, indicators, settings, state):
+        print("evaluating buy")  # Must not reach stdout during a backtest
+        return state["current_price"] <= 100
+
+    def check_sell_signal(self, indicators, settings, state):
+        return state["current_price"] >= state["entry_price"] * 1.02
+
+
+def test_replay_applies_dca_commission_and_exit(capsys):
+    closes = np.array([100.0] * 60 + [98.0] * 5 + [101.0] * 5)
+    index = pd.to_datetime(np.arange(len(closes)) * 60_000, unit='ms')
+    df = pd.DataFrame({"open": closes, "high": closes + 1, "low": closes - 1,
+                       "close": closes, "volume": 10.0}, index=index)
+
+    result = Backtester(BuyThenTakeProfit(), settings={
+        "dca_enabled": True, "max_dca_orders": 2, "dca_step_pct": 1.5,
+        "trade_qty": 35.0, "testnet_commission_pct": 0.1}).run(df)
+
+    assert capsys.readouterr().out == ""
+    trades = result["trades"]
+    assert [t["type"] for t in trades] == [
+        "BUY (Test-BUY)", "BUY (Test-BUY)", "SELL (Test-SELL)"]
+    assert [t["price"] for t in trades] == [100.0, 98.0, 101.0]
+
+    held = 35 / 100 * 0.999 + 35 / 98 * 0.999  # Commission taken in base on buys
+    entry = 70 * 0.999 / held
+    assert trades[2]["qty"] == pytest.approx(held)
+    assert trades[2]["pnl"] == pytest.approx((101 - entry) * held)
+    assert result["final_equity"] == pytest.approx(930 + held * 101 * 0.999, abs=1e-3)
+    assert result["open_qty"] == 0
+    assert result["stats"]["wins"] == 1
+    assert result["candles_per_sec"] > 0
@@ -0,0 +1,92 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.services.balances import BalanceLedger  # noqa: E402
+
+
+class _Client:
+    def __init__(self, balances, update_time=0):
+        self.result = None if balances is None else (balances, update_time)
+        self.calls = 0
+
+    def get_balances(self):
+        self.calls += 1
+        return self.result
+
+
+def _position(u, **assets):
+    return {"e": "outboundAccountPosition", "E": u, "u": u,
+            "B": [{"a": a, "f": str(f), "l": "0.0"} for a, f in assets.items()]}
+
+
+def test_stream_events_and_reconciliation():
+    ledger = BalanceLedger()
+    assert ledger.needs_reconcile()
+    assert ledger.reconcile(_Client({"USDT": (1000.0, 0.0), "BTC": (0.0, 0.0)}, 100))
+    assert not ledger.needs_reconcile()
+
+    assert ledger.apply(_position(200, USDT=900.0, BTC=0.01))
+    assert ledger.apply({"e": "balanceUpdate", "E": 210, "a": "USDT", "d": "50.5", "T": 210})
+    assert not ledger.apply({"e": "executionReport", "E": 220})
+    assert ledger.apply(_position(150, USDT=1.0))  # Out of order: older than the ledger value
+    assert (ledger.free("USDT"), ledger.free("BTC")) == (pytest.approx(950.5), 0.01)
+
+    # A REST snapshot taken before the stream events keeps the newer stream values
+    ledger.reconcile(_Client({"USDT": (1000.0, 0.0), "ETH": (2.0, 0.0)}, 180))
+    assert (ledger.free("USDT"), ledger.free("BTC"), ledger.free("ETH")) == (pytest.approx(950.5), 0.01, 2.0)
+
+    # A newer snapshot corrects drift (e.g. a missed event) and drops assets gone from the account
+    ledger.reconcile(_Client({"USDT": (940.0, 10.0)}, 300))
+    assert ledger.balances() == {"USDT": (940.0, 10.0)}
+    stats = ledger.get_stats()
+    assert stats["reconciliations"] == 3 and stats["drift_corrections"] == 4 and stats["events"] == 3
+
+
+def test_balance_update_already_in_a_newer_snapshot_is_skipped():
+    ledger = BalanceLedger()
+    ledger.reconcile(_Client({"USDT": (100.0, 0.0)}, 100))
+    # A deposit the REST snapshot (taken at 100) already contains
+    assert not ledger.apply({"e": "balanceUpdate", "E": 90, "a": "USDT", "d": "25.0", "T": 90})
+    assert ledger.free("USDT") == 100.0
+
+    assert ledger.apply(_position(200, USDT=150.0))
+    assert not ledger.apply({"e": "balanceUpdate", "E": 200, "a": "USDT", "d": "25.0", "T": 200})
+    assert ledger.apply({"e": "balanceUpdate", "E": 210, "a": "USDT", "d": "-30.0", "T": 210})
+    assert ledger.free("USDT") == pytest.approx(120.0)
+
+
+def test_failed_reconciliation_keeps_ledger():
+    ledger = BalanceLedger()
+    ledger.apply(_position(10, USDT=5.0))
+    assert not ledger.reconcile(_Client(None))
+    assert ledger.free("USDT") == 5.0 and ledger.needs_reconcile()
+    assert ledger.get_stats()["failures"] == 1
+
+
+def test_replay_reads_balances_without_rest_calls():
+    pytest.importorskip("binance")
+    from backend.replay import ReplayHarness
+    from backend.services.fake_exchange import FakeExchange, synthetic_klines
+
+    exchange = FakeExchange(balances={"USDT": 1000.0}, commission_pct=0.1)
+    exchange.load_klines("BTCUSDT", "1m", synthetic_klines(1400, seed=7))
+    calls = []
+    for name in ("get_account", "get_asset_balance"):
+        original = getattr(exchange, name)
+        setattr(exchange, name, lambda *a, _name=name, _f=original, **kw: calls.append(_name) or _f(*a, **kw))
+
+    settings = {"active_strategy": "rsi_rebound", "buy_rsi": 35, "sell_rsi": 65, "enable_trend_filter": False,
+                "enable_vol_filter": False, "enable_fast_ema": False}
+    with ReplayHarness(exchange, "BTCUSDT", "1m", settings=settings) as replay:
+        assert calls == ["get_account"]  # The startup reconciliation
+        replay.run()
+        replay.bot.manual_buy()
+        exchange.pump()
+        assert exchange.orders
+        assert (replay.bot.balance, replay.bot.crypto_balance) == (
+            pytest.approx(exchange.balances["USDT"]), pytest.approx(exchange.balances["BTC"]))
+    assert calls == ["get_account"]
@@ -0,0 +1,182 @@
+import os
+import random
+import sys
+import time
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.services.candle_resampler import CandleResampler  # noqa: E402
+from backend.services.kline_store import INTERVAL_MS  # noqa: E402
+
+START_MS = 1_700_000_040_000  # Minute-aligned, not 5m/15m-aligned: the first buckets are seeded mid-way
+
+
+def _minutes(n, seed=1):
+    rng = random.Random(seed)
+    rows, price = [], 100.0
+    for i in range(n):
+        close = price * (1 + rng.gauss(0, 0.002))
+        t = START_MS + i * 60_000
+        rows.append((t, price, max(price, close) + rng.random(), min(price, close) - rng.random(),
+                     close, round(rng.uniform(1, 10), 4), t + 59_999))
+        price = close
+    return rows
+
+
+def _msg(row, closed):
+    return {"e": "kline", "E": row[6], "s": "BTCUSDT",
+            "k": {"t": row[0], "T": row[6], "s": "BTCUSDT", "i": "1m", "o": str(row[1]), "h": str(row[2]),
+                  "l": str(row[3]), "c": str(row[4]), "v": str(row[5]), "x": closed}}
+
+
+def _aggregate(rows, interval):
+    step = INTERVAL_MS[interval]
+    buckets = {}
+    for r in rows:
+        start = r[0] - r[0] % step
+        b = buckets.get(start)
+        buckets[start] = (start, r[1], r[2], r[3], r[4], r[5], start + step - 1) if b is None else \
+            (start, b[1], max(b[2], r[2]), min(b[3], r[3]), r[4], b[5] + r[5], b[6])
+    return buckets
+
+
+def test_derived_candles_match_direct_aggregation():
+    rows = _minutes(200)
+    history, live = rows[:37], rows[37:]
+    resampler = CandleResampler("BTCUSDT", history=lambda limit: history[-limit:] + [live[0]])
+    assert resampler.seed()
+
+    closed, last = {}, {}
+    for row in live:
+        # Live tick (open only), a mid-candle update, then the close
+        opening = (row[0], row[1], row[1], row[1], row[1], 0.0, row[6])
+        midway = (*row[:5], row[5] / 2, row[6])
+        for update, is_closed in ((opening, False), (midway, False), (row, True)):
+            for interval, candle, done in resampler.feed(_msg(update, is_closed)):
+                last[interval] = candle
+                if done:
+                    closed.setdefault(interval, []).append(candle)
+
+    for interval in ("3m", "5m", "15m", "1h"):
+        expected = _aggregate(rows, interval)
+        assert closed[interval], interval
+        for candle in closed[interval]:
+            assert candle == pytest.approx(expected[candle[0]]), (interval, candle[0])
+        assert last[interval] == pytest.approx(expected[last[interval][0]])  # Live bucket
+        # Exactly the buckets whose last minute closed during the stream (the first one seeded from history)
+        assert [c[0] for c in closed[interval]] == [
+            b[0] for b in expected.values() if live[0][0] <= b[6] - 59_999 <= live[-1][0]]
+
+
+def _stream(resampler, rows, skip=()):
+    """Feeds a live update and the close of every row except those in `skip`; returns the 5m closes."""
+    closes = []
+    for row in rows:
+        if row[0] in skip:
+            continue
+        for update, is_closed in (((*row[:5], row[5] / 2, row[6]), False), (row, True)):
+            closes += [c for i, c, done in resampler.feed(_msg(update, is_closed)) if i == "5m" and done]
+    return closes
+
+
+def test_missed_close_still_closes_the_bucket():
+    rows = _minutes(40)
+    resampler = CandleResampler("BTCUSDT", intervals=("5m",))  # No history to replay from
+    # Only a live update of a bucket's last minute arrives, its close is dropped
+    last = next(r for r in rows[10:] if (r[0] + 60_000) % 300_000 == 0)
+    closes = []
+    for row in rows:
+        closes += [c for _, c, done in resampler.feed(_msg(row, row is not last)) if done]
+
+    # Closed once, when the next bucket starts, from the minutes it did receive
+    bucket = last[0] - last[0] % 300_000
+    held = [r for r in rows if bucket <= r[0] < last[0]]
+    assert [c for c in closes if c[0] == bucket] == [pytest.approx((
+        bucket, held[0][1], max(r[2] for r in held), min(r[3] for r in held), held[-1][4],
+        sum(r[5] for r in held), bucket + 299_999))]
+    expected = _aggregate(rows, "5m")
+    for candle in closes:
+        if candle[0] > bucket:
+            assert candle == pytest.approx(expected[candle[0]])
+    assert [c[0] for c in closes if c[0] > bucket] == [b for b in expected if bucket < b <= rows[-5][0]]
+
+
+def test_gap_is_replayed_from_history():
+    rows = _minutes(120)
+    available, reads = [30], []
+
+    def history(limit):
+        reads.append(limit)
+        return rows[:available[0]][-limit:]
+
+    resampler = CandleResampler("BTCUSDT", intervals=("5m", "15m"), history=history)
+    assert resampler.seed()  # Up to the live minute rows[29]
+
+    # Reconnect: minutes 40..51 never arrive on the stream but are in the history by then
+    skip = {r[0] for r in rows[40:52]}
+    available[0] = 53
+    closes = _stream(resampler, rows[29:60], skip)
+
+    expected = _aggregate(rows, "5m")
+    assert [c[0] for c in closes] == [b for b in expected if rows[29][0] <= b + 240_000 <= rows[59][0]]
+    for candle in closes:
+        assert candle == pytest.approx(expected[candle[0]])
+    assert resampler.reseeds == 1 and len(reads) == 2  # Seed plus one gap replay
+
+
+def test_hub_serves_any_timeframe_from_one_1m_socket():
+    pytest.importorskip("binance")
+    from backend.binance_wrapper import BinanceWrapper
+    from backend.services.fake_exchange import FakeExchange
+    from backend.services.kline_store import KlineStore
+    from backend.services.market_hub import MarketDataHub
+
+    rows = _minutes(1300)
+    exchange = FakeExchange()
+    exchange.load_klines("BTCUSDT", "1m", rows, history=1000)
+    for interval in ("5m", "15m"):
+        exchange.load_klines("BTCUSDT", interval, list(_aggregate(rows, interval).values()),
+                             history=(1000 * 60_000) // INTERVAL_MS[interval])
+    store = KlineStore(":memory:")
+    hub = MarketDataHub()
+    hub._clients["replay"] = BinanceWrapper(client=exchange, stream_manager=exchange, kline_store=store)
+
+    received = {"5m": [], "15m": []}
+    hub.subscribe_klines("replay", "BTCUSDT", "5m", "a", lambda m: received["5m"].append(m))
+    hub.subscribe_klines("replay", "BTCUSDT", "15m", "b", lambda m: received["15m"].append(m))
+    assert list(exchange._subs) == ["btcusdt@kline_1m"]
+
+    # Switching timeframe keeps the shared socket
+    hub.subscribe_klines("replay", "BTCUSDT", "15m", "a", lambda m: received["5m"].append(m), exclusive=True)
+    hub.subscribe_klines("replay", "BTCUSDT", "5m", "a", lambda m: received["5m"].append(m), exclusive=True)
+    assert list(exchange._subs) == ["btcusdt@kline_1m"]
+
+    window = hub.get_data_client("replay").get_kline_rows("BTCUSDT", "15m", 50)  # Loads the series once
+    calls = []
+    original = exchange.get_klines
+    exchange.get_klines = lambda *a, **kw: calls.append(kw) or original(*a, **kw)
+    for _ in range(60):
+        exchange.step()
+        exchange.pump()
+
+    def closes():
+        return [m["k"] for m in received["5m"] if m["k"]["x"]]
+
+    # Hub feeds deliver on each subscriber's own worker
+    deadline = time.time() + 5
+    while len(closes()) < 12 and time.time() < deadline:
+        time.sleep(0.01)
+    expected = _aggregate(rows, "5m")
+    assert len(closes()) == 12
+    for k in closes():
+        assert (k["t"], k["o"], k["h"], k["l"], k["c"], k["v"]) == pytest.approx(expected[k["t"]][:6])
+
+    fresh = hub.get_data_client("replay").get_kline_rows("BTCUSDT", "15m", 50)
+    assert fresh[-1][0] > window[-1][0]  # Served from the streamed window
+    assert calls == []  # The open buckets were seeded on subscribe: no REST while streaming
+
+    hub.unsubscribe("a")
+    hub.unsubscribe("b")
+    assert not exchange._subs
@@ -0,0 +1,63 @@
+import os
+import sys
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', 'backend')))
+
+from database import DatabaseManager  # noqa: E402
+
+
+def test_bulk_reads_and_persistent_connections(tmp_path):
+    db = DatabaseManager(str(tmp_path / "bot.db"))
+    assert db.create_user("alice", "key", "secret") == 1
+    assert db.create_user("bob", "key", "secret") == 2
+    db.save_setting("symbol", "ETHUSDT", user_id=1)
+    db.save_setting("buy_rsi", 25.0, user_id=1)
+    db.save_setting("symbol", "SOLUSDT", user_id=2)
+    db.save_state("dca_enabled", True, user_id=1)
+    db.save_state("credentials", {"api_key": "k"}, user_id=1)
+
+    assert db.get_all_settings(user_id=1) == {
+        "symbol": "ETHUSDT", "buy_rsi": "25.0"}
+    state = db.get_all_state(user_id=1)
+    assert state["dca_enabled"] == db.get_state("dca_enabled", user_id=1)
+    assert db.get_state("credentials", is_json=True,
+                        user_id=1) == {"api_key": "k"}
+
+    # Same thread reuses one connection; other threads get their own
+    assert db._get_connection() is DatabaseManager(db.db_name)._get_connection()
+    other = []
+    t = threading.Thread(target=lambda: other.append(
+        (db._get_connection(), db.get_setting("symbol", user_id=2))))
+    t.start()
+    t.join()
+    assert other[0][0] is not db._get_connection()
+    assert other[0][1] == "SOLUSDT"
+    assert db._get_connection().execute(
+        "PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_deferred_state_is_coalesced_and_visible_before_flush(tmp_path):
+    db = DatabaseManager(str(tmp_path / "journal.db"))
+    db.create_user("alice", "key", "secret")
+    db.journal.flush_interval = 60  # Only explicit flushes in this test
+
+    for price in (100.0, 101.5, 102.25):
+        db.save_state_deferred("highest_price_BTCUSDT", price, user_id=1)
+    db.save_state_deferred("position_orders_BTCUSDT", 2, user_id=1)
+
+    # Readers see queued values; the table does not have them yet
+    assert db.get_state("highest_price_BTCUSDT", user_id=1) == "102.25"
+    assert db.get_all_state(user_id=1)["position_orders_BTCUSDT"] == "2"
+    assert db._get_connection().execute(
+        "SELECT COUNT(*) FROM state").fetchone()[0] == 0
+
+    # A direct write supersedes the queued value for the same key
+    db.save_state("position_orders_BTCUSDT", 3, user_id=1)
+    db.flush_state()
+    rows = dict(db._get_connection().execute(
+        "SELECT key, value FROM state").fetchall())
+    assert rows == {"highest_price_BTCUSDT": "102.25",
+                    "position_orders_BTCUSDT": "3"}
+    assert db.journal.rows_written == 1
@@ -0,0 +1,82 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', 'backend')))
+
+from indicators import kernels  # noqa: E402
+from predictive_modules import IncrementalPredictiveEngine, PredictionCache, PredictiveEngine  # noqa: E402
+
+TIME_DEPENDENT = ("speed", "session")
+
+
+def _candles(n=1200, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, n))
+    df = pd.DataFrame({
+        "open": close, "high": close + rng.random(n), "low": close - rng.random(n),
+        "close": close, "volume": rng.random(n) * 100,
+    }, index=pd.date_range("2024-01-01", periods=n, freq="1min"))
+    df["RSI_14"] = kernels.rsi(close, 14)
+    df["EMA_200"] = kernels.ema(close, 200)
+    df["BBL_20_2.0"], _, df["BBU_20_2.0"] = kernels.bbands(close, 20, 2.0)
+    return df
+
+
+def _assert_same(expected, actual):
+    for key, value in expected.items():
+        if key in TIME_DEPENDENT:
+            continue
+        if key == "volatility":
+            assert abs(value["value"] - actual[key]["value"]) < 1e-9
+            assert value["status"] == actual[key]["status"]
+        elif key == "projection":
+            assert [p["time"] for p in value] == [p["time"] for p in actual[key]]
+            np.testing.assert_allclose([p["value"] for p in value], [p["value"] for p in actual[key]])
+        else:
+            assert value == actual[key], key
+
+
+def test_incremental_matches_full_analysis_on_closed_candles():
+    candles = _candles()
+    full = PredictiveEngine(indicator_backend="numpy")
+    engine = IncrementalPredictiveEngine(cache=PredictionCache())
+
+    for end in range(1000, 1200, 7):  # Several candles close between some calls
+        window = candles.iloc[end - 1000:end + 1]  # Last row is the live candle
+        _assert_same(full.analyze(window.iloc[:-1], 1.0),
+                     engine.analyze(window, 1.0, symbol="BTCUSDT", timeframe="1m"))
+
+    stats = engine.cache.get_stats()
+    assert stats["rebuilds"] == 1 and stats["updates"] > 0
+
+
+def test_no_closed_candle_reuses_cached_result():
+    candles = _candles(300)
+    cache = PredictionCache()
+    first = IncrementalPredictiveEngine(cache=cache).analyze(candles, 1.0, "ETHUSDT", "5m")
+
+    live = candles.copy()
+    live.iloc[-1, live.columns.get_loc("close")] += 5  # Live candle moved, none closed
+    second = IncrementalPredictiveEngine(cache=cache).analyze(live, 1.0, "ETHUSDT", "5m")
+
+    assert cache.get_stats()["hits"] == 1
+    assert second["summary"] == first["summary"]
+    assert "speed" in second and "session" in second
+
+
+def test_networks_keep_separate_state():
+    cache = PredictionCache()
+    engine = IncrementalPredictiveEngine(cache=cache)
+    mainnet = _candles(300)
+    testnet = _candles(300, seed=11)  # Same pair and times, different testnet prices
+
+    expected = PredictiveEngine(indicator_backend="numpy").analyze(testnet.iloc[:-1], 1.0)
+    engine.analyze(mainnet, 1.0, "BTCUSDT", "1m", network="mainnet")
+    _assert_same(expected, engine.analyze(testnet, 1.0, "BTCUSDT", "1m", network="testnet"))
+
+    stats = cache.get_stats()
+    assert stats["series"] == 2 and stats["hits"] == 0
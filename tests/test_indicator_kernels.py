@@ -0,0 +1,102 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', 'backend')))
+
+from indicators import kernels, calculate_indicators  # noqa: E402
+from predictive_modules import PredictiveEngine  # noqa: E402
+
+SETTINGS = {"ema_length": 200, "fast_ema_len": 7,
+            "macd_fast": 12, "macd_slow": 26, "macd_signal": 9}
+
+
+def create_klines(n=1000, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 60000 + np.cumsum(rng.normal(0, 25, n))
+    open_ = np.r_[close[0], close[:-1]]
+    index = pd.to_datetime(np.arange(n) * 60_000 + 1_700_000_000_000, unit='ms')
+    return pd.DataFrame({
+        "open": open_,
+        "high": np.maximum(open_, close) + rng.random(n) * 20,
+        "low": np.minimum(open_, close) - rng.random(n) * 20,
+        "close": close,
+        "volume": rng.random(n) * 50 + 1,
+    }, index=index)
+
+
+def assert_same(actual, expected, rtol=1e-9):
+    expected = np.asarray(expected, dtype=float)
+    assert np.array_equal(np.isnan(actual), np.isnan(expected))
+    np.testing.assert_allclose(actual, expected, rtol=rtol, equal_nan=True)
+
+
+def test_kernels_match_pandas_definitions():
+    df = create_klines()
+    close = df['close']
+    # Long series cross several scan blocks for short EMAs
+    for length in (2, 7, 200):
+        ref = close.copy()
+        ref.iloc[:length - 1] = np.nan
+        ref.iloc[length - 1] = close.iloc[:length].mean()
+        assert_same(kernels.ema(close, length), ref.ewm(span=length, adjust=False).mean())
+
+    diff = close.diff()
+    gain = diff.clip(lower=0).ewm(alpha=1 / 14, min_periods=14).mean()
+    loss = (-diff).clip(lower=0).ewm(alpha=1 / 14, min_periods=14).mean()
+    assert_same(kernels.rsi(close), 100 * gain / (gain + loss))
+
+    lower, mid, upper = kernels.bbands(close)
+    assert_same(mid, close.rolling(20).mean())
+    assert_same(upper - mid, 2 * close.rolling(20).std(ddof=0), rtol=1e-7)
+
+    # Batched along the last axis: each row equals its 1D result
+    batch = np.vstack([close.to_numpy(), close.to_numpy()[::-1]])
+    assert_same(kernels.rsi(batch)[1], kernels.rsi(close.to_numpy()[::-1]))
+    assert_same(kernels.macd(batch)[2][0], kernels.macd(close)[2])
+
+
+def test_kernels_match_pandas_ta():
+    ta = pytest.importorskip("pandas_ta")
+    df = create_klines()
+    h, l, c, v = df['high'], df['low'], df['close'], df['volume']
+
+    assert_same(kernels.rsi(c), ta.rsi(c, length=14))
+    assert_same(kernels.ema(c, 200), ta.ema(c, length=200))
+    macd = ta.macd(c, fast=12, slow=26, signal=9)
+    for ours, col in zip(kernels.macd(c), ("MACD_12_26_9", "MACDh_12_26_9", "MACDs_12_26_9")):
+        assert_same(ours, macd[col])
+    bb = ta.bbands(c, length=20, std=2)
+    for ours, col in zip(kernels.bbands(c), ("BBL_20_2.0", "BBM_20_2.0", "BBU_20_2.0")):
+        assert_same(ours, bb[col], rtol=1e-7)
+    assert_same(kernels.atr(h, l, c), ta.atr(h, l, c, length=14))
+    adx = ta.adx(h, l, c, length=14)
+    for ours, col in zip(kernels.adx(h, l, c), ("ADX_14", "DMP_14", "DMN_14")):
+        assert_same(ours, adx[col])
+    assert_same(kernels.obv(c, v), ta.obv(c, v))
+
+    numpy_results = calculate_indicators(df, {**SETTINGS, "indicator_backend": "numpy"})
+    ta_results = calculate_indicators(df, SETTINGS)
+    assert numpy_results.keys() == ta_results.keys()
+    for key, value in ta_results.items():
+        assert numpy_results[key] == pytest.approx(value, rel=1e-7)
+
+
+def test_predictive_engine_backends_agree():
+    df = create_klines(300)
+    df['RSI_14'] = kernels.rsi(df['close'])
+    df['EMA_200'] = kernels.ema(df['close'], 200)
+    lower, _, upper = kernels.bbands(df['close'])
+    df['BBL_20_2.0'], df['BBU_20_2.0'] = lower, upper
+    price = float(df['close'].iloc[-1])
+
+    expected = PredictiveEngine().analyze(df, price)
+    actual = PredictiveEngine(indicator_backend="numpy").analyze(df, price)
+    for key in ("smart_money", "rvol", "breakout_prob", "market_score"):
+        assert actual[key] == expected[key]
+    assert actual["volatility"]["status"] == expected["volatility"]["status"]
+    assert actual["volatility"]["value"] == pytest.approx(expected["volatility"]["value"])
@@ -0,0 +1,109 @@
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.services.kline_store import KlineStore  # noqa: E402
+
+STEP = 60_000
+
+
+class _Client:
+    """get_klines over a list of raw Binance klines (the last one is the live candle)."""
+
+    def __init__(self, klines):
+        self.klines = klines
+        self.calls = []
+
+    def get_klines(self, symbol, interval, limit=500, startTime=None):
+        self.calls.append(startTime)
+        rows = [k for k in self.klines if startTime is None or k[0] >= startTime]
+        return rows[:limit] if startTime is not None else rows[-limit:]
+
+
+def _klines(n, end_ms=None, price=100.0):
+    end = (end_ms or int(time.time() * 1000)) // STEP * STEP
+    return [[t, str(price + i), str(price + i + 1), str(price + i - 1), str(price + i + 0.5), "10.0", t + STEP - 1]
+            for i, t in enumerate(range(end - (n - 1) * STEP, end + 1, STEP))]
+
+
+def _store(path=":memory:"):
+    store = KlineStore(path)
+    store.MIN_REFRESH_SECONDS = 0.0
+    return store
+
+
+def test_delta_merge_refreshes_live_candle_and_appends():
+    now = int(time.time() * 1000)
+    client = _Client(_klines(300, end_ms=now - 2 * STEP))
+    store = _store()
+    first = store.get_klines(client, "mainnet", "BTCUSDT", "1m", 100)
+    assert client.calls == [None] and len(first) == 100
+
+    # The live candle moved and closed, and two newer candles arrived
+    live = client.klines[-1]
+    client.klines[-1] = [live[0], live[1], "999.0", live[3], "998.0", "20.0", live[6]]
+    client.klines += _klines(2, end_ms=now, price=500.0)
+    rows = store.get_klines(client, "mainnet", "BTCUSDT", "1m", 100)
+
+    assert client.calls == [None, live[0]]  # Only klines from the last stored open time
+    assert len(rows) == 100 and rows[-1][0] - rows[0][0] == 99 * STEP
+    assert rows[-3] == (live[0], float(live[1]), 999.0, float(live[3]), 998.0, 20.0, live[6])
+    assert [r[0] for r in rows[-2:]] == [k[0] for k in client.klines[-2:]]
+
+
+def test_gap_falls_back_to_full_fetch():
+    now = int(time.time() * 1000)
+    client = _Client(_klines(200, end_ms=now - 2000 * STEP))
+    store = _store()
+    store.get_klines(client, "mainnet", "BTCUSDT", "1m", 100)
+
+    # More than one request (1000 klines) behind: the window is replaced, not patched
+    client.klines = _klines(200, end_ms=now)
+    rows = store.get_klines(client, "mainnet", "BTCUSDT", "1m", 100)
+    assert client.calls == [None, None]
+    assert [r[0] for r in rows] == [k[0] for k in client.klines[-100:]]
+
+
+def test_short_series_respects_the_refresh_throttle():
+    client = _Client(_klines(50))  # Young listing: fewer candles than asked for
+    store = KlineStore(":memory:")
+    store.MIN_REFRESH_SECONDS = 60.0
+    for _ in range(3):
+        assert len(store.get_klines(client, "mainnet", "NEWUSDT", "1m", 100)) == 50
+    assert client.calls == [None]
+
+    # Asking for a deeper window than the one already known to be short goes through
+    store.get_klines(client, "mainnet", "NEWUSDT", "1m", 200)
+    store.invalidate("mainnet", "NEWUSDT", "1m")
+    store.get_klines(client, "mainnet", "NEWUSDT", "1m", 100)
+    assert client.calls == [None, None, None]
+
+
+def test_restart_reloads_from_sqlite(tmp_path):
+    path = str(tmp_path / "klines.db")
+    client = _Client(_klines(150))
+    before = _store(path).get_klines(client, "mainnet", "ETHUSDT", "1m", 150)
+
+    restarted = _store(path)
+    after = restarted.get_klines(client, "mainnet", "ETHUSDT", "1m", 150)
+    # History comes from disk; only the live candle is asked for again
+    assert client.calls == [None, before[-1][0]]
+    assert after == before
+    assert restarted.load_range("mainnet", "ETHUSDT", "1m") == before
+
+
+def test_memory_and_disk_retention_caps(tmp_path):
+    store = _store(str(tmp_path / "klines.db"))
+    store.MEMORY_CANDLES, store.RETENTION_CANDLES, store.PRUNE_EVERY = 120, 200, 10
+    now = int(time.time() * 1000)
+    client = _Client(_klines(1000, end_ms=now - 600 * STEP))
+    store.get_klines(client, "mainnet", "BTCUSDT", "1m", 100)
+    client.klines += _klines(600, end_ms=now, price=2000.0)  # Contiguous, one delta request
+    rows = store.get_klines(client, "mainnet", "BTCUSDT", "1m", 100)
+
+    persisted = store.load_range("mainnet", "BTCUSDT", "1m")
+    assert len(store._series[("mainnet", "BTCUSDT", "1m")].rows) == 120
+    assert len(persisted) == 200 and persisted[-1] == rows[-1]
+    assert persisted[0][0] == rows[-1][0] - 199 * STEP
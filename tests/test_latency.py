@@ -0,0 +1,43 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', 'backend')))
+
+from services.latency import LatencyHistogram, LatencyTracker, TickTrace  # noqa: E402
+
+
+def test_histogram_percentiles_and_cumulative_buckets():
+    hist = LatencyHistogram()
+    for ms in [0.2] * 90 + [3.0] * 9 + [700.0]:
+        hist.record(ms)
+
+    summary = hist.summary()
+    assert summary["count"] == 100
+    assert summary["p50_ms"] == 0.25  # Upper bound of the 0.1-0.25 bucket
+    assert summary["p95_ms"] == 5
+    assert summary["p99_ms"] == 5
+    assert summary["max_ms"] == 700.0
+    assert summary["buckets"]["0.25"] == 90
+    assert summary["buckets"]["1000"] == summary["buckets"]["+Inf"] == 100
+
+
+def test_trace_stages_sum_to_total():
+    trace = TickTrace(received=100.0)
+    trace.last = 100.0
+    for stage, at in [("queue", 100.002), ("lock_wait", 100.003),
+                      ("strategy", 100.004), ("lock_wait", 100.010)]:
+        trace.stages.append((stage, (at - trace.last) * 1000))
+        trace.last = at
+
+    out = trace.as_dict()
+    assert out["lock_wait"] == pytest.approx(7.0)
+    assert out["total"] == pytest.approx(10.0)
+
+    tracker = LatencyTracker()
+    trace.finish("tick_to_decision", tracker=tracker)
+    snap = tracker.snapshot()
+    assert snap["lock_wait"]["count"] == 2
+    assert snap["tick_to_decision"]["max_ms"] == pytest.approx(10.0)
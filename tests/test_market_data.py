@@ -0,0 +1,79 @@
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+pytest.importorskip("binance")
+
+from backend.services.market_data import MarketDataService, PriceTable  # noqa: E402
+
+
+class _Client:
+    def __init__(self, prices):
+        self.prices = prices
+        self.calls = []
+
+    def get_symbol_ticker(self, symbol):
+        self.calls.append(symbol)
+        return {"symbol": symbol, "price": str(self.prices[symbol])}
+
+
+class _Streams:
+    def __init__(self):
+        self.subscribed = []
+
+    def subscribe(self, network, stream, key, callback):
+        self.subscribed.append((network, stream))
+
+
+def test_mini_ticker_ingestion_and_staleness():
+    table = PriceTable("mainnet")
+    table.on_message([{"s": "BTCUSDT", "c": "65000.5"}, {"s": "ETHUSDT", "c": "bad"}, {"c": "1"}])
+    table.on_message({"s": "SOLUSDT", "c": "150"})  # Single-symbol stream
+    assert table.snapshot() == {"BTCUSDT": 65000.5, "SOLUSDT": 150.0}
+    assert table.snapshot(["SOLUSDT", "XRPUSDT"]) == {"SOLUSDT": 150.0}
+
+    entry = table.get("BTCUSDT")
+    assert entry.price == 65000.5 and entry.age < 1 and not entry.stale
+    assert table.get("XRPUSDT") is None
+
+    # Symbol not traded for MAX_AGE: stale even though the stream is alive
+    table.set("ETHUSDT", 3000.0, ts=time.time() - PriceTable.MAX_AGE - 1)
+    assert table.get("ETHUSDT").stale and not table.get("SOLUSDT").stale
+
+    # Stream went quiet: every entry is stale, but the last price is still reported
+    table._last_batch = time.time() - PriceTable.STREAM_TIMEOUT - 1
+    assert table.get("SOLUSDT").stale and table.get("SOLUSDT").price == 150.0
+
+
+def test_service_reads_the_table_and_refreshes_stale_entries_over_rest():
+    client, streams = _Client({"BTCUSDT": 64000.0}), _Streams()
+    wrapper = SimpleNamespace(network="price-test", client=client, stream_manager=streams)
+    service = MarketDataService(wrapper)
+
+    service.start_data_stream(["BTCUSDT"])
+    service.start_data_stream(["BTCUSDT"])
+    assert streams.subscribed == [("price-test", "btcusdt@miniTicker")]
+
+    # Never reported by the stream: one REST read, then served from the table until
+    # the rate limit allows another refresh of the (stale) entry
+    assert service.get_price_entry("BTCUSDT") is None
+    assert service.get_current_price("BTCUSDT") == 64000.0
+    assert service.get_current_price("BTCUSDT") == 64000.0
+    assert client.calls == ["BTCUSDT"]
+
+    client.prices["BTCUSDT"] = 64050.0
+    service.prices._rest_at["BTCUSDT"] -= PriceTable.REST_INTERVAL
+    assert service.get_current_price("BTCUSDT") == 64050.0
+    assert client.calls == ["BTCUSDT", "BTCUSDT"]
+
+    # Live stream: served from the table without REST
+    service.update_price_stream([{"s": "BTCUSDT", "c": "64100"}])
+    service.prices._rest_at["BTCUSDT"] -= PriceTable.REST_INTERVAL
+    assert service.get_current_price("BTCUSDT") == 64100.0 and len(client.calls) == 2
+    assert service.get_prices(["BTCUSDT"]) == {"BTCUSDT": 64100.0}
+    assert service.get_current_price("DOGEUSDT") == 0.0  # REST failure
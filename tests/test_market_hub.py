@@ -0,0 +1,115 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+pytest.importorskip("binance")
+
+from backend.services.kline_store import KlineStore  # noqa: E402
+from backend.services.market_hub import MarketDataHub  # noqa: E402
+
+
+class _Wrapper:
+    """Socket side of BinanceWrapper: records opened/stopped sockets, no network."""
+
+    def __init__(self):
+        self.kline_store = KlineStore(":memory:")
+        self.sockets = {}
+        self.stopped = []
+
+    def start_kline_socket(self, symbol, interval, callback, exclusive=True):
+        self.sockets[f"kline_{symbol}_{interval}"] = callback
+
+    def start_trade_socket(self, symbol, callback, exclusive=True):
+        self.sockets[f"trade_{symbol}"] = callback
+
+    def stop_socket(self, name):
+        self.sockets.pop(name, None)
+        self.stopped.append(name)
+
+    def stop_all_sockets(self):
+        self.sockets.clear()
+
+    def get_kline_rows(self, symbol, interval, limit=100):
+        return []
+
+
+def _hub():
+    hub = MarketDataHub()
+    wrapper = hub._clients["mainnet"] = _Wrapper()
+    return hub, wrapper
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_subscribers_share_one_feed_and_last_release_closes_it():
+    hub, wrapper = _hub()
+    received = {1: [], 2: []}
+    for user in (1, 2):
+        hub.subscribe_klines("mainnet", "BTCUSDT", "1d", user, received[user].append)
+        hub.subscribe_trades("mainnet", "BTCUSDT", user, received[user].append)
+    assert sorted(wrapper.sockets) == ["kline_BTCUSDT_1d", "trade_BTCUSDT"]
+    assert hub.get_stats()["kline_feeds"] == {"mainnet_BTCUSDT_1d": 2}
+
+    msg = {"e": "kline", "k": {"t": 0, "x": False}}
+    wrapper.sockets["kline_BTCUSDT_1d"](msg)
+    assert wait_for(lambda: received[1] == [msg] and received[2] == [msg])
+
+    # Refcounted: the sockets stay open until their last subscriber leaves
+    hub.unsubscribe(1)
+    assert sorted(wrapper.sockets) == ["kline_BTCUSDT_1d", "trade_BTCUSDT"]
+    hub.unsubscribe_trades(2)
+    assert sorted(wrapper.sockets) == ["kline_BTCUSDT_1d"]
+    hub.unsubscribe(2)
+    assert wrapper.sockets == {} and sorted(wrapper.stopped) == ["kline_BTCUSDT_1d", "trade_BTCUSDT"]
+    assert hub.get_stats()["kline_feeds"] == {}
+
+
+def test_timeframe_switch_keeps_the_shared_1m_socket():
+    hub, wrapper = _hub()
+    hub.subscribe_klines("mainnet", "ETHUSDT", "5m", 1, lambda m: None)
+    hub.subscribe_klines("mainnet", "ETHUSDT", "15m", 2, lambda m: None)
+    hub.subscribe_klines("mainnet", "ETHUSDT", "1h", 1, lambda m: None, exclusive=True)
+    assert list(wrapper.sockets) == ["kline_ETHUSDT_1m"] and wrapper.stopped == []
+    assert sorted(hub.get_stats()["kline_feeds"]) == ["mainnet_ETHUSDT_15m", "mainnet_ETHUSDT_1h"]
+
+    hub.unsubscribe(1)
+    assert list(wrapper.sockets) == ["kline_ETHUSDT_1m"]
+    hub.unsubscribe(2)
+    assert wrapper.sockets == {} and wrapper.stopped == ["kline_ETHUSDT_1m"]
+
+
+def test_indicator_engines_are_shared_per_network_and_params():
+    hub, _ = _hub()
+    settings = {"ema_length": 200, "macd_fast": 12}
+    engine = hub.get_indicator_engine("mainnet", settings)
+    assert hub.get_indicator_engine("mainnet", dict(settings)) is engine
+    assert hub.get_indicator_engine("mainnet", {**settings, "ema_length": 50}) is not engine
+    assert hub.get_indicator_engine("testnet", settings) is not engine
+    assert hub.get_stats()["indicator_engines"] == 3
+
+
+def test_feed_subscribers_share_the_delivery_pool():
+    hub, wrapper = _hub()
+    received = []
+    hub.subscribe_klines("mainnet", "BTCUSDT", "1d", 0, received.append)
+    wrapper.sockets["kline_BTCUSDT_1d"]({"n": 0})
+    assert wait_for(lambda: len(received) == 1)
+    baseline = threading.active_count()
+
+    for user in range(1, 50):
+        hub.subscribe_klines("mainnet", "BTCUSDT", "1d", user, received.append)
+    wrapper.sockets["kline_BTCUSDT_1d"]({"n": 1})
+    assert wait_for(lambda: len(received) == 51)
+    assert threading.active_count() <= baseline
@@ -0,0 +1,71 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.indicators import kernels  # noqa: E402
+from backend.market_scan import MarketScanService  # noqa: E402
+from backend.predictive_modules import PredictiveEngine  # noqa: E402
+
+
+def _matrix(symbols=12, candles=400, seed=5):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, (symbols, candles)), axis=1)
+    return close + rng.random(close.shape), close - rng.random(close.shape), close, rng.random(close.shape) * 100
+
+
+def test_batch_scan_matches_single_symbol_analysis():
+    high, low, close, volume = _matrix()
+    symbols = [f"C{i}USDT" for i in range(len(close))]
+    engine = PredictiveEngine(indicator_backend="numpy")
+
+    table = engine.scan(symbols, high, low, close, volume)
+
+    assert [row["rank"] for row in table] == list(range(1, len(symbols) + 1))
+    assert [(-r["market_score"], -r["breakout_prob"], -r["rvol"]) for r in table] == \
+        sorted((-r["market_score"], -r["breakout_prob"], -r["rvol"]) for r in table)
+    rows = {row["symbol"]: row for row in table}
+    for i, symbol in enumerate(symbols):
+        df = pd.DataFrame({"high": high[i], "low": low[i], "close": close[i], "volume": volume[i]},
+                          index=pd.date_range("2024-01-01", periods=close.shape[1], freq="1min"))
+        df["RSI_14"] = kernels.rsi(close[i], 14)
+        df["EMA_200"] = kernels.ema(close[i], 200)
+        df["BBL_20_2.0"], _, df["BBU_20_2.0"] = kernels.bbands(close[i], 20, 2.0)
+        expected = engine.analyze(df, close[i, -1])
+        for key in ("rvol", "breakout_prob", "market_score", "divergences", "fear_greed"):
+            assert rows[symbol][key] == expected[key], (symbol, key)
+
+
+class _Client:
+    network = "testnet"
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def get_kline_rows(self, symbol, interval, limit=100):
+        return self.rows[symbol][-limit:]
+
+
+def _rows(n, end_ms, price):
+    return [(end_ms - (n - i) * 60_000, price, price + 1, price - 1, price + i * 0.01, 10.0, 0)
+            for i in range(n)]
+
+
+def test_load_matrix_aligns_and_drops_stale_or_short_symbols():
+    now = 1_700_000_000_000
+    client = _Client({
+        "AUSDT": _rows(300, now, 10.0),
+        "BUSDT": _rows(120, now, 20.0),           # Shorter history: matrix is cut to it
+        "CUSDT": _rows(300, now - 60_000, 30.0),  # Stale: last candle one minute behind
+        "DUSDT": _rows(30, now, 40.0),            # Too short
+    })
+    kept, high, low, close, volume = MarketScanService().load_matrix(
+        client, ["AUSDT", "BUSDT", "CUSDT", "DUSDT"], "1m")
+
+    assert kept == ["AUSDT", "BUSDT"]
+    assert close.shape == (2, 119)  # Closed candles only
+    assert close[0, -1] == client.rows["AUSDT"][-2][4]
+    assert high[1, 0] == 21.0 and low[1, 0] == 19.0 and volume[0, 0] == 10.0
@@ -0,0 +1,33 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', 'backend')))
+
+from utils.ohlcv_buffer import OHLCVRingBuffer  # noqa: E402
+
+
+def test_wraparound_keeps_latest_candles_contiguous():
+    buf = OHLCVRingBuffer(capacity=5)
+    for t in range(12):
+        buf.append(time=t, open=t, high=t + 1, low=t - 1, close=t, volume=1)
+        expected = list(range(max(0, t - 4), t + 1))
+        assert buf.column('time').tolist() == expected
+        assert np.shares_memory(buf.column('close'), buf._data)
+
+    assert len(buf) == 5
+    assert buf.column('close', 2).tolist() == [10.0, 11.0]
+
+
+def test_update_last_and_records():
+    buf = OHLCVRingBuffer(capacity=3)
+    buf.load(time=[1, 2, 3, 4], close=[1.0, 2.0, 3.0, 4.0])
+    buf.update_last(close=4.5, rsi=55.0)
+
+    records = buf.to_records()
+    assert [r['time'] for r in records] == [2, 3, 4]
+    assert records[-1]['close'] == 4.5 and records[-1]['rsi'] == 55.0
+    assert records[0]['rsi'] is None
+    assert buf.last_time == 4
@@ -0,0 +1,59 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', 'backend')))
+
+from backtester import Backtester, precompute_indicators  # noqa: E402
+from database import DatabaseManager  # noqa: E402
+from optimizer import Optimizer  # noqa: E402
+
+
+def _series(n=3000, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 100 + 5 * np.sin(np.arange(n) / 40) + np.cumsum(rng.normal(0, 0.2, n))
+    times = 1_700_000_000 + np.arange(n) * 60
+    return times, close + 0.3, close - 0.3, close, rng.uniform(5, 15, n)
+
+
+def test_walk_forward_pool_matches_sequential_backtests(tmp_path):
+    times, high, low, close, volume = _series()
+    base = {"enable_trend_filter": False, "enable_vol_filter": False, "enable_fast_ema": False}
+    candidates = Optimizer.grid({"buy_rsi": [25, 35, 45], "take_profit_pct": [0.5, 1.0],
+                                 "ema_length": [200, 50]})
+    windows = Optimizer.walk_forward_windows(len(close), train=1200, test=600)
+    assert windows == [((0, 1200), (1200, 1800)), ((600, 1800), (1800, 2400)),
+                       ((1200, 2400), (2400, 3000))]
+
+    db = DatabaseManager(str(tmp_path / "bot.db"))
+    pooled = Optimizer("rsi_rebound", base_settings=base, workers=2, db=db, user_id=7).run(
+        times, high, low, close, volume, candidates, windows=windows, symbol="TEST", interval="1m")
+    inline = Optimizer("rsi_rebound", base_settings=base, workers=1).run(
+        times, high, low, close, volume, candidates, windows=windows, symbol="TEST", interval="1m")
+
+    assert pooled["ranked"] == inline["ranked"]
+    assert pooled["walk_forward"] == inline["walk_forward"]
+
+    # Best train candidate of the last window, replayed directly
+    best = pooled["ranked"][2][0]
+    assert [r["rank"] for r in pooled["ranked"][2]] == list(range(1, len(candidates) + 1))
+    tester = Backtester("rsi_rebound", settings={**base, **best["params"]}, symbol="TEST")
+    arrays = precompute_indicators(high, low, close, volume, tester.settings)
+    window = tester.replay(times, close, arrays, 1200, 2400)
+    assert best["metrics"]["trades"] > 0
+    assert best["metrics"]["net_pnl"] == pytest.approx(window["net_pnl"])
+
+    test_rows = db.get_optimizer_results(pooled["run_id"], phase="test", user_id=7)
+    assert [r["window"] for r in test_rows] == [0, 1, 2]
+    assert test_rows[2]["params"] == best["params"]
+    train_rows = db.get_optimizer_results(pooled["run_id"], phase="train", limit=500)
+    assert len(train_rows) == len(candidates) * len(windows)
+    assert db.get_optimizer_results(pooled["run_id"], user_id=8) == []  # Someone else's run
+
+
+def test_workers_are_capped_at_the_core_count():
+    assert Optimizer(workers=10_000).workers == (os.cpu_count() or 1)
+    assert Optimizer(workers=0).workers == (os.cpu_count() or 1)
@@ -0,0 +1,80 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+pytest.importorskip("binance")
+
+from backend.portfolio import PortfolioEngine, SymbolBook, parse_symbols  # noqa: E402
+from backend.replay import ReplayHarness  # noqa: E402
+from backend.services.fake_exchange import FakeExchange, synthetic_klines  # noqa: E402
+
+SYMBOLS = ("BTCUSDT", "ETHUSDT", "SOLUSDT")
+SETTINGS = {"active_strategy": "rsi_rebound", "buy_rsi": 35, "sell_rsi": 65,
+            "enable_trend_filter": False, "enable_vol_filter": False, "enable_fast_ema": False,
+            "portfolio_symbols": ",".join(SYMBOLS), "max_open_positions": 2,
+            "max_portfolio_exposure_pct": 80, "trade_qty": 100}
+
+
+def test_parse_symbols_and_book_fills():
+    assert parse_symbols(" btcusdt,ETHUSDT,,BTCUSDT ") == ["BTCUSDT", "ETHUSDT"]
+
+    book = SymbolBook("ETHUSDT")
+    book.apply_fill("BUY", 1.0, 100.0)
+    book.apply_fill("BUY", 1.0, 90.0)
+    assert (book.accumulated_qty, book.entry_price, book.position_orders) == (2.0, 95.0, 2)
+    assert book.apply_fill("SELL", 1.0, 105.0) == pytest.approx(10.0)
+    assert book.apply_fill("SELL", 1.0, 105.0) == pytest.approx(10.0)
+    assert book.accumulated_qty == 0 and book.entry_price == 0 and not book.open_position
+
+
+def test_dca_step_respects_sniper_mode():
+    db = SimpleNamespace(get_all_state=lambda user_id: {}, save_state_deferred=lambda *a, **k: None)
+    bot = SimpleNamespace(db=db, user_id=1, dca_enabled=True, max_dca_orders=3, dca_step_pct=5.0,
+                          sniper_mode=False, enable_buying=True, enable_selling=True,
+                          _log=lambda *a, **k: None)
+    strategy = SimpleNamespace(get_required_indicators=lambda: [], check_sell_signal=lambda *a: False)
+    engine = PortfolioEngine(bot, ["ETHUSDT"])
+    engine.books["ETHUSDT"].apply_fill("BUY", 1.0, 100.0)
+
+    # 10% under the last buy: a DCA step, unless sniper mode (single entry) is on
+    assert engine._decide("ETHUSDT", strategy, {}, 90.0, {}) == "BUY"
+    bot.sniper_mode = True
+    assert engine._decide("ETHUSDT", strategy, {}, 90.0, {}) is None
+
+
+def test_portfolio_trades_every_symbol_within_limits():
+    exchange = FakeExchange(balances={"USDT": 1000.0}, commission_pct=0.1)
+    for seed, symbol in enumerate(SYMBOLS):
+        exchange.load_klines(symbol, "1m", synthetic_klines(1600, seed=seed + 3, start_price=50.0 * (seed + 1)))
+
+    with ReplayHarness(exchange, "BTCUSDT", "1m", settings=SETTINGS) as replay:
+        bot = replay.bot
+        assert bot.portfolio is not None and bot.portfolio.symbols == list(SYMBOLS)
+        assert all(bot.portfolio.status()["symbols"][i]["rsi"] > 0 for i in range(len(SYMBOLS)))
+
+        # Open positions (> 1 USDT of the asset) never exceed the portfolio limit
+        peak = 0
+        while replay.run(steps=20)["candles"]:
+            held = [s for s in SYMBOLS if exchange.balances.get(exchange.base_asset(s), 0.0) *
+                    float(exchange.get_symbol_ticker(s)["price"]) > 1.0]
+            peak = max(peak, len(held))
+
+        traded = {o["symbol"] for o in exchange.orders}
+        status = bot.portfolio.status()
+        books = {s: (b.accumulated_qty, b.entry_price) for s, b in bot.portfolio.books.items()}
+        state = bot.db.get_all_state(user_id=bot.user_id)
+        balances = {a: bot.balances.free(a) for a in exchange.balances}
+
+    assert len(traded) >= 2
+    assert peak <= 2 and status["open_positions"] <= 2
+    assert status["stats"]["passes"] > 0 and status["stats"]["orders"] == len(exchange.orders)
+    # Per-symbol books are persisted under the symbol-scoped state keys
+    for symbol, (qty, entry) in books.items():
+        assert float(state.get(f"accumulated_qty_{symbol}", 0.0)) == pytest.approx(qty)
+        assert float(state.get(f"entry_price_{symbol}", 0.0)) == pytest.approx(entry)
+    # The shared snapshot follows the exchange through the user stream
+    assert balances == pytest.approx(exchange.balances)
@@ -0,0 +1,84 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.services.refresh_pool import RefreshExecutor, get_alert_executor, get_refresh_executor  # noqa: E402
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_single_flight_per_key_with_one_coalesced_follow_up():
+    executor = RefreshExecutor(max_workers=4)
+    release = threading.Event()
+    runs, active, overlap = [], [], []
+    lock = threading.Lock()
+
+    def job(name):
+        def run():
+            with lock:
+                overlap.append(len(active))
+                active.append(name)
+            release.wait(5)
+            with lock:
+                active.remove(name)
+                runs.append(name)
+        return run
+
+    try:
+        assert executor.submit("a", job("first"))
+        assert wait_for(lambda: executor.get_metrics()["running"] == 1)
+        assert executor.submit("a", job("follow-up"))   # Queued behind the run in flight
+        assert not executor.submit("a", job("burst-1"))  # Coalesced into the queued follow-up
+        assert not executor.submit("a", job("burst-2"))
+        assert executor.is_busy("a")
+
+        # Other keys are not held back by the busy one
+        assert executor.submit("b", job("other"))
+        assert wait_for(lambda: executor.get_metrics()["running"] == 2)
+        assert executor.get_metrics()["pending_followups"] == 1
+
+        release.set()
+        assert wait_for(lambda: not executor.is_busy("a") and not executor.is_busy("b"))
+        assert sorted(runs) == ["first", "follow-up", "other"]
+        assert runs.index("first") < runs.index("follow-up")
+        assert max(overlap) <= 1  # Never two runs of "a" (only "a" and "b" side by side)
+
+        metrics = executor.get_metrics()
+        assert (metrics["submitted"], metrics["coalesced"], metrics["completed"]) == (5, 2, 3)
+        assert metrics["queue_depth"] == 0 and metrics["running"] == 0
+    finally:
+        release.set()
+        executor.shutdown(wait=True)
+
+
+def test_failed_job_releases_its_key():
+    executor = RefreshExecutor(max_workers=1)
+    done = threading.Event()
+
+    def boom():
+        raise RuntimeError("exchange down")
+
+    try:
+        executor.submit("k", boom)
+        assert wait_for(lambda: not executor.is_busy("k"))
+        assert executor.submit("k", done.set)
+        assert done.wait(5)
+        assert wait_for(lambda: executor.get_metrics()["completed"] == 1)
+        assert executor.get_metrics()["failed"] == 1
+    finally:
+        executor.shutdown(wait=True)
+
+
+def test_alert_scans_have_their_own_workers():
+    assert get_alert_executor() is get_alert_executor()
+    assert get_alert_executor() is not get_refresh_executor()
@@ -0,0 +1,43 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+pytest.importorskip("binance")
+
+from backend.replay import ReplayHarness  # noqa: E402
+from backend.services.fake_exchange import FakeExchange, synthetic_klines  # noqa: E402
+
+SETTINGS = {"active_strategy": "rsi_rebound", "buy_rsi": 35, "sell_rsi": 65,
+            "enable_trend_filter": False, "enable_vol_filter": False, "enable_fast_ema": False}
+
+
+def _replay():
+    exchange = FakeExchange(balances={"USDT": 1000.0}, commission_pct=0.1)
+    exchange.load_klines("BTCUSDT", "1m", synthetic_klines(1800, seed=7))
+    with ReplayHarness(exchange, "BTCUSDT", "1m", settings=SETTINGS) as replay:
+        report = replay.run()
+        trades = replay.bot.db.get_trades(user_id=replay.bot.user_id, limit=1000)
+        bot_balance = (replay.bot.balance, replay.bot.crypto_balance)
+    return exchange, report, trades, bot_balance
+
+
+def test_replay_drives_bot_deterministically():
+    exchange, report, trades, bot_balance = _replay()
+
+    assert report["candles"] == 799  # 1000 warm-up candles, then every close
+    assert report["orders"] > 0 and report["orders"] == len(trades)
+    # Bot state follows the exchange through the user stream / balance sync
+    assert bot_balance == (pytest.approx(exchange.balances["USDT"]),
+                           pytest.approx(exchange.balances.get("BTC", 0.0)))
+    assert all(t["latency"]["fill"] >= 0 and t["latency"]["total"] > 0 for t in trades)
+    assert report["latency"]["tick_to_order"]["count"] >= len(trades)
+    fills = [(o["side"], float(o["executedQty"])) for o in exchange.orders]
+    assert fills == [(t["type"].split()[0], t["qty"]) for t in reversed(trades)]
+
+    _, again, trades_again, _ = _replay()
+    assert [(t["type"], t["price"], t["qty"]) for t in trades_again] == \
+        [(t["type"], t["price"], t["qty"]) for t in trades]
+    assert again["equity"] == report["equity"]
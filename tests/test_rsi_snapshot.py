@@ -0,0 +1,59 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.indicators import calculate_rsi_from_df  # noqa: E402
+from backend.rsi_snapshot import calculate_rsi_snapshot  # noqa: E402
+
+SYMBOLS = ["BTCUSDT", "ETHUSDT", "SOLUSDT"]
+
+
+class _Client:
+    """get_kline_rows over random walks; counts calls and holds them until released."""
+
+    def __init__(self, network):
+        self.network = network
+        self.calls = Counter()
+        self.release = threading.Event()
+        self.rows = {}
+        for seed, symbol in enumerate(SYMBOLS):
+            rng = np.random.default_rng(seed)
+            close = 100 + np.cumsum(rng.normal(0, 0.5, 300))
+            self.rows[symbol] = [(i * 60_000, c, c + 1, c - 1, c, 10.0, i * 60_000 + 59_999)
+                                 for i, c in enumerate(close)]
+
+    def get_kline_rows(self, symbol, interval, limit=100):
+        self.calls[symbol] += 1
+        self.release.wait(5)
+        return self.rows[symbol][-limit:]
+
+
+def test_concurrent_snapshots_share_one_fetch_per_symbol_and_match_sequential_rsi():
+    client = _Client("rsi-snapshot-test")  # Own network: no hits from the global cache
+    results = []
+    callers = [threading.Thread(target=lambda: results.append(calculate_rsi_snapshot(SYMBOLS, client, "1m")))
+               for _ in range(6)]
+    for t in callers:
+        t.start()
+    deadline = time.time() + 5
+    while sum(client.calls.values()) < len(SYMBOLS) and time.time() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.05)  # Every caller is now waiting on the in-flight fetches
+    client.release.set()
+    for t in callers:
+        t.join(10)
+
+    assert client.calls == Counter({s: 1 for s in SYMBOLS})
+    assert len(results) == 6 and all(r == results[0] for r in results)
+
+    # Same values as the sequential pass: RSI over the full close series
+    expected = [{"symbol": s, "rsi": round(calculate_rsi_from_df(
+        pd.DataFrame({"close": [r[4] for r in client.rows[s]]}), backend="numpy"), 1)} for s in SYMBOLS]
+    assert results[0] == expected
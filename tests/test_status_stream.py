@@ -0,0 +1,105 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', 'backend')))
+
+from services.status_stream import StatusBroadcaster, StatusDiffer, encode  # noqa: E402
+from utils.ohlcv_buffer import OHLCVRingBuffer  # noqa: E402
+
+
+class FakeBot:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.history = OHLCVRingBuffer(capacity=5)
+        for t in range(3):
+            self.history.append(time=t * 60, open=1, high=2,
+                                low=0.5, close=1.5, volume=10)
+        self.trades = [{"time": "t0", "pnl": 1.0}]
+        self.trade_seq = 0
+        self.trades_version = 0
+        self.price = 1.5
+        self.rsi = 50.0
+        self.builds = 0
+
+    def _live_status(self):
+        self.builds += 1
+        return {"price": self.price, "rsi": self.rsi, "symbol": "BTCUSDT"}
+
+
+def test_snapshot_then_only_deltas():
+    bot = FakeBot()
+    differ = StatusDiffer(bot)
+
+    snap = differ.snapshot()
+    assert snap["type"] == "snapshot"
+    assert len(snap["data"]["history"]) == 3 and snap["data"]["trades"] == bot.trades
+    assert differ.delta() is None
+
+    # Live candle update + one indicator change
+    bot.history.update_last(close=1.7)
+    bot.price = 1.7
+    delta = differ.delta()
+    assert delta["fields"] == {"price": 1.7}
+    assert [c["time"] for c in delta["candles"]] == [120]
+    assert "history" not in delta and "trades" not in delta
+
+    # New candle and a new trade
+    bot.history.append(time=180, open=1.7, high=1.8,
+                       low=1.6, close=1.75, volume=3)
+    bot.trades.insert(0, {"time": "t1", "pnl": -0.5})
+    bot.trade_seq += 1
+    delta = differ.delta()
+    assert [c["time"] for c in delta["candles"]] == [120, 180]
+    assert delta["new_trades"] == [{"time": "t1", "pnl": -0.5}]
+    assert "fields" not in delta
+
+    # Symbol switch: history no longer contains our last candle -> full resend
+    bot.history.load(time=[1000, 1060], open=[5, 5], high=[6, 6],
+                     low=[4, 4], close=[5, 5.5], volume=[1, 1])
+    bot.trades = []
+    bot.trades_version += 1
+    delta = differ.delta()
+    assert [c["time"] for c in delta["history"]] == [1000, 1060]
+    assert delta["trades"] == []
+    json.loads(encode(delta))
+
+
+def test_broadcaster_builds_status_once_per_bot_and_tick():
+    bot = FakeBot()
+    bots = {1: bot}
+
+    async def scenario():
+        broadcaster = StatusBroadcaster(bots.get, interval=0.05)
+        first, second = broadcaster.subscribe(1), broadcaster.subscribe(1)
+        for queue in (first, second):
+            assert json.loads(await asyncio.wait_for(queue.get(), 2))["type"] == "snapshot"
+        assert bot.builds == 1  # One snapshot build served both connections
+
+        bot.price = 1.9
+        deltas = [json.loads(await asyncio.wait_for(q.get(), 2)) for q in (first, second)]
+        assert deltas[0] == deltas[1] == {"type": "delta", "fields": {"price": 1.9}}
+
+        # A late joiner gets a snapshot in step with the shared deltas
+        late = broadcaster.subscribe(1)
+        snap = json.loads(await asyncio.wait_for(late.get(), 2))
+        assert snap["type"] == "snapshot" and snap["data"]["price"] == 1.9
+        bot.rsi = 55.0
+        for queue in (first, second, late):
+            assert json.loads(await asyncio.wait_for(queue.get(), 2))["fields"] == {"rsi": 55.0}
+
+        ticks = broadcaster.get_stats()["ticks"]
+        assert bot.builds == ticks and broadcaster.get_stats()["connections"] == 3
+
+        # Bot removed: one error each; the producer stops with the last connection
+        del bots[1]
+        for queue in (first, second, late):
+            assert json.loads(await asyncio.wait_for(queue.get(), 2))["type"] == "error"
+            broadcaster.unsubscribe(1, queue)
+        await asyncio.sleep(0.15)
+        assert broadcaster.get_stats()["bots"] == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,83 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+pytest.importorskip("binance")
+
+from backend.bot_logic import BinanceBot  # noqa: E402
+
+DEBOUNCE_MS = 100
+
+
+def _worker(evaluate, fallback=BinanceBot.STRATEGY_FALLBACK_SECONDS):
+    """Strategy worker of a bare bot whose evaluation pass is `evaluate`."""
+    bot = BinanceBot.__new__(BinanceBot)
+    bot.monitor_active = True
+    bot.strategy_debounce_ms = DEBOUNCE_MS
+    bot.STRATEGY_FALLBACK_SECONDS = fallback
+    bot._strategy_event = threading.Event()
+    bot._last_strategy_eval = time.monotonic()
+    bot._evaluate_strategies = evaluate
+    threading.Thread(target=bot._strategy_worker, daemon=True).start()
+    return bot
+
+
+def test_tick_burst_yields_one_evaluation_per_debounce_window():
+    evals = []
+    bot = _worker(lambda: evals.append(time.monotonic()))
+    try:
+        started = time.monotonic()
+        while time.monotonic() - started < 0.35:  # ~70 ticks over 3.5 debounce windows
+            bot._request_strategy_eval()
+            time.sleep(0.005)
+        time.sleep(3 * DEBOUNCE_MS / 1000)
+    finally:
+        bot.monitor_active = False
+
+    gaps = [b - a for a, b in zip(evals, evals[1:])]
+    assert 3 <= len(evals) <= 5
+    assert min(gaps) >= DEBOUNCE_MS / 1000 * 0.95
+
+
+def test_tick_during_evaluation_triggers_exactly_one_more():
+    release = threading.Event()
+    evals = []
+
+    def evaluate():
+        evals.append(time.monotonic())
+        if len(evals) == 1:
+            release.wait(5)  # E.g. an order round trip
+
+    bot = _worker(evaluate)
+    try:
+        bot._request_strategy_eval()
+        deadline = time.time() + 5
+        while not evals and time.time() < deadline:
+            time.sleep(0.005)
+        for _ in range(10):  # Ticks arriving while the first pass runs
+            bot._request_strategy_eval()
+        release.set()
+        time.sleep(4 * DEBOUNCE_MS / 1000)
+    finally:
+        release.set()
+        bot.monitor_active = False
+
+    assert len(evals) == 2
+
+
+def test_stalled_streams_still_evaluate_on_the_fallback_timer():
+    evals = []
+    bot = _worker(lambda: evals.append(time.monotonic()), fallback=0.2)
+    started = time.monotonic()
+    try:
+        time.sleep(0.5)  # No events at all
+    finally:
+        bot.monitor_active = False
+
+    assert len(evals) == 2
+    assert evals[0] - started >= 0.2 * 0.95
@@ -0,0 +1,145 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', 'backend')))
+
+websockets = pytest.importorskip("websockets")
+
+from services.stream_manager import StreamManager, _Connection  # noqa: E402
+
+
+class FakeCombinedStreamServer:
+    """Local combined-stream endpoint: echoes one event per (un)subscribed stream."""
+
+    def __init__(self):
+        self.connections = 0
+        self.controls = []
+        self.loop = asyncio.new_event_loop()
+        self.port = None
+        ready = threading.Event()
+
+        async def handler(ws):
+            self.connections += 1
+            query = parse_qs(urlparse(ws.request.path).query)
+            streams = query.get("streams", [""])[0].split("/")
+            for stream in streams:
+                await ws.send(json.dumps({"stream": stream, "data": {"s": stream}}))
+            if self.connections == 1:
+                await ws.close()  # Force one reconnect
+                return
+            async for raw in ws:
+                msg = json.loads(raw)
+                self.controls.append(msg["method"])
+                await ws.send(json.dumps({"result": None, "id": msg["id"]}))
+                if msg["method"] == "SUBSCRIBE":
+                    for stream in msg["params"]:
+                        await ws.send(json.dumps({"stream": stream, "data": {"s": stream}}))
+
+        async def start():
+            server = await websockets.serve(handler, "127.0.0.1", 0)
+            self.port = server.sockets[0].getsockname()[1]
+            ready.set()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self.loop.run_until_complete(start())
+            self.loop.run_forever()
+
+        threading.Thread(target=run, daemon=True).start()
+        ready.wait(5)
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_multiplexing_dynamic_subscribe_and_reconnect(monkeypatch):
+    monkeypatch.setattr(_Connection, "BACKOFF_BASE", 0.01)
+    server = FakeCombinedStreamServer()
+    manager = StreamManager(
+        urls={"mainnet": f"ws://127.0.0.1:{server.port}/stream"})
+    received = []
+
+    try:
+        manager.subscribe("mainnet", "btcusdt@kline_1m", "a",
+                          lambda d: received.append(("a", d["s"])))
+        manager.subscribe("mainnet", "btcusdt@kline_1m", "b",
+                          lambda d: received.append(("b", d["s"])))
+        # First connection is dropped by the server; the manager reconnects
+        assert wait_for(lambda: server.connections >= 2)
+        assert wait_for(lambda: ("b", "btcusdt@kline_1m") in received)
+
+        manager.subscribe("mainnet", "ethusdt@aggTrade", "a",
+                          lambda d: received.append(("a", d["s"])))
+        assert wait_for(lambda: ("a", "ethusdt@aggTrade") in received)
+        assert server.controls == ["SUBSCRIBE"]
+
+        manager.unsubscribe("mainnet", "ethusdt@aggTrade", "a")
+        assert wait_for(lambda: server.controls == ["SUBSCRIBE", "UNSUBSCRIBE"])
+
+        stats = manager.get_stats()["mainnet"]
+        assert stats["streams"] == 1 and stats["owners"] == 2
+        assert stats["reconnects"] >= 1
+    finally:
+        manager.close()
+
+
+def test_slow_callback_does_not_delay_other_streams():
+    server = FakeCombinedStreamServer()
+    manager = StreamManager(
+        urls={"mainnet": f"ws://127.0.0.1:{server.port}/stream"})
+    release = threading.Event()
+    slow, fast = [], []
+
+    def blocking(d):
+        release.wait(10)  # E.g. a handler waiting on a bot lock held across an order
+        slow.append(d["s"])
+
+    try:
+        manager.subscribe("mainnet", "btcusdt@kline_1m", "slow", blocking)
+        manager.subscribe("mainnet", "ethusdt@kline_1m", "fast", lambda d: fast.append(d["s"]))
+        # Delivered while the other owner's worker is still blocked
+        assert wait_for(lambda: "ethusdt@kline_1m" in fast)
+        assert slow == []
+
+        release.set()
+        assert wait_for(lambda: "btcusdt@kline_1m" in slow)
+        assert wait_for(lambda: manager.get_stats()["mainnet"]["pending"] == 0)
+    finally:
+        release.set()
+        manager.close()
+
+
+def test_thread_count_stays_flat_as_subscriptions_grow():
+    server = FakeCombinedStreamServer()
+    manager = StreamManager(
+        urls={"mainnet": f"ws://127.0.0.1:{server.port}/stream"})
+    received = set()
+    try:
+        manager.subscribe("mainnet", "btcusdt@kline_1m", "owner-0", lambda d: received.add(d["s"]))
+        assert wait_for(lambda: "btcusdt@kline_1m" in received)
+        assert wait_for(lambda: manager.get_stats()["mainnet"]["reconnects"] >= 1)
+        baseline = threading.active_count()
+
+        # 60 more owners over 30 streams: one mailbox each, no thread each
+        for i in range(60):
+            stream = f"sym{i % 30}usdt@kline_1m"
+            manager.subscribe("mainnet", stream, f"owner-{i + 1}", lambda d: received.add(d["s"]))
+        assert wait_for(lambda: len(received) == 31)
+        assert threading.active_count() <= baseline  # Unrelated threads may exit meanwhile
+        assert manager.get_stats()["mainnet"]["owners"] == 61
+    finally:
+        manager.close()
@@ -0,0 +1,150 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', 'backend')))
+
+from indicators import calculate_indicators  # noqa: E402
+from streaming_indicators import StreamingIndicatorEngine, StreamingRSI  # noqa: E402
+
+SETTINGS = {"ema_length": 200, "fast_ema_len": 7,
+            "macd_fast": 12, "macd_slow": 26, "macd_signal": 9}
+
+
+def create_klines(n=600):
+    """Random-walk OHLCV indexed by open time, like get_historical_klines."""
+    rng = np.random.default_rng(7)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, n))
+    open_ = np.r_[close[0], close[:-1]]
+    index = pd.to_datetime(np.arange(n) * 60_000 + 1_700_000_000_000, unit='ms')
+    return pd.DataFrame({
+        "open": open_,
+        "high": np.maximum(open_, close) + rng.random(n),
+        "low": np.minimum(open_, close) - rng.random(n),
+        "close": close,
+        "volume": rng.random(n) * 100 + 1,
+    }, index=index)
+
+
+def as_candle(df, i):
+    row = df.iloc[i]
+    return {"time": int(df.index[i].timestamp()), "high": row['high'], "low": row['low'],
+            "close": row['close'], "volume": row['volume']}
+
+
+def pandas_reference(df, settings=SETTINGS):
+    """Last values of RSI/EMA/MACD/BB/ATR/ADX from their pandas definitions."""
+    h, l, c = df['high'], df['low'], df['close']
+
+    def rma(x):
+        return x.ewm(alpha=1 / 14, adjust=True, min_periods=14).mean()
+
+    def ema(x, length):
+        x = x.dropna()
+        ref = x.copy()
+        ref.iloc[:length - 1] = np.nan
+        ref.iloc[length - 1] = x.iloc[:length].mean()
+        return ref.ewm(span=length, adjust=False).mean()
+
+    diff = c.diff()
+    gain, loss = rma(diff.clip(lower=0)), rma((-diff).clip(lower=0))
+    macd = ema(c, settings["macd_fast"]) - ema(c, settings["macd_slow"])
+    signal = ema(macd, settings["macd_signal"])
+    prev = c.shift()
+    tr = pd.concat([h - l, (h - prev).abs(), (prev - l).abs()], axis=1).max(axis=1, skipna=False)
+    atr = rma(tr)
+    up, dn = h.diff(), -l.diff()
+    dmp = 100 * rma(up.where((up > dn) & (up > 0), 0.0).mask(up.isna())) / atr
+    dmn = 100 * rma(dn.where((dn > up) & (dn > 0), 0.0).mask(dn.isna())) / atr
+    mid, std = c.rolling(20).mean(), c.rolling(20).std(ddof=0)
+    return {
+        "rsi": (100 * gain / (gain + loss)).iloc[-1],
+        "trend_ema": ema(c, settings["ema_length"]).iloc[-1],
+        "fast_ema": ema(c, settings["fast_ema_len"]).iloc[-1],
+        "macd": macd.iloc[-1], "macd_signal": signal.iloc[-1], "macd_hist": (macd - signal).iloc[-1],
+        "bb_middle": mid.iloc[-1], "bb_upper": (mid + 2 * std).iloc[-1], "bb_lower": (mid - 2 * std).iloc[-1],
+        "atr": atr.iloc[-1], "adx": rma(100 * (dmp - dmn).abs() / (dmp + dmn)).iloc[-1],
+    }
+
+
+def test_streaming_matches_batch_and_pandas_definitions():
+    df = create_klines(400)
+    engine = StreamingIndicatorEngine()
+    engine.seed("BTCUSDT", "1m", df.iloc[:250], SETTINGS)
+
+    for end in range(250, len(df) - 1):
+        committed = engine.update("BTCUSDT", "1m", as_candle(df, end))
+        live = engine.peek("BTCUSDT", "1m", as_candle(df, end + 1))  # Unclosed candle on top
+        if end % 10:
+            continue
+        for result, window in ((committed, df.iloc[:end + 1]), (live, df.iloc[:end + 2])):
+            batch = calculate_indicators(window, {**SETTINGS, "indicator_backend": "numpy"})
+            assert set(result) == set(batch)
+            for key, val in batch.items():
+                assert np.isclose(result[key], val, rtol=1e-9), (end, key)
+            for key, val in pandas_reference(window).items():
+                assert np.isclose(result[key], val, rtol=1e-9), (end, key)
+
+
+def test_incremental_updates_match_full_seed():
+    df = create_klines()
+
+    full = StreamingIndicatorEngine()
+    expected = full.seed("BTCUSDT", "1m", df, SETTINGS)
+
+    streaming = StreamingIndicatorEngine()
+    streaming.seed("BTCUSDT", "1m", df.iloc[:300], SETTINGS)
+    for i in range(300, len(df)):
+        result = streaming.update("BTCUSDT", "1m", as_candle(df, i))
+
+    assert set(result) == set(expected)
+    for key, val in expected.items():
+        assert np.isclose(result[key], val, rtol=1e-10), key
+
+
+def test_peek_does_not_mutate_and_duplicates_are_ignored():
+    df = create_klines()
+    engine = StreamingIndicatorEngine()
+    engine.seed("BTCUSDT", "1m", df.iloc[:-1], SETTINGS)
+    before = engine.peek("BTCUSDT", "1m")
+
+    preview = engine.peek("BTCUSDT", "1m", as_candle(df, -1))
+    assert engine.peek("BTCUSDT", "1m") == before
+
+    committed = engine.update("BTCUSDT", "1m", as_candle(df, -1))
+    assert committed == preview
+    assert engine.update("BTCUSDT", "1m", as_candle(df, -1)) == committed
+
+
+def test_parameter_change_requires_reseed():
+    engine = StreamingIndicatorEngine()
+    engine.seed("BTCUSDT", "1m", create_klines(), SETTINGS)
+    assert engine.is_ready("BTCUSDT", "1m", SETTINGS)
+    assert not engine.is_ready("BTCUSDT", "1m", {**SETTINGS, "ema_length": 50})
+    assert not engine.is_ready("BTCUSDT", "5m", SETTINGS)
+
+
+def test_streaming_rsi_advances_only_new_candles():
+    df = create_klines(300)
+    closes = df['close']
+    # pandas_ta rsi: RMA = ewm(alpha=1/14, adjust=True, min_periods=14)
+    diff = closes.diff()
+    gain = diff.clip(lower=0).ewm(alpha=1 / 14, min_periods=14).mean()
+    loss = (-diff).clip(lower=0).ewm(alpha=1 / 14, min_periods=14).mean()
+    expected = (100 * gain / (gain + loss)).to_numpy()
+
+    times = [int(t.timestamp()) for t in df.index]
+    rows = list(zip(times, closes))
+    rsi = StreamingRSI()
+    assert rsi.advance(rows[:250]) == 250
+    # Overlapping window: only the 40 newer closed candles are folded in
+    assert rsi.advance(rows[100:290]) == 40
+    assert np.isclose(rsi.value(), expected[289])
+    # Live candle preview does not mutate the state
+    assert np.isclose(rsi.value(live_close=closes.iloc[290]), expected[290])
+    assert rsi.last_time == times[289]
+    # A window that skipped our last candle triggers a rebuild
+    assert rsi.advance(rows[295:]) == 5
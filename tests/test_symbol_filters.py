@@ -0,0 +1,52 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', 'backend')))
+
+from services.symbol_filters import SymbolFilterTable, SymbolFilters  # noqa: E402
+
+BTC = {"symbol": "BTCUSDT", "baseAsset": "BTC", "quoteAsset": "USDT", "filters": [
+    {"filterType": "PRICE_FILTER", "minPrice": "0.01", "maxPrice": "1000000", "tickSize": "0.01000000"},
+    {"filterType": "LOT_SIZE", "minQty": "0.00001000", "maxQty": "9000.00000000", "stepSize": "0.00001000"},
+    {"filterType": "NOTIONAL", "minNotional": "5.00000000"},
+]}
+
+
+class ExchangeInfoClient:
+    def __init__(self):
+        self.symbol_info_calls = 0
+
+    def get_exchange_info(self):
+        return {"symbols": [BTC, {"symbol": "BROKEN", "filters": [{"filterType": "LOT_SIZE"}]}]}
+
+    def get_symbol_info(self, symbol):
+        self.symbol_info_calls += 1
+        if symbol != "SOLUSDT":
+            return None
+        return {"symbol": "SOLUSDT", "filters": [
+            {"filterType": "MARKET_LOT_SIZE", "minQty": "0.001", "maxQty": "100", "stepSize": "0.001"},
+            {"filterType": "MIN_NOTIONAL", "minNotional": "10"}]}
+
+
+def test_filters_parse_once_and_round_with_arithmetic():
+    f = SymbolFilters.from_info(BTC)
+    assert (f.step_size, f.min_qty, f.max_qty, f.min_notional) == (0.00001, 0.00001, 9000.0, 5.0)
+    assert (f.qty_precision, f.price_precision) == (5, 2)
+    assert f.floor_qty(0.123456789) == 0.12345
+    assert f.ceil_qty(0.123451) == 0.12346
+    assert f.floor_price(0.29) == 0.29  # 0.29 * 100 is 28.999999999999996 in binary
+
+
+def test_table_bulk_load_and_single_symbol_fallback():
+    client = ExchangeInfoClient()
+    table = SymbolFilterTable("test")
+    assert table.load(client) == 1  # Malformed entries are skipped
+    assert table.get("BTCUSDT", client).base_asset == "BTC"
+    assert client.symbol_info_calls == 0
+
+    sol = table.get("SOLUSDT", client)
+    assert (sol.step_size, sol.min_notional, sol.tick_size) == (0.001, 10.0, None)
+    assert table.get("SOLUSDT", client) is sol
+    assert client.symbol_info_calls == 1
+    assert table.get("NOPE", client) is None
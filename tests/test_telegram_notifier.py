@@ -0,0 +1,88 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', 'backend')))
+
+from telegram_notifier import TelegramDispatcher, TelegramNotifier  # noqa: E402
+
+
+class _Response:
+    def __init__(self, status_code=200, payload=None):
+        self.status_code = status_code
+        self._payload = payload or {"ok": True}
+        self.text = str(self._payload)
+
+    def json(self):
+        return self._payload
+
+
+class _Session:
+    """Records sendMessage payloads; the first post blocks until released."""
+
+    def __init__(self, responses=()):
+        self.posts = []
+        self.release = threading.Event()
+        self.responses = list(responses)
+
+    def post(self, url, json=None, timeout=None):
+        self.release.wait(5)
+        self.posts.append(json)
+        return self.responses.pop(0) if self.responses else _Response()
+
+
+def _dispatcher(session):
+    dispatcher = TelegramDispatcher(session=session)
+    dispatcher.PER_CHAT_INTERVAL = 0.05
+    dispatcher.RETRY_DELAY = 0.01
+    return dispatcher
+
+
+def test_send_message_enqueues_without_blocking_and_coalesces_bursts():
+    session = _Session()
+    notifier = TelegramNotifier("token", "1,2", dispatcher=_dispatcher(session))
+
+    started = time.perf_counter()
+    assert notifier.send_message("first")
+    for i in range(3):
+        assert notifier.send_message(f"burst {i}")
+    assert time.perf_counter() - started < 0.5  # The session is still blocked
+
+    session.release.set()
+    assert notifier.dispatcher.flush(5)
+
+    for chat in ("1", "2"):
+        texts = [p["text"] for p in session.posts if p["chat_id"] == chat]
+        # The first message may or may not have been picked up before the burst
+        assert sum(t.count("burst") for t in texts) == 3
+        assert "first" in texts[0]
+        assert len(texts) <= 2
+        assert texts[-1].startswith("🗂 *3 notificaciones*") or len(texts) == 1
+    stats = notifier.dispatcher.get_stats()
+    assert stats["sent"] == 8 and stats["pending"] == 0
+
+
+def test_rate_limit_retry_after_is_honoured_and_errors_give_up():
+    session = _Session([_Response(429, {"ok": False, "parameters": {"retry_after": 0.05}}),
+                        _Response(200), _Response(500), _Response(500), _Response(500)])
+    session.release.set()
+    dispatcher = _dispatcher(session)
+
+    dispatcher.enqueue("token", "1", "hello")
+    assert dispatcher.flush(5)
+    assert [p["text"] for p in session.posts] == ["hello", "hello"]
+
+    dispatcher.enqueue("token", "1", "broken")
+    assert dispatcher.flush(5)
+    stats = dispatcher.get_stats()
+    assert stats["rate_limited"] == 1 and stats["sent"] == 1 and stats["failed"] == 1
+    assert len(session.posts) == 5
+
+
+def test_disabled_or_unconfigured_notifier_does_not_queue():
+    dispatcher = _dispatcher(_Session())
+    assert not TelegramNotifier("token", "1", enabled=False, dispatcher=dispatcher).send_message("x")
+    assert not TelegramNotifier(None, "1", dispatcher=dispatcher).send_message("x")
+    assert dispatcher.get_stats()["queued"] == 0
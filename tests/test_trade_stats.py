@@ -0,0 +1,56 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', 'backend')))
+
+from database import DatabaseManager  # noqa: E402
+from services.trade_stats import TradeStatsAccumulator  # noqa: E402
+
+
+def trade(time, side, strategy, pnl, symbol="BTCUSDT"):
+    return {"time": f"2024-01-01 {time}", "type": f"{side} ({strategy})", "price": 100.0,
+            "qty": 1.0, "symbol": symbol, "pnl": pnl, "rsi": 30.0, "commission": 0.0,
+            "total": 100.0}
+
+
+def test_incremental_stats_match_sql_rebuild(tmp_path):
+    db = DatabaseManager(str(tmp_path / "trades.db"))
+    db.create_user("alice", "key", "secret")
+    trades = [
+        trade("10:00:00", "BUY", "RSI Rebound-BUY", 0.0),
+        trade("10:10:00", "BUY", "RSI Rebound-BUY", 0.0),  # DCA, same holding
+        trade("10:30:00", "SELL", "RSI Rebound-SELL", 6.0),
+        trade("11:00:00", "BUY", "Smart Scalper-BUY", 0.0, symbol="ETHUSDT"),
+        trade("11:20:00", "SELL", "Smart Scalper-SELL", -4.0, symbol="ETHUSDT"),
+        trade("12:00:00", "BUY", "MANUAL", 0.0),
+        trade("12:10:00", "SELL", "MANUAL", -1.0),
+        trade("13:00:00", "BUY", "RSI Rebound-BUY", 0.0),  # Still open
+    ]
+    live = TradeStatsAccumulator()
+    for t in trades:
+        db.save_trade(t, user_id=1)
+        live.add(t)
+
+    snap = live.snapshot()
+    assert (snap["wins"], snap["losses"], snap["net_pnl"]) == (1, 2, 1.0)
+    assert snap["profit_factor"] == 1.2
+    assert snap["max_drawdown"] == 5.0
+    assert snap["avg_hold_minutes"] == 20.0  # (30 + 20 + 10) / 3
+    assert snap["by_strategy"]["RSI Rebound"]["net_pnl"] == 6.0
+    assert snap["by_strategy"]["Smart Scalper"]["losses"] == 1
+
+    rebuilt = TradeStatsAccumulator()
+    rebuilt.load_aggregates(db.get_trade_aggregates(user_id=1))
+    assert rebuilt.snapshot() == snap
+    assert set(rebuilt.open_since) == {"BTCUSDT"}
+
+    # Both continue identically from here
+    closing = trade("13:40:00", "SELL", "RSI Rebound-SELL", 2.0)
+    live.add(closing)
+    rebuilt.add(closing)
+    assert rebuilt.snapshot() == live.snapshot()
+
+    page = db.get_trades(user_id=1, limit=3, offset=2)
+    assert [t["time"][-8:] for t in page] == ["12:00:00", "11:20:00", "11:00:00"]
+    assert db.count_trades(user_id=1) == len(trades)